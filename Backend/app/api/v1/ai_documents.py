@@ -3,7 +3,34 @@
 """
 AI Documents API Router
 FastAPI endpoints for AI document generation
-TenderZen v3.6 - AI Features
+TenderZen v3.10 - AI Features
+
+WIJZIGINGEN v3.10:
+- generate-document(/stream): pre-flight (claude_preflight) telt de input
+  en kiest max_tokens uit de ai_generatie-historie (minimaal 8192; stream
+  tot het modelplafond). Past de input niet in de context → 413 vóór de call
+
+WIJZIGINGEN v3.9:
+- POST /tenders/{tender_id}/generate-document/stream — zelfde generatie als
+  SSE stream: tekst komt binnen terwijl Claude schrijft i.p.v. na de
+  volledige 8192-token response. Record vooraf aangemaakt ('generating'),
+  tussenstand elke GENERATIE_OPSLAAN_SECONDEN, eindresultaat 'completed'
+- GET /documents/{document_id}/stream — hervatten na een verbroken
+  verbinding (Last-Event-ID / ?vanaf=); de generatie zelf loopt door
+- Voorbereiding (tender, prompt, brondocumenten) in _bereid_generatie_voor
+
+WIJZIGINGEN v3.8:
+- Prompt caching: brondocumenten staan vóór de instructie en krijgen een
+  cache_control breakpoint (met_cache_breakpoint). generate-document
+  voor meerdere templates van dezelfde tender, en extract-planning /
+  extract-checklist na elkaar, betalen de documenten maar één keer volledig
+- generate-document: tekst-extractie (Word/Excel/grote PDF) als eigen blok
+  in de gedeelde prefix i.p.v. in de template-prompt; {{documenten_inhoud}}
+  verwijst naar dat blok. Documenten in vaste volgorde (created_at, id)
+
+WIJZIGINGEN v3.7:
+- Schrijfacties op planning_taken / checklist_items invalideren de
+  agenda week-cache (invalidate_agenda_bureau)
 
 WIJZIGINGEN v3.6 (2026-03-18):
 - PATCH  /tenders/{tender_id}/milestones/{milestone_id}  — datum, tijd, status, verantwoordelijke
@@ -29,11 +56,14 @@ from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Q
 from supabase import Client
 from app.services.ai_documents.ai_document_service import AIDocumentService
 from app.services.tender_service import TenderService
-from app.core.database import get_supabase_async
+from app.services.agenda_cache import invalidate_agenda_bureau
+from app.core.database import get_supabase_async, get_async_supabase
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional, List
+import asyncio
 import os
+import time
 import uuid
 import base64
 import json
@@ -43,7 +73,11 @@ from app.config import settings
 from fastapi.responses import StreamingResponse
 import io
 from app.utils.markdown_to_docx import convert_markdown_to_docx
-from app.services.anthropic_service import call_claude
+from app.services.anthropic_service import acall_claude, astream_claude, met_cache_breakpoint
+from app.services.claude_preflight import plan_call
+from app.services.generatie_stream import (
+    GeneratieStream, SSE_PING, STREAM_RETRY_MS, sse_event, start_generatie, zoek_generatie,
+)
 
 
 MAX_PDF_DIRECT_SIZE = 20 * 1024 * 1024
@@ -923,129 +957,201 @@ class GenerateDocumentRequest(BaseModel):
     brondocument_ids: Optional[List[str]] = None
 
 
-@router.post("/tenders/{tender_id}/generate-document")
-async def generate_document_for_tender(
-    tender_id: str,
-    body: GenerateDocumentRequest,
-    request: Request,
-    db: Client = Depends(get_supabase_async)
-):
-    print(f"🤖 Genereer: tender={tender_id}, template={body.template_key}, model={body.model}")
-    try:
-        tender_result = db.table('tenders').select('*').eq('id', tender_id).single().execute()
-        if not tender_result.data:
-            raise HTTPException(status_code=404, detail="Tender niet gevonden")
-        tender = tender_result.data
-        tenderbureau_id = tender.get('tenderbureau_id')
+GENERATIE_MAX_TOKENS = 8192             # ondergrens; pre-flight verhoogt op basis van historie
+GENERATIE_OPSLAAN_SECONDEN = 5.0      # stream: tussenstand naar ai_documents
+GENERATIE_STIL_MAX_SECONDEN = 120.0   # hervatten uit DB: zo lang geen groei → onderbroken
 
-        prompts_result = db.table('ai_prompts') \
-            .select('*') \
-            .eq('template_key', body.template_key) \
-            .eq('status', 'active') \
-            .execute()
 
-        if not prompts_result.data:
-            raise HTTPException(status_code=404, detail=f"Geen actieve prompt voor '{body.template_key}'")
+def _bereid_generatie_voor(db: Client, tender_id: str, body: GenerateDocumentRequest) -> dict:
+    """
+    Tender, actieve prompt en brondocumenten ophalen en de Claude-input
+    opbouwen. Gedeeld door generate-document en generate-document/stream.
+    """
+    tender_result = db.table('tenders').select('*').eq('id', tender_id).single().execute()
+    if not tender_result.data:
+        raise HTTPException(status_code=404, detail="Tender niet gevonden")
+    tender = tender_result.data
+    tenderbureau_id = tender.get('tenderbureau_id')
 
-        prompts = prompts_result.data
-        prompt_record = (
-            next((p for p in prompts if p.get('tenderbureau_id') is None), None)
-            or prompts[0]
-        )
-        if not prompt_record:
-            raise HTTPException(status_code=404, detail="Geen bruikbare prompt gevonden")
+    prompts_result = db.table('ai_prompts') \
+        .select('*') \
+        .eq('template_key', body.template_key) \
+        .eq('status', 'active') \
+        .execute()
 
-        docs_query = db.table('tender_documents') \
-            .select('*') \
-            .eq('tender_id', tender_id) \
-            .eq('is_deleted', False)
-        if body.brondocument_ids:
-            docs_query = docs_query.in_('id', body.brondocument_ids)
-        docs_result = docs_query.execute()
-        documents = docs_result.data or []
+    if not prompts_result.data:
+        raise HTTPException(status_code=404, detail=f"Geen actieve prompt voor '{body.template_key}'")
 
-        pdf_content_blocks = []
-        fallback_teksten = []
-        doc_namen_lijst_parts = []
+    prompts = prompts_result.data
+    prompt_record = (
+        next((p for p in prompts if p.get('tenderbureau_id') is None), None)
+        or prompts[0]
+    )
+    if not prompt_record:
+        raise HTTPException(status_code=404, detail="Geen bruikbare prompt gevonden")
 
-        for doc in documents:
-            storage_path = doc.get('storage_path')
-            file_type = doc.get('file_type', '').lower()
-            file_size = doc.get('file_size', 0) or 0
-            original_name = doc.get('original_file_name') or doc.get('file_name', 'Document')
-            naam_lower = original_name.lower()
-            doc_namen_lijst_parts.append(f"- {original_name}")
+    docs_query = db.table('tender_documents') \
+        .select('*') \
+        .eq('tender_id', tender_id) \
+        .eq('is_deleted', False)
+    if body.brondocument_ids:
+        docs_query = docs_query.in_('id', body.brondocument_ids)
+    # Vaste volgorde: identieke document-prefix → prompt cache hit
+    docs_result = docs_query.order('created_at').order('id').execute()
+    documents = docs_result.data or []
+
+    pdf_content_blocks = []
+    fallback_teksten = []
+    doc_namen_lijst_parts = []
+
+    for doc in documents:
+        storage_path = doc.get('storage_path')
+        file_type = doc.get('file_type', '').lower()
+        file_size = doc.get('file_size', 0) or 0
+        original_name = doc.get('original_file_name') or doc.get('file_name', 'Document')
+        naam_lower = original_name.lower()
+        doc_namen_lijst_parts.append(f"- {original_name}")
+
+        if not storage_path:
+            continue
 
-            if not storage_path:
-                continue
+        file_bytes = fetch_document_from_storage(db, storage_path)
+        if not file_bytes:
+            continue
 
-            file_bytes = fetch_document_from_storage(db, storage_path)
-            if not file_bytes:
-                continue
+        is_pdf = 'pdf' in file_type or naam_lower.endswith('.pdf')
+        is_word = 'wordprocessingml' in file_type or 'msword' in file_type \
+                  or naam_lower.endswith('.docx') or naam_lower.endswith('.doc')
+        is_excel = 'spreadsheetml' in file_type or 'excel' in file_type \
+                   or naam_lower.endswith('.xlsx') or naam_lower.endswith('.xls')
+        is_groot = file_size > MAX_PDF_DIRECT_SIZE
+
+        if is_pdf and not is_groot:
+            pdf_content_blocks.append(prepare_pdf_for_claude(file_bytes, original_name))
+        elif is_pdf and is_groot:
+            tekst = extract_pdf_text_fallback(file_bytes, max_chars=60000)
+            fallback_teksten.append(f"=== {original_name} (PDF — tekst-extractie) ===\n{tekst or '(geen tekst)'}\n===")
+        elif is_word:
+            tekst = extract_word_text(file_bytes, max_chars=60000)
+            fallback_teksten.append(f"=== {original_name} (Word document) ===\n{tekst or '(geen tekst)'}\n===")
+        elif is_excel:
+            tekst = extract_excel_text(file_bytes, max_chars=40000)
+            fallback_teksten.append(f"=== {original_name} (Excel werkmap) ===\n{tekst or '(geen data)'}\n===")
+        else:
+            fallback_teksten.append(f"=== {original_name} ===\n(Bestandstype niet ondersteund)\n===")
+
+    doc_namen_lijst = '\n'.join(doc_namen_lijst_parts) or '(Nog geen documenten geüpload)'
+
+    # Documenten (PDF's + tekst-extracties) vormen de gedeelde prefix voor
+    # alle templates van deze tender; de template-prompt komt erna
+    document_blokken = list(pdf_content_blocks)
+    if fallback_teksten:
+        document_blokken.append({"type": "text", "text": '\n\n'.join(fallback_teksten)})
+        fallback_tekst_blok = '(De tekst van de niet-PDF documenten staat hierboven, vóór deze instructie.)'
+    else:
+        fallback_tekst_blok = ''
+
+    variables = {
+        'tender_naam': tender.get('naam', ''),
+        'tender_nummer': tender.get('tender_nummer', ''),
+        'opdrachtgever': tender.get('opdrachtgever', ''),
+        'aanbestedende_dienst': tender.get('aanbestedende_dienst') or tender.get('opdrachtgever', ''),
+        'locatie': tender.get('locatie', 'Niet opgegeven'),
+        'tender_waarde': str(tender.get('tender_waarde', 'Niet opgegeven')),
+        'deadline': str(tender.get('deadline_indiening', 'Niet opgegeven')),
+        'omschrijving': tender.get('omschrijving', ''),
+        'documenten_lijst': doc_namen_lijst,
+        'aantal_documenten': str(len(documents)),
+        'documenten_inhoud': fallback_tekst_blok,
+    }
 
-            is_pdf = 'pdf' in file_type or naam_lower.endswith('.pdf')
-            is_word = 'wordprocessingml' in file_type or 'msword' in file_type \
-                      or naam_lower.endswith('.docx') or naam_lower.endswith('.doc')
-            is_excel = 'spreadsheetml' in file_type or 'excel' in file_type \
-                       or naam_lower.endswith('.xlsx') or naam_lower.endswith('.xls')
-            is_groot = file_size > MAX_PDF_DIRECT_SIZE
-
-            if is_pdf and not is_groot:
-                pdf_content_blocks.append(prepare_pdf_for_claude(file_bytes, original_name))
-            elif is_pdf and is_groot:
-                tekst = extract_pdf_text_fallback(file_bytes, max_chars=60000)
-                fallback_teksten.append(f"=== {original_name} (PDF — tekst-extractie) ===\n{tekst or '(geen tekst)'}\n===")
-            elif is_word:
-                tekst = extract_word_text(file_bytes, max_chars=60000)
-                fallback_teksten.append(f"=== {original_name} (Word document) ===\n{tekst or '(geen tekst)'}\n===")
-            elif is_excel:
-                tekst = extract_excel_text(file_bytes, max_chars=40000)
-                fallback_teksten.append(f"=== {original_name} (Excel werkmap) ===\n{tekst or '(geen data)'}\n===")
-            else:
-                fallback_teksten.append(f"=== {original_name} ===\n(Bestandstype niet ondersteund)\n===")
+    prompt_content = prompt_record.get('prompt_content', '')
+    for key, value in variables.items():
+        prompt_content = prompt_content.replace(f'{{{{{key}}}}}', str(value))
+
+    model_map = {
+        "haiku": "claude-haiku-4-5-20251001",
+        "sonnet": "claude-sonnet-4-6",
+        "opus": "claude-opus-4-6",
+        "claude-haiku-4-5-20251001": "claude-haiku-4-5-20251001",
+        "claude-sonnet-4-6": "claude-sonnet-4-6",
+        "claude-opus-4-6": "claude-opus-4-6",
+    }
+    selected_model = model_map.get(body.model, "claude-sonnet-4-6")
 
-        doc_namen_lijst = '\n'.join(doc_namen_lijst_parts) or '(Nog geen documenten geüpload)'
-        fallback_tekst_blok = '\n\n'.join(fallback_teksten) if fallback_teksten else ''
+    message_content = met_cache_breakpoint(document_blokken)
+    message_content.append({"type": "text", "text": prompt_content})
 
-        variables = {
-            'tender_naam': tender.get('naam', ''),
-            'tender_nummer': tender.get('tender_nummer', ''),
-            'opdrachtgever': tender.get('opdrachtgever', ''),
-            'aanbestedende_dienst': tender.get('aanbestedende_dienst') or tender.get('opdrachtgever', ''),
-            'locatie': tender.get('locatie', 'Niet opgegeven'),
-            'tender_waarde': str(tender.get('tender_waarde', 'Niet opgegeven')),
-            'deadline': str(tender.get('deadline_indiening', 'Niet opgegeven')),
-            'omschrijving': tender.get('omschrijving', ''),
-            'documenten_lijst': doc_namen_lijst,
-            'aantal_documenten': str(len(documents)),
-            'documenten_inhoud': fallback_tekst_blok,
-        }
+    return {
+        'tenderbureau_id': tenderbureau_id,
+        'documents': documents,
+        'prompt_content': prompt_content,
+        'selected_model': selected_model,
+        'message_content': message_content,
+    }
 
-        prompt_content = prompt_record.get('prompt_content', '')
-        for key, value in variables.items():
-            prompt_content = prompt_content.replace(f'{{{{{key}}}}}', str(value))
-
-        model_map = {
-            "haiku": "claude-haiku-4-5-20251001",
-            "sonnet": "claude-sonnet-4-6",
-            "opus": "claude-opus-4-6",
-            "claude-haiku-4-5-20251001": "claude-haiku-4-5-20251001",
-            "claude-sonnet-4-6": "claude-sonnet-4-6",
-            "claude-opus-4-6": "claude-opus-4-6",
-        }
-        selected_model = model_map.get(body.model, "claude-sonnet-4-6")
 
-        message_content = []
-        if pdf_content_blocks:
-            message_content.extend(pdf_content_blocks)
-        message_content.append({"type": "text", "text": prompt_content})
+async def _plan_generatie(voorbereid: dict, streaming: bool = False) -> None:
+    """
+    Pre-flight (claude_preflight): max_tokens uit de ai_generatie-historie,
+    nooit lager dan GENERATIE_MAX_TOKENS, en een 413 als de brondocumenten
+    niet in de context passen — vóór er iets verstuurd of betaald is.
+    Zet voorbereid['max_tokens'].
+    """
+    plan = await plan_call(
+        {
+            'model': voorbereid['selected_model'],
+            'messages': [{"role": "user", "content": voorbereid['message_content']}],
+        },
+        call_type='ai_generatie',
+        standaard_output=GENERATIE_MAX_TOKENS,
+        streaming=streaming,
+        minimaal=GENERATIE_MAX_TOKENS,
+    )
+    if not plan.past:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"Brondocumenten te groot voor één generatie (±{plan.input_tokens} tokens, "
+                f"max {plan.max_input_per_deel}). Selecteer minder documenten."
+            ),
+        )
+    voorbereid['max_tokens'] = plan.max_tokens
+
+
+def _generatie_record(tender_id: str, body: GenerateDocumentRequest, voorbereid: dict, created_by: Optional[str]) -> dict:
+    """Vaste velden van het ai_documents record van een generatie."""
+    return {
+        'tender_id': tender_id,
+        'tenderbureau_id': voorbereid['tenderbureau_id'],
+        'template_key': body.template_key,
+        'prompt_used': voorbereid['prompt_content'],
+        'input_data': {'brondocument_ids': body.brondocument_ids, 'aantal_brondocumenten': len(voorbereid['documents'])},
+        'generation_config': {'model': voorbereid['selected_model']},
+        'claude_model_used': voorbereid['selected_model'],
+        'created_by': created_by,
+        'created_at': datetime.utcnow().isoformat(),
+    }
+
+
+@router.post("/tenders/{tender_id}/generate-document")
+async def generate_document_for_tender(
+    tender_id: str,
+    body: GenerateDocumentRequest,
+    request: Request,
+    db: Client = Depends(get_supabase_async)
+):
+    print(f"🤖 Genereer: tender={tender_id}, template={body.template_key}, model={body.model}")
+    try:
+        voorbereid = _bereid_generatie_voor(db, tender_id, body)
+        await _plan_generatie(voorbereid)
 
-        message = call_claude(
-            messages=[{"role": "user", "content": message_content}],
-            model=selected_model,
-            max_tokens=8192,
+        message = await acall_claude(
+            messages=[{"role": "user", "content": voorbereid['message_content']}],
+            model=voorbereid['selected_model'],
+            max_tokens=voorbereid['max_tokens'],
             db=db,
-            bureau_id=tenderbureau_id,
+            bureau_id=voorbereid['tenderbureau_id'],
             tender_id=str(tender_id),
             call_type='ai_generatie',
         )
@@ -1054,20 +1160,12 @@ async def generate_document_for_tender(
         tokens_used = message.usage.input_tokens + message.usage.output_tokens
 
         doc_data = {
-            'tender_id': tender_id,
-            'tenderbureau_id': tenderbureau_id,
-            'template_key': body.template_key,
+            **_generatie_record(tender_id, body, voorbereid, get_user_id_from_request(request)),
             'status': 'completed',
             'progress': 100,
             'document_content': generated_text,
-            'prompt_used': prompt_content,
-            'input_data': {'brondocument_ids': body.brondocument_ids, 'aantal_brondocumenten': len(documents)},
-            'generation_config': {'model': selected_model},
-            'claude_model_used': selected_model,
             'claude_tokens_used': tokens_used,
-            'created_by': get_user_id_from_request(request),
             'completed_at': datetime.utcnow().isoformat(),
-            'created_at': datetime.utcnow().isoformat(),
         }
 
         save_result = db.table('ai_documents').insert(doc_data).execute()
@@ -1088,6 +1186,206 @@ async def generate_document_for_tender(
         raise HTTPException(status_code=500, detail=f"Generatie mislukt: {str(e)}")
 
 
+# ============================================
+# v3.9: STREAMING GENERATIE (SSE)
+# ============================================
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def _zonder_tekst(doc: dict) -> dict:
+    """Record voor het klaar-event: de tekst heeft de client al."""
+    return {
+        **{k: v for k, v in doc.items() if k not in ('document_content', 'prompt_used')},
+        'heeft_downstream': doc.get('template_key') in DOWNSTREAM_TEMPLATES,
+    }
+
+
+async def _genereer_stream(
+    stream: GeneratieStream,
+    tender_id: str,
+    voorbereid: dict,
+) -> dict:
+    """Achtergrondtaak: Claude streamen, tussenstanden en eindresultaat opslaan."""
+    adb = get_async_supabase()
+    document_id = stream.document_id
+    message = None
+    laatst_opgeslagen = time.monotonic()
+    try:
+        async for deel in astream_claude(
+            messages=[{"role": "user", "content": voorbereid['message_content']}],
+            model=voorbereid['selected_model'],
+            max_tokens=voorbereid['max_tokens'],
+            db=adb,
+            bureau_id=voorbereid['tenderbureau_id'],
+            tender_id=str(tender_id),
+            call_type='ai_generatie',
+        ):
+            if not isinstance(deel, str):
+                message = deel
+                continue
+            stream.voeg_toe(deel)
+            if time.monotonic() - laatst_opgeslagen >= GENERATIE_OPSLAAN_SECONDEN:
+                # Tussenstand: hervatten op een andere worker / na herstart
+                laatst_opgeslagen = time.monotonic()
+                await adb.table('ai_documents').update({
+                    'document_content': stream.tekst,
+                    'progress': min(99, stream.lengte * 100 // (voorbereid['max_tokens'] * 4)),
+                }).eq('id', document_id).execute()
+
+        update = {
+            'status': 'completed',
+            'progress': 100,
+            'document_content': stream.tekst,
+            'claude_tokens_used': message.usage.input_tokens + message.usage.output_tokens,
+            'completed_at': datetime.utcnow().isoformat(),
+        }
+        result = await adb.table('ai_documents').update(update).eq('id', document_id).execute()
+        return _zonder_tekst(result.data[0] if result.data else {'id': document_id, **update})
+    except BaseException as e:
+        fout = 'Generatie afgebroken' if isinstance(e, asyncio.CancelledError) else f"Generatie mislukt: {e}"
+        try:
+            await asyncio.shield(adb.table('ai_documents').update({
+                'status': 'failed',
+                'document_content': stream.tekst,
+                'error_message': fout,
+            }).eq('id', document_id).execute())
+        except BaseException as opslaan_fout:
+            print(f"⚠️ Status 'failed' opslaan mislukt voor {document_id}: {opslaan_fout}")
+        raise
+
+
+async def _sse_uit_buffer(stream: GeneratieStream, vanaf: int):
+    yield f"retry: {STREAM_RETRY_MS}\n" + sse_event({
+        'type': 'start', 'document_id': stream.document_id, 'vanaf': vanaf,
+    })
+    async for event in stream.events(vanaf):
+        yield event
+
+
+async def _sse_uit_document(document_id: str, vanaf: int):
+    """
+    Hervatten zonder buffer in deze worker: ai_documents pollen. Loopt de
+    generatie nog op een andere worker, dan komt de tekst per tussenstand
+    binnen (GENERATIE_OPSLAAN_SECONDEN).
+    """
+    adb = get_async_supabase()
+    yield f"retry: {STREAM_RETRY_MS}\n" + sse_event({
+        'type': 'start', 'document_id': document_id, 'vanaf': vanaf,
+    })
+    positie = vanaf
+    laatste_groei = time.monotonic()
+    while True:
+        result = await adb.table('ai_documents').select('*').eq('id', document_id).execute()
+        if not result.data:
+            yield sse_event({'type': 'fout', 'detail': 'Document niet gevonden'})
+            return
+        doc = result.data[0]
+        tekst = doc.get('document_content') or ''
+        if len(tekst) > positie:
+            yield sse_event({'type': 'tekst', 'tekst': tekst[positie:]}, len(tekst))
+            positie = len(tekst)
+            laatste_groei = time.monotonic()
+        else:
+            yield SSE_PING
+
+        if doc.get('status') == 'completed':
+            yield sse_event({'type': 'klaar', 'document': _zonder_tekst(doc)})
+            return
+        if doc.get('status') != 'generating':
+            yield sse_event({'type': 'fout', 'detail': doc.get('error_message') or f"Status: {doc.get('status')}"})
+            return
+        if time.monotonic() - laatste_groei > GENERATIE_STIL_MAX_SECONDEN:
+            yield sse_event({'type': 'fout', 'detail': 'Generatie onderbroken — start opnieuw'})
+            return
+        await asyncio.sleep(GENERATIE_OPSLAAN_SECONDEN)
+
+
+@router.post("/tenders/{tender_id}/generate-document/stream")
+async def generate_document_stream(
+    tender_id: str,
+    body: GenerateDocumentRequest,
+    request: Request,
+    db: Client = Depends(get_supabase_async)
+):
+    """
+    Als generate-document, maar als SSE stream (text/event-stream):
+
+      data: {"type": "start", "document_id": "...", "vanaf": 0}
+      id: 1834
+      data: {"type": "tekst", "tekst": "..."}          (id = tekenpositie)
+      data: {"type": "klaar", "document": {...}}       (record zonder tekst)
+      data: {"type": "fout", "detail": "..."}
+
+    Het ai_documents record wordt vooraf aangemaakt (status 'generating').
+    De generatie loopt door als de client wegvalt; hervatten via
+    GET /documents/{document_id}/stream met Last-Event-ID of ?vanaf=.
+    """
+    print(f"🤖 Genereer (stream): tender={tender_id}, template={body.template_key}, model={body.model}")
+    try:
+        voorbereid = _bereid_generatie_voor(db, tender_id, body)
+        await _plan_generatie(voorbereid, streaming=True)
+
+        doc_data = {
+            **_generatie_record(tender_id, body, voorbereid, get_user_id_from_request(request)),
+            'status': 'generating',
+            'progress': 0,
+            'document_content': '',
+            'started_at': datetime.utcnow().isoformat(),
+        }
+        save_result = db.table('ai_documents').insert(doc_data).execute()
+        if not save_result.data:
+            raise HTTPException(status_code=500, detail="Document record aanmaken mislukt")
+        document_id = str(save_result.data[0]['id'])
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Generatie (stream) mislukt: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Generatie mislukt: {str(e)}")
+
+    stream = start_generatie(
+        document_id,
+        lambda s: _genereer_stream(s, tender_id, voorbereid),
+    )
+    return StreamingResponse(
+        _sse_uit_buffer(stream, 0),
+        media_type="text/event-stream",
+        headers={**SSE_HEADERS, "X-Document-Id": document_id},
+    )
+
+
+@router.get("/documents/{document_id}/stream")
+async def hervat_generatie_stream(
+    document_id: str,
+    request: Request,
+    vanaf: Optional[int] = Query(None, ge=0),
+    db: Client = Depends(get_supabase_async)
+):
+    """
+    Hervat de SSE stream van een (lopende of afgeronde) generatie vanaf
+    tekenpositie `vanaf` of de Last-Event-ID header. Geschikt als
+    EventSource-URL: herverbinden gaat dan automatisch.
+    """
+    if vanaf is None:
+        try:
+            vanaf = max(0, int(request.headers.get('last-event-id') or 0))
+        except ValueError:
+            vanaf = 0
+
+    result = db.table('ai_documents').select('id').eq('id', document_id).execute()
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Document niet gevonden")
+
+    stream = zoek_generatie(document_id)
+    events = _sse_uit_buffer(stream, vanaf) if stream else _sse_uit_document(document_id, vanaf)
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 # ============================================
 # AKKOORD & DOWNSTREAM ENDPOINTS
 # ============================================
@@ -1216,6 +1514,7 @@ async def voer_downstream_uit(
             if not heeft_data or mag_overschrijven:
                 if mag_overschrijven and heeft_data:
                     db.table('planning_taken').delete().eq('tender_id', tender_id).execute()
+                    invalidate_agenda_bureau(tenderbureau_id)
                 nieuwe_taken = []
                 for i, item in enumerate(parsed['projectplanning']):
                     taak = {
@@ -1234,6 +1533,7 @@ async def voer_downstream_uit(
                     nieuwe_taken.append(taak)
                 if nieuwe_taken:
                     db.table('planning_taken').insert(nieuwe_taken).execute()
+                    invalidate_agenda_bureau(tenderbureau_id)
                     resultaten['projectplanning'] = {'aangemaakt': len(nieuwe_taken), 'status': 'gevuld'}
             else:
                 resultaten['projectplanning'] = {'status': 'overgeslagen', 'reden': 'Bestaande data behouden'}
@@ -1244,6 +1544,7 @@ async def voer_downstream_uit(
             if not heeft_data or mag_overschrijven:
                 if mag_overschrijven and heeft_data:
                     db.table('checklist_items').delete().eq('tender_id', tender_id).execute()
+                    invalidate_agenda_bureau(tenderbureau_id)
                 nieuwe_items = []
                 for i, item in enumerate(parsed['checklist']):
                     nieuwe_items.append({
@@ -1257,6 +1558,7 @@ async def voer_downstream_uit(
                     })
                 if nieuwe_items:
                     db.table('checklist_items').insert(nieuwe_items).execute()
+                    invalidate_agenda_bureau(tenderbureau_id)
                     resultaten['checklist'] = {'aangemaakt': len(nieuwe_items), 'status': 'gevuld'}
             else:
                 resultaten['checklist'] = {'status': 'overgeslagen', 'reden': 'Bestaande data behouden'}
@@ -1821,10 +2123,10 @@ async def extract_planning(
         gekozen_model = body.model if body.model in GELDIGE_EXTRACTIE_MODELLEN else "claude-haiku-4-5-20251001"
         print(f"🤖 Extractie met model: {gekozen_model}")
 
-        response = call_claude(
+        response = await acall_claude(
             messages=[{
                 'role': 'user',
-                'content': content_blocks + [{'type': 'text', 'text': prompt_tekst}]
+                'content': met_cache_breakpoint(content_blocks) + [{'type': 'text', 'text': prompt_tekst}]
             }],
             model=gekozen_model,
             max_tokens=2000,
@@ -1884,7 +2186,7 @@ async def extract_planning(
         db.table('milestones').insert(nieuwe_milestones).execute()
 
         # Sync milestones naar tender kolommen
-        tender_service = TenderService(db)
+        tender_service = TenderService(get_async_supabase())
         await tender_service.sync_milestones_to_tender(str(tender_id))
 
         return {
@@ -1933,10 +2235,10 @@ async def extract_checklist(
 
         gekozen_model = body.model if body.model in GELDIGE_EXTRACTIE_MODELLEN else "claude-haiku-4-5-20251001"
 
-        response = call_claude(
+        response = await acall_claude(
             messages=[{
                 'role': 'user',
-                'content': content_blocks + [{'type': 'text', 'text': PROMPT_EXTRACT_CHECKLIST}]
+                'content': met_cache_breakpoint(content_blocks) + [{'type': 'text', 'text': PROMPT_EXTRACT_CHECKLIST}]
             }],
             model=gekozen_model,
             max_tokens=8000,
@@ -1953,6 +2255,7 @@ async def extract_checklist(
 
         if heeft_data and body.overschrijf:
             db.table('checklist_items').delete().eq('tender_id', tender_id).execute()
+            invalidate_agenda_bureau(tenderbureau_id)
             bestaande_namen = set()
         elif body.aanvullen:
             bestaande_namen = {r['taak_naam'].lower().strip() for r in bestaande_items if r.get('taak_naam')}
@@ -1972,6 +2275,7 @@ async def extract_checklist(
 
         if nieuwe_items:
             db.table('checklist_items').insert(nieuwe_items).execute()
+            invalidate_agenda_bureau(tenderbureau_id)
 
         alle_items = db.table('checklist_items').select('*').eq('tender_id', tender_id).order('volgorde').execute()
         toegevoegd = len(nieuwe_items)
@@ -2094,7 +2398,7 @@ Geef ALLEEN een JSON-array terug, geen uitleg, geen markdown:
   {{"id": "uuid-hier", "datum": "2026-04-22"}}
 ]"""
 
-        response = call_claude(
+        response = await acall_claude(
             messages=[{'role': 'user', 'content': prompt}],
             model="claude-sonnet-4-6",
             max_tokens=2000,
@@ -2127,6 +2431,9 @@ Geef ALLEEN een JSON-array terug, geen uitleg, geen markdown:
                 .execute()
             bijgewerkt += 1
 
+        if bijgewerkt:
+            invalidate_agenda_bureau(tenderbureau_id)
+
         return {
             'success': True,
             'bijgewerkt': bijgewerkt,
@@ -2188,6 +2495,7 @@ async def update_planning_taak(
             raise HTTPException(status_code=400, detail="Geen velden om te updaten")
 
         result = db.table('planning_taken').update(update_data).eq('id', taak_id).eq('tender_id', tender_id).execute()
+        invalidate_agenda_bureau(result.data[0].get('tenderbureau_id') if result.data else None)
         if not result.data:
             raise HTTPException(status_code=500, detail="Update mislukt")
 
@@ -2206,10 +2514,11 @@ async def delete_planning_taak(
     db: Client = Depends(get_supabase_async)
 ):
     try:
-        bestaand = db.table('planning_taken').select('id').eq('id', taak_id).eq('tender_id', tender_id).single().execute()
+        bestaand = db.table('planning_taken').select('id, tenderbureau_id').eq('id', taak_id).eq('tender_id', tender_id).single().execute()
         if not bestaand.data:
             raise HTTPException(status_code=404, detail="Taak niet gevonden")
         db.table('planning_taken').delete().eq('id', taak_id).eq('tender_id', tender_id).execute()
+        invalidate_agenda_bureau(bestaand.data.get('tenderbureau_id'))
         return {'success': True, 'message': 'Taak verwijderd'}
     except HTTPException:
         raise
@@ -2264,6 +2573,7 @@ async def create_planning_taak(
             taak_data['beschrijving'] = body.beschrijving[:500]
 
         result = db.table('planning_taken').insert(taak_data).execute()
+        invalidate_agenda_bureau(tenderbureau_id)
         if not result.data:
             raise HTTPException(status_code=500, detail="Aanmaken mislukt")
 
@@ -2322,6 +2632,7 @@ async def populate_planning_from_template(
 
         if heeft_data and body.overschrijf:
             db.table('planning_taken').delete().eq('tender_id', tender_id).execute()
+            invalidate_agenda_bureau(tenderbureau_id)
 
         nieuwe_taken = []
         for i, tt in enumerate(template_taken):
@@ -2341,6 +2652,7 @@ async def populate_planning_from_template(
             nieuwe_taken.append(taak)
 
         result = db.table('planning_taken').insert(nieuwe_taken).execute()
+        invalidate_agenda_bureau(tenderbureau_id)
         aangemaakt = len(result.data or [])
 
         return {'success': True, 'aangemaakt': aangemaakt, 'template_naam': template_result.data['naam'], 'items': result.data or [], 'message': f'{aangemaakt} taken geladen vanuit template'}
@@ -2422,6 +2734,7 @@ async def update_checklist_item(
             raise HTTPException(status_code=400, detail="Geen velden om te updaten")
 
         result = db.table('checklist_items').update(update_data).eq('id', item_id).eq('tender_id', tender_id).execute()
+        invalidate_agenda_bureau(result.data[0].get('tenderbureau_id') if result.data else None)
         if not result.data:
             raise HTTPException(status_code=500, detail="Update mislukt")
 
@@ -2440,10 +2753,11 @@ async def delete_checklist_item(
     db: Client = Depends(get_supabase_async)
 ):
     try:
-        bestaand = db.table('checklist_items').select('id').eq('id', item_id).eq('tender_id', tender_id).single().execute()
+        bestaand = db.table('checklist_items').select('id, tenderbureau_id').eq('id', item_id).eq('tender_id', tender_id).single().execute()
         if not bestaand.data:
             raise HTTPException(status_code=404, detail="Checklist item niet gevonden")
         db.table('checklist_items').delete().eq('id', item_id).eq('tender_id', tender_id).execute()
+        invalidate_agenda_bureau(bestaand.data.get('tenderbureau_id'))
         return {'success': True, 'message': 'Item verwijderd'}
     except HTTPException:
         raise
@@ -2487,6 +2801,7 @@ async def create_checklist_item(
             item_data['verantwoordelijke'] = body.toegewezen_aan[0] if body.toegewezen_aan else None
 
         result = db.table('checklist_items').insert(item_data).execute()
+        invalidate_agenda_bureau(tenderbureau_id)
         if not result.data:
             raise HTTPException(status_code=500, detail="Aanmaken mislukt")
 
@@ -2529,6 +2844,7 @@ async def populate_checklist_from_template(
 
         if heeft_data and body.overschrijf:
             db.table('checklist_items').delete().eq('tender_id', tender_id).execute()
+            invalidate_agenda_bureau(tenderbureau_id)
             bestaande_namen = set()
         elif body.aanvullen:
             bestaande_namen = {r['taak_naam'].lower().strip() for r in bestaande_items if r.get('taak_naam')}
@@ -2555,6 +2871,7 @@ async def populate_checklist_from_template(
 
         if nieuwe_items:
             db.table('checklist_items').insert(nieuwe_items).execute()
+            invalidate_agenda_bureau(tenderbureau_id)
 
         alle_items = db.table('checklist_items').select('*').eq('tender_id', tender_id).order('volgorde').execute()
         toegevoegd = len(nieuwe_items)
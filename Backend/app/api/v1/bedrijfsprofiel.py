@@ -2,7 +2,6 @@
 Bedrijfsprofiel API — TenderZen
 Volledig profiel beheer: basis, competenties, CPV, referenties, kwaliteit, signalering.
 """
-import asyncio
 import json
 import logging
 from typing import Optional, List
@@ -12,7 +11,7 @@ from pydantic import BaseModel
 from supabase import Client
 
 from app.core.dependencies import get_current_user, get_user_db
-from app.services.anthropic_service import call_claude
+from app.services.anthropic_service import acall_claude
 
 logger = logging.getLogger(__name__)
 
@@ -351,8 +350,7 @@ Referentieprojecten ({len(referenties)}x):
 Geef ALLEEN de profieltekst terug, geen toelichting of opmaak."""
 
     try:
-        resp = await asyncio.to_thread(
-            call_claude,
+        resp = await acall_claude(
             messages=[{"role": "user", "content": prompt}],
             model=CLAUDE_MODEL,
             max_tokens=800,
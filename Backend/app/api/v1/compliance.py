@@ -3,6 +3,7 @@ ComplianceZen API — Sprint 1A
 Norm-extractie, norm opslaan, score herberekenen, normen/clausules ophalen.
 """
 
+import asyncio
 import logging
 from typing import Optional
 
@@ -69,7 +70,8 @@ async def extraheer_norm(
         )
 
     try:
-        clausules = extraheer_clausules_uit_tekst(
+        clausules = await asyncio.to_thread(
+            extraheer_clausules_uit_tekst,
             norm_naam=body.norm_naam,
             tekst=body.tekst,
         )
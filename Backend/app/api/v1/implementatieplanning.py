@@ -1,13 +1,12 @@
 """
 Implementatieplanning API — TenderZen
 CRUD voor implementatie secties/taken/metadata, AI-generatie en Excel/PDF export.
+Afhankelijkheden, kritiek pad en lokaal herplannen via ImplementatieScheduler.
 """
-import asyncio
 import base64
-import io
 import json
 import logging
-from datetime import datetime, date, timezone, timedelta
+from datetime import datetime, date, timezone
 from typing import Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -16,7 +15,13 @@ from supabase import Client
 
 from app.core.database import get_supabase_async
 from app.core.dependencies import get_current_user
-from app.services.anthropic_service import call_claude
+from app.services.anthropic_service import acall_claude
+from app.services.implementatie_scheduler import ImplementatieScheduler, CyclischeAfhankelijkheid
+from app.services.implementatie_export import MIMETYPES
+from app.services.export_cache import get_export
+from app.services.implementatie_compact import (
+    CompactePlanning, kies_kolommen, PLANNING_FORMAAT, DIFF_INSTRUCTIE,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -52,70 +57,22 @@ Retourneer UITSLUITEND een JSON object, geen uitleg, geen markdown backticks."""
 CHAT_SYSTEEM_PROMPT = """Je bent een expert projectplanner. De gebruiker heeft een \
 implementatieplanning gemaakt en wil die verfijnen via instructies in natuurlijke taal.
 
-Je krijgt de volledige huidige planning als JSON mee.
-Analyseer de instructie en geef een gestructureerd diff terug.
+""" + PLANNING_FORMAAT + """
 
-Retourneer UITSLUITEND dit JSON formaat, geen uitleg, geen markdown:
-{
-  "samenvatting": "Korte beschrijving van wat je hebt aangepast (max 1 zin)",
-  "wijzigingen": [
-    {
-      "type": "sectie_toevoegen",
-      "data": {
-        "naam": "Evaluatiefase",
-        "kleur": "#a7f3d0",
-        "volgorde": 5,
-        "taken": [
-          {
-            "nummer": "E.1",
-            "naam": "Kwaliteitscontrole",
-            "verantwoordelijke": "Opdrachtgever",
-            "toelichting": "Eindcontrole per fase",
-            "startdatum": "YYYY-MM-DD",
-            "einddatum": "YYYY-MM-DD",
-            "dagen": 10,
-            "volgorde": 1
-          }
-        ]
-      }
-    },
-    {
-      "type": "taak_toevoegen",
-      "sectie_id": "uuid-bestaande-sectie",
-      "data": { "nummer": "X.1", "naam": "...", "startdatum": "YYYY-MM-DD", "einddatum": "YYYY-MM-DD", "dagen": 5, "volgorde": 99 }
-    },
-    {
-      "type": "taak_wijzigen",
-      "taak_id": "uuid",
-      "data": { "startdatum": "YYYY-MM-DD", "einddatum": "YYYY-MM-DD" }
-    },
-    {
-      "type": "taak_verwijderen",
-      "taak_id": "uuid"
-    },
-    {
-      "type": "sectie_wijzigen",
-      "sectie_id": "uuid",
-      "data": { "naam": "Nieuwe naam", "kleur": "#..." }
-    },
-    {
-      "type": "sectie_verwijderen",
-      "sectie_id": "uuid"
-    }
-  ]
-}
+Analyseer de instructie en geef een diff terug met ALLEEN de wijzigingen.
 
-Toegestane types: sectie_toevoegen, sectie_wijzigen, sectie_verwijderen,
-                  taak_toevoegen, taak_wijzigen, taak_verwijderen.
-Houd datums realistisch t.o.v. planstart/planeinde in de planning.
-Gebruik YYYY-MM-DD formaat voor alle datums."""
+""" + DIFF_INSTRUCTIE + """
+Houd datums realistisch t.o.v. planstart/planeinde in de planning."""
 
 VRAAG_SYSTEEM_PROMPT = """Je bent een expert projectplanner. Je krijgt een \
-implementatieplanning als JSON en een vraag van de gebruiker.
+implementatieplanning en een vraag van de gebruiker.
+
+""" + PLANNING_FORMAAT + """
 
 Analyseer de planning en beantwoord de vraag op basis van de gegevens.
 Wijs op relevante details zoals verantwoordelijken, datums, doorlooptijden,
-overlappende fasen, of risico's die je ziet.
+overlappende fasen, of risico's die je ziet. Verwijs naar taken met hun
+nummer en naam, niet met de korte id (T<n>).
 
 Retourneer UITSLUITEND dit JSON formaat, geen uitleg, geen markdown backticks:
 {
@@ -168,6 +125,22 @@ class TaakUpdate(BaseModel):
     dagen:            Optional[int] = None
     volgorde:         Optional[int] = None
 
+class AfhankelijkheidCreate(BaseModel):
+    van_taak_id:  str
+    naar_taak_id: str
+    lag_dagen:    int = 0
+    herplan:      bool = True   # opvolgers direct laten meeschuiven
+
+class VerschuifRequest(BaseModel):
+    startdatum: str
+    dagen:      Optional[int] = None
+    compact:    bool = False    # True: opvolgers ook naar voren trekken
+    opslaan:    bool = True     # False: alleen doorrekenen (preview)
+
+class HerplanRequest(BaseModel):
+    compact: bool = False
+    opslaan: bool = True
+
 class Document(BaseModel):
     base64: str
     naam:   str
@@ -217,6 +190,150 @@ def _bereken_dagen(startdatum: Optional[str], einddatum: Optional[str]) -> Optio
     except Exception:
         return None
 
+def _datum(waarde) -> Optional[str]:
+    """ISO-datum of None — ongeldige AI-datums mogen de bulk-insert niet breken."""
+    if not waarde:
+        return None
+    try:
+        return date.fromisoformat(str(waarde)[:10]).isoformat()
+    except ValueError:
+        return None
+
+def _geheel(waarde, default: Optional[int] = None) -> Optional[int]:
+    try:
+        return int(waarde)
+    except (TypeError, ValueError):
+        return default
+
+def _sectie_row(sectie_data: dict) -> dict:
+    return {
+        "naam":     sectie_data.get("naam")  or "Fase",
+        "kleur":    sectie_data.get("kleur") or "#c7d2fe",
+        "volgorde": _geheel(sectie_data.get("volgorde"), 0),
+    }
+
+def _taak_row(taak_data: dict) -> dict:
+    startdatum = _datum(taak_data.get("startdatum"))
+    einddatum  = _datum(taak_data.get("einddatum"))
+    return {
+        "nummer":            taak_data.get("nummer"),
+        "naam":              taak_data.get("naam") or "Taak",
+        "verantwoordelijke": taak_data.get("verantwoordelijke"),
+        "toelichting":       taak_data.get("toelichting"),
+        "startdatum":        startdatum,
+        "einddatum":         einddatum,
+        "dagen":             _geheel(taak_data.get("dagen")) or _bereken_dagen(startdatum, einddatum),
+        "volgorde":          _geheel(taak_data.get("volgorde"), 0),
+        "status":            "open",
+    }
+
+def _rpc_ontbreekt(e: Exception) -> bool:
+    """True als de database-functie (nog) niet bestaat — migratie 022 niet gedraaid."""
+    code = getattr(e, "code", None) or ""
+    return code in ("PGRST202", "42883") or "Could not find the function" in str(e)
+
+def _vervang_planning(db: Client, tender_id: str, bureau_id: str,
+                      meta_row: dict, secties: List[dict]) -> int:
+    """
+    Vervang de volledige planning van een tender. Geeft het aantal taken terug.
+
+    Via RPC vervang_implementatieplanning (migratie 022): één round-trip,
+    één transactie. Bestaat de functie nog niet, dan _vervang_planning_batch.
+    """
+    payload = [
+        {**_sectie_row(s), "taken": [_taak_row(t) for t in (s.get("taken") or [])]}
+        for s in secties
+    ]
+    try:
+        res = db.rpc("vervang_implementatieplanning", {
+            "p_tender_id": tender_id,
+            "p_bureau_id": bureau_id,
+            "p_metadata":  meta_row,
+            "p_secties":   payload,
+        }).execute()
+        return (res.data or {}).get("taken", 0)
+    except Exception as e:
+        if not _rpc_ontbreekt(e):
+            raise
+        logger.warning(f"[ip] RPC vervang_implementatieplanning niet beschikbaar, fallback: {e}")
+
+    return _vervang_planning_batch(db, tender_id, bureau_id, meta_row, payload)
+
+def _vervang_planning_batch(db: Client, tender_id: str, bureau_id: str,
+                            meta_row: dict, payload: List[dict]) -> int:
+    """
+    Fallback zonder RPC: één insert per tabel. Geen echte transactie, dus
+    eerst de NIEUWE planning wegschrijven en pas daarna de oude secties
+    verwijderen — faalt een stap, dan worden de nieuwe secties opgeruimd
+    en blijft de oude planning staan.
+    """
+    oude_res = db.table("implementatie_secties").select("id").eq("tender_id", tender_id).execute()
+    oude_ids = [r["id"] for r in (oude_res.data or [])]
+
+    nieuwe_ids: List[str] = []
+    taken_rows: List[dict] = []
+    try:
+        if payload:
+            sectie_rows = [
+                {**{k: v for k, v in s.items() if k != "taken"},
+                 "tender_id": tender_id, "tenderbureau_id": bureau_id}
+                for s in payload
+            ]
+            # PostgREST geeft de rijen terug in insert-volgorde
+            sectie_res = db.table("implementatie_secties").insert(sectie_rows).execute()
+            nieuwe_ids = [r["id"] for r in (sectie_res.data or [])]
+            if len(nieuwe_ids) != len(payload):
+                raise RuntimeError("Aantal ingevoegde secties klopt niet")
+
+            for sectie_id, s in zip(nieuwe_ids, payload):
+                for taak in s["taken"]:
+                    taken_rows.append({**taak, "sectie_id": sectie_id,
+                                       "tender_id": tender_id, "tenderbureau_id": bureau_id})
+            if taken_rows:
+                db.table("implementatie_taken").insert(taken_rows).execute()
+
+        db.table("implementatie_metadata").upsert(
+            {**meta_row, "tender_id": tender_id, "tenderbureau_id": bureau_id},
+            on_conflict="tender_id",
+        ).execute()
+    except Exception:
+        if nieuwe_ids:
+            db.table("implementatie_secties").delete().in_("id", nieuwe_ids).execute()
+        raise
+
+    if oude_ids:
+        db.table("implementatie_secties").delete().in_("id", oude_ids).execute()
+    return len(taken_rows)
+
+def _load_afhankelijkheden(db: Client, tender_id: str) -> List[dict]:
+    try:
+        res = db.table("implementatie_afhankelijkheden") \
+            .select("*").eq("tender_id", tender_id).execute()
+        return res.data or []
+    except Exception as e:
+        # Migratie 023 nog niet gedraaid → planning zonder afhankelijkheden
+        logger.warning(f"[ip] Afhankelijkheden niet beschikbaar: {e}")
+        return []
+
+def _load_scheduler(db: Client, tender_id: str):
+    """Taken (op id) + ImplementatieScheduler voor een tender."""
+    taken_res = db.table("implementatie_taken") \
+        .select("*").eq("tender_id", tender_id).order("volgorde").execute()
+    taken = taken_res.data or []
+    try:
+        scheduler = ImplementatieScheduler(taken, _load_afhankelijkheden(db, tender_id))
+    except CyclischeAfhankelijkheid as e:
+        raise HTTPException(409, str(e))
+    return {t["id"]: t for t in taken}, scheduler
+
+def _sla_datums_op(db: Client, taken: dict, wijzigingen: dict) -> None:
+    """Gewijzigde datums van meerdere taken in één upsert wegschrijven."""
+    if not wijzigingen:
+        return
+    nu = _now()
+    rows = [{**taken[tid], **w, "updated_at": nu} for tid, w in wijzigingen.items()]
+    db.table("implementatie_taken").upsert(rows, on_conflict="id").execute()
+
 def _load_planning(db: Client, tender_id: str) -> dict:
     """Laad metadata + secties + taken voor een tender."""
     meta_res = db.table("implementatie_metadata").select("*").eq("tender_id", tender_id).execute()
@@ -236,7 +353,11 @@ def _load_planning(db: Client, tender_id: str) -> dict:
         for s in secties:
             s["taken"] = taken_map.get(s["id"], [])
 
-    return {"metadata": metadata, "secties": secties}
+    return {
+        "metadata":         metadata,
+        "secties":          secties,
+        "afhankelijkheden": _load_afhankelijkheden(db, tender_id) if secties else [],
+    }
 
 # ══════════════════════════════════════════════════════════════════════════════
 # ENDPOINTS
@@ -332,8 +453,7 @@ Genereer een implementatieplanning in exact dit JSON formaat:
 
     # Claude aanroepen
     try:
-        resp = await asyncio.to_thread(
-            call_claude,
+        resp = await acall_claude(
             messages=messages,
             model=gekozen_model,
             max_tokens=MAX_TOKENS,
@@ -372,52 +492,22 @@ Genereer een implementatieplanning in exact dit JSON formaat:
         logger.error(f"[ip] Claude fout: {e}")
         raise HTTPException(500, f"AI-generatie mislukt: {str(e)}")
 
-    # Bestaande data verwijderen
-    db.table("implementatie_secties").delete().eq("tender_id", tender_id).execute()
-
-    # Metadata opslaan
+    # Metadata + secties + taken in één transactie (RPC, migratie 022)
     meta_row = {
-        "tender_id":        tender_id,
-        "tenderbureau_id":  bureau_id,
         "projectnaam":      ai_data.get("projectnaam",   projectnaam),
         "opdrachtgever":    ai_data.get("opdrachtgever", opdrachtgever),
         "opdrachtnemer":    opdrachtnemer,
-        "planstart":        ai_data.get("planstart",     planstart),
-        "planeinde":        ai_data.get("planeinde"),
+        "planstart":        _datum(ai_data.get("planstart", planstart)),
+        "planeinde":        _datum(ai_data.get("planeinde")),
         "ai_gegenereerd":   True,
         "ai_gegenereerd_op": _now(),
         "updated_at":       _now(),
     }
-    db.table("implementatie_metadata").upsert(meta_row, on_conflict="tender_id").execute()
-
-    # Secties en taken
-    totaal_taken = 0
-    for sectie_data in ai_data.get("secties", []):
-        sectie_res = db.table("implementatie_secties").insert({
-            "tender_id":      tender_id,
-            "tenderbureau_id": bureau_id,
-            "naam":           sectie_data.get("naam",     "Fase"),
-            "kleur":          sectie_data.get("kleur",    "#c7d2fe"),
-            "volgorde":       sectie_data.get("volgorde", 0),
-        }).execute()
-        sectie_id = sectie_res.data[0]["id"]
-
-        for taak_data in sectie_data.get("taken", []):
-            db.table("implementatie_taken").insert({
-                "sectie_id":       sectie_id,
-                "tender_id":       tender_id,
-                "tenderbureau_id": bureau_id,
-                "nummer":          taak_data.get("nummer"),
-                "naam":            taak_data.get("naam",    "Taak"),
-                "verantwoordelijke": taak_data.get("verantwoordelijke"),
-                "toelichting":     taak_data.get("toelichting"),
-                "startdatum":      taak_data.get("startdatum"),
-                "einddatum":       taak_data.get("einddatum"),
-                "dagen":           taak_data.get("dagen"),
-                "volgorde":        taak_data.get("volgorde", 0),
-                "status":          "open",
-            }).execute()
-            totaal_taken += 1
+    try:
+        totaal_taken = _vervang_planning(db, tender_id, bureau_id, meta_row, ai_data.get("secties") or [])
+    except Exception as e:
+        logger.error(f"[ip] Planning opslaan mislukt: {e}")
+        raise HTTPException(500, f"Planning opslaan mislukt: {str(e)}")
 
     return {
         "succes": True,
@@ -581,6 +671,116 @@ async def delete_taak(
     return {"succes": True}
 
 
+# ── Afhankelijkheden & herplannen ─────────────────────────────────────────────
+
+@router.get("/implementatieplanning/{tender_id}/afhankelijkheden")
+async def get_afhankelijkheden(
+    tender_id:    str,
+    db:           Client = Depends(get_supabase_async),
+    current_user: dict   = Depends(get_current_user),
+):
+    return _load_afhankelijkheden(db, tender_id)
+
+
+@router.post("/implementatieplanning/{tender_id}/afhankelijkheden")
+async def add_afhankelijkheid(
+    tender_id:    str,
+    body:         AfhankelijkheidCreate,
+    db:           Client = Depends(get_supabase_async),
+    current_user: dict   = Depends(get_current_user),
+):
+    tender = _require_tender(db, tender_id)
+    taken, scheduler = _load_scheduler(db, tender_id)
+    if body.van_taak_id not in taken or body.naar_taak_id not in taken:
+        raise HTTPException(404, "Taak niet gevonden in deze planning")
+    if scheduler.maakt_cyclus(body.van_taak_id, body.naar_taak_id):
+        raise HTTPException(400, "Deze afhankelijkheid maakt een cyclus")
+
+    res = db.table("implementatie_afhankelijkheden").insert({
+        "tender_id":       tender_id,
+        "tenderbureau_id": tender["tenderbureau_id"],
+        "van_taak_id":     body.van_taak_id,
+        "naar_taak_id":    body.naar_taak_id,
+        "type":            "FS",
+        "lag_dagen":       body.lag_dagen,
+    }).execute()
+
+    gewijzigd = {}
+    if body.herplan:
+        _, scheduler = _load_scheduler(db, tender_id)
+        gewijzigd = scheduler.herplan_vanaf([body.van_taak_id])
+        _sla_datums_op(db, taken, gewijzigd)
+
+    return {"afhankelijkheid": res.data[0], "gewijzigd": gewijzigd}
+
+
+@router.delete("/implementatieplanning/afhankelijkheden/{afhankelijkheid_id}")
+async def delete_afhankelijkheid(
+    afhankelijkheid_id: str,
+    db:                 Client = Depends(get_supabase_async),
+    current_user:       dict   = Depends(get_current_user),
+):
+    db.table("implementatie_afhankelijkheden").delete().eq("id", afhankelijkheid_id).execute()
+    return {"succes": True}
+
+
+@router.get("/implementatieplanning/{tender_id}/kritiek-pad")
+async def get_kritiek_pad(
+    tender_id:    str,
+    db:           Client = Depends(get_supabase_async),
+    current_user: dict   = Depends(get_current_user),
+):
+    _, scheduler = _load_scheduler(db, tender_id)
+    return scheduler.analyse()
+
+
+@router.post("/implementatieplanning/taken/{taak_id}/verschuif")
+async def verschuif_taak(
+    taak_id:      str,
+    body:         VerschuifRequest,
+    db:           Client = Depends(get_supabase_async),
+    current_user: dict   = Depends(get_current_user),
+):
+    """
+    Verplaats een taak; opvolgers schuiven lokaal mee (geen AI-aanroep).
+    opslaan=False geeft alleen het resultaat terug (preview).
+    """
+    taak_res = db.table("implementatie_taken").select("tender_id").eq("id", taak_id).execute()
+    if not taak_res.data:
+        raise HTTPException(404, "Taak niet gevonden")
+    tender_id = taak_res.data[0]["tender_id"]
+
+    taken, scheduler = _load_scheduler(db, tender_id)
+    try:
+        gewijzigd = scheduler.verschuif(taak_id, body.startdatum, body.dagen, body.compact)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    if body.opslaan:
+        _sla_datums_op(db, taken, gewijzigd)
+
+    return {
+        "gewijzigd":    gewijzigd,
+        "opgeslagen":   body.opslaan,
+        "projecteinde": scheduler.analyse()["projecteinde"],
+    }
+
+
+@router.post("/implementatieplanning/{tender_id}/herplan")
+async def herplan_planning(
+    tender_id:    str,
+    body:         HerplanRequest,
+    db:           Client = Depends(get_supabase_async),
+    current_user: dict   = Depends(get_current_user),
+):
+    """Volledige doorrekening van alle afhankelijkheden (bijv. na import)."""
+    taken, scheduler = _load_scheduler(db, tender_id)
+    gewijzigd = scheduler.plan(compact=body.compact)
+    if body.opslaan:
+        _sla_datums_op(db, taken, gewijzigd)
+    return {"gewijzigd": gewijzigd, "opgeslagen": body.opslaan}
+
+
 # ── AI chat ───────────────────────────────────────────────────────────────────
 
 @router.post("/implementatieplanning/{tender_id}/chat")
@@ -597,17 +797,18 @@ async def chat_planning(
     tender    = _require_tender(db, tender_id)
     bureau_id = tender["tenderbureau_id"]
 
+    # Compacte codering met korte id's i.p.v. de volledige planning-JSON
+    compact = CompactePlanning(body.planning, kies_kolommen(body.bericht, body.modus))
     label_bericht = "Instructie" if body.modus == "aanpas" else "Vraag"
     user_message = (
-        f"Huidige planning:\n{json.dumps(body.planning, ensure_ascii=False, indent=2)}\n\n"
+        f"Huidige planning:\n{compact.tekst}\n\n"
         f"{label_bericht} van de gebruiker:\n{body.bericht}"
     )
 
     # ── Vraag-modus: alleen analyseren, niets toepassen ──────────────────────
     if body.modus == "vraag":
         try:
-            resp = await asyncio.to_thread(
-                call_claude,
+            resp = await acall_claude(
                 messages=[{"role": "user", "content": user_message}],
                 model=gekozen_model,
                 max_tokens=1000,
@@ -639,8 +840,7 @@ async def chat_planning(
 
     # ── Aanpas-modus: diff berekenen en toepassen ─────────────────────────────
     try:
-        resp = await asyncio.to_thread(
-            call_claude,
+        resp = await acall_claude(
             messages=[{"role": "user", "content": user_message}],
             model=gekozen_model,
             max_tokens=4000,
@@ -666,8 +866,11 @@ async def chat_planning(
         logger.error(f"[ip-chat] JSON parse fout: {e}")
         raise HTTPException(500, f"AI gaf ongeldige JSON: {e}")
 
+    samenvatting, wijzigingen = compact.vertaal(diff)
+
     toegepast = []
-    for w in diff.get("wijzigingen", []):
+    verschoven: List[str] = []
+    for w in wijzigingen:
         wtype = w.get("type")
         try:
             if wtype == "sectie_toevoegen":
@@ -681,7 +884,8 @@ async def chat_planning(
                                  "tenderbureau_id": bureau_id})
                     taak["dagen"] = _bereken_dagen(taak.get("startdatum"), taak.get("einddatum")) \
                                     or taak.get("dagen")
-                    db.table("implementatie_taken").insert(taak).execute()
+                if taken:
+                    db.table("implementatie_taken").insert(taken).execute()
 
             elif wtype == "taak_toevoegen":
                 data = dict(w.get("data", {}))
@@ -697,6 +901,8 @@ async def chat_planning(
                     data["dagen"] = _bereken_dagen(data["startdatum"], data["einddatum"])
                 data["updated_at"] = _now()
                 db.table("implementatie_taken").update(data).eq("id", w["taak_id"]).execute()
+                if "startdatum" in data or "einddatum" in data:
+                    verschoven.append(w["taak_id"])
 
             elif wtype == "taak_verwijderen":
                 db.table("implementatie_taken").delete().eq("id", w["taak_id"]).execute()
@@ -718,15 +924,41 @@ async def chat_planning(
         except Exception as e:
             logger.error(f"[ip-chat] Wijziging '{wtype}' mislukt: {e}")
 
+    # Opvolgers van verschoven taken lokaal meeschuiven
+    if verschoven:
+        try:
+            taken, scheduler = _load_scheduler(db, tender_id)
+            _sla_datums_op(db, taken, scheduler.herplan_vanaf(verschoven))
+        except Exception as e:
+            logger.error(f"[ip-chat] Herplannen opvolgers mislukt: {e}")
+
     return {
         "modus":                 "aanpas",
-        "samenvatting":          diff.get("samenvatting", "Planning bijgewerkt"),
+        "samenvatting":          samenvatting,
         "wijzigingen_toegepast": len(toegepast),
         "types":                 toegepast,
     }
 
 
-# ── Excel export ──────────────────────────────────────────────────────────────
+# ── Excel / PDF export ────────────────────────────────────────────────────────
+
+async def _export(db: Client, tender_id: str, soort: str) -> dict:
+    """Export via export_cache: ongewijzigde planning → gecachte bytes."""
+    planning    = _load_planning(db, tender_id)
+    metadata    = planning["metadata"] or {}
+    projectnaam = metadata.get("projectnaam") or "Implementatieplanning"
+    try:
+        data, bron = await get_export(db, tender_id, soort, planning)
+    except ImportError as e:
+        raise HTTPException(500, f"Export niet beschikbaar — ontbrekende module: {e.name or e}")
+    logger.debug(f"[ip] Export {soort} voor {tender_id}: {bron}")
+
+    return {
+        "bestandsnaam": f"Implementatieplanning_{projectnaam.replace(' ', '_')}.{soort}",
+        "base64":       base64.b64encode(data).decode("utf-8"),
+        "mimetype":     MIMETYPES[soort],
+    }
+
 
 @router.post("/implementatieplanning/{tender_id}/export/excel")
 async def export_excel(
@@ -734,116 +966,8 @@ async def export_excel(
     db:           Client = Depends(get_supabase_async),
     current_user: dict   = Depends(get_current_user),
 ):
-    try:
-        import openpyxl
-        from openpyxl.styles import PatternFill, Font, Alignment
-        from openpyxl.utils import get_column_letter
-    except ImportError:
-        raise HTTPException(500, "openpyxl niet beschikbaar")
-
-    planning  = _load_planning(db, tender_id)
-    metadata  = planning["metadata"] or {}
-    secties   = planning["secties"]
-    projectnaam   = metadata.get("projectnaam", "Implementatieplanning")
-    planstart_str = metadata.get("planstart")
-    planeinde_str = metadata.get("planeinde")
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Implementatieplanning"
-
-    # Kolom breedte
-    col_w = {"A": 6, "B": 42, "C": 22, "D": 15, "E": 12, "F": 12, "G": 7}
-    for col, w in col_w.items():
-        ws.column_dimensions[col].width = w
-
-    # Weekkolommen berekenen
-    week_labels = []
-    if planstart_str and planeinde_str:
-        try:
-            ps = datetime.strptime(planstart_str, "%Y-%m-%d")
-            pe = datetime.strptime(planeinde_str, "%Y-%m-%d")
-            cur = ps
-            while cur <= pe:
-                week_labels.append(f"W{cur.strftime('%V')}\n{cur.strftime('%d/%m')}")
-                cur += timedelta(weeks=1)
-        except Exception:
-            pass
-
-    for i in range(len(week_labels)):
-        ws.column_dimensions[get_column_letter(8 + i)].width = 4
-
-    # Header rij
-    DARK   = "1E293B"
-    hfill  = PatternFill("solid", fgColor=DARK)
-    hfont  = Font(bold=True, color="FFFFFF", size=9)
-    halign = Alignment(horizontal="center", vertical="center", wrap_text=True)
-
-    headers = ["Nr", "Taak / Fase", "Verantwoordelijk", "Status", "Start", "Einde", "Dgn"] + week_labels
-    for ci, h in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=ci, value=h)
-        cell.fill, cell.font, cell.alignment = hfill, hfont, halign
-    ws.row_dimensions[1].height = 28
-
-    STATUS_LABELS = {"open": "Open", "in_uitvoering": "In uitvoering", "afgerond": "Afgerond"}
-    row = 2
-
-    def _hex_fill(h):
-        h = (h or "c7d2fe").lstrip("#")
-        return PatternFill("solid", fgColor=h.upper())
-
-    for sectie in secties:
-        # Sectie header
-        sfill  = _hex_fill(sectie.get("kleur"))
-        sfont  = Font(bold=True, size=10)
-        cell   = ws.cell(row=row, column=1, value=sectie["naam"])
-        end_c  = get_column_letter(len(headers))
-        ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=len(headers))
-        cell.fill = sfill
-        cell.font = sfont
-        cell.alignment = Alignment(horizontal="left", indent=1, vertical="center")
-        ws.row_dimensions[row].height = 18
-        row += 1
-
-        for taak in sectie.get("taken", []):
-            ws.cell(row=row, column=1, value=taak.get("nummer",           ""))
-            ws.cell(row=row, column=2, value=taak.get("naam",             ""))
-            ws.cell(row=row, column=3, value=taak.get("verantwoordelijke", ""))
-            ws.cell(row=row, column=4, value=STATUS_LABELS.get(taak.get("status", "open"), "Open"))
-            ws.cell(row=row, column=5, value=taak.get("startdatum",       ""))
-            ws.cell(row=row, column=6, value=taak.get("einddatum",        ""))
-            ws.cell(row=row, column=7, value=taak.get("dagen") or "")
-
-            # Gantt balk kolommen
-            if week_labels and planstart_str and taak.get("startdatum") and taak.get("einddatum"):
-                try:
-                    ps = datetime.strptime(planstart_str, "%Y-%m-%d")
-                    ts = datetime.strptime(taak["startdatum"], "%Y-%m-%d")
-                    te = datetime.strptime(taak["einddatum"],  "%Y-%m-%d")
-                    for wi in range(len(week_labels)):
-                        w_start = ps + timedelta(weeks=wi)
-                        w_end   = ps + timedelta(weeks=wi + 1)
-                        if ts < w_end and te >= w_start:
-                            ws.cell(row=row, column=8 + wi).fill = sfill
-                except Exception:
-                    pass
-
-            ws.row_dimensions[row].height = 15
-            row += 1
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    b64 = base64.b64encode(buf.read()).decode("utf-8")
+    return await _export(db, tender_id, "xlsx")
 
-    return {
-        "bestandsnaam": f"Implementatieplanning_{projectnaam.replace(' ', '_')}.xlsx",
-        "base64":       b64,
-        "mimetype":     "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    }
-
-
-# ── PDF export ────────────────────────────────────────────────────────────────
 
 @router.post("/implementatieplanning/{tender_id}/export/pdf")
 async def export_pdf(
@@ -851,174 +975,4 @@ async def export_pdf(
     db:           Client = Depends(get_supabase_async),
     current_user: dict   = Depends(get_current_user),
 ):
-    try:
-        from reportlab.lib.pagesizes import A4, landscape
-        from reportlab.lib.units import mm
-        from reportlab.pdfgen import canvas as rl_canvas
-    except ImportError:
-        raise HTTPException(500, "reportlab niet beschikbaar — voer 'pip install reportlab' uit")
-
-    planning      = _load_planning(db, tender_id)
-    metadata      = planning["metadata"] or {}
-    secties       = planning["secties"]
-    projectnaam   = metadata.get("projectnaam",   "Implementatieplanning")
-    opdrachtgever = metadata.get("opdrachtgever", "")
-    planstart_str = metadata.get("planstart")
-    planeinde_str = metadata.get("planeinde")
-
-    buf   = io.BytesIO()
-    pw, ph = landscape(A4)
-    c      = rl_canvas.Canvas(buf, pagesize=(pw, ph))
-
-    MG     = 15 * mm
-    ROW_H  = 6.5 * mm
-
-    # Bereken totaal projectdagen voor Gantt-fractie
-    totaal_dagen = 1
-    ps_dt = pe_dt = None
-    if planstart_str and planeinde_str:
-        try:
-            ps_dt = datetime.strptime(planstart_str, "%Y-%m-%d")
-            pe_dt = datetime.strptime(planeinde_str, "%Y-%m-%d")
-            totaal_dagen = max(1, (pe_dt - ps_dt).days)
-        except Exception:
-            pass
-
-    def _hex_rgb(h):
-        h = (h or "c7d2fe").lstrip("#")
-        if len(h) == 6:
-            return tuple(int(h[i:i+2], 16) / 255 for i in (0, 2, 4))
-        return (0.78, 0.82, 0.996)
-
-    # Kolombreedtes: [nr, naam, verantw, status, start, einde, dgn, gantt]
-    tabel_w  = pw - 2 * MG
-    gantt_w  = tabel_w * 0.42
-    info_w   = tabel_w - gantt_w
-    col_ws   = [
-        info_w * 0.07,  # Nr
-        info_w * 0.32,  # Naam
-        info_w * 0.24,  # Verantw.
-        info_w * 0.12,  # Status
-        info_w * 0.11,  # Start
-        info_w * 0.11,  # Einde
-        info_w * 0.03,  # Dgn
-        gantt_w,        # Gantt
-    ]
-
-    def _new_page():
-        nonlocal y
-        c.showPage()
-        y = ph - MG
-        # Herdruk kolomkoppen
-        _draw_header_row()
-
-    def _draw_cell(x, cy, text, w, bold=False, fill_rgb=None, text_color=(0, 0, 0)):
-        if fill_rgb:
-            c.setFillColorRGB(*fill_rgb)
-            c.rect(x, cy - ROW_H, w, ROW_H, fill=1, stroke=0)
-        c.setStrokeColorRGB(0.85, 0.85, 0.85)
-        c.rect(x, cy - ROW_H, w, ROW_H, fill=0, stroke=1)
-        c.setFillColorRGB(*text_color)
-        c.setFont("Helvetica-Bold" if bold else "Helvetica", 7.5)
-        c.drawString(x + 1.5 * mm, cy - ROW_H + 1.8 * mm, str(text or "")[:45])
-
-    def _draw_header_row():
-        nonlocal y
-        lbls = ["Nr", "Taak / Fase", "Verantw.", "Status", "Start", "Einde", "Dgn", "Gantt"]
-        x = MG
-        for lbl, w in zip(lbls, col_ws):
-            _draw_cell(x, y, lbl, w, bold=True,
-                       fill_rgb=(0.12, 0.16, 0.24), text_color=(1, 1, 1))
-            x += w
-        y -= ROW_H
-
-    # ── Paginakop ──────────────────────────────────────────────────────────
-    y = ph - MG
-    c.setFont("Helvetica-Bold", 13)
-    c.setFillColorRGB(0.07, 0.09, 0.29)
-    c.drawString(MG, y, projectnaam)
-
-    c.setFont("Helvetica", 9)
-    c.setFillColorRGB(0.4, 0.4, 0.4)
-    if opdrachtgever:
-        c.drawString(MG, y - 5 * mm, f"Opdrachtgever: {opdrachtgever}")
-    if planstart_str and planeinde_str:
-        c.drawRightString(pw - MG, y, f"Looptijd: {planstart_str}  –  {planeinde_str}")
-
-    y -= 16 * mm
-    _draw_header_row()
-
-    STATUS_LABELS = {"open": "Open", "in_uitvoering": "Uitvoering", "afgerond": "Afgerond"}
-
-    for sectie in secties:
-        if y < MG + ROW_H * 3:
-            _new_page()
-
-        rgb = _hex_rgb(sectie.get("kleur"))
-        x = MG
-        for i, w in enumerate(col_ws):
-            text = sectie["naam"] if i == 0 else ""
-            # Sectieheader spans alle kolommen (visueel via kleur)
-            _draw_cell(x, y, text if i == 0 else "", w,
-                       bold=True, fill_rgb=rgb, text_color=(0.1, 0.1, 0.1))
-            x += w
-        # Tekst over breedte van eerste 7 kolommen
-        c.setFillColorRGB(0.1, 0.1, 0.1)
-        c.setFont("Helvetica-Bold", 8)
-        c.drawString(MG + 1.5 * mm, y - ROW_H + 1.8 * mm, sectie["naam"])
-        y -= ROW_H
-
-        for taak in sectie.get("taken", []):
-            if y < MG + ROW_H:
-                _new_page()
-
-            cols_data = [
-                taak.get("nummer",            ""),
-                taak.get("naam",              ""),
-                taak.get("verantwoordelijke", ""),
-                STATUS_LABELS.get(taak.get("status", "open"), "Open"),
-                taak.get("startdatum",        ""),
-                taak.get("einddatum",         ""),
-                str(taak.get("dagen") or ""),
-                "",  # gantt placeholder
-            ]
-            x = MG
-            for i, (text, w) in enumerate(zip(cols_data, col_ws)):
-                if i < 7:
-                    _draw_cell(x, y, text, w)
-                else:
-                    # Gantt cel achtergrond
-                    c.setFillColorRGB(0.96, 0.97, 0.99)
-                    c.rect(x, y - ROW_H, w, ROW_H, fill=1, stroke=0)
-                    c.setStrokeColorRGB(0.85, 0.85, 0.85)
-                    c.rect(x, y - ROW_H, w, ROW_H, fill=0, stroke=1)
-
-                    # Gantt balk
-                    if ps_dt and taak.get("startdatum") and taak.get("einddatum"):
-                        try:
-                            ts = datetime.strptime(taak["startdatum"], "%Y-%m-%d")
-                            te = datetime.strptime(taak["einddatum"],  "%Y-%m-%d")
-                            l_frac = max(0.0, (ts - ps_dt).days / totaal_dagen)
-                            w_frac = max(0.005, (te - ts).days  / totaal_dagen)
-                            bar_x  = x + l_frac * w
-                            bar_w  = min(w_frac * w, w - l_frac * w)
-                            pad    = 1.2 * mm
-                            c.setFillColorRGB(*rgb)
-                            c.rect(bar_x + pad, y - ROW_H + pad,
-                                   max(1, bar_w - 2 * pad), ROW_H - 2 * pad,
-                                   fill=1, stroke=0)
-                        except Exception:
-                            pass
-                x += w
-
-            y -= ROW_H
-
-    c.save()
-    buf.seek(0)
-    b64 = base64.b64encode(buf.read()).decode("utf-8")
-
-    return {
-        "bestandsnaam": f"Implementatieplanning_{projectnaam.replace(' ', '_')}.pdf",
-        "base64":       b64,
-        "mimetype":     "application/pdf",
-    }
+    return await _export(db, tender_id, "pdf")
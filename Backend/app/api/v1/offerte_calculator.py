@@ -3,7 +3,6 @@ Offerte Calculator API — TenderZen
 Berekent uren en factuurbedragen voor het schrijven van een aanbesteding.
 Gebaseerd op het bestaande Excel-model van Tendertaal.
 """
-import asyncio
 import base64
 import io
 import json
@@ -22,7 +21,7 @@ from supabase import Client
 
 from app.core.dependencies import get_current_user
 from app.core.database import get_supabase_async
-from app.services.anthropic_service import call_claude
+from app.services.anthropic_service import acall_claude
 from app.config import TOEGESTANE_MODELLEN, DEFAULT_AI_MODEL
 
 OFFERTE_STORAGE_BUCKET = "ai-documents"
@@ -720,8 +719,7 @@ async def analyseer_met_ai(
     messages = [{"role": "user", "content": gebruiker_bericht}]
 
     try:
-        resp = await asyncio.to_thread(
-            call_claude,
+        resp = await acall_claude(
             messages=messages,
             system=ANALYSE_PROMPT,
             model=gekozen_model,
@@ -1,6 +1,6 @@
 """
 Planning & Checklist API Router - 100% COMPLETE UNIFIED VERSION
-TenderZen v4.2 - Single Professional Planning Router
+TenderZen v4.3 - Single Professional Planning Router
 
 ════════════════════════════════════════════════════════════════════
 VOLLEDIGE MERGE van:
@@ -8,6 +8,23 @@ VOLLEDIGE MERGE van:
 - Backend/app/routers/planning_router.py (backplanning, templates, workload)
 ════════════════════════════════════════════════════════════════════
 
+WIJZIGINGEN v4.4:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+✅ POST /planning/bulk-backplanning — back-planning voor veel tenders
+   tegelijk (dry-run of opslaan), gedeelde template/kalender/workload
+✅ GET /team/workload-pieken — overbezette dagen uit de workload-matrix
+✅ Template CRUD invalideert de template cache (invalidate_templates)
+✅ GET /planning/agenda delegeert naar PlanningService.get_agenda_data
+   (week-cache, parallelle queries, voortgang per tender)
+✅ Agenda, workload en (bulk-)backplanning valideren het bureau
+   (ensure_bureau_access, 403) vóór de per-bureau caches
+
+WIJZIGINGEN v4.3:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+✅ RequestContext (get_request_context) — bureau/rol één keer per request,
+   gedeeld door PlanningService en resolve_bureau_id
+✅ planning-bulk invalideert de agenda week-cache
+
 KRITIEKE WIJZIGINGEN v4.2:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 ✅ Template detail endpoints toegevoegd (GET/PUT/DELETE/{id}, duplicate, taken)
@@ -26,6 +43,7 @@ ENDPOINTS COMPLEET OVERZICHT:
 TEAM & WORKLOAD (v_bureau_team):
   GET  /team-members                        — Bureau teamleden
   GET  /team/workload                       — Workload analyse
+  GET  /team/workload-pieken                — Overbezette dagen per teamlid
   GET  /tenders/{id}/team-assignments       — Tender team ophalen
   POST /tenders/{id}/team-assignments       — Teamlid toevoegen
   DEL  /tenders/{id}/team-assignments/{id}  — Teamlid verwijderen
@@ -44,6 +62,7 @@ CHECKLIST ITEMS (per tender):
 
 BACKPLANNING & AI:
   POST /planning/generate-backplanning       — AI backplanning generatie
+  POST /planning/bulk-backplanning           — Backplanning voor veel tenders
   POST /planning/save                        — Planning opslaan (BackplanningService)
   POST /tenders/{id}/planning-bulk           — Bulk save (SmartImport wizard)
 
@@ -77,18 +96,23 @@ from supabase import Client
 import logging
 
 # Core dependencies
-from app.core.database import get_supabase, get_supabase_async
-from app.core.dependencies import get_current_user, get_user_db
-from app.core.bureau_context import resolve_bureau_id
+from app.core.database import get_supabase, get_supabase_async, get_async_db, AsyncSupabaseClient
+from app.core.dependencies import get_current_user, get_user_db, get_async_user_db, get_request_context
+from app.core.request_context import RequestContext
+from app.core.bureau_context import ensure_bureau_access, resolve_bureau_id
 
 # Services
 from app.services.planning_service import PlanningService
 from app.services.backplanning_service import BackplanningService
+from app.services.agenda_cache import invalidate_agenda_bureau
+from app.services.template_cache import invalidate_templates
+from app.services.workload_matrix import WORKLOAD_MAX_DAGEN, get_workload_matrix
 
 # Models
 from app.models.planning_models import (
     BackplanningRequest,
     BackplanningResponse,
+    BulkBackplanningRequest,
     WorkloadResponse,
     TemplateCreateRequest,
     TemplateUpdateRequest,
@@ -197,10 +221,13 @@ class TeamMembersResponse(BaseModel):
 # DEPENDENCIES
 # ════════════════════════════════════════════════════════
 
-def get_planning_service(db: Client = Depends(get_supabase_async)) -> PlanningService:
-    return PlanningService(db)
+def get_planning_service(
+    db: AsyncSupabaseClient = Depends(get_async_db),
+    context: RequestContext = Depends(get_request_context)
+) -> PlanningService:
+    return PlanningService(db, context)
 
-def get_backplanning_service(db: Client = Depends(get_user_db)) -> BackplanningService:
+def get_backplanning_service(db: AsyncSupabaseClient = Depends(get_async_user_db)) -> BackplanningService:
     return BackplanningService(db)
 
 
@@ -217,13 +244,15 @@ def get_backplanning_service(db: Client = Depends(get_user_db)) -> BackplanningS
 async def get_team_members(
     tenderbureau_id: Optional[str] = Query(None, description="Bureau ID filter"),
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_user_db)
+    db: Client = Depends(get_user_db),
+    context: RequestContext = Depends(get_request_context)
 ):
     try:
         bureau_id = await resolve_bureau_id(
             current_user,
             explicit_bureau_id=tenderbureau_id,
-            db=db
+            db=db,
+            context=context
         )
 
         logger.info(f"📋 Team members ophalen voor bureau: {bureau_id}")
@@ -271,10 +300,13 @@ async def get_workload(
     end: date = Query(..., description="Eind datum (YYYY-MM-DD)"),
     tenderbureau_id: Optional[str] = Query(None),
     current_user: dict = Depends(get_current_user),
-    service: BackplanningService = Depends(get_backplanning_service)
+    service: BackplanningService = Depends(get_backplanning_service),
+    context: RequestContext = Depends(get_request_context)
 ):
     if start > end:
         raise HTTPException(status_code=400, detail="Startdatum mag niet na einddatum")
+    if (end - start).days + 1 > WORKLOAD_MAX_DAGEN:
+        raise HTTPException(status_code=400, detail=f"Periode mag maximaal {WORKLOAD_MAX_DAGEN} dagen zijn")
 
     user_id_list = [uid.strip() for uid in user_ids.split(',') if uid.strip()]
     if not user_id_list:
@@ -284,8 +316,11 @@ async def get_workload(
         bureau_id = await resolve_bureau_id(
             current_user,
             explicit_bureau_id=tenderbureau_id,
-            db=service.db
+            db=service.db,
+            context=context
         )
+        # Workload-matrix is per bureau gecached: RLS beschermt een cache-hit niet
+        await ensure_bureau_access(current_user, bureau_id, db=service.db, context=context)
 
         workload = await service.get_workload(
             user_ids=user_id_list,
@@ -303,6 +338,45 @@ async def get_workload(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/team/workload-pieken", summary="Overbezette dagen per teamlid")
+async def get_workload_pieken(
+    start: date = Query(..., description="Start datum (YYYY-MM-DD)"),
+    end: date = Query(..., description="Eind datum (YYYY-MM-DD)"),
+    drempel: Optional[int] = Query(None, ge=1, description="Minimaal aantal taken per dag"),
+    user_ids: Optional[str] = Query(None, description="Comma-separated user IDs"),
+    tenderbureau_id: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user),
+    service: BackplanningService = Depends(get_backplanning_service),
+    context: RequestContext = Depends(get_request_context)
+):
+    if start > end:
+        raise HTTPException(status_code=400, detail="Startdatum mag niet na einddatum")
+    if (end - start).days + 1 > WORKLOAD_MAX_DAGEN:
+        raise HTTPException(status_code=400, detail=f"Periode mag maximaal {WORKLOAD_MAX_DAGEN} dagen zijn")
+
+    try:
+        bureau_id = await resolve_bureau_id(
+            current_user,
+            explicit_bureau_id=tenderbureau_id,
+            db=service.db,
+            context=context
+        )
+        await ensure_bureau_access(current_user, bureau_id, db=service.db, context=context)
+        matrix = await get_workload_matrix(service.db, bureau_id)
+        ids = [uid.strip() for uid in user_ids.split(',') if uid.strip()] if user_ids else None
+
+        return {
+            "success": True,
+            "data": matrix.pieken(drempel, start, end, ids)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Workload pieken error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ════════════════════════════════════════════════════════
 # 3. AGENDA — Cross-tender planning overview
 # ════════════════════════════════════════════════════════
@@ -314,117 +388,32 @@ async def get_agenda_data(
     team_member_id: Optional[str] = Query(None, description="Filter op user UUID"),
     tenderbureau_id: Optional[str] = Query(None),
     user: dict = Depends(get_current_user),
-    db: Client = Depends(get_user_db)
+    db: AsyncSupabaseClient = Depends(get_async_user_db),
+    context: RequestContext = Depends(get_request_context)
 ):
     try:
-        # Resolve bureau eerst — nodig om alle tenders voor dit bureau op te halen
         bureau_id = await resolve_bureau_id(
             user,
             explicit_bureau_id=tenderbureau_id,
             db=db,
-            required=False
+            required=False,
+            context=context
+        )
+        # Agenda komt uit een cache per bureau: RLS beschermt een cache-hit niet
+        await ensure_bureau_access(user, bureau_id, db=db, context=context)
+
+        agenda = await PlanningService(db, context).get_agenda_data(
+            bureau_id,
+            user.get('is_super_admin', False),
+            start_date,
+            end_date,
+            team_member_id
         )
 
-        is_super_admin = user.get('is_super_admin', False)
-
-        def _map_tender(t: dict) -> dict:
-            """Plat de geneste bedrijven-relatie uit naar bedrijfsnaam."""
-            bedrijven_data = t.get('bedrijven') or {}
-            bedrijfsnaam = bedrijven_data.get('bedrijfsnaam', '') if isinstance(bedrijven_data, dict) else ''
-            return {
-                'id':                 t['id'],
-                'naam':               t.get('naam'),
-                'opdrachtgever':      t.get('opdrachtgever'),
-                'bedrijfsnaam':       bedrijfsnaam,
-                'fase':               t.get('fase'),
-                'fase_status':        t.get('fase_status'),
-                'deadline_indiening': t.get('deadline_indiening'),
-                'tenderbureau_id':    t.get('tenderbureau_id'),
-            }
-
-        TENDERS_SELECT = 'id, naam, opdrachtgever, fase, fase_status, deadline_indiening, tenderbureau_id, bedrijven(bedrijfsnaam)'
-
-        # Haal ALLE tenders op voor dit bureau (ook zonder planning)
-        tenders = {}
-        bureau_tender_ids = []
-        if bureau_id:
-            # Specifiek bureau geselecteerd (normale user of super-admin met bureau)
-            all_tenders_result = db.table('tenders') \
-                .select(TENDERS_SELECT) \
-                .eq('tenderbureau_id', bureau_id) \
-                .neq('fase', 'archief') \
-                .execute()
-            for t in (all_tenders_result.data or []):
-                mapped = _map_tender(t)
-                tenders[mapped['id']] = mapped
-                bureau_tender_ids.append(mapped['id'])
-        elif is_super_admin:
-            # Super-admin "Alle bureau's" — haal alle niet-archief tenders op
-            all_tenders_result = db.table('tenders') \
-                .select(TENDERS_SELECT) \
-                .neq('fase', 'archief') \
-                .execute()
-            for t in (all_tenders_result.data or []):
-                mapped = _map_tender(t)
-                tenders[mapped['id']] = mapped
-                bureau_tender_ids.append(mapped['id'])
-
-        if not bureau_tender_ids:
-            # Geen bureau context en geen super-admin → lege response
-            return {
-                "success": True,
-                "data": {"taken": [], "tenders": tenders, "v_bureau_team": []}
-            }
-
-        # Planning taken gefilterd op bureau tenders
-        planning_query = db.table('planning_taken') \
-            .select('*') \
-            .in_('tender_id', bureau_tender_ids) \
-            .gte('datum', start_date) \
-            .lte('datum', end_date)
-
-        if team_member_id:
-            planning_query = planning_query.contains('toegewezen_aan', [team_member_id])
-
-        planning_result = planning_query.execute()
-        planning_taken = planning_result.data or []
-
-        checklist_query = db.table('checklist_items') \
-            .select('*') \
-            .in_('tender_id', bureau_tender_ids) \
-            .gte('deadline', start_date) \
-            .lte('deadline', end_date)
-
-        checklist_result = checklist_query.execute()
-        checklist_items = checklist_result.data or []
-
-        taken = []
-        for t in planning_taken:
-            t['item_type'] = 'planning'
-            taken.append(t)
-        for c in checklist_items:
-            c['item_type'] = 'checklist'
-            c['datum'] = c.get('deadline')
-            taken.append(c)
-
-        team_members = []
-        if bureau_id:
-            team_result = db.table('v_bureau_team') \
-                .select('user_id, naam, email, initialen, avatar_kleur, bureau_rol') \
-                .eq('tenderbureau_id', bureau_id) \
-                .order('naam') \
-                .execute()
-            team_members = team_result.data or []
-
-        return {
-            "success": True,
-            "data": {
-                "taken": taken,
-                "tenders": tenders,
-                "v_bureau_team": team_members,
-            }
-        }
+        return {"success": True, "data": agenda}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Agenda error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Fout bij ophalen agenda")
@@ -442,8 +431,15 @@ async def get_agenda_data(
 async def generate_backplanning(
     request: BackplanningRequest,
     current_user: dict = Depends(get_current_user),
-    service: BackplanningService = Depends(get_backplanning_service)
+    service: BackplanningService = Depends(get_backplanning_service),
+    context: RequestContext = Depends(get_request_context)
 ):
+    # Templates, werkdag-kalender en workload-matrix zijn per bureau
+    # gecached: het bureau uit de request eerst valideren
+    await ensure_bureau_access(
+        current_user, str(request.tenderbureau_id), db=service.db, context=context
+    )
+
     try:
         result = await service.generate_backplanning(
             deadline=request.deadline,
@@ -465,6 +461,51 @@ async def generate_backplanning(
         )
 
 
+@router.post(
+    "/planning/bulk-backplanning",
+    summary="Herbereken backplanning voor veel tenders tegelijk"
+)
+async def generate_backplanning_bulk(
+    request: BulkBackplanningRequest,
+    current_user: dict = Depends(get_current_user),
+    service: BackplanningService = Depends(get_backplanning_service),
+    context: RequestContext = Depends(get_request_context)
+):
+    """
+    Regenereer (of dry-run) de backplanning van alle/geselecteerde tenders
+    van een bureau met één template. Met dry_run=false worden bestaande
+    planning taken en checklist items van die tenders vervangen.
+    """
+    bureau_id = await resolve_bureau_id(
+        current_user,
+        explicit_bureau_id=str(request.tenderbureau_id) if request.tenderbureau_id else None,
+        db=service.db,
+        context=context
+    )
+    await ensure_bureau_access(current_user, bureau_id, db=service.db, context=context)
+
+    try:
+        result = await service.generate_backplanning_bulk(
+            template_id=str(request.template_id),
+            tenderbureau_id=bureau_id,
+            tender_ids=[str(t) for t in request.tender_ids] if request.tender_ids else None,
+            include_checklist=request.include_checklist,
+            dry_run=request.dry_run
+        )
+        return {"success": True, "data": result}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Bulk backplanning error: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Bulk backplanning mislukt: {str(e)}"
+        )
+
+
 # ════════════════════════════════════════════════════════
 # 5. PLANNING SAVE — BackplanningService integration
 # ════════════════════════════════════════════════════════
@@ -535,6 +576,9 @@ async def save_planning(
             db.table('checklist_items').insert(checklist_inserts).execute()
             logger.info(f"✅ {len(checklist_inserts)} checklist items opgeslagen")
 
+        if planning_inserts or checklist_inserts:
+            invalidate_agenda_bureau(tenderbureau_id)
+
         # ── Team assignments met validatie ──
         team_saved = 0
         if team_assignments:
@@ -706,8 +750,8 @@ async def bulk_save_planning(
         checklist_count = 0
 
         if request.overwrite:
-            service.db.table('planning_taken').delete().eq('tender_id', tender_id).execute()
-            service.db.table('checklist_items').delete().eq('tender_id', tender_id).execute()
+            await service.db.table('planning_taken').delete().eq('tender_id', tender_id).execute()
+            await service.db.table('checklist_items').delete().eq('tender_id', tender_id).execute()
             logger.info(f"🗑️ Bestaande data verwijderd voor tender {tender_id}")
 
         if request.planning_taken:
@@ -724,7 +768,7 @@ async def bulk_save_planning(
                 'is_milestone': t.is_milestone
             } for t in request.planning_taken]
 
-            service.db.table('planning_taken').insert(planning_rows).execute()
+            await service.db.table('planning_taken').insert(planning_rows).execute()
             planning_count = len(planning_rows)
             logger.info(f"✅ {planning_count} planning taken bulk-inserted")
 
@@ -740,10 +784,12 @@ async def bulk_save_planning(
                 'volgorde': c.volgorde
             } for c in request.checklist_items]
 
-            service.db.table('checklist_items').insert(checklist_rows).execute()
+            await service.db.table('checklist_items').insert(checklist_rows).execute()
             checklist_count = len(checklist_rows)
             logger.info(f"✅ {checklist_count} checklist items bulk-inserted")
 
+        invalidate_agenda_bureau(bureau_id)
+
         return {
             "success": True,
             "data": {
@@ -794,7 +840,8 @@ async def get_planning_templates(
     type: Optional[str] = Query(None, pattern='^(planning|checklist|tenderplanning)$'),
     tenderbureau_id: Optional[str] = Query(None),
     user: dict = Depends(get_current_user),
-    db: Client = Depends(get_user_db)
+    db: Client = Depends(get_user_db),
+    context: RequestContext = Depends(get_request_context)
 ):
     """
     Haal planning templates op: bureau-eigen + generieke (tenderbureau_id IS NULL).
@@ -808,7 +855,8 @@ async def get_planning_templates(
             user,
             explicit_bureau_id=tenderbureau_id,
             db=db,
-            required=False
+            required=False,
+            context=context
         )
 
         if bureau_id:
@@ -919,6 +967,7 @@ async def create_planning_template(
         if not result.data:
             raise HTTPException(status_code=500, detail="Template aanmaken mislukt")
 
+        invalidate_templates(bureau_id, result.data[0].get('id'))
         return {**result.data[0], 'taken': []}
 
     except HTTPException:
@@ -949,6 +998,8 @@ async def update_planning_template(
         if not result.data:
             raise HTTPException(status_code=404, detail="Template niet gevonden")
 
+        invalidate_templates(result.data[0].get('tenderbureau_id'), template_id)
+
         taken_result = db.table('planning_template_taken') \
             .select('*') \
             .eq('template_id', template_id) \
@@ -980,6 +1031,8 @@ async def delete_planning_template(
         if not result.data:
             raise HTTPException(status_code=404, detail="Template niet gevonden")
 
+        invalidate_templates(result.data[0].get('tenderbureau_id'), template_id)
+
     except HTTPException:
         raise
     except Exception as e:
@@ -1040,6 +1093,7 @@ async def duplicate_planning_template(
             taken_result = db.table('planning_template_taken').insert(taken_inserts).execute()
             new_taken = taken_result.data or []
 
+        invalidate_templates(bureau_id, new_id)
         return {**new_result.data[0], 'taken': new_taken}
 
     except HTTPException:
@@ -1085,6 +1139,7 @@ async def replace_planning_template_taken(
         } for t in request.taken]
 
         taken_result = db.table('planning_template_taken').insert(taken_inserts).execute()
+        invalidate_templates(tmpl_result.data[0].get('tenderbureau_id'), template_id)
 
         return {**tmpl_result.data[0], 'taken': taken_result.data or []}
 
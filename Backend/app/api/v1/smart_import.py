@@ -33,7 +33,7 @@ import logging
 # ============================================
 # CORRECTE IMPORTS VOOR JOUW PROJECT STRUCTUUR
 # ============================================
-from app.core.database import get_supabase_async
+from app.core.database import get_async_db
 from app.core.dependencies import get_current_user
 from app.services.smart_import.smart_import_service import SmartImportService
 from app.config import TOEGESTANE_MODELLEN, DEFAULT_AI_MODEL
@@ -90,7 +90,7 @@ async def upload_files(
     files: List[UploadFile] = File(...),
     tenderbureau_id: str = Query(..., description="UUID van het tenderbureau"),
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_supabase_async)
+    db = Depends(get_async_db)
 ):
     """
     Start een nieuwe Smart Import sessie en upload bestanden.
@@ -130,7 +130,7 @@ async def start_analysis(
     import_id: str,
     options: AnalyzeOptions = AnalyzeOptions(),
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_supabase_async)
+    db = Depends(get_async_db)
 ):
     """
     Start de AI analyse voor een import sessie.
@@ -174,7 +174,7 @@ async def reanalyze(
     import_id: str,
     options: ReanalyzeOptions = ReanalyzeOptions(),
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_supabase_async)
+    db = Depends(get_async_db)
 ):
     """
     Voer de analyse opnieuw uit met een ander model.
@@ -223,7 +223,7 @@ async def add_document(
     import_id: str,
     file: UploadFile = File(..., description="Extra document om toe te voegen"),
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_supabase_async)
+    db = Depends(get_async_db)
 ):
     """
     Voeg een extra document toe aan een bestaande import sessie.
@@ -258,7 +258,7 @@ async def analyze_supplement(
     import_id: str,
     options: SupplementAnalyzeOptions = SupplementAnalyzeOptions(),
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_supabase_async)
+    db = Depends(get_async_db)
 ):
     """
     Voer een aanvullende analyse uit op nieuw toegevoegde documenten.
@@ -294,7 +294,7 @@ async def analyze_supplement(
 async def get_status(
     import_id: str,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_supabase_async)
+    db = Depends(get_async_db)
 ):
     """
     Haal de huidige status van een import sessie op.
@@ -354,7 +354,7 @@ async def create_tender(
     import_id: str,
     request: CreateTenderRequest,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_supabase_async)
+    db = Depends(get_async_db)
 ):
     """
     Maak een nieuwe tender aan met de geëxtraheerde data.
@@ -420,7 +420,7 @@ async def create_tender(
 async def cancel_import(
     import_id: str,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_supabase_async)
+    db = Depends(get_async_db)
 ):
     """
     Annuleer een import sessie.
@@ -432,7 +432,7 @@ async def cancel_import(
         raise HTTPException(status_code=404, detail="Import niet gevonden")
     
     try:
-        db.table('smart_imports').update({
+        await db.table('smart_imports').update({
             'status': 'cancelled'
         }).eq('id', import_id).execute()
         
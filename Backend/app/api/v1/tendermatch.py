@@ -3,6 +3,7 @@ Tendermatch API endpoint — TenderZen
 Matching engine die live Supabase bedrijven query gebruikt + sessie persistentie.
 """
 
+import asyncio
 import json
 import logging
 import re
@@ -80,6 +81,7 @@ Handel & Retail, Overheid & Non-profit."""
         model="claude-haiku-4-5-20251001",
         max_tokens=900,
         system="Je antwoordt ALTIJD met alleen valid JSON. Geen markdown backticks. Geen uitleg.",
+        call_type="tendermatch_analyse",
         log_usage=False,
     )
     text = response.content[0].text.strip()
@@ -274,6 +276,7 @@ Scoringsrichtlijnen:
         max_tokens=2000,
         system="Je antwoordt ALTIJD met alleen een valid JSON array. Geen markdown backticks. Geen uitleg buiten de JSON.",
         messages=[{"role": "user", "content": prompt}],
+        call_type="tendermatch_score",
         log_usage=False,
     )
 
@@ -370,14 +373,17 @@ async def match_tender(
             }
 
         # Matching pipeline
-        analyse = analyseer_aanbesteding(tekst)
+        # Sync Claude-helpers (ook gebruikt door tendersignalering) in een thread
+        analyse = await asyncio.to_thread(analyseer_aanbesteding, tekst)
         kandidaten = filter_bedrijven(analyse, bedrijven)
 
         # Referenties ophalen voor de top-30 kandidaten
         bedrijf_ids = [str(k["id"]) for k in kandidaten[:30] if k.get("id")]
         referenties_per_bedrijf = haal_referenties_op(db, bedrijf_ids)
 
-        shortlist = scoor_kandidaten(tekst, analyse, kandidaten, referenties_per_bedrijf)
+        shortlist = await asyncio.to_thread(
+            scoor_kandidaten, tekst, analyse, kandidaten, referenties_per_bedrijf
+        )
 
         # Sessie aanmaken
         titel = genereer_sessie_titel(tekst, analyse)
@@ -2,44 +2,79 @@
 Tender API endpoints
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from supabase import Client
-from app.core.database import get_supabase_async
-from app.core.dependencies import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.core.database import AsyncSupabaseClient, get_async_db
+from app.core.dependencies import get_current_user, get_request_context
+from app.core.request_context import RequestContext
 from app.models.tender import TenderCreate, TenderUpdate, TenderResponse
-from app.services.tender_service import TenderService
+from app.services.tender_service import TenderService, encode_cursor
 
 router = APIRouter(prefix="/tenders", tags=["tenders"])
 
 
 @router.get("", response_model=List[TenderResponse])
 async def get_tenders(
+    response: Response,
     tenderbureau_id: Optional[str] = Query(None, description="ID van het bureau, of None voor alle bureaus (super_admin only)"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Max aantal tenders per pagina; volgende pagina via X-Next-Cursor"),
+    cursor: Optional[str] = Query(None, description="Waarde van X-Next-Cursor uit de vorige pagina"),
+    fields: Optional[str] = Query(None, description="Komma-gescheiden velden (projectie), bijv. naam,fase,deadline_indiening"),
+    include_archived: bool = Query(True, description="Tenders in archief-fases meenemen (False → zonder archief)"),
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_supabase_async)
+    db: AsyncSupabaseClient = Depends(get_async_db),
+    context: RequestContext = Depends(get_request_context)
 ):
-    """Get all tenders for current user or all bureaus (super_admin only)"""
+    """
+    Get all tenders for current user or all bureaus (super_admin only)
+
+    Paginering is keyset op (created_at, id): geef de X-Next-Cursor header
+    van een pagina mee als ?cursor= voor de volgende. Met fields= wordt
+    alleen de gevraagde projectie teruggegeven (plus id/naam/fase); een
+    onbekende veldnaam geeft 400.
+    """
     print(f"📱 GET /tenders for user: {current_user['id']} | tenderbureau_id={tenderbureau_id}")
-    service = TenderService(db)
+    service = TenderService(db, context)
+    field_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    options = dict(limit=limit, cursor=cursor, fields=field_list, include_archived=include_archived)
+
     is_super = await service._is_super_admin(current_user['id'])
-    if tenderbureau_id is None and is_super:
-        print("⭐ Super_admin requesting ALL tenders")
-        return await service.get_all_tenders_all_bureaus(current_user['id'])
-    elif tenderbureau_id is None and not is_super:
-        # Niet toegestaan
-        raise HTTPException(status_code=403, detail="Alleen super_admins mogen alle tenders opvragen.")
-    else:
-        return await service.get_all_tenders(current_user['id'], tenderbureau_id)
+    try:
+        if tenderbureau_id is None and is_super:
+            print("⭐ Super_admin requesting ALL tenders")
+            tenders = await service.get_all_tenders_all_bureaus(current_user['id'], **options)
+        elif tenderbureau_id is None and not is_super:
+            # Niet toegestaan
+            raise HTTPException(status_code=403, detail="Alleen super_admins mogen alle tenders opvragen.")
+        else:
+            tenders = await service.get_all_tenders(current_user['id'], tenderbureau_id, **options)
+    except ValueError as e:
+        # Ongeldige cursor of veldnaam
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {}
+    if limit and len(tenders) == limit:
+        headers['X-Next-Cursor'] = encode_cursor(tenders[-1])
+    response.headers.update(headers)
+
+    if field_list:
+        # Projectie: niet door TenderResponse halen, anders komen alle
+        # overige velden als null terug en is de winst weg
+        return JSONResponse(content=jsonable_encoder(tenders), headers=headers)
+
+    return tenders
 
 
 @router.get("/{tender_id}", response_model=TenderResponse)
 async def get_tender(
     tender_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_supabase_async)
+    db: AsyncSupabaseClient = Depends(get_async_db),
+    context: RequestContext = Depends(get_request_context)
 ):
     """Get a specific tender"""
-    service = TenderService(db)
+    service = TenderService(db, context)
     tender = await service.get_tender_by_id(tender_id, current_user['id'])
     
     if not tender:
@@ -55,12 +90,13 @@ async def get_tender(
 async def create_tender(
     tender: TenderCreate,
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_supabase_async)
+    db: AsyncSupabaseClient = Depends(get_async_db),
+    context: RequestContext = Depends(get_request_context)
 ):
     """Create a new tender"""
     print(f"➕ Creating tender for user: {current_user['id']}")
     print(f"📝 Tender data received: {tender}")
-    service = TenderService(db)
+    service = TenderService(db, context)
     new_tender = await service.create_tender(tender, current_user['id'])
     return new_tender
 
@@ -70,10 +106,11 @@ async def update_tender(
     tender_id: str,
     tender: TenderUpdate,
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_supabase_async)
+    db: AsyncSupabaseClient = Depends(get_async_db),
+    context: RequestContext = Depends(get_request_context)
 ):
     """Update a tender"""
-    service = TenderService(db)
+    service = TenderService(db, context)
     updated_tender = await service.update_tender(
         tender_id, 
         tender, 
@@ -93,10 +130,11 @@ async def update_tender(
 async def delete_tender(
     tender_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_supabase_async)
+    db: AsyncSupabaseClient = Depends(get_async_db),
+    context: RequestContext = Depends(get_request_context)
 ):
     """Delete a tender"""
-    service = TenderService(db)
+    service = TenderService(db, context)
     success = await service.delete_tender(tender_id, current_user['id'])
     
     if not success:
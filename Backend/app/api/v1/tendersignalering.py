@@ -1,6 +1,12 @@
 """
 Tendersignalering API — TenderZen
 Dashboard, matches ophalen/bijwerken, scan uitvoeren via Claude AI.
+
+scan-bureau met batch=true: alle bedrijfsscans als één Message Batch
+(halve prijs, buiten de rate limits van interactief werk). Het endpoint
+antwoordt direct; de matches worden opgeslagen zodra de batch klaar is.
+De batch staat in claude_batches, zodat een herstart het resultaat niet
+kwijtraakt (de verzamelaar slaat het dan alsnog op).
 """
 import asyncio
 import json
@@ -16,8 +22,9 @@ from pydantic import BaseModel
 from supabase import Client
 
 from app.core.dependencies import get_current_user
-from app.core.database import get_supabase_async
-from app.services.anthropic_service import call_claude
+from app.core.database import get_supabase, get_supabase_async
+from app.services.anthropic_service import acall_claude, claude_prioriteit, PRIORITEIT_ACHTERGROND
+from app.services.claude_batches import registreer_verwerker, start_achtergrondtaak, verwerk_batch
 from app.api.v1.tendermatch import analyseer_aanbesteding, haal_referenties_op
 
 logger = logging.getLogger(__name__)
@@ -100,6 +107,7 @@ class ScanRequest(BaseModel):
 
 class ScanBureauRequest(BaseModel):
     max_tenders_per_bedrijf: Optional[int] = 20
+    batch: bool = False   # via Message Batches; resultaat komt later binnen
 
 
 class HandmatigMatchRequest(BaseModel):
@@ -319,24 +327,29 @@ async def scan_bureau(
     if not bedrijven:
         return {"ok": True, "gescande_bedrijven": 0, "totaal_nieuwe_matches": 0}
 
+    if body.batch:
+        return await _start_scan_batch(bedrijven, body, current_user, db)
+
     totaal_nieuw = 0
     resultaten = []
 
-    for bedrijf in bedrijven:
-        try:
-            scan_req = ScanRequest(max_tenders=body.max_tenders_per_bedrijf or 20)
-            # Hergebruik de scan-logica via directe aanroep
-            res = await scan_tenders(
-                bedrijf_id=bedrijf["id"],
-                body=scan_req,
-                current_user=current_user,
-                db=db,
-            )
-            totaal_nieuw += res.get("nieuwe_matches", 0)
-            resultaten.append({"bedrijf_id": bedrijf["id"], "bedrijfsnaam": bedrijf["bedrijfsnaam"], "nieuwe_matches": res.get("nieuwe_matches", 0)})
-        except Exception as e:
-            logger.warning("Scan mislukt voor bedrijf %s: %s", bedrijf["id"], e)
-            resultaten.append({"bedrijf_id": bedrijf["id"], "bedrijfsnaam": bedrijf["bedrijfsnaam"], "fout": str(e)})
+    # Bulk-scan: Claude-calls in de achtergrondbaan van de governor
+    with claude_prioriteit(PRIORITEIT_ACHTERGROND):
+        for bedrijf in bedrijven:
+            try:
+                scan_req = ScanRequest(max_tenders=body.max_tenders_per_bedrijf or 20)
+                # Hergebruik de scan-logica via directe aanroep
+                res = await scan_tenders(
+                    bedrijf_id=bedrijf["id"],
+                    body=scan_req,
+                    current_user=current_user,
+                    db=db,
+                )
+                totaal_nieuw += res.get("nieuwe_matches", 0)
+                resultaten.append({"bedrijf_id": bedrijf["id"], "bedrijfsnaam": bedrijf["bedrijfsnaam"], "nieuwe_matches": res.get("nieuwe_matches", 0)})
+            except Exception as e:
+                logger.warning("Scan mislukt voor bedrijf %s: %s", bedrijf["id"], e)
+                resultaten.append({"bedrijf_id": bedrijf["id"], "bedrijfsnaam": bedrijf["bedrijfsnaam"], "fout": str(e)})
 
     return {
         "ok": True,
@@ -512,6 +525,34 @@ async def scan_tenders(
     """
     _check_toegang(db, bedrijf_id, current_user)
 
+    scan = _bereid_scan_voor(db, bedrijf_id, body, current_user)
+    if not scan["tenders"]:
+        return {"ok": True, "gescand": 0, "nieuwe_matches": 0, "matches": []}
+
+    raw = ""
+    try:
+        resp = await acall_claude(**scan["verzoek"], log_usage=False)
+        raw = resp.content[0].text.strip()
+        data = json.loads(extraheer_json(raw))
+        beoordelingen = data.get("beoordelingen", [])
+    except json.JSONDecodeError as e:
+        logger.error("JSON parse fout bij scan: %s | raw: %s", e, raw[:200])
+        raise HTTPException(status_code=502, detail="AI retourneerde ongeldige JSON")
+    except Exception as e:
+        logger.error("Claude fout bij scan: %s", e)
+        raise HTTPException(status_code=502, detail="AI-scan mislukt")
+
+    return _sla_scan_op(db, scan, beoordelingen)
+
+
+SCAN_SYSTEEM = "Je bent een expert in aanbestedingen en bedrijfsmatching. Retourneer alleen valide JSON."
+
+
+def _bereid_scan_voor(db: Client, bedrijf_id: str, body: ScanRequest, current_user: dict) -> dict:
+    """
+    Bedrijf, referenties en tenders ophalen en het Claude-verzoek bouwen.
+    Geeft {'tenders': []} terug als er niets te scannen is.
+    """
     # Bedrijf ophalen
     bedrijf_res = (
         db.table("bedrijven")
@@ -566,7 +607,7 @@ async def scan_tenders(
     tenders = tenders_res.data or []
 
     if not tenders:
-        return {"ok": True, "gescand": 0, "nieuwe_matches": 0, "matches": []}
+        return {"bedrijf_id": bedrijf_id, "tenders": []}
 
     # Lookup-map voor denormalized opslag na de scan
     tender_map = {str(t["id"]): t for t in tenders}
@@ -615,25 +656,26 @@ Retourneer UITSLUITEND dit JSON-formaat, geen uitleg:
   ]
 }}"""
 
-    raw = ""
-    try:
-        resp = await asyncio.to_thread(
-            call_claude,
-            messages=[{"role": "user", "content": prompt}],
-            model=CLAUDE_MODEL,
-            max_tokens=2000,
-            system="Je bent een expert in aanbestedingen en bedrijfsmatching. Retourneer alleen valide JSON.",
-            log_usage=False,
-        )
-        raw = resp.content[0].text.strip()
-        data = json.loads(extraheer_json(raw))
-        beoordelingen = data.get("beoordelingen", [])
-    except json.JSONDecodeError as e:
-        logger.error("JSON parse fout bij scan: %s | raw: %s", e, raw[:200])
-        raise HTTPException(status_code=502, detail="AI retourneerde ongeldige JSON")
-    except Exception as e:
-        logger.error("Claude fout bij scan: %s", e)
-        raise HTTPException(status_code=502, detail="AI-scan mislukt")
+    return {
+        "bedrijf_id":      bedrijf_id,
+        "tenders":         tenders,
+        "tender_map":      tender_map,
+        "tenderbureau_id": tenderbureau_id,
+        "verzoek": {
+            "model":      CLAUDE_MODEL,
+            "max_tokens": 2000,
+            "system":     SCAN_SYSTEEM,
+            "messages":   [{"role": "user", "content": prompt}],
+        },
+    }
+
+
+def _sla_scan_op(db: Client, scan: dict, beoordelingen: list) -> dict:
+    """Upsert de beoordelingen van één bedrijfsscan als matches."""
+    bedrijf_id      = scan["bedrijf_id"]
+    tenders         = scan["tenders"]
+    tender_map      = scan["tender_map"]
+    tenderbureau_id = scan["tenderbureau_id"]
 
     # Sla matches op (upsert op bedrijf_id + tender_id, denormalized tenderinfo)
     nieuwe_matches = 0
@@ -690,6 +732,78 @@ Retourneer UITSLUITEND dit JSON-formaat, geen uitleg:
     }
 
 
+async def _start_scan_batch(bedrijven: list, body: ScanBureauRequest, current_user: dict, db: Client) -> dict:
+    """scan-bureau in batch-modus: verzoeken bouwen, batch op de achtergrond."""
+    scans, resultaten = {}, []
+    for bedrijf in bedrijven:
+        try:
+            _check_toegang(db, bedrijf["id"], current_user)
+            scan = _bereid_scan_voor(
+                db, bedrijf["id"], ScanRequest(max_tenders=body.max_tenders_per_bedrijf or 20), current_user
+            )
+            if scan["tenders"]:
+                scans[str(bedrijf["id"])] = scan
+        except Exception as e:
+            logger.warning("Scan voorbereiden mislukt voor bedrijf %s: %s", bedrijf["id"], e)
+            resultaten.append({"bedrijf_id": bedrijf["id"], "bedrijfsnaam": bedrijf["bedrijfsnaam"], "fout": str(e)})
+
+    if scans:
+        start_achtergrondtaak(_verwerk_scan_batch(scans))
+
+    return {
+        "ok": True,
+        "batch": True,
+        "gescande_bedrijven": len(scans),
+        "totaal_nieuwe_matches": 0,
+        "resultaten": resultaten,
+        "bericht": "Scan ingediend als batch; matches verschijnen zodra de batch klaar is.",
+    }
+
+
+async def _verwerk_scan_batch(scans: dict):
+    """Dien de scan-batch in; _sla_scan_batch_op slaat de matches op."""
+    try:
+        await verwerk_batch(
+            {bedrijf_id: scan["verzoek"] for bedrijf_id, scan in scans.items()},
+            "scan-bureau",
+            {
+                bedrijf_id: {k: scan[k] for k in ("bedrijf_id", "tenders", "tenderbureau_id")}
+                for bedrijf_id, scan in scans.items()
+            },
+        )
+    except Exception as e:
+        logger.error("Scan-batch mislukt: %s", e)
+
+
+async def _sla_scan_batch_op(uitkomst: dict, context: dict):
+    """Verwerker 'scan-bureau': per bedrijf de matches van de batch opslaan."""
+    db = get_supabase()
+    totaal_nieuw = 0
+    for bedrijf_id, scan in context.items():
+        if bedrijf_id not in uitkomst:
+            logger.info("Scan-batch: bedrijf %s geannuleerd of verlopen", bedrijf_id)
+            continue
+        bericht = uitkomst[bedrijf_id]
+        if not bericht or not bericht.content:
+            logger.warning("Scan-batch: geen resultaat voor bedrijf %s", bedrijf_id)
+            continue
+        raw = bericht.content[0].text.strip()
+        try:
+            beoordelingen = json.loads(extraheer_json(raw)).get("beoordelingen", [])
+        except json.JSONDecodeError as e:
+            logger.error("JSON parse fout bij scan-batch %s: %s | raw: %s", bedrijf_id, e, raw[:200])
+            continue
+        scan = {**scan, "tender_map": {str(t["id"]): t for t in scan["tenders"]}}
+        try:
+            totaal_nieuw += _sla_scan_op(db, scan, beoordelingen)["nieuwe_matches"]
+        except Exception as e:
+            logger.warning("Scan-batch opslaan mislukt voor bedrijf %s: %s", bedrijf_id, e)
+    logger.info("Scan-batch klaar: %d bedrijven, %d matches opgeslagen", len(context), totaal_nieuw)
+
+
+registreer_verwerker("scan-bureau", _sla_scan_batch_op)
+
+
 @router.put("/activeer/{bedrijf_id}")
 async def toggle_signalering(
     bedrijf_id: str,
@@ -995,8 +1109,7 @@ Retourneer UITSLUITEND dit JSON-formaat, geen uitleg:
 
     raw = ""
     try:
-        resp = await asyncio.to_thread(
-            call_claude,
+        resp = await acall_claude(
             messages=[{"role": "user", "content": prompt}],
             model=CLAUDE_MODEL,
             max_tokens=max_tokens,
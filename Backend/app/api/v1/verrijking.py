@@ -1,6 +1,14 @@
 """
 Verrijking API - TenderZen
 Website scraping + AI verrijking voor bedrijven in de matchpool.
+
+Bulk job in batch-modus (BulkStartRequest.batch): per BULK_BATCH_GROOTTE
+bedrijven eerst scrapen, dan alle Claude-verzoeken in één Message Batch
+(halve prijs, buiten de rate limits van interactief werk). Terwijl een
+batch loopt wordt het volgende blok al gescraped. De batch staat in
+claude_batches; na een herstart slaat de verzamelaar de resultaten alsnog
+op. Door bulk-stop geannuleerde (of verlopen) verzoeken laten de status van
+het bedrijf ongemoeid, zodat een volgende run ze weer oppakt.
 """
 
 import asyncio
@@ -18,7 +26,8 @@ from pydantic import BaseModel
 
 from app.core.database import get_supabase_admin
 from app.core.dependencies import get_current_user
-from app.services.anthropic_service import call_claude
+from app.services.anthropic_service import acall_claude, claude_prioriteit, PRIORITEIT_ACHTERGROND
+from app.services.claude_batches import registreer_verwerker, start_achtergrondtaak, verwerk_batch
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/verrijking", tags=["verrijking"])
@@ -28,6 +37,7 @@ HTTP_TIMEOUT   = 5
 SCRAPE_TIMEOUT = 8
 MAX_TEXT_CHARS = 4000
 PAUZE_SECONDEN = 0.3
+BULK_BATCH_GROOTTE = 200
 
 HTTP_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; TenderZen-bot/1.0)"}
 
@@ -52,6 +62,8 @@ PARKING_KEYWORDS = [
 
 _bulk_job: dict = {
     "actief":      False,
+    "modus":       "direct",
+    "in_batch":    0,
     "totaal":      0,
     "verwerkt":    0,
     "verrijkt":    0,
@@ -194,25 +206,37 @@ Website tekst:
 {tekst}"""
 
 
-async def _vraag_claude(naam: str, stad: str, branche: str, tekst: str) -> Optional[dict]:
+def _claude_verzoek(bedrijf: dict, tekst: str) -> dict:
+    """messages.create-argumenten (direct of als batch-verzoek)."""
     prompt = _CLAUDE_PROMPT.format(
-        naam=naam, stad=stad or "onbekend",
-        branche=branche or "onbekend", tekst=tekst,
+        naam=(bedrijf.get("bedrijfsnaam") or "").strip(),
+        stad=(bedrijf.get("plaats") or "").strip() or "onbekend",
+        branche=(bedrijf.get("branche") or "").strip() or "onbekend",
+        tekst=tekst,
     )
+    return {
+        "model":      CLAUDE_MODEL,
+        "max_tokens": 600,
+        "messages":   [{"role": "user", "content": prompt}],
+    }
+
+
+def _parse_ai_json(raw: str) -> Optional[dict]:
+    raw   = raw.strip()
+    start = raw.find("{")
+    eind  = raw.rfind("}") + 1
+    if start == -1 or eind == 0:
+        return None
     try:
-        resp = await asyncio.to_thread(
-            call_claude,
-            messages=[{"role": "user", "content": prompt}],
-            model=CLAUDE_MODEL,
-            max_tokens=600,
-            log_usage=False,
-        )
-        raw   = resp.content[0].text.strip()
-        start = raw.find("{")
-        eind  = raw.rfind("}") + 1
-        if start == -1 or eind == 0:
-            return None
         return json.loads(raw[start:eind])
+    except json.JSONDecodeError:
+        return None
+
+
+async def _vraag_claude(verzoek: dict) -> Optional[dict]:
+    try:
+        resp = await acall_claude(**verzoek, log_usage=False)
+        return _parse_ai_json(resp.content[0].text)
     except Exception as e:
         logger.error(f"[verrijking] Claude fout: {e}")
         return None
@@ -233,14 +257,15 @@ def _sla_status_op(db, bedrijf_id: str, status: str, website: Optional[str] = No
 
 # ── Verrijking pipeline ───────────────────────────────────────────────────────
 
-async def _verrijk_bedrijf(bedrijf: dict) -> dict:
-    """Volledige verrijkingspipeline. Slaat altijd op in DB."""
+async def _scrape_bedrijf(db, bedrijf: dict) -> dict:
+    """
+    Stap 1-2: URL vinden en scrapen. Bij een fout is de status al opgeslagen
+    en is het resultaat definitief; anders status 'gescraped' met tekst.
+    """
     naam    = (bedrijf.get("bedrijfsnaam") or "").strip()
     stad    = (bedrijf.get("plaats")       or "").strip()
-    branche = (bedrijf.get("branche")      or "").strip()
     bid     = bedrijf["id"]
     bestaande_url = (bedrijf.get("website") or "").strip()
-    db = get_supabase_admin()
 
     async with httpx.AsyncClient(verify=False, follow_redirects=True, headers=HTTP_HEADERS) as client:
         # Stap 1: URL vinden
@@ -266,8 +291,13 @@ async def _verrijk_bedrijf(bedrijf: dict) -> dict:
                 "ai_omschrijving": None, "ai_omschrijving_json": None,
                 "fout": "Scraping mislukt of parking page"}
 
-    # Stap 3: Claude (buiten httpx context)
-    ai_json = await _vraag_claude(naam, stad, branche, tekst)
+    return {"id": bid, "status": "gescraped", "website": gevonden_url, "tekst": tekst}
+
+
+def _sla_verrijking_op(db, bedrijf: dict, gevonden_url: str, ai_json: Optional[dict]) -> dict:
+    """Stap 4: AI-resultaat (of ai_fout) opslaan."""
+    naam = (bedrijf.get("bedrijfsnaam") or "").strip()
+    bid  = bedrijf["id"]
     if not ai_json:
         _sla_status_op(db, bid, "ai_fout", website=gevonden_url)
         return {"id": bid, "status": "ai_fout", "website": gevonden_url,
@@ -291,6 +321,18 @@ async def _verrijk_bedrijf(bedrijf: dict) -> dict:
             "ai_omschrijving": ai_json.get("kernactiviteit"),
             "ai_omschrijving_json": ai_json, "fout": None}
 
+
+async def _verrijk_bedrijf(bedrijf: dict) -> dict:
+    """Volledige verrijkingspipeline. Slaat altijd op in DB."""
+    db = get_supabase_admin()
+    res = await _scrape_bedrijf(db, bedrijf)
+    if res["status"] != "gescraped":
+        return res
+
+    # Stap 3: Claude (buiten httpx context)
+    ai_json = await _vraag_claude(_claude_verzoek(bedrijf, res["tekst"]))
+    return _sla_verrijking_op(db, bedrijf, res["website"], ai_json)
+
 # ── Bulk job ──────────────────────────────────────────────────────────────────
 
 def _log_bulk(bericht: str):
@@ -343,6 +385,122 @@ async def _run_bulk_job(bedrijf_ids: list):
     _bulk_job["gestopt_op"] = datetime.now(timezone.utc).isoformat()
     _log_bulk("=== Bulk job voltooid ===")
 
+
+def _tel_resultaat(res: dict):
+    naam = res.get("naam", "?")
+    _bulk_job["verwerkt"] += 1
+    if res["status"] == "verrijkt":
+        _bulk_job["verrijkt"] += 1
+        _log_bulk(f"[OK] {naam} — verrijkt")
+    else:
+        _bulk_job["mislukt"] += 1
+        _log_bulk(f"[!!] {naam} — {res['status']}")
+
+
+async def _sla_batch_resultaten_op(uitkomst: dict, context: dict):
+    """
+    Verwerker 'verrijking': AI-resultaten van één batch opslaan.
+    Geannuleerd / verlopen (ontbreekt in uitkomst) → status ongewijzigd.
+    """
+    db = get_supabase_admin()
+    for bid, ctx in context.items():
+        naam = ctx["bedrijf"].get("bedrijfsnaam", "?")
+        if bid not in uitkomst:
+            _bulk_job["verwerkt"] += 1
+            _log_bulk(f"[--] {naam} — niet geanalyseerd (batch geannuleerd of verlopen)")
+            continue
+        bericht = uitkomst[bid]
+        ai_json = _parse_ai_json(bericht.content[0].text) if bericht and bericht.content else None
+        res = _sla_verrijking_op(db, ctx["bedrijf"], ctx["website"], ai_json)
+        _tel_resultaat({**res, "naam": naam})
+
+
+registreer_verwerker("verrijking", _sla_batch_resultaten_op)
+
+
+async def _verwerk_batch_blok(wachtend: dict):
+    """Claude-verzoeken van één blok als Message Batch; resultaten opslaan."""
+    verzoeken = {bid: w["verzoek"] for bid, w in wachtend.items()}
+    context   = {bid: {"bedrijf": w["bedrijf"], "website": w["website"]} for bid, w in wachtend.items()}
+    _bulk_job["in_batch"] += len(wachtend)
+    try:
+        await verwerk_batch(
+            verzoeken, "verrijking", context, gestopt=lambda: not _bulk_job["actief"]
+        )
+    except Exception as e:
+        # Indienen mislukt: niets geanalyseerd, status blijft ongewijzigd
+        logger.error(f"[bulk] Batch mislukt: {e}")
+        _bulk_job["verwerkt"] += len(wachtend)
+        _bulk_job["mislukt"]  += len(wachtend)
+        _log_bulk(f"[ERR] Batch indienen mislukt — {len(wachtend)} bedrijven ongewijzigd")
+    finally:
+        _bulk_job["in_batch"] -= len(wachtend)
+
+
+async def _run_bulk_job_batch(bedrijf_ids: list):
+    """
+    Batch-modus: per blok eerst scrapen, dan één Message Batch voor de
+    Claude-analyses. Het volgende blok wordt gescraped terwijl de batch
+    van het vorige loopt (hooguit één batch tegelijk).
+    """
+    db = get_supabase_admin()
+    lopend: Optional[asyncio.Task] = None
+
+    for i in range(0, len(bedrijf_ids), BULK_BATCH_GROOTTE):
+        if not _bulk_job["actief"]:
+            break
+        blok = bedrijf_ids[i:i + BULK_BATCH_GROOTTE]
+        try:
+            r = db.table("bedrijven") \
+                .select("id,bedrijfsnaam,plaats,branche,website") \
+                .in_("id", blok).execute()
+            bedrijven = {b["id"]: b for b in (r.data or [])}
+        except Exception as e:
+            logger.error(f"[bulk] Ophalen blok fout: {e}")
+            _bulk_job["verwerkt"] += len(blok)
+            _bulk_job["mislukt"]  += len(blok)
+            continue
+        _bulk_job["verwerkt"] += len(blok) - len(bedrijven)   # niet (meer) gevonden
+
+        wachtend: dict = {}
+        for bid in blok:
+            bedrijf = bedrijven.get(bid)
+            if not bedrijf:
+                continue
+            if not _bulk_job["actief"]:
+                break
+            naam = bedrijf.get("bedrijfsnaam", "?")
+            try:
+                res = await _scrape_bedrijf(db, bedrijf)
+            except Exception as e:
+                logger.error(f"[bulk] Scrape fout {naam}: {e}")
+                _bulk_job["verwerkt"] += 1
+                _bulk_job["mislukt"]  += 1
+                _log_bulk(f"[ERR] {naam} — onverwachte fout")
+                continue
+            if res["status"] == "gescraped":
+                wachtend[bid] = {
+                    "bedrijf": bedrijf,
+                    "website": res["website"],
+                    "verzoek": _claude_verzoek(bedrijf, res["tekst"]),
+                }
+            else:
+                _tel_resultaat({**res, "naam": naam})
+
+        if lopend:
+            await lopend
+            lopend = None
+        if wachtend:
+            _log_bulk(f"Batch met {len(wachtend)} analyses ingediend")
+            lopend = asyncio.create_task(_verwerk_batch_blok(wachtend))
+
+    if lopend:
+        await lopend
+
+    _bulk_job["actief"]     = False
+    _bulk_job["gestopt_op"] = datetime.now(timezone.utc).isoformat()
+    _log_bulk("=== Bulk job voltooid ===")
+
 # ══════════════════════════════════════════════════════════════════════════════
 # ENDPOINTS
 # ══════════════════════════════════════════════════════════════════════════════
@@ -351,6 +509,7 @@ class BulkStartRequest(BaseModel):
     alleen_niet_verrijkt: bool = True
     ook_mislukte:         bool = False
     max_bedrijven:        Optional[int] = None
+    batch:                bool = False   # Claude via Message Batches (halve prijs, trager)
 
 
 @router.get("/statistieken")
@@ -478,6 +637,8 @@ async def bulk_start(
 
     _bulk_job.update({
         "actief":     True,
+        "modus":      "batch" if body.batch else "direct",
+        "in_batch":   0,
         "totaal":     len(ids),
         "verwerkt":   0,
         "verrijkt":   0,
@@ -486,11 +647,16 @@ async def bulk_start(
         "gestopt_op": None,
         "log":        [],
     })
-    _log_bulk(f"=== Bulk job gestart: {len(ids)} bedrijven ===")
+    _log_bulk(f"=== Bulk job gestart: {len(ids)} bedrijven ({_bulk_job['modus']}) ===")
 
-    asyncio.create_task(_run_bulk_job(ids))
+    if body.batch:
+        start_achtergrondtaak(_run_bulk_job_batch(ids))
+    else:
+        # De taak erft de context: alle Claude-calls van de bulk job in de achtergrondbaan
+        with claude_prioriteit(PRIORITEIT_ACHTERGROND):
+            start_achtergrondtaak(_run_bulk_job(ids))
 
-    return {"gestart": True, "te_verwerken": len(ids)}
+    return {"gestart": True, "te_verwerken": len(ids), "modus": _bulk_job["modus"]}
 
 
 @router.post("/bulk-stop")
@@ -521,6 +687,8 @@ async def bulk_status(current_user: dict = Depends(get_current_user)):
 
     return {
         "actief":       _bulk_job["actief"],
+        "modus":        _bulk_job["modus"],
+        "in_batch":     _bulk_job["in_batch"],
         "totaal":       totaal,
         "verwerkt":     verwerkt,
         "verrijkt":     _bulk_job["verrijkt"],
@@ -41,6 +41,33 @@ class Settings(BaseSettings):
     rate_limit_window_minutes: int = Field(default=15)
     rate_limit_max_requests: int = Field(default=100)
     
+    # User-profiel cache (get_current_user)
+    user_cache_ttl_seconds: int = Field(default=300)
+    user_cache_max_entries: int = Field(default=1024)
+    
+    # Workload-drempels (bestaande taken per persoon per dag)
+    workload_warning_drempel: int = Field(default=3)
+    workload_error_drempel: int = Field(default=5)
+    
+    # Claude governor (per uvicorn worker; 0 = geen limiet, standaard uit).
+    # Inschakelen via CLAUDE_RPM_LIMIET / CLAUDE_TPM_LIMIET met de limiet van
+    # de Anthropic-organisatie gedeeld door het aantal workers, bv. bij
+    # 4 workers en 200 RPM / 400k TPM: CLAUDE_RPM_LIMIET=50, CLAUDE_TPM_LIMIET=100000.
+    claude_rpm_limiet: int = Field(default=0)
+    claude_tpm_limiet: int = Field(default=0)
+    claude_reserve_interactief: float = Field(default=0.25)
+    
+    # Claude response cache (lokale SQLite, gedeeld door de workers; '' = tempdir)
+    claude_cache_actief: bool = Field(default=True)
+    claude_cache_pad: str = Field(default="")
+    claude_cache_max_mb: int = Field(default=256)
+    
+    # Message Batches: andere base URL (bijv. scripts/claude_batch_stub.py) voor offline testen
+    claude_batch_base_url: Optional[str] = Field(default=None)
+    
+    # Pre-flight: input tellen via count_tokens (False = alleen schatten, bijv. offline)
+    claude_preflight_tellen: bool = Field(default=True)
+    
     # Optional Features (AI, Email, etc.)
     openai_api_key: Optional[str] = Field(default=None, alias="OPENAI_API_KEY")
     sendgrid_api_key: Optional[str] = Field(default=None, alias="SENDGRID_API_KEY")
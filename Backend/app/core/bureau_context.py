@@ -12,6 +12,17 @@ SECURITY PRINCIPES:
 3. Elke endpoint die bureau-specifieke data ophaalt MOET deze helper gebruiken
 4. Fallback naar "alle data" is VERBODEN
 
+v3.6: db mag een sync Client óf een AsyncSupabaseClient zijn
+      (queries lopen via app.core.database.execute).
+v3.7: optionele RequestContext — de user_bureau_access fallback en
+      validate_bureau_access gebruiken dan de per-request gememoizede
+      bureau-toegang i.p.v. een eigen query.
+v3.8: ensure_bureau_access — 403 als de gebruiker geen toegang heeft tot
+      het (via ?tenderbureau_id= meegegeven) bureau. Verplicht vóór elke
+      per-proces cache die per bureau gesleuteld is (agenda, workload-
+      matrix, templates): een cache-hit gaat niet langs RLS.
+      validate_bureau_access accepteert ook het profiel-bureau.
+
 INSTALLATIE:
 1. Kopieer naar Backend/app/core/bureau_context.py
 2. Importeer in endpoints:
@@ -22,6 +33,9 @@ from typing import Optional
 from fastapi import HTTPException, Query
 import logging
 
+from app.core.database import execute
+from app.core.request_context import RequestContext
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,7 +44,8 @@ async def resolve_bureau_id(
     explicit_bureau_id: Optional[str] = None,
     tender_id: Optional[str] = None,
     db=None,
-    required: bool = True
+    required: bool = True,
+    context: Optional[RequestContext] = None
 ) -> Optional[str]:
     """
     Bepaal de juiste tenderbureau_id voor een API call.
@@ -45,8 +60,9 @@ async def resolve_bureau_id(
         current_user: Dict met user data (uit get_current_user)
         explicit_bureau_id: Bureau ID meegegeven als query param
         tender_id: Optioneel tender ID om bureau van af te leiden
-        db: Supabase client (nodig voor lookups)
+        db: Supabase client, sync of async (nodig voor lookups)
         required: Als True, gooi exception als geen bureau gevonden
+        context: Optionele RequestContext (hergebruikt bureau-toegang)
         
     Returns:
         tenderbureau_id string, of None als niet gevonden en required=False
@@ -65,11 +81,12 @@ async def resolve_bureau_id(
     # ── 2. Afleiden van tender ──
     if tender_id and db:
         try:
-            result = db.table('tenders') \
-                .select('tenderbureau_id') \
-                .eq('id', tender_id) \
-                .limit(1) \
-                .execute()
+            result = await execute(
+                db.table('tenders')
+                .select('tenderbureau_id')
+                .eq('id', tender_id)
+                .limit(1)
+            )
             if result.data and result.data[0].get('tenderbureau_id'):
                 bureau_id = result.data[0]['tenderbureau_id']
                 logger.debug(f"Bureau via tender {tender_id}: {bureau_id}")
@@ -99,14 +116,20 @@ async def resolve_bureau_id(
         return bureau_id
     
     # ── 5. Fallback: user_bureau_access ──
-    if user_id and db:
+    if context is not None:
+        bureau_ids = await context.get_bureau_ids()
+        if bureau_ids:
+            logger.debug(f"Bureau via request context: {bureau_ids[0]}")
+            return bureau_ids[0]
+    elif user_id and db:
         try:
-            result = db.table('user_bureau_access') \
-                .select('tenderbureau_id') \
-                .eq('user_id', user_id) \
-                .eq('is_active', True) \
-                .limit(1) \
-                .execute()
+            result = await execute(
+                db.table('user_bureau_access')
+                .select('tenderbureau_id')
+                .eq('user_id', user_id)
+                .eq('is_active', True)
+                .limit(1)
+            )
             if result.data:
                 bureau_id = result.data[0]['tenderbureau_id']
                 logger.debug(f"Bureau via user_bureau_access: {bureau_id}")
@@ -132,29 +155,67 @@ def is_super_admin(current_user: dict) -> bool:
 async def validate_bureau_access(
     current_user: dict,
     bureau_id: str,
-    db=None
+    db=None,
+    context: Optional[RequestContext] = None
 ) -> bool:
     """
     Valideer dat een user toegang heeft tot een specifiek bureau.
     
     Super-admin: altijd True (heeft toegang tot alles)
-    Normale user: check user_bureau_access
+    Normale user: profiel-bureau of check user_bureau_access
     """
     if is_super_admin(current_user):
         return True
     
+    if bureau_id and bureau_id == current_user.get('tenderbureau_id'):
+        return True
+    
+    if context is not None:
+        return await context.has_bureau_access(bureau_id)
+    
     user_id = current_user.get('id') or current_user.get('sub')
     if not user_id or not db:
         return False
     
     try:
-        result = db.table('user_bureau_access') \
-            .select('id') \
-            .eq('user_id', user_id) \
-            .eq('tenderbureau_id', bureau_id) \
-            .eq('is_active', True) \
-            .limit(1) \
-            .execute()
+        result = await execute(
+            db.table('user_bureau_access')
+            .select('id')
+            .eq('user_id', user_id)
+            .eq('tenderbureau_id', bureau_id)
+            .eq('is_active', True)
+            .limit(1)
+        )
         return bool(result.data)
     except Exception:
         return False
+
+
+async def ensure_bureau_access(
+    current_user: dict,
+    bureau_id: Optional[str],
+    db=None,
+    context: Optional[RequestContext] = None
+) -> Optional[str]:
+    """
+    Als validate_bureau_access, maar gooit 403 bij geen toegang.
+    
+    resolve_bureau_id vertrouwt een expliciet meegegeven bureau; zolang
+    de query via de user JWT loopt houdt RLS een ander bureau tegen. Een
+    endpoint dat uit een per-bureau cache antwoordt moet het bureau eerst
+    hiermee valideren. bureau_id=None (super-admin "alle bureaus") gaat
+    ongewijzigd door.
+    
+    Returns:
+        bureau_id
+        
+    Raises:
+        HTTPException 403 als de gebruiker geen toegang heeft
+    """
+    if bureau_id is None:
+        return None
+    if not await validate_bureau_access(current_user, bureau_id, db=db, context=context):
+        user_id = current_user.get('id') or current_user.get('sub')
+        logger.warning(f"⛔ SECURITY: user {user_id} vroeg bureau {bureau_id} op zonder toegang")
+        raise HTTPException(status_code=403, detail="Geen toegang tot dit bureau")
+    return bureau_id
@@ -1,5 +1,22 @@
 # Backend/app/core/database.py
-# Database connectie helpers — TenderZen v3.5
+# Database connectie helpers — TenderZen v3.7
+#
+# WIJZIGINGEN v3.7:
+# - NIEUW: gedeelde connection pool per proces (httpx transport)
+#   → get_supabase_with_token() roept niet langer create_client() aan
+#     per request; retourneert een lichte UserScopedClient-view met de
+#     user JWT als Authorization header boven de gedeelde pool
+#   → Geen TLS handshake + nieuwe socket meer per RLS-request
+#   → AsyncSupabaseClient gebruikt dezelfde aanpak (async pool)
+#
+# WIJZIGINGEN v3.6:
+# - NIEUW: AsyncSupabaseClient — echte async PostgREST + Storage client
+#   → .execute() is awaitable, blokkeert de event loop niet meer
+#   → Gebruikt door de service-laag (Tender/Planning/Backplanning/
+#     SmartImport/Finalize)
+# - NIEUW: get_async_supabase(), get_async_supabase_admin(),
+#   get_async_supabase_with_token(jwt), get_async_db() dependency
+# - NIEUW: execute() helper — voert een query uit op sync óf async client
 #
 # WIJZIGINGEN v3.5 (2026-02-11):
 # - NIEUW: get_supabase_with_token() — Supabase client met user JWT
@@ -13,7 +30,7 @@
 #
 # ARCHITECTUUR:
 # ┌─────────────────────────────────────────────────────────┐
-# │  get_supabase_with_token(jwt)  ← NIEUW, voor endpoints │
+# │  get_supabase_with_token(jwt)  ← voor endpoints         │
 # │  ├── apikey header = SECRET_KEY                         │
 # │  └── Authorization  = Bearer {user JWT}                 │
 # │      → auth.uid() = user's UUID ✅                      │
@@ -24,11 +41,24 @@
 # │                                                         │
 # │  get_supabase_admin()  ← Optioneel, service_role key    │
 # │  └── Omzeilt RLS volledig ⛔                             │
+# │                                                         │
+# │  get_async_supabase*()  ← v3.6, async varianten van     │
+# │  └── bovenstaande, voor services (await .execute())     │
+# │                                                         │
+# │  Alle PostgREST/Storage sessies delen per proces één    │
+# │  connection pool (v3.7) — per request alleen headers.   │
 # └─────────────────────────────────────────────────────────┘
 
 import os
+import inspect
 import logging
+from typing import Any, Dict, Optional
+import httpx
 from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from postgrest.utils import AsyncClient as _PostgrestAsyncSession
+from postgrest.utils import SyncClient as _PostgrestSyncSession
+from storage3 import AsyncStorageClient
 from functools import lru_cache
 
 from app.config import settings
@@ -42,6 +72,96 @@ SUPABASE_SECRET_KEY = settings.supabase_secret_key
 # Service role key is optioneel — kan in .env staan als SUPABASE_SERVICE_ROLE_KEY
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
+# Limieten van de gedeelde connection pool (per uvicorn worker)
+HTTP_POOL_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=30.0,
+)
+
+
+# ─── Gedeelde connection pool (v3.7) ───
+
+@lru_cache()
+def _get_http_transport() -> httpx.HTTPTransport:
+    """Eén sync transport (= connection pool + TLS context) per proces."""
+    return httpx.HTTPTransport(limits=HTTP_POOL_LIMITS)
+
+
+@lru_cache()
+def _get_async_http_transport() -> httpx.AsyncHTTPTransport:
+    """Eén async transport (= connection pool + TLS context) per proces."""
+    return httpx.AsyncHTTPTransport(limits=HTTP_POOL_LIMITS, http2=True)
+
+
+class _SharedTransport(httpx.BaseTransport):
+    """
+    Sync transport-view over de gedeelde pool.
+
+    Een per-request client mag bij het opruimen de gedeelde pool NIET
+    sluiten — close() is daarom een no-op.
+    """
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return _get_http_transport().handle_request(request)
+
+    def close(self) -> None:
+        pass
+
+
+class _SharedAsyncTransport(httpx.AsyncBaseTransport):
+    """Async tegenhanger van _SharedTransport."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await _get_async_http_transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class _PooledPostgrestClient(SyncPostgrestClient):
+    """SyncPostgrestClient waarvan de sessie de gedeelde pool gebruikt."""
+
+    def create_session(self, base_url, headers, timeout) -> _PostgrestSyncSession:
+        return _PostgrestSyncSession(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            transport=_SharedTransport(),
+        )
+
+
+class _PooledAsyncPostgrestClient(AsyncPostgrestClient):
+    """AsyncPostgrestClient waarvan de sessie de gedeelde pool gebruikt."""
+
+    def create_session(self, base_url, headers, timeout) -> _PostgrestAsyncSession:
+        return _PostgrestAsyncSession(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            transport=_SharedAsyncTransport(),
+        )
+
+
+class _PooledAsyncStorageClient(AsyncStorageClient):
+    """AsyncStorageClient waarvan de sessie de gedeelde pool gebruikt."""
+
+    def _create_session(self, base_url, headers, timeout, verify=True) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=_SharedAsyncTransport(),
+        )
+
+
+def _supabase_headers(key: str) -> Dict[str, str]:
+    return {
+        "apikey": key,
+        "Authorization": f"Bearer {key}",
+    }
+
 
 @lru_cache()
 def get_supabase() -> Client:
@@ -68,7 +188,51 @@ def get_supabase_admin() -> Client:
     return create_client(SUPABASE_URL, key)
 
 
-def get_supabase_with_token(token: str) -> Client:
+class UserScopedClient:
+    """
+    Lichte per-request view met de JWT van de ingelogde gebruiker.
+
+    Heeft dezelfde query API als supabase.Client (table/from_/rpc), maar
+    bouwt geen eigen httpx client/TLS sessie op: de PostgREST sessie
+    gebruikt de gedeelde connection pool van het proces. Alleen de
+    headers (apikey + user JWT) zijn per request.
+
+    storage/auth worden gedelegeerd aan de gedeelde get_supabase() client
+    (die gebruikten ook vóór v3.7 de secret key, niet de user JWT).
+    """
+
+    def __init__(self, supabase_url: str, supabase_key: str, access_token: str):
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+
+        self.postgrest = _PooledPostgrestClient(
+            f"{supabase_url}/rest/v1",
+            headers=_supabase_headers(supabase_key)
+        )
+        self.postgrest.auth(access_token)
+
+    def table(self, table_name: str):
+        """Start een query op een tabel of view."""
+        return self.postgrest.from_(table_name)
+
+    def from_(self, table_name: str):
+        """Alias van table(), zoals bij supabase.Client."""
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None):
+        """Roep een PostgreSQL functie aan."""
+        return self.postgrest.rpc(fn, params or {})
+
+    @property
+    def storage(self):
+        return get_supabase().storage
+
+    @property
+    def auth(self):
+        return get_supabase().auth
+
+
+def get_supabase_with_token(token: str) -> UserScopedClient:
     """
     Supabase client met de JWT van de ingelogde gebruiker.
     
@@ -79,22 +243,18 @@ def get_supabase_with_token(token: str) -> Client:
     - RLS policies   = werken correct ✅
     
     ⚠️ NIET cachen — elke request heeft een eigen token.
+    De view zelf is goedkoop: de connection pool wordt gedeeld (v3.7).
     
     Args:
         token: De JWT access token van de ingelogde gebruiker
     
     Returns:
-        Supabase Client met user-context voor RLS
+        UserScopedClient met user-context voor RLS
     """
     if not token:
         raise ValueError("User token is vereist voor get_supabase_with_token()")
     
-    # Maak een NIEUWE client per request (niet cachen — token is user-specifiek)
-    client = create_client(SUPABASE_URL, SUPABASE_SECRET_KEY)
-    
-    # Stel de user JWT in als Authorization header voor PostgREST
-    # Dit zorgt ervoor dat auth.uid() de juiste user UUID retourneert
-    client.postgrest.auth(token)
+    client = UserScopedClient(SUPABASE_URL, SUPABASE_SECRET_KEY, token)
     
     logger.debug("Supabase client aangemaakt met user token voor RLS")
     
@@ -114,5 +274,118 @@ async def get_supabase_async() -> Client:
     return get_supabase()
 
 
+# ─── Async client (v3.6) ───
+
+class AsyncSupabaseClient:
+    """
+    Async tegenhanger van supabase.Client.
+
+    Zelfde query-builder API als de sync client (table/from_/rpc/storage),
+    maar .execute() en storage-calls zijn coroutines:
+
+        result = await db.table('tenders') \\
+            .select('id, naam') \\
+            .eq('tenderbureau_id', bureau_id) \\
+            .execute()
+
+    Hierdoor blokkeert een trage PostgREST round trip niet langer de
+    uvicorn event loop (en daarmee alle andere requests op die worker).
+    """
+
+    def __init__(
+        self,
+        supabase_url: str,
+        supabase_key: str,
+        access_token: Optional[str] = None
+    ):
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+
+        # Sessies delen de async connection pool van het proces (v3.7)
+        self.postgrest = _PooledAsyncPostgrestClient(
+            f"{supabase_url}/rest/v1",
+            headers=_supabase_headers(supabase_key)
+        )
+        if access_token:
+            # Zelfde gedrag als get_supabase_with_token(): alleen PostgREST
+            # krijgt de user JWT, zodat auth.uid() werkt in RLS policies
+            self.postgrest.auth(access_token)
+
+        self.storage = _PooledAsyncStorageClient(
+            f"{supabase_url}/storage/v1",
+            _supabase_headers(supabase_key)
+        )
+
+    def table(self, table_name: str):
+        """Start een query op een tabel of view."""
+        return self.postgrest.from_(table_name)
+
+    def from_(self, table_name: str):
+        """Alias van table(), zoals bij supabase.Client."""
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None):
+        """Roep een PostgreSQL functie aan (await .execute())."""
+        return self.postgrest.rpc(fn, params or {})
+
+
+@lru_cache()
+def get_async_supabase() -> AsyncSupabaseClient:
+    """
+    Async variant van get_supabase() — secret key, één client per proces.
+
+    ⚠️ LET OP: auth.uid() is NULL met deze client!
+    Voor endpoint queries met RLS → gebruik get_async_user_db() dependency.
+    """
+    return AsyncSupabaseClient(SUPABASE_URL, SUPABASE_SECRET_KEY)
+
+
+@lru_cache()
+def get_async_supabase_admin() -> AsyncSupabaseClient:
+    """
+    Async variant van get_supabase_admin().
+
+    ⛔ WAARSCHUWING: Omzeilt Row Level Security volledig!
+    """
+    key = SUPABASE_SERVICE_ROLE_KEY or SUPABASE_SECRET_KEY
+    return AsyncSupabaseClient(SUPABASE_URL, key)
+
+
+def get_async_supabase_with_token(token: str) -> AsyncSupabaseClient:
+    """
+    Async variant van get_supabase_with_token() — client met user JWT.
+
+    ⚠️ NIET cachen — elke request heeft een eigen token.
+    """
+    if not token:
+        raise ValueError("User token is vereist voor get_async_supabase_with_token()")
+
+    return AsyncSupabaseClient(SUPABASE_URL, SUPABASE_SECRET_KEY, access_token=token)
+
+
+async def get_async_db() -> AsyncSupabaseClient:
+    """
+    FastAPI dependency — async tegenhanger van get_supabase_async().
+
+    ⚠️ Zelfde beperking als get_supabase(): auth.uid() = NULL.
+    """
+    return get_async_supabase()
+
+
+async def execute(query) -> Any:
+    """
+    Voer een query-builder uit op een sync óf async client.
+
+    Voor gedeelde helpers (bijv. bureau_context) die zowel vanuit
+    sync endpoints als vanuit async services worden aangeroepen:
+
+        result = await execute(db.table('users').select('id').eq('id', uid))
+    """
+    result = query.execute()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
 # ─── Backwards compatibility aliases ───
 get_supabase_client = get_supabase
@@ -1,7 +1,26 @@
 """
-FastAPI Dependencies — TenderZen v3.5
+FastAPI Dependencies — TenderZen v3.7
 Bevat authenticatie, autorisatie en database dependencies.
 
+WIJZIGINGEN v3.7 (request context):
+- NIEUW: get_request_context() — RequestContext met bureau/rol van de
+  user, één keer per request bepaald en gedeeld door alle services
+
+WIJZIGINGEN v3.7 (user cache):
+- get_current_user() leest de users-rij uit user_profile_cache
+  → Eén database round trip minder per API call
+  → TTL begrensd door de 'exp' claim van de JWT
+  → Invalidatie via app.core.user_cache.invalidate_user()
+
+WIJZIGINGEN v3.7:
+- get_user_db() retourneert een UserScopedClient: lichte view met de
+  user JWT boven de gedeelde connection pool (geen create_client() meer
+  per request)
+
+WIJZIGINGEN v3.6:
+- NIEUW: get_async_user_db() — async Supabase client met user JWT
+  → Voor services die hun queries awaiten (geen blokkerende event loop)
+
 WIJZIGINGEN v3.5 (2026-02-11):
 - NIEUW: get_user_db() — Supabase client met user JWT voor RLS
   → Vervangt get_supabase() in alle endpoint queries
@@ -22,8 +41,17 @@ from typing import Optional
 from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import Client
-from app.core.database import get_supabase, get_supabase_with_token
+from app.core.database import (
+    AsyncSupabaseClient,
+    UserScopedClient,
+    get_async_db,
+    get_supabase,
+    get_supabase_with_token,
+    get_async_supabase_with_token,
+)
 from app.core.security import decode_access_token
+from app.core.user_cache import user_profile_cache
+from app.core.request_context import RequestContext
 
 import logging
 
@@ -49,6 +77,7 @@ async def get_current_user(
     - Normale user: tenderbureau_id uit profiel (ongewijzigd)
     
     v3.5: Slaat ook _jwt_token op voor get_user_db()
+    v3.7: users-rij komt uit user_profile_cache als die nog geldig is
     """
     token = credentials.credentials
     payload = decode_access_token(token)
@@ -71,20 +100,26 @@ async def get_current_user(
     # lookup in get_current_user een bootstrap-operatie is.
     # De 'users' tabel moet accessible zijn met anon key
     # OF via een permissive RLS policy voor authenticated users.
-    db = get_supabase()
+    #
+    # v3.7: eerst de in-process cache (kopie van de ruwe users-rij)
+    user = user_profile_cache.get(user_id)
     try:
-        result = db.table('users') \
-            .select('*') \
-            .eq('id', user_id) \
-            .execute()
-
-        if not result.data:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
-            )
-
-        user = result.data[0]
+        if user is None:
+            db = get_supabase()
+            result = db.table('users') \
+                .select('*') \
+                .eq('id', user_id) \
+                .execute()
+
+            if not result.data:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found"
+                )
+
+            user = result.data[0]
+            user_profile_cache.set(user_id, user, token_exp=payload.get("exp"))
+            user = dict(user)
     except HTTPException:
         raise
     except Exception as e:
@@ -126,7 +161,7 @@ async def get_current_user(
 
 async def get_user_db(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> Client:
+) -> UserScopedClient:
     """
     Supabase client met de JWT van de ingelogde gebruiker.
     
@@ -155,6 +190,23 @@ async def get_team_members(
     return get_supabase_with_token(token)
 
 
+async def get_async_user_db(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> AsyncSupabaseClient:
+    """
+    Async variant van get_user_db() — zelfde RLS-gedrag (auth.uid() werkt),
+    maar queries worden ge-await en blokkeren de event loop niet.
+
+    Voorbeeld:
+        def get_backplanning_service(
+            db: AsyncSupabaseClient = Depends(get_async_user_db)
+        ) -> BackplanningService:
+            return BackplanningService(db)
+    """
+    token = credentials.credentials
+    return get_async_supabase_with_token(token)
+
+
 # ═══════════════════════════════════════════════════════════════
 # 3. AUTORISATIE — Role checks
 # ═══════════════════════════════════════════════════════════════
@@ -181,3 +233,21 @@ async def require_super_admin(
             detail="Super-admin rechten vereist"
         )
     return current_user
+
+
+# ═══════════════════════════════════════════════════════════════
+# 4. REQUEST CONTEXT — Bureau/rol, één keer per request
+# ═══════════════════════════════════════════════════════════════
+
+async def get_request_context(
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSupabaseClient = Depends(get_async_db),
+) -> RequestContext:
+    """
+    RequestContext voor de ingelogde gebruiker.
+
+    FastAPI cached deze dependency per request, dus services en helpers
+    (resolve_bureau_id) delen dezelfde context en doen de
+    user_bureau_access lookup hooguit één keer.
+    """
+    return RequestContext.from_current_user(db, current_user)
@@ -0,0 +1,137 @@
+"""
+Request Context — bureau/rol context, één keer per request bepaald
+TenderZen v1.0
+
+Voorheen deed elke service zijn eigen lookups:
+- PlanningService._get_user_bureau_id / _is_super_admin
+- TenderService._get_user_tenderbureau_id / _is_super_admin
+- bureau_context.resolve_bureau_id (user_bureau_access fallback)
+
+Eén dashboard-request raakte daardoor 2–4× dezelfde `users` /
+`user_bureau_access` rijen. RequestContext bundelt die gegevens:
+
+- user-velden (is_super_admin, role, profiel-bureau) komen direct uit
+  get_current_user — geen extra query
+- de actieve bureau-toegang wordt lazy opgehaald (één query, daarna
+  gememoized), zodat endpoints die hem niet nodig hebben niets betalen
+
+GEBRUIK:
+    from app.core.dependencies import get_request_context
+
+    def get_planning_service(
+        db: AsyncSupabaseClient = Depends(get_async_db),
+        context: RequestContext = Depends(get_request_context)
+    ) -> PlanningService:
+        return PlanningService(db, context)
+
+FastAPI cached de dependency per request: alle services en helpers
+binnen dezelfde request delen dus één RequestContext.
+"""
+
+from typing import List, Optional
+import logging
+
+from app.core.database import execute
+
+logger = logging.getLogger(__name__)
+
+
+class RequestContext:
+    """Bureau- en rolcontext van de ingelogde gebruiker voor één request."""
+
+    def __init__(self, db, user_id: str, user: Optional[dict] = None):
+        """
+        Args:
+            db: Supabase client, sync of async
+            user_id: UUID van de gebruiker
+            user: users-rij (zoals get_current_user hem teruggeeft), of None
+                  → wordt dan lazy uit de `users` tabel gehaald
+        """
+        self.db = db
+        self.user_id = user_id
+        self._user = user
+        self._bureau_ids: Optional[List[str]] = None
+
+    @classmethod
+    def from_current_user(cls, db, current_user: dict) -> "RequestContext":
+        """Bouw een context uit het resultaat van get_current_user()."""
+        user_id = current_user.get('id') or current_user.get('sub')
+        return cls(db, user_id, user=current_user)
+
+    # ── User-velden ──
+
+    async def _get_user(self) -> dict:
+        if self._user is None:
+            try:
+                result = await execute(
+                    self.db.table('users')
+                    .select('id, role, is_super_admin, tenderbureau_id')
+                    .eq('id', self.user_id)
+                    .limit(1)
+                )
+                self._user = result.data[0] if result.data else {}
+            except Exception as e:
+                logger.warning(f"⚠️ User lookup mislukt voor {self.user_id}: {e}")
+                self._user = {}
+        return self._user
+
+    async def is_super_admin(self) -> bool:
+        """users.is_super_admin flag."""
+        user = await self._get_user()
+        return user.get('is_super_admin', False) is True
+
+    async def get_role(self) -> Optional[str]:
+        """users.role (bijv. 'super_admin')."""
+        user = await self._get_user()
+        return user.get('role')
+
+    async def get_profile_bureau_id(self) -> Optional[str]:
+        """
+        users.tenderbureau_id — ook voor super-admins.
+
+        get_current_user nult tenderbureau_id voor super-admins en bewaart
+        de oorspronkelijke waarde in _original_tenderbureau_id.
+        """
+        user = await self._get_user()
+        if '_original_tenderbureau_id' in user:
+            return user.get('_original_tenderbureau_id')
+        return user.get('tenderbureau_id')
+
+    # ── Bureau-toegang ──
+
+    async def get_bureau_ids(self) -> List[str]:
+        """
+        Actieve bureaus uit user_bureau_access, meest recent gebruikt eerst.
+        Eén query per request, daarna uit het geheugen.
+        """
+        if self._bureau_ids is None:
+            try:
+                result = await execute(
+                    self.db.table('user_bureau_access')
+                    .select('tenderbureau_id')
+                    .eq('user_id', self.user_id)
+                    .eq('is_active', True)
+                    .order('last_accessed_at', desc=True)
+                )
+                self._bureau_ids = [
+                    row['tenderbureau_id'] for row in (result.data or [])
+                    if row.get('tenderbureau_id')
+                ]
+            except Exception as e:
+                logger.warning(f"⚠️ user_bureau_access lookup mislukt voor {self.user_id}: {e}")
+                self._bureau_ids = []
+        return self._bureau_ids
+
+    async def get_bureau_id(self) -> Optional[str]:
+        """
+        Standaard bureau van de gebruiker:
+        meest recente user_bureau_access, anders users.tenderbureau_id.
+        """
+        bureau_ids = await self.get_bureau_ids()
+        if bureau_ids:
+            return bureau_ids[0]
+        return await self.get_profile_bureau_id()
+
+    async def has_bureau_access(self, bureau_id: str) -> bool:
+        """Heeft de gebruiker een actieve koppeling met dit bureau?"""
+        return bureau_id in await self.get_bureau_ids()
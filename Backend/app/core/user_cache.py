@@ -0,0 +1,104 @@
+# Backend/app/core/user_cache.py
+# User-profiel cache voor get_current_user — TenderZen v1.0
+#
+# Zonder cache draait get_current_user() bij ELKE API call een
+# `users` select('*'). Deze module houdt per proces een begrensde
+# LRU-cache bij van de ruwe users-rij, gesleuteld op user id.
+#
+# REGELS:
+# - TTL = min(user_cache_ttl_seconds, resterende levensduur JWT)
+#   → een entry overleeft nooit het token waarmee hij is opgehaald
+# - Max user_cache_max_entries entries, oudste (LRU) vallen eruit
+# - Alleen echte DB-rijen worden gecached, NOOIT de JWT-fallback
+# - Na schrijven naar `users` / bureau-toegang → invalidate_user(user_id)
+#   (profile_router.update_profile). Wijzigingen buiten deze API om
+#   (uitnodiging accepteren, Supabase dashboard) zijn na de TTL zichtbaar.
+#
+# ⚠️ Cache is per uvicorn worker. Na een invalidatie op worker A kan
+# worker B maximaal user_cache_ttl_seconds een oud profiel tonen.
+
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UserProfileCache:
+    """Thread-safe LRU-cache met TTL per entry."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[dict]:
+        """Geef een kopie van het gecachte profiel, of None (miss/verlopen)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            # Kopie: get_current_user muteert de dict (super-admin, _jwt_token)
+            return dict(user)
+
+    def set(self, user_id: str, user: dict, token_exp: Optional[float] = None) -> None:
+        """
+        Cache een users-rij.
+
+        Args:
+            user_id: UUID van de gebruiker
+            user: Ruwe rij uit de `users` tabel
+            token_exp: 'exp' claim (unix timestamp) van de JWT, optioneel
+        """
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, float(token_exp) - time.time())
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, dict(user))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """Verwijder één gebruiker uit de cache."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Eén cache per proces
+user_profile_cache = UserProfileCache(
+    max_entries=settings.user_cache_max_entries,
+    ttl_seconds=settings.user_cache_ttl_seconds,
+)
+
+
+def invalidate_user(user_id: Optional[str]) -> None:
+    """
+    Invalidatie-hook: aanroepen na elke wijziging aan de `users` rij
+    of bureau-toegang van een gebruiker.
+    """
+    if not user_id:
+        return
+    user_profile_cache.invalidate(user_id)
+    logger.debug(f"User cache geïnvalideerd voor {user_id}")
@@ -1,6 +1,9 @@
 """
 FastAPI Application Entry Point
 """
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
@@ -11,6 +14,20 @@ from app.routers.document_router import router as document_router
 from app.routers.finalize_router import router as finalize_router
 from app.routers.profile_router import router as profile_router
 from app.routers.ai_usage import router as ai_usage_router
+from app.services.claude_batches import start_achtergrondtaak, verzamelaar
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup: Message Batches van een herstarte worker alsnog afhandelen."""
+    taak = start_achtergrondtaak(verzamelaar())
+    yield
+    taak.cancel()
+    try:
+        await taak
+    except asyncio.CancelledError:
+        pass
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -19,7 +36,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    redirect_slashes=False  # ← FIX: Voorkom CORS errors bij redirects
+    redirect_slashes=False,  # ← FIX: Voorkom CORS errors bij redirects
+    lifespan=lifespan,
 )
 
 # CORS middleware - HERSTELD NA DEBUG
@@ -29,6 +47,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
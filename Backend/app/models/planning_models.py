@@ -7,6 +7,9 @@
 # Pydantic modellen voor request/response validatie
 # van de planning endpoints.
 #
+# WIJZIGINGEN v2.1:
+# - BulkBackplanningRequest voor POST /planning/bulk-backplanning
+#
 # WIJZIGINGEN v2.0 (2026-02-19):
 # - toegewezen_aan: PersoonInfo dict → List[str] (array van user IDs)
 # - Verwijderd: PersoonInfo class (niet meer nodig)
@@ -68,6 +71,30 @@ class BackplanningRequest(BaseModel):
         }
 
 
+class BulkBackplanningRequest(BaseModel):
+    """Request body voor POST /planning/bulk-backplanning"""
+    template_id: UUID = Field(
+        ...,
+        description="UUID van het planning template (voor alle tenders)"
+    )
+    tenderbureau_id: Optional[UUID] = Field(
+        None,
+        description="UUID van het bureau (default: bureau van de gebruiker)"
+    )
+    tender_ids: Optional[List[UUID]] = Field(
+        None,
+        description="Subset van tenders; leeg = alle actieve tenders van het bureau"
+    )
+    include_checklist: bool = Field(
+        True,
+        description="Ook checklist items herberekenen"
+    )
+    dry_run: bool = Field(
+        True,
+        description="Alleen berekenen en tonen, niets opslaan"
+    )
+
+
 class WorkloadRequest(BaseModel):
     """Query parameters voor GET /team/workload"""
     user_ids: str = Field(
@@ -17,7 +17,7 @@ from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
 import logging
 
-from app.core.database import get_supabase
+from app.core.database import get_async_supabase
 from app.core.dependencies import get_current_user
 from app.services.finalize_service import FinalizeService
 
@@ -132,7 +132,7 @@ async def finalize_import(
             detail="Bureau ID komt niet overeen met je account"
         )
 
-    db = get_supabase()
+    db = get_async_supabase()
     service = FinalizeService(db)
 
     try:
@@ -36,10 +36,11 @@ from datetime import date
 from supabase import Client
 import logging
 
-from app.core.database import get_supabase
-from app.core.dependencies import get_current_user, get_user_db
-from app.core.bureau_context import resolve_bureau_id
+from app.core.database import get_supabase, AsyncSupabaseClient
+from app.core.dependencies import get_current_user, get_user_db, get_async_user_db
+from app.core.bureau_context import ensure_bureau_access, resolve_bureau_id
 from app.services.backplanning_service import BackplanningService
+from app.services.template_cache import invalidate_templates
 from app.models.planning_models import (
     BackplanningRequest,
     BackplanningResponse,
@@ -61,7 +62,7 @@ router = APIRouter(tags=["Planning"])
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
 
 def get_backplanning_service(
-    db: Client = Depends(get_user_db)
+    db: AsyncSupabaseClient = Depends(get_async_user_db)
 ) -> BackplanningService:
     """Dependency injection voor BackplanningService met user-scoped DB."""
     return BackplanningService(db)
@@ -273,6 +274,9 @@ async def generate_backplanning(
     - **tenderbureau_id**: UUID van het bureau
     - **tender_id**: Optioneel, voor workload-check
     """
+    # Templates en workload-matrix zijn per bureau gecached
+    await ensure_bureau_access(current_user, str(request.tenderbureau_id), db=service.db)
+
     try:
         result = await service.generate_backplanning(
             deadline=request.deadline,
@@ -342,6 +346,7 @@ async def get_workload(
     resolved_bureau = await resolve_bureau_id(
         current_user, explicit_bureau_id=tenderbureau_id, db=db
     )
+    await ensure_bureau_access(current_user, resolved_bureau, db=db)
 
     try:
         result = await service.get_workload(
@@ -573,6 +578,7 @@ async def create_template(
         if not result.data:
             raise HTTPException(status_code=500, detail="Template aanmaken mislukt")
 
+        invalidate_templates(resolved_bureau, result.data[0].get('id'))
         return {**result.data[0], 'taken': []}
 
     except HTTPException:
@@ -634,6 +640,8 @@ async def update_template(
         if not result.data:
             raise HTTPException(status_code=404, detail="Template niet gevonden")
 
+        invalidate_templates(result.data[0].get('tenderbureau_id'), template_id)
+
         taken_result = db.table('planning_template_taken') \
             .select('*') \
             .eq('template_id', template_id) \
@@ -672,6 +680,8 @@ async def delete_template(
         if not result.data:
             raise HTTPException(status_code=404, detail="Template niet gevonden")
 
+        invalidate_templates(result.data[0].get('tenderbureau_id'), template_id)
+
     except HTTPException:
         raise
     except Exception as e:
@@ -748,6 +758,7 @@ async def duplicate_template(
                 .execute()
             new_taken = taken_result.data or []
 
+        invalidate_templates(resolved_bureau, new_id)
         return {
             **new_template.data[0],
             'taken': new_taken
@@ -816,6 +827,7 @@ async def replace_template_taken(
         taken_result = db.table('planning_template_taken') \
             .insert(taken_inserts) \
             .execute()
+        invalidate_templates(tmpl.data.get('tenderbureau_id'), template_id)
 
         return {
             **tmpl.data,
@@ -18,6 +18,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.core.dependencies import get_current_user
 from app.core.database import get_supabase
+from app.core.user_cache import invalidate_user
 
 logger = logging.getLogger(__name__)
 
@@ -195,6 +196,9 @@ async def update_profile(
         if not result.data:
             raise HTTPException(status_code=404, detail="Profiel niet gevonden")
 
+        # get_current_user mag geen verouderd profiel meer serveren
+        invalidate_user(user_id)
+
         logger.info(f"✅ Profiel bijgewerkt voor {current_user.get('email')}: {list(update_data.keys())}")
 
         return {
@@ -0,0 +1,140 @@
+# Backend/app/services/agenda_cache.py
+# Agenda cache per ISO-week — TenderZen v1.0
+#
+# PlanningService.get_agenda_data bouwt bij elke week-navigatie de
+# volledige agenda opnieuw op (planning + checklist + tenders +
+# voortgang + team). De meeste weken veranderen niet tussen twee
+# klikken, dus houden we het resultaat per proces in het geheugen.
+#
+# SLEUTEL:
+#   (bureau_id | '*', ISO-jaar, ISO-week, team_member_id | '', start, end)
+#   '*' = super-admin "Alle bureau's"
+#   Alleen ranges binnen één ISO-week worden gecached.
+#
+# INVALIDATIE (write-through):
+#   Elke schrijfactie op planning_taken / checklist_items roept
+#   invalidate_agenda_bureau(bureau_id) aan. Dat verwijdert ALLE weken
+#   van dat bureau (+ de '*' entries): ongeplande taken en de voortgang
+#   per tender staan in elke week, dus week-granulair invalideren zou
+#   verouderde data laten staan.
+#   Ook TenderService.update_tender / delete_tender / milestone-sync
+#   (en finalize) roepen hem aan: naam, fase en deadline van de tender
+#   staan in de gecachte agenda en archief-tenders vallen eruit.
+#   Dezelfde hook maakt ook de workload-matrix van het bureau ongeldig
+#   (workload_matrix.py), die op dezelfde planning_taken is gebouwd.
+#
+# ⚠️ Cache is per uvicorn worker; TTL begrenst veroudering tussen workers.
+
+import copy
+import time
+import threading
+import logging
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Optional, Tuple
+
+from app.services.workload_matrix import invalidate_workload_matrix
+
+logger = logging.getLogger(__name__)
+
+ALL_BUREAUS = '*'
+
+AGENDA_CACHE_TTL_SECONDS = 300
+AGENDA_CACHE_MAX_ENTRIES = 512
+
+
+def agenda_cache_key(
+    bureau_id: Optional[str],
+    start_date: str,
+    end_date: str,
+    team_member_id: Optional[str] = None
+) -> Optional[Tuple]:
+    """
+    Cache-sleutel voor een agenda-request, of None als de range niet
+    binnen één ISO-week valt (dan niet cachen).
+    """
+    try:
+        start = date.fromisoformat(start_date[:10])
+        end = date.fromisoformat(end_date[:10])
+    except (TypeError, ValueError):
+        return None
+
+    start_year, start_week, _ = start.isocalendar()
+    end_year, end_week, _ = end.isocalendar()
+    if (start_year, start_week) != (end_year, end_week):
+        return None
+
+    return (
+        bureau_id or ALL_BUREAUS,
+        start_year,
+        start_week,
+        team_member_id or '',
+        start.isoformat(),
+        end.isoformat(),
+    )
+
+
+class AgendaCache:
+    """Thread-safe LRU-cache met TTL, invalidatie per bureau."""
+
+    def __init__(
+        self,
+        max_entries: int = AGENDA_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = AGENDA_CACHE_TTL_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Kopie buiten de lock: caller mag het resultaat muteren
+        return copy.deepcopy(value)
+
+    def set(self, key: Tuple, value: Any) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_bureau(self, bureau_id: Optional[str]) -> None:
+        """Verwijder alle weken van een bureau én de 'alle bureaus' entries."""
+        if not bureau_id:
+            self.clear()
+            return
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in (bureau_id, ALL_BUREAUS)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Eén cache per proces
+agenda_cache = AgendaCache()
+
+
+def invalidate_agenda_bureau(bureau_id: Optional[str]) -> None:
+    """
+    Invalidatie-hook: aanroepen na elke schrijfactie op planning_taken,
+    checklist_items of tenders. bureau_id=None → hele cache leeg.
+    """
+    agenda_cache.invalidate_bureau(bureau_id)
+    invalidate_workload_matrix(bureau_id)
+    logger.debug(f"Agenda cache geïnvalideerd voor bureau {bureau_id or 'ALLE'}")
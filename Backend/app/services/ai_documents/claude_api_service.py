@@ -1,7 +1,24 @@
 # app/services/ai_documents/claude_api_service.py
 """
 Claude API Service
-TenderZen v2.0
+TenderZen v2.2
+
+v2.2 WIJZIGINGEN:
+- kies_model(): shortcode → model-ID, ook voor de pre-flight (claude_preflight)
+- Afgekapte response (max_tokens) wordt gelogd en geeft model en usage
+  mee: die call is wel betaald
+
+v2.1 WIJZIGINGEN:
+- AsyncAnthropic i.p.v. de sync client: execute_prompt_with_retry blokkeert
+  de event loop niet meer (SmartImportService roept hem direct aan)
+- Back-off via anthropic_service.met_backoff (asyncio.sleep, jitter,
+  retry-after header) i.p.v. time.sleep; niet-retrybare fouten (400, 401,
+  ...) worden niet meer herhaald
+- Elke poging loopt via de procesbrede Claude governor (rate limits,
+  prioriteit volgens claude_prioriteit())
+- Response cache (claude_cache): identieke prompts voor een call_type met
+  cachebeleid (o.a. smart_import) komen uit de cache, met usage 0/0 en
+  cache_hit=True in het resultaat
 
 v2.0 NIEUW:
 - Model parameter in execute_prompt_with_retry() 
@@ -15,10 +32,13 @@ MODELLEN:
 """
 import json
 import logging
-import time
 from typing import Dict, Any, Optional
 import anthropic
 
+from app.services.anthropic_service import met_backoff, create_met_governor
+from app.services.claude_cache import cache_sleutel, cache_ttl, eenmalig, response_cache
+from app.services.ai_usage_logger import cache_tokens, log_ai_usage_async
+
 logger = logging.getLogger(__name__)
 
 # Model constanten
@@ -28,6 +48,25 @@ MODEL_OPUS = "claude-opus-4-6"
 DEFAULT_MODEL = MODEL_SONNET
 
 
+_SHORTCODES = {
+    "haiku": MODEL_HAIKU,
+    "sonnet": MODEL_SONNET,
+    "opus": MODEL_OPUS,
+}
+
+
+def kies_model(model: Optional[str]) -> str:
+    """Shortcode ('haiku'/'sonnet'/'opus') of volledig model-ID → model-ID."""
+    if model in _SHORTCODES:
+        return _SHORTCODES[model]
+    return model or DEFAULT_MODEL
+
+
+def _als_cache_hit(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultaat uit cache of gedeelde call: geen eigen verbruik."""
+    return {**result, "usage": {"input_tokens": 0, "output_tokens": 0}, "cache_hit": True}
+
+
 class ClaudeAPIService:
     """
     Service voor Claude API interacties.
@@ -44,7 +83,8 @@ class ClaudeAPIService:
         if not api_key:
             raise ValueError("Anthropic API key is required")
         
-        self.client = anthropic.Anthropic(api_key=api_key)
+        # SDK-retries uit: met_backoff() regelt de back-off async
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
         self.default_model = DEFAULT_MODEL
         logger.info(f"✅ ClaudeAPIService initialized with default model: {self.default_model}")
     
@@ -62,6 +102,7 @@ class ClaudeAPIService:
         bureau_id: Optional[str] = None,
         call_type: str = 'ai_call',
         log_usage: bool = True,
+        cache: Optional[bool] = None,
     ) -> Dict[str, Any]:
         """
         Execute a prompt with automatic retry on failure.
@@ -72,125 +113,120 @@ class ClaudeAPIService:
             response_format: "text" or "json"
             max_tokens: Maximum tokens in response
             temperature: Creativity setting (0-1)
-            max_retries: Number of retry attempts
+            max_retries: Total number of attempts
             model: Model to use (None = default Haiku, "sonnet" = Sonnet Pro)
+            cache: None = beleid per call_type, True/False = forceren
         
         Returns:
             Dict with success, content, model, usage info
         """
         # Bepaal welk model te gebruiken — shortcodes en volledige IDs worden beide ondersteund
-        _shortcodes = {
-            "haiku": MODEL_HAIKU,
-            "sonnet": MODEL_SONNET,
-            "opus": MODEL_OPUS,
-        }
-        if model in _shortcodes:
-            selected_model = _shortcodes[model]
-        elif model:
-            selected_model = model  # Volledig model-ID doorgeven
-        else:
-            selected_model = self.default_model
+        selected_model = kies_model(model or self.default_model)
         
         logger.info(f"🤖 Using model: {selected_model}")
         
-        last_error = None
-        
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"📤 API call attempt {attempt + 1}/{max_retries}")
-                
-                # Build messages
-                messages = [
-                    {"role": "user", "content": user_prompt}
-                ]
-                
-                # Make API call
-                response = self.client.messages.create(
-                    model=selected_model,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    system=system_prompt,
-                    messages=messages
-                )
-                
-                # Extract content
-                content = ""
-                if response.content:
-                    for block in response.content:
-                        if hasattr(block, 'text'):
-                            content += block.text
-                
-                # Parse JSON if requested
-                if response_format == "json":
-                    try:
-                        # Try to parse, but return raw string if it fails
-                        # (caller will handle parsing)
-                        pass  # Keep as string, let caller parse
-                    except:
-                        pass
-                
-                stop_reason = getattr(response, 'stop_reason', None)
-                if stop_reason == 'max_tokens':
-                    logger.warning(f"⚠️ Response afgekapt door max_tokens limiet. Ontvangen: {len(content)} tekens.")
-                    return {
-                        "success": False,
-                        "error": f"Response afgekapt door max_tokens limiet. Ontvangen: {len(content)} tekens.",
-                        "truncated": True,
-                        "content": content
-                    }
-
-                logger.info(f"✅ API call successful, response length: {len(content)}")
-
-                if log_usage and db is not None:
-                    try:
-                        from app.services.ai_usage_logger import log_ai_usage
-                        log_ai_usage(
-                            db=db,
-                            bureau_id=bureau_id,
-                            tender_id=tender_id,
-                            call_type=call_type,
-                            model=selected_model,
-                            input_tokens=getattr(response.usage, 'input_tokens', 0),
-                            output_tokens=getattr(response.usage, 'output_tokens', 0),
-                        )
-                    except Exception as e:
-                        print(f"[claude_api_service] Logging mislukt (non-fatal): {e}")
-
-                return {
-                    "success": True,
-                    "content": content,
-                    "model": selected_model,
-                    "model_type": "pro" if selected_model == MODEL_SONNET else "standaard",
-                    "usage": {
-                        "input_tokens": response.usage.input_tokens,
-                        "output_tokens": response.usage.output_tokens
-                    }
+        messages = [
+            {"role": "user", "content": user_prompt}
+        ]
+        kwargs = dict(
+            model=selected_model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system_prompt,
+            messages=messages
+        )
+
+        ttl = cache_ttl(call_type, cache)
+        if not ttl:
+            return await self._execute(kwargs, max_retries, db, tender_id, bureau_id, call_type, log_usage)
+
+        sleutel = cache_sleutel('service', kwargs)
+        opgeslagen = await response_cache.aget(sleutel)
+        if opgeslagen is not None:
+            logger.info(f"✅ Cache hit ({call_type}), geen API call")
+            return _als_cache_hit(json.loads(opgeslagen))
+
+        async def roep():
+            result = await self._execute(kwargs, max_retries, db, tender_id, bureau_id, call_type, log_usage)
+            if result.get("success"):
+                await response_cache.aset(sleutel, call_type, json.dumps(result), ttl)
+            return result
+
+        return await eenmalig(sleutel, roep, gedeeld=_als_cache_hit)
+
+    async def _execute(
+        self,
+        kwargs: Dict[str, Any],
+        max_retries: int,
+        db,
+        tender_id: Optional[str],
+        bureau_id: Optional[str],
+        call_type: str,
+        log_usage: bool,
+    ) -> Dict[str, Any]:
+        """Eén (her)probeerde API call → resultaat-dict van execute_prompt_with_retry."""
+        selected_model = kwargs["model"]
+
+        try:
+            response = await met_backoff(
+                lambda: create_met_governor(self.client, **kwargs),
+                max_retries=max(0, max_retries - 1),
+                label=call_type,
+            )
+        except Exception as e:
+            logger.error(f"❌ API call mislukt: {e}")
+            return {
+                "success": False,
+                "error": str(e) or "Unknown error",
+                "model": selected_model
+            }
+
+        # Extract content
+        content = ""
+        if response.content:
+            for block in response.content:
+                if hasattr(block, 'text'):
+                    content += block.text
+
+        if log_usage and db is not None:
+            await log_ai_usage_async(
+                db=db,
+                bureau_id=bureau_id,
+                tender_id=tender_id,
+                call_type=call_type,
+                model=selected_model,
+                input_tokens=getattr(response.usage, 'input_tokens', 0),
+                output_tokens=getattr(response.usage, 'output_tokens', 0),
+                **cache_tokens(response),
+            )
+
+        stop_reason = getattr(response, 'stop_reason', None)
+        if stop_reason == 'max_tokens':
+            logger.warning(f"⚠️ Response afgekapt door max_tokens limiet. Ontvangen: {len(content)} tekens.")
+            # Wel betaald: usage mee zodat de aanroeper het kan loggen
+            return {
+                "success": False,
+                "error": f"Response afgekapt door max_tokens limiet. Ontvangen: {len(content)} tekens.",
+                "truncated": True,
+                "content": content,
+                "model": selected_model,
+                "usage": {
+                    "input_tokens": response.usage.input_tokens,
+                    "output_tokens": response.usage.output_tokens
                 }
-                
-            except anthropic.RateLimitError as e:
-                last_error = str(e)
-                wait_time = (attempt + 1) * 5
-                logger.warning(f"⚠️ Rate limit hit, waiting {wait_time}s...")
-                time.sleep(wait_time)
-                
-            except anthropic.APIError as e:
-                last_error = str(e)
-                logger.error(f"❌ API error: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(2)
-                    
-            except Exception as e:
-                last_error = str(e)
-                logger.exception(f"❌ Unexpected error: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)
-        
-        # All retries failed
-        logger.error(f"❌ All {max_retries} attempts failed")
+            }
+
+        logger.info(f"✅ API call successful, response length: {len(content)}")
+
         return {
-            "success": False,
-            "error": last_error or "Unknown error",
-            "model": selected_model
+            "success": True,
+            "content": content,
+            "model": selected_model,
+            "model_type": "pro" if selected_model == MODEL_SONNET else "standaard",
+            "usage": {
+                "input_tokens": response.usage.input_tokens,
+                "output_tokens": response.usage.output_tokens
+            }
         }
     
     def get_available_models(self) -> Dict[str, Dict[str, Any]]:
@@ -2,7 +2,14 @@
 AI Usage Logger — TenderZen
 Logt AI token verbruik naar de ai_usage_log tabel.
 Non-fatal: een fout hier breekt de hoofdflow nooit.
+
+Prompt caching (migratie 024): cache_write_tokens / cache_read_tokens
+worden apart gelogd en tegen de cache-tarieven berekend (schrijven 1,25×,
+lezen 0,1× de input-prijs). De kolommen gaan alleen mee als ze > 0 zijn,
+zodat logging zonder cache ook zonder migratie blijft werken.
 """
+import asyncio
+import inspect
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,16 +24,64 @@ KOSTEN_PER_MILJOEN = {
     'claude-opus-4-6':            {'input': 15.00, 'output': 75.00},
 }
 
+# Prompt caching: factor op de input-prijs
+CACHE_WRITE_FACTOR = 1.25
+CACHE_READ_FACTOR = 0.10
+
 
-def bereken_kosten(model: str, input_tokens: int, output_tokens: int) -> float:
+def bereken_kosten(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_write_tokens: int = 0,
+    cache_read_tokens: int = 0,
+) -> float:
     t = KOSTEN_PER_MILJOEN.get(model, {'input': 3.0, 'output': 15.0})
     return round(
         input_tokens  / 1_000_000 * t['input'] +
-        output_tokens / 1_000_000 * t['output'],
+        output_tokens / 1_000_000 * t['output'] +
+        cache_write_tokens / 1_000_000 * t['input'] * CACHE_WRITE_FACTOR +
+        cache_read_tokens  / 1_000_000 * t['input'] * CACHE_READ_FACTOR,
         6
     )
 
 
+def cache_tokens(response) -> dict:
+    """cache_write_tokens / cache_read_tokens uit een Message (0 zonder caching)."""
+    usage = getattr(response, 'usage', None)
+    return {
+        'cache_write_tokens': getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+        'cache_read_tokens':  getattr(usage, 'cache_read_input_tokens', 0) or 0,
+    }
+
+
+def _usage_row(
+    bureau_id: str,
+    call_type: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    tender_id: str = None,
+    cache_write_tokens: int = 0,
+    cache_read_tokens: int = 0,
+) -> dict:
+    """Bouw de ai_usage_log rij (incl. berekende kosten)."""
+    row = {
+        'tender_id':     tender_id,
+        'bureau_id':     bureau_id,
+        'call_type':     call_type,
+        'model':         model,
+        'input_tokens':  input_tokens,
+        'output_tokens': output_tokens,
+        'kosten_eur':    bereken_kosten(model, input_tokens, output_tokens,
+                                        cache_write_tokens, cache_read_tokens),
+    }
+    if cache_write_tokens or cache_read_tokens:
+        row['cache_write_tokens'] = cache_write_tokens
+        row['cache_read_tokens'] = cache_read_tokens
+    return row
+
+
 def log_ai_usage(
     db,
     bureau_id: str,
@@ -35,6 +90,8 @@ def log_ai_usage(
     input_tokens: int,
     output_tokens: int,
     tender_id: str = None,
+    cache_write_tokens: int = 0,
+    cache_read_tokens: int = 0,
 ):
     """
     Schrijf één AI-call naar de ai_usage_log tabel.
@@ -47,21 +104,50 @@ def log_ai_usage(
         input_tokens:  Aantal verbruikte input tokens
         output_tokens: Aantal verbruikte output tokens
         tender_id:     UUID van de tender (optioneel, None indien niet gekoppeld)
+        cache_write_tokens: Input tokens weggeschreven naar de prompt cache
+        cache_read_tokens:  Input tokens gelezen uit de prompt cache
+    """
+    try:
+        row = _usage_row(bureau_id, call_type, model, input_tokens, output_tokens, tender_id,
+                         cache_write_tokens, cache_read_tokens)
+        db.table('ai_usage_log').insert(row).execute()
+        logger.debug(
+            f"[ai_usage] {call_type} | {model} | "
+            f"in={input_tokens} out={output_tokens} "
+            f"cache_w={cache_write_tokens} cache_r={cache_read_tokens} | €{row['kosten_eur']:.4f}"
+        )
+    except Exception as e:
+        logger.warning(f"[ai_usage_logger] Logging mislukt (non-fatal): {e}")
+
+
+async def log_ai_usage_async(
+    db,
+    bureau_id: str,
+    call_type: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    tender_id: str = None,
+    cache_write_tokens: int = 0,
+    cache_read_tokens: int = 0,
+):
+    """
+    Async variant van log_ai_usage(). Zelfde argumenten, zelfde non-fatal
+    gedrag. AsyncSupabaseClient wordt ge-await; een sync Client draait in
+    een thread zodat de event loop niet blokkeert.
     """
     try:
-        kosten = bereken_kosten(model, input_tokens, output_tokens)
-        db.table('ai_usage_log').insert({
-            'tender_id':     tender_id,
-            'bureau_id':     bureau_id,
-            'call_type':     call_type,
-            'model':         model,
-            'input_tokens':  input_tokens,
-            'output_tokens': output_tokens,
-            'kosten_eur':    kosten,
-        }).execute()
+        row = _usage_row(bureau_id, call_type, model, input_tokens, output_tokens, tender_id,
+                         cache_write_tokens, cache_read_tokens)
+        query = db.table('ai_usage_log').insert(row)
+        if inspect.iscoroutinefunction(query.execute):
+            await query.execute()
+        else:
+            await asyncio.to_thread(query.execute)
         logger.debug(
             f"[ai_usage] {call_type} | {model} | "
-            f"in={input_tokens} out={output_tokens} | €{kosten:.4f}"
+            f"in={input_tokens} out={output_tokens} "
+            f"cache_w={cache_write_tokens} cache_r={cache_read_tokens} | €{row['kosten_eur']:.4f}"
         )
     except Exception as e:
         logger.warning(f"[ai_usage_logger] Logging mislukt (non-fatal): {e}")
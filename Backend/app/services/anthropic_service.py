@@ -3,12 +3,323 @@ Centrale Anthropic API wrapper voor TenderZen.
 Alle directe Claude API calls gaan via call_claude() zodat
 logging, client-hergebruik en toekomstige uitbreidingen
 op één plek beheerd worden.
+
+Vanuit async code: acall_claude() — AsyncAnthropic + asyncio.sleep, zodat
+een lange generatie of rate-limit back-off de event loop niet blokkeert.
+call_claude() blijft voor sync code (scripts, helpers in een thread).
+astream_claude() streamt de tekst-delta's door (lange documentgeneratie).
+
+GOVERNOR:
+Elke call (sync, async, ClaudeAPIService) vraagt eerst capaciteit aan bij
+één ClaudeGovernor per proces: token buckets voor requests/minuut en
+tokens/minuut, met twee prioriteitsbanen. Achtergrondwerk (bulk-
+verrijking, bureau-scan) wacht zolang er interactieve aanvragen wachten
+en mag een reserve (claude_reserve_interactief) niet aanspreken — een
+bulk-run kan de limiet dus nooit helemaal opmaken. Bulkjobs markeren
+zichzelf met `with claude_prioriteit(PRIORITEIT_ACHTERGROND):`.
+Een 429 van de API pauzeert de buckets voor de retry-after periode.
+
+⚠️ Limieten gelden per uvicorn worker: stel ze in als (org-limiet / workers)
+via CLAUDE_RPM_LIMIET / CLAUDE_TPM_LIMIET. Standaard 0 = governor uit; de
+429-backoff van de API blijft dan de enige rem.
+
+CACHE:
+Voor call_types met een beleid in claude_cache.CACHE_TTL (of cache=True)
+komt een identieke request (model, system, messages, max_tokens,
+temperature) uit de response cache — zonder governor, zonder tokens.
+Alleen volledige antwoorden (stop_reason end_turn) worden opgeslagen.
+Een cache-hit heeft usage 0/0, zodat aanroepers die zelf tokens tellen
+geen verbruik rapporteren dat niet plaatsvond.
+
+PROMPT CACHING (Anthropic):
+Los van de response cache: met met_cache_breakpoint() krijgt een gedeelde
+prefix (brondocumenten) een cache_control breakpoint. De API rekent dan
+alleen bij de eerste call de volle input-prijs; cache_creation/-read
+tokens worden apart in ai_usage_log gelogd.
 """
+import asyncio
+import email.utils
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar, Union
+
 import anthropic
 from app.config import settings
-from app.services.ai_usage_logger import log_ai_usage
+from app.services.ai_usage_logger import cache_tokens, log_ai_usage, log_ai_usage_async
+from app.services.claude_cache import cache_sleutel, cache_ttl, eenmalig, response_cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Back-off: full jitter, exponentieel vanaf RETRY_BASIS_SECONDEN, begrensd
+# op RETRY_MAX_SECONDEN. Een retry-after header van de API gaat voor.
+RETRY_MAX_POGINGEN = 4
+RETRY_BASIS_SECONDEN = 1.0
+RETRY_MAX_SECONDEN = 30.0
+RETRY_STATUSSEN = {408, 409, 429, 500, 502, 503, 504, 529}
+
+PRIORITEIT_INTERACTIEF = 0
+PRIORITEIT_ACHTERGROND = 1
+
+# Governor-wachtlus: opnieuw proberen na de berekende wachttijd, begrensd
+# zodat een wachtende achtergrondcall snel ziet dat de baan vrij is
+GOVERNOR_POLL_MIN = 0.01
+GOVERNOR_POLL_MAX = 0.5
 
 _client = None
+_async_client = None
+
+_prioriteit: ContextVar[int] = ContextVar('claude_prioriteit', default=PRIORITEIT_INTERACTIEF)
+
+
+@contextmanager
+def claude_prioriteit(prioriteit: int):
+    """Alle Claude-calls binnen dit blok (ook in taken/threads) krijgen deze prioriteit."""
+    token = _prioriteit.set(prioriteit)
+    try:
+        yield
+    finally:
+        _prioriteit.reset(token)
+
+
+class _TokenBucket:
+    """Token bucket met capaciteit = limiet per minuut, lineair bijgevuld."""
+
+    def __init__(self, per_minuut: float):
+        self.capaciteit = float(per_minuut)
+        self.niveau = self.capaciteit
+        self.snelheid = self.capaciteit / 60.0
+        self._t = time.monotonic()
+
+    def vul(self, nu: float) -> None:
+        self.niveau = min(self.capaciteit, self.niveau + (nu - self._t) * self.snelheid)
+        self._t = nu
+
+    def wachttijd(self, kosten: float, reserve: float = 0.0) -> float:
+        """Seconden tot `kosten` genomen kan worden met `reserve` over (0 = nu)."""
+        tekort = kosten + reserve - self.niveau
+        return 0.0 if tekort <= 0 else tekort / self.snelheid
+
+    def neem(self, kosten: float) -> None:
+        self.niveau -= kosten
+
+    def geef_terug(self, aantal: float) -> None:
+        self.niveau = min(self.capaciteit, self.niveau + aantal)
+
+    def pauzeer(self, seconden: float) -> None:
+        # Negatief niveau: pas na `seconden` bijvullen weer iets beschikbaar
+        self.niveau = min(self.niveau, -seconden * self.snelheid)
+
+
+class ClaudeGovernor:
+    """
+    Procesbrede limiet op Claude-calls (requests en tokens per minuut) met
+    prioriteitsbanen. Thread-safe; bruikbaar vanuit async code (acquire)
+    en vanuit threads (acquire_sync).
+
+    Args:
+        rpm: requests per minuut (<= 0 = geen limiet)
+        tpm: tokens per minuut, input + output (<= 0 = geen limiet)
+        reserve_interactief: fractie van elke bucket die achtergrondwerk
+            niet mag aanspreken
+    """
+
+    def __init__(self, rpm: int, tpm: int, reserve_interactief: float = 0.2):
+        self.actief = rpm > 0 and tpm > 0
+        self.requests = _TokenBucket(max(rpm, 1))
+        self.tokens = _TokenBucket(max(tpm, 1))
+        self.reserve = min(max(reserve_interactief, 0.0), 0.9)
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._wachtrij: Dict[int, List[int]] = {PRIORITEIT_INTERACTIEF: [], PRIORITEIT_ACHTERGROND: []}
+        self.toegekend = {PRIORITEIT_INTERACTIEF: 0, PRIORITEIT_ACHTERGROND: 0}
+
+    def _aanmelden(self, prioriteit: int) -> int:
+        seq = next(self._seq)
+        with self._lock:
+            heapq.heappush(self._wachtrij[prioriteit], seq)
+        return seq
+
+    def _afmelden(self, prioriteit: int, seq: int) -> None:
+        with self._lock:
+            rij = self._wachtrij[prioriteit]
+            if seq in rij:
+                rij.remove(seq)
+                heapq.heapify(rij)
+
+    def _probeer(self, prioriteit: int, seq: int, tokens: int) -> float:
+        """0 = toegekend (en uit de wachtrij); anders seconden tot volgende poging."""
+        with self._lock:
+            rij = self._wachtrij[prioriteit]
+            if rij[0] != seq:
+                # FIFO binnen de baan; wachttijd naar plek in de rij
+                plek = sum(1 for x in rij if x < seq)
+                return min(GOVERNOR_POLL_MAX, max(GOVERNOR_POLL_MIN, plek / self.requests.snelheid))
+            if any(self._wachtrij[p] for p in self._wachtrij if p < prioriteit):
+                return GOVERNOR_POLL_MAX   # hogere baan wacht: voorrang
+
+            nu = time.monotonic()
+            self.requests.vul(nu)
+            self.tokens.vul(nu)
+            fractie = self.reserve if prioriteit > PRIORITEIT_INTERACTIEF else 0.0
+            wacht = max(
+                self.requests.wachttijd(1, fractie * self.requests.capaciteit),
+                self.tokens.wachttijd(tokens, fractie * self.tokens.capaciteit),
+            )
+            if wacht > 0:
+                return wacht
+
+            self.requests.neem(1)
+            self.tokens.neem(tokens)
+            heapq.heappop(self._wachtrij[prioriteit])
+            self.toegekend[prioriteit] += 1
+            return 0.0
+
+    def _begrens(self, tokens: int, prioriteit: int) -> int:
+        # Eén call groter dan de bucket (min reserve) zou eeuwig wachten
+        plafond = self.tokens.capaciteit * (1 - (self.reserve if prioriteit > PRIORITEIT_INTERACTIEF else 0))
+        return int(max(1, min(tokens, plafond)))
+
+    async def acquire(self, tokens: int, prioriteit: Optional[int] = None) -> int:
+        """Wacht op capaciteit. Geeft het gereserveerde aantal tokens terug (voor verreken)."""
+        if not self.actief:
+            return 0
+        prioriteit = _prioriteit.get() if prioriteit is None else prioriteit
+        tokens = self._begrens(tokens, prioriteit)
+        seq = self._aanmelden(prioriteit)
+        try:
+            while True:
+                wacht = self._probeer(prioriteit, seq, tokens)
+                if wacht <= 0:
+                    return tokens
+                await asyncio.sleep(min(max(wacht, GOVERNOR_POLL_MIN), GOVERNOR_POLL_MAX))
+        except BaseException:
+            self._afmelden(prioriteit, seq)
+            raise
+
+    def acquire_sync(self, tokens: int, prioriteit: Optional[int] = None) -> int:
+        """Blokkerende variant voor call_claude (draait in een thread)."""
+        if not self.actief:
+            return 0
+        prioriteit = _prioriteit.get() if prioriteit is None else prioriteit
+        tokens = self._begrens(tokens, prioriteit)
+        seq = self._aanmelden(prioriteit)
+        try:
+            while True:
+                wacht = self._probeer(prioriteit, seq, tokens)
+                if wacht <= 0:
+                    return tokens
+                time.sleep(min(max(wacht, GOVERNOR_POLL_MIN), GOVERNOR_POLL_MAX))
+        except BaseException:
+            self._afmelden(prioriteit, seq)
+            raise
+
+    def verreken(self, gereserveerd: int, werkelijk: int) -> None:
+        """Corrigeer de reservering met het werkelijke verbruik (usage van de response)."""
+        if not self.actief:
+            return
+        with self._lock:
+            self.tokens.vul(time.monotonic())
+            self.tokens.geef_terug(gereserveerd - werkelijk)
+
+    def pauzeer(self, seconden: float) -> None:
+        """Na een 429: niemand start een nieuwe call binnen `seconden`."""
+        if not self.actief or seconden <= 0:
+            return
+        with self._lock:
+            self.requests.pauzeer(seconden)
+            self.tokens.pauzeer(seconden)
+
+    def status(self) -> dict:
+        with self._lock:
+            nu = time.monotonic()
+            self.requests.vul(nu)
+            self.tokens.vul(nu)
+            return {
+                'actief':            self.actief,
+                'requests_vrij':     round(self.requests.niveau, 1),
+                'tokens_vrij':       round(self.tokens.niveau),
+                'wachtend':          {p: len(r) for p, r in self._wachtrij.items()},
+                'toegekend':         dict(self.toegekend),
+            }
+
+
+governor = ClaudeGovernor(
+    rpm=settings.claude_rpm_limiet,
+    tpm=settings.claude_tpm_limiet,
+    reserve_interactief=settings.claude_reserve_interactief,
+)
+
+
+def schat_tokens(kwargs: dict) -> int:
+    """
+    Ruwe schatting (input + max output) voor de governor-reservering;
+    verreken() corrigeert na de response met de werkelijke usage.
+    Tekst ~4 tekens per token, base64-documenten ~1 token per 50 bytes.
+    """
+    system = kwargs.get('system') or ''
+    tekens = len(system) if isinstance(system, str) else len(json.dumps(system, default=str))
+    doc_bytes = 0
+    for msg in kwargs.get('messages') or []:
+        content = msg.get('content')
+        if isinstance(content, str):
+            tekens += len(content)
+            continue
+        for blok in content or []:
+            if not isinstance(blok, dict):
+                continue
+            if blok.get('type') == 'text':
+                tekens += len(blok.get('text') or '')
+            else:
+                data = (blok.get('source') or {}).get('data') or ''
+                doc_bytes += len(data) * 3 // 4
+    return tekens // 4 + doc_bytes // 50 + int(kwargs.get('max_tokens') or 0)
+
+
+def _usage_tokens(response) -> int:
+    # Cache-reads tellen niet mee voor de input-tokenlimiet, cache-writes wel
+    usage = getattr(response, 'usage', None)
+    return (
+        (getattr(usage, 'input_tokens', 0) or 0)
+        + (getattr(usage, 'cache_creation_input_tokens', 0) or 0)
+        + (getattr(usage, 'output_tokens', 0) or 0)
+    )
+
+
+def met_cache_breakpoint(blokken: List[dict]) -> List[dict]:
+    """
+    Kopie van content-blokken met een prompt-cache breakpoint op het
+    laatste blok. Gebruik voor een gedeelde prefix (bijv. de brondocumenten
+    van een tender) die vóór het wisselende deel van de prompt staat:
+    volgende calls met exact dezelfde prefix lezen hem uit de cache.
+    """
+    if not blokken:
+        return []
+    kopie = list(blokken)
+    kopie[-1] = {**kopie[-1], 'cache_control': {'type': 'ephemeral'}}
+    return kopie
+
+
+async def create_met_governor(client: anthropic.AsyncAnthropic, prioriteit: Optional[int] = None, **kwargs):
+    """Eén messages.create via de governor (reserveren → call → verrekenen)."""
+    gereserveerd = await governor.acquire(schat_tokens(kwargs), prioriteit)
+    try:
+        response = await client.messages.create(**kwargs)
+    except Exception as e:
+        governor.verreken(gereserveerd, 0)
+        if isinstance(e, anthropic.RateLimitError):
+            governor.pauzeer(retry_after_seconden(e) or RETRY_BASIS_SECONDEN)
+        raise
+    governor.verreken(gereserveerd, _usage_tokens(response))
+    return response
 
 
 def get_client() -> anthropic.Anthropic:
@@ -18,6 +329,84 @@ def get_client() -> anthropic.Anthropic:
     return _client
 
 
+def get_async_client() -> anthropic.AsyncAnthropic:
+    """Gedeelde AsyncAnthropic client. SDK-retries uit: met_backoff() doet dat async."""
+    global _async_client
+    if _async_client is None:
+        _async_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key, max_retries=0)
+    return _async_client
+
+
+def is_retrybaar(e: Exception) -> bool:
+    """Rate limits, overbelasting, 5xx, time-outs en verbindingsfouten."""
+    if isinstance(e, (anthropic.APIConnectionError, anthropic.APITimeoutError)):
+        return True
+    if isinstance(e, anthropic.APIStatusError):
+        return e.status_code in RETRY_STATUSSEN
+    return False
+
+
+def retry_after_seconden(e: Exception) -> Optional[float]:
+    """retry-after(-ms) header van een API-fout, in seconden (None = niet meegegeven)."""
+    response = getattr(e, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        ms = headers.get('retry-after-ms')
+        if ms:
+            return max(0.0, float(ms) / 1000)
+        waarde = headers.get('retry-after')
+        if not waarde:
+            return None
+        try:
+            return max(0.0, float(waarde))
+        except ValueError:
+            # HTTP-datum
+            return max(0.0, email.utils.parsedate_to_datetime(waarde).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def backoff_seconden(poging: int, retry_after: Optional[float] = None) -> float:
+    """Wachttijd voor poging (0-based): retry-after + kleine jitter, anders full jitter."""
+    if retry_after is not None:
+        return min(RETRY_MAX_SECONDEN, retry_after) + random.uniform(0, 0.25 * RETRY_BASIS_SECONDEN)
+    return random.uniform(0, min(RETRY_MAX_SECONDEN, RETRY_BASIS_SECONDEN * (2 ** poging)))
+
+
+async def met_backoff(
+    maak_call: Callable[[], Awaitable[T]],
+    max_retries: int = RETRY_MAX_POGINGEN,
+    label: str = 'claude',
+) -> T:
+    """
+    Voer een async API-call uit met jittered exponential back-off.
+
+    Args:
+        maak_call:   Functie die per poging een nieuwe coroutine maakt.
+        max_retries: Aantal herhalingen ná de eerste poging.
+        label:       Naam voor de logging.
+
+    Raises:
+        De laatste fout als die niet retrybaar is of de pogingen op zijn.
+    """
+    poging = 0
+    while True:
+        try:
+            return await maak_call()
+        except Exception as e:
+            if not is_retrybaar(e) or poging >= max_retries:
+                raise
+            wacht = backoff_seconden(poging, retry_after_seconden(e))
+            logger.warning(
+                f"[{label}] {type(e).__name__} (poging {poging + 1}/{max_retries + 1}), "
+                f"opnieuw over {wacht:.1f}s"
+            )
+            await asyncio.sleep(wacht)
+            poging += 1
+
+
 def call_claude(
     messages: list,
     model: str,
@@ -29,6 +418,8 @@ def call_claude(
     bureau_id: str = None,
     call_type: str = 'ai_call',
     log_usage: bool = True,
+    prioriteit: Optional[int] = None,
+    cache: Optional[bool] = None,
 ) -> anthropic.types.Message:
     """
     Voer een Claude API call uit en log het token-verbruik.
@@ -44,6 +435,8 @@ def call_claude(
         bureau_id:   UUID van het bureau voor logging.
         call_type:   Categorie voor de usage log.
         log_usage:   False om logging te onderdrukken.
+        prioriteit:  PRIORITEIT_* voor de governor (None = uit claude_prioriteit()).
+        cache:       None = beleid per call_type, True/False = forceren.
 
     Returns:
         anthropic.types.Message — ongewijzigde API response.
@@ -58,7 +451,24 @@ def call_claude(
     if temperature is not None:
         kwargs['temperature'] = temperature
 
-    response = get_client().messages.create(**kwargs)
+    ttl = cache_ttl(call_type, cache)
+    sleutel = cache_sleutel('message', kwargs) if ttl else None
+    if sleutel:
+        opgeslagen = response_cache.get(sleutel)
+        if opgeslagen is not None:
+            logger.debug(f"Claude cache hit ({call_type})")
+            return _uit_cache(opgeslagen)
+
+    gereserveerd = governor.acquire_sync(schat_tokens(kwargs), prioriteit)
+    try:
+        response = get_client().messages.create(**kwargs)
+    except Exception:
+        governor.verreken(gereserveerd, 0)
+        raise
+    governor.verreken(gereserveerd, _usage_tokens(response))
+
+    if sleutel and response.stop_reason == 'end_turn':
+        response_cache.set(sleutel, call_type, response.model_dump_json(), ttl)
 
     if log_usage and db is not None and bureau_id is not None:
         log_ai_usage(
@@ -69,6 +479,179 @@ def call_claude(
             model=model,
             input_tokens=response.usage.input_tokens,
             output_tokens=response.usage.output_tokens,
+            **cache_tokens(response),
         )
 
     return response
+
+
+async def acall_claude(
+    messages: list,
+    model: str,
+    max_tokens: int = 4096,
+    system: str = None,
+    temperature: float = None,
+    db=None,
+    tender_id: str = None,
+    bureau_id: str = None,
+    call_type: str = 'ai_call',
+    log_usage: bool = True,
+    max_retries: int = RETRY_MAX_POGINGEN,
+    prioriteit: Optional[int] = None,
+    cache: Optional[bool] = None,
+) -> anthropic.types.Message:
+    """
+    Async variant van call_claude(): zelfde argumenten en response, plus
+    max_retries voor de back-off bij rate limits / overbelasting.
+    db mag een sync Client of een AsyncSupabaseClient zijn.
+    Elke poging vraagt opnieuw capaciteit aan bij de governor.
+    Gelijktijdige identieke cachebare calls delen één API-call.
+    """
+    kwargs = dict(
+        model=model,
+        max_tokens=max_tokens,
+        messages=messages,
+    )
+    if system is not None:
+        kwargs['system'] = system
+    if temperature is not None:
+        kwargs['temperature'] = temperature
+
+    ttl = cache_ttl(call_type, cache)
+    sleutel = cache_sleutel('message', kwargs) if ttl else None
+
+    async def roep() -> anthropic.types.Message:
+        client = get_async_client()
+        response = await met_backoff(
+            lambda: create_met_governor(client, prioriteit, **kwargs),
+            max_retries=max_retries,
+            label=call_type,
+        )
+
+        if log_usage and db is not None and bureau_id is not None:
+            await log_ai_usage_async(
+                db=db,
+                bureau_id=bureau_id,
+                tender_id=tender_id,
+                call_type=call_type,
+                model=model,
+                input_tokens=response.usage.input_tokens,
+                output_tokens=response.usage.output_tokens,
+                **cache_tokens(response),
+            )
+
+        if sleutel and response.stop_reason == 'end_turn':
+            await response_cache.aset(sleutel, call_type, response.model_dump_json(), ttl)
+        return response
+
+    if not sleutel:
+        return await roep()
+
+    opgeslagen = await response_cache.aget(sleutel)
+    if opgeslagen is not None:
+        logger.debug(f"Claude cache hit ({call_type})")
+        return _uit_cache(opgeslagen)
+    return await eenmalig(sleutel, roep, gedeeld=_zonder_usage)
+
+
+async def astream_claude(
+    messages: list,
+    model: str,
+    max_tokens: int = 4096,
+    system: str = None,
+    temperature: float = None,
+    db=None,
+    tender_id: str = None,
+    bureau_id: str = None,
+    call_type: str = 'ai_call',
+    log_usage: bool = True,
+    max_retries: int = RETRY_MAX_POGINGEN,
+    prioriteit: Optional[int] = None,
+    cache: Optional[bool] = None,
+) -> AsyncIterator[Union[str, anthropic.types.Message]]:
+    """
+    Streaming variant van acall_claude(): yieldt de tekst-delta's (str)
+    zodra ze binnenkomen en als laatste element de volledige Message.
+
+    Governor, usage-logging en response cache als bij acall_claude(); een
+    cache-hit levert de hele tekst als één delta. Back-off alleen zolang er
+    nog niets ge-yield is — een afgebroken stream halverwege gaat als fout
+    naar de aanroeper.
+    """
+    kwargs = dict(
+        model=model,
+        max_tokens=max_tokens,
+        messages=messages,
+    )
+    if system is not None:
+        kwargs['system'] = system
+    if temperature is not None:
+        kwargs['temperature'] = temperature
+
+    ttl = cache_ttl(call_type, cache)
+    sleutel = cache_sleutel('message', kwargs) if ttl else None
+    if sleutel:
+        opgeslagen = await response_cache.aget(sleutel)
+        if opgeslagen is not None:
+            logger.debug(f"Claude cache hit ({call_type}, stream)")
+            response = _uit_cache(opgeslagen)
+            yield ''.join(b.text for b in response.content if getattr(b, 'type', None) == 'text')
+            yield response
+            return
+
+    client = get_async_client()
+    poging = 0
+    while True:
+        gestart = False
+        gereserveerd = await governor.acquire(schat_tokens(kwargs), prioriteit)
+        try:
+            async with client.messages.stream(**kwargs) as stream:
+                async for tekst in stream.text_stream:
+                    gestart = True
+                    yield tekst
+                response = await stream.get_final_message()
+            break
+        except Exception as e:
+            governor.verreken(gereserveerd, 0)
+            if isinstance(e, anthropic.RateLimitError):
+                governor.pauzeer(retry_after_seconden(e) or RETRY_BASIS_SECONDEN)
+            if gestart or not is_retrybaar(e) or poging >= max_retries:
+                raise
+            wacht = backoff_seconden(poging, retry_after_seconden(e))
+            logger.warning(
+                f"[{call_type}] {type(e).__name__} (poging {poging + 1}/{max_retries + 1}), "
+                f"opnieuw over {wacht:.1f}s"
+            )
+            await asyncio.sleep(wacht)
+            poging += 1
+    governor.verreken(gereserveerd, _usage_tokens(response))
+
+    if log_usage and db is not None and bureau_id is not None:
+        await log_ai_usage_async(
+            db=db,
+            bureau_id=bureau_id,
+            tender_id=tender_id,
+            call_type=call_type,
+            model=model,
+            input_tokens=response.usage.input_tokens,
+            output_tokens=response.usage.output_tokens,
+            **cache_tokens(response),
+        )
+
+    if sleutel and response.stop_reason == 'end_turn':
+        await response_cache.aset(sleutel, call_type, response.model_dump_json(), ttl)
+    yield response
+
+
+def _zonder_usage(response: anthropic.types.Message) -> anthropic.types.Message:
+    """Kopie met usage 0/0 (er is niets verbruikt)."""
+    kopie = response.model_copy(deep=True)
+    kopie.usage.input_tokens = 0
+    kopie.usage.output_tokens = 0
+    kopie.usage.cache_creation_input_tokens = 0
+    kopie.usage.cache_read_input_tokens = 0
+    return kopie
+
+
+def _uit_cache(opgeslagen: str) -> anthropic.types.Message:
+    return _zonder_usage(anthropic.types.Message.model_validate_json(opgeslagen))
@@ -2,9 +2,62 @@
 # TenderZen — BackplanningService
 # Backend/app/services/backplanning_service.py
 # Bestandsnaam: backplanning_service_20260217_1730.py
-# Versie: 2.1 — FIX: 'planning' → 'planning_taken'
+# Versie: 2.7 — Bulk opslaan in één transactie
 # ================================================================
 #
+# WIJZIGINGEN v2.7.1:
+# - Workload en conflicten alleen uit de matrix als de periode binnen
+#   het matrix-venster valt (WorkloadMatrix.dekt); daarbuiten weer de
+#   RPC's get_workload_for_users / get_workload_per_dag, zoals vóór v2.5.
+#
+# WIJZIGINGEN v2.7:
+# - Bulk opslaan via RPC vervang_backplanning_bulk (migratie 026):
+#   delete + inserts in één transactie. Zonder de migratie eerst de
+#   nieuwe rijen wegschrijven en pas daarna de oude verwijderen.
+# - Status (done / completed / ...) van bestaande taken gaat mee naar
+#   de herberekende taak met dezelfde naam; nieuwe taken starten op
+#   todo / pending.
+# - in_() filters op tender ids per IN_FILTER_CHUNK_SIZE.
+#
+# WIJZIGINGEN v2.6:
+# - Template-taken en checklist_templates via template_cache.py
+#   (per proces, versie-invalidatie vanuit de template-CRUD).
+#   Een back-planning met warme cache kost nul template-queries.
+#
+# WIJZIGINGEN v2.5:
+# - get_workload() en workload-conflicten via WorkloadMatrix
+#   (workload_matrix.py): één keer geladen NumPy-matrix persoon×dag
+#   per bureau i.p.v. een RPC per aanroep. De RPC's blijven de
+#   fallback als de matrix niet geladen kan worden of er geen bureau
+#   bekend is.
+# - Bulk: workload-snapshot = matrix zonder de batch-tenders, met de
+#   nieuw berekende plannings eroverheen (what-if).
+# - Drempels (3 / 5) komen uit settings.workload_*_drempel.
+#
+# WIJZIGINGEN v2.4:
+# - generate_backplanning_bulk(): herberekent (of dry-run) de
+#   back-planning van veel tenders in één job. Template-taken,
+#   checklist-templates, werkdag-kalender, team-toewijzingen en een
+#   workload-snapshot worden één keer geladen; opslaan gebeurt met
+#   één delete + gebatchte inserts per tabel.
+# - Per-tender berekening uitgesplitst in _bereken_planning(),
+#   _bereken_checklist() en _workload_warnings() (gedeeld door de
+#   enkele en de bulk-variant).
+# - FIX: workload-conflicten lazen toegewezen_aan['id'], terwijl
+#   toegewezen_aan een array van user IDs is → TypeError zodra een
+#   tender_id werd meegegeven.
+#
+# WIJZIGINGEN v2.3:
+# - Datumberekening via WerkdagKalender (werkdag_kalender.py): per
+#   bureau gecachte, gesorteerde werkdagen over meerdere jaren;
+#   T-minus / vooruit zijn bisect-lookups i.p.v. dag-voor-dag loops.
+# - Feestdagen van alle jaren worden geladen (voorheen alleen
+#   deadline.year → planning over de jaarwisseling miste feestdagen).
+#
+# WIJZIGINGEN v2.2:
+# - db is nu een AsyncSupabaseClient: alle queries en RPC's worden
+#   ge-await en blokkeren de event loop niet meer.
+#
 # WIJZIGINGEN v2.1 (2026-02-17 17:30):
 # - generate_backplanning(): return key 'planning' → 'planning_taken'
 #   → Frontend verwacht 'planning_taken', niet 'planning'
@@ -23,12 +76,32 @@
 #   in Supabase voordat deze service gebruikt kan worden.
 # ================================================================
 
-from datetime import date, timedelta
-from typing import Dict, List, Optional
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import logging
 
+from app.config import settings
+from app.services.agenda_cache import invalidate_agenda_bureau
+from app.services.template_cache import get_checklist_template_items, get_template_met_taken
+from app.services.tender_service import _chunks
+from app.services.werkdag_kalender import WerkdagKalender, get_werkdag_kalender
+from app.services.workload_matrix import WorkloadMatrix, get_workload_matrix
+
 logger = logging.getLogger(__name__)
 
+# Maximaal aantal rijen per insert bij bulk-opslag
+BULK_INSERT_CHUNK = 500
+
+# PostgREST geeft max 1000 rijen per request (db-max-rows)
+BULK_LEES_PAGINA = 1000
+
+
+def _rpc_ontbreekt(e: Exception) -> bool:
+    """True als de database-functie (nog) niet bestaat — migratie niet gedraaid."""
+    code = getattr(e, "code", None) or ""
+    return code in ("PGRST202", "42883") or "Could not find the function" in str(e)
+
 
 class BackplanningService:
     """
@@ -40,7 +113,7 @@ class BackplanningService:
     """
 
     def __init__(self, supabase_client):
-        self.db = supabase_client
+        self.db = supabase_client  # AsyncSupabaseClient
 
     # ──────────────────────────────────────────────────────────────
     # PUBLIEKE METHODEN
@@ -57,11 +130,11 @@ class BackplanningService:
     ) -> dict:
         """Hoofdfunctie: genereer complete back-planning."""
 
-        # 1. Haal template taken op
-        template_taken = await self._get_template_taken(template_id)
+        # 1. Haal template taken op (gecached)
+        template_taken = await self._get_template_taken(template_id, tenderbureau_id)
 
-        # 2. Haal feestdagen op
-        feestdagen = await self._get_feestdagen(tenderbureau_id, deadline.year)
+        # 2. Werkdag-kalender van het bureau (feestdagen alle jaren, gecached)
+        kalender = await get_werkdag_kalender(self.db, tenderbureau_id, deadline)
 
         # 3. Haal team member details op
         team_details = await self._get_team_details(
@@ -69,33 +142,9 @@ class BackplanningService:
         )
 
         # 4. Bereken datums (back-planning)
-        planning = []
-        for taak in template_taken:
-            taak_datum = self._bereken_werkdag(
-                deadline, taak['t_minus_werkdagen'], feestdagen
-            )
-            eind_datum = taak_datum
-            duur = taak.get('duur_werkdagen', 1) or 1
-            if duur > 1:
-                eind_datum = self._bereken_vooruit(
-                    taak_datum, duur - 1, feestdagen
-                )
-
-            user_id = team_assignments.get(taak['rol'])
-
-            planning.append({
-                'naam': taak['naam'],
-                'beschrijving': taak.get('beschrijving'),
-                'datum': taak_datum.isoformat(),
-                'eind_datum': eind_datum.isoformat(),
-                'duur_werkdagen': duur,
-                'rol': taak['rol'],
-                'categorie': taak.get('categorie', 'algemeen'),
-                'toegewezen_aan': [user_id] if user_id else [],  # Array van user IDs
-                'is_mijlpaal': taak.get('is_mijlpaal', False),
-                't_minus': taak['t_minus_werkdagen'],
-                'volgorde': taak.get('volgorde', 0)
-            })
+        planning = self._bereken_planning(
+            template_taken, deadline, kalender, team_assignments
+        )
 
         # 5. Check workload conflicten
         workload_warnings = []
@@ -103,32 +152,18 @@ class BackplanningService:
             workload_warnings = await self._check_workload(
                 planning, tenderbureau_id, tender_id
             )
-            for taak in planning:
-                if taak['toegewezen_aan']:
-                    for warning in workload_warnings:
-                        if (warning['persoon_id'] == taak['toegewezen_aan']['id']
-                                and warning['datum'] == taak['datum']):
-                            taak['conflict'] = {
-                                'type': 'workload',
-                                'bericht': warning['bericht'],
-                                'severity': warning['severity']
-                            }
+            self._attach_conflicts(planning, workload_warnings)
 
         # 6. Optioneel: checklist items genereren
         checklist_items = []
         if include_checklist:
             checklist_items = await self._generate_checklist(
-                template_id, deadline, feestdagen, team_assignments, team_details
+                template_id, deadline, kalender, team_assignments, team_details,
+                tenderbureau_id=tenderbureau_id
             )
 
         # 7. Metadata berekenen
-        alle_datums = [
-            date.fromisoformat(t['datum'])
-            for t in planning
-            if t.get('datum')
-        ]
-        eerste = min(alle_datums).isoformat() if alle_datums else None
-        laatste = max(alle_datums).isoformat() if alle_datums else None
+        metadata = self._bereken_metadata(planning, deadline)
 
         # DEBUG v2.1: Log wat we gaan retourneren
         logger.info("=" * 60)
@@ -143,15 +178,146 @@ class BackplanningService:
             'planning_taken': planning,        # ← WAS: 'planning'
             'checklist_items': checklist_items,
             'workload_warnings': workload_warnings,
-            'metadata': {
-                'eerste_taak': eerste,
-                'laatste_taak': laatste,
-                'deadline': deadline.isoformat(),
-                'doorlooptijd_werkdagen': len(alle_datums),
-                'doorlooptijd_kalenderdagen': (
-                    (date.fromisoformat(laatste) - date.fromisoformat(eerste)).days
-                    if eerste and laatste else 0
-                ),
+            'metadata': metadata
+        }
+
+    async def generate_backplanning_bulk(
+        self,
+        template_id: str,
+        tenderbureau_id: str,
+        tender_ids: Optional[List[str]] = None,
+        include_checklist: bool = True,
+        dry_run: bool = True
+    ) -> dict:
+        """
+        Herbereken de back-planning voor veel tenders in één job.
+
+        Template, checklist-templates, werkdag-kalender, team-toewijzingen
+        en workload worden één keer geladen voor alle tenders. Zonder
+        dry_run worden de bestaande planning_taken / checklist_items van
+        de verwerkte tenders in één transactie vervangen; de status van
+        een bestaande taak gaat mee naar de nieuwe taak met dezelfde naam.
+
+        Args:
+            template_id: planning template voor alle tenders
+            tenderbureau_id: bureau waarvan de tenders worden verwerkt
+            tender_ids: subset van tenders (None → alle actieve tenders
+                        van het bureau met een deadline)
+            include_checklist: ook checklist items herberekenen
+            dry_run: alleen berekenen, niets opslaan
+
+        Returns:
+            dict met 'tenders' (resultaat per tender) en 'totalen'
+            ('status_behouden' = taken die hun status hielden)
+        """
+        # 1. Gedeelde data — één keer voor de hele batch
+        template_taken = await self._get_template_taken(template_id, tenderbureau_id)
+        if not template_taken:
+            raise ValueError(f"Template {template_id} heeft geen taken")
+
+        checklist_templates = (
+            await self._get_checklist_templates(template_id, tenderbureau_id)
+            if include_checklist else []
+        )
+        kalender = await get_werkdag_kalender(self.db, tenderbureau_id)
+
+        tenders = await self._get_bulk_tenders(tenderbureau_id, tender_ids)
+        teams = await self._get_bulk_team_assignments([t['id'] for t in tenders])
+
+        # 2. Planning per tender berekenen (puur lokaal)
+        resultaten = []
+        verwerkt = []
+        for tender in tenders:
+            deadline = self._parse_deadline(tender.get('deadline_indiening'))
+            if deadline is None:
+                resultaten.append({
+                    'tender_id': tender['id'],
+                    'naam': tender.get('naam'),
+                    'status': 'overgeslagen',
+                    'reden': 'Geen (geldige) deadline_indiening',
+                })
+                continue
+
+            team_assignments = teams.get(tender['id'], {})
+            planning = self._bereken_planning(
+                template_taken, deadline, kalender, team_assignments
+            )
+            checklist = self._bereken_checklist(
+                checklist_templates, deadline, kalender, team_assignments
+            )
+            verwerkt.append((tender, deadline, planning, checklist))
+
+        # 3. Workload: matrix zonder de batch-tenders (die worden vervangen),
+        #    met alle nieuw berekende plannings eroverheen
+        snapshot = await self._get_matrix(tenderbureau_id)
+        if snapshot is not None:
+            snapshot = snapshot.zonder_tenders(tender['id'] for tender, _, _, _ in verwerkt)
+            for tender, _, planning, _ in verwerkt:
+                snapshot = snapshot.met_planning(planning, tender['id'])
+
+        planning_rows = []
+        checklist_rows = []
+        totaal_warnings = 0
+        for tender, deadline, planning, checklist in verwerkt:
+            # Andere tenders in de batch tellen mee, de tender zelf niet
+            if snapshot is None:
+                warnings = []
+            elif self._matrix_dekt(snapshot, planning):
+                warnings = snapshot.conflicten(planning, exclude_tender_id=tender['id'])
+            else:
+                warnings = await self._rpc_conflicten(planning, tender['id'])
+            self._attach_conflicts(planning, warnings)
+            totaal_warnings += len(warnings)
+
+            planning_rows.extend(
+                self._planning_rows(planning, tender['id'], tenderbureau_id)
+            )
+            checklist_rows.extend(
+                self._checklist_rows(checklist, tender['id'], tenderbureau_id)
+            )
+
+            resultaat = {
+                'tender_id': tender['id'],
+                'naam': tender.get('naam'),
+                'status': 'berekend' if dry_run else 'opgeslagen',
+                'planning_count': len(planning),
+                'checklist_count': len(checklist),
+                'workload_warnings': warnings,
+                'metadata': self._bereken_metadata(planning, deadline),
+            }
+            if dry_run:
+                resultaat['planning_taken'] = planning
+                resultaat['checklist_items'] = checklist
+            resultaten.append(resultaat)
+
+        # 4. Opslaan: alles in één transactie (RPC)
+        status_behouden = 0
+        if not dry_run and verwerkt:
+            verwerkte_ids = [tender['id'] for tender, _, _, _ in verwerkt]
+            status_behouden = await self._vervang_bulk(
+                verwerkte_ids, planning_rows, checklist_rows, include_checklist
+            )
+            invalidate_agenda_bureau(tenderbureau_id)
+
+        logger.info(
+            f"📦 Bulk back-planning bureau {tenderbureau_id}: "
+            f"{len(verwerkt)}/{len(tenders)} tenders, "
+            f"{len(planning_rows)} taken, {len(checklist_rows)} checklist items, "
+            f"{totaal_warnings} workload warnings"
+            f"{' (dry-run)' if dry_run else ''}"
+        )
+
+        return {
+            'dry_run': dry_run,
+            'tenders': resultaten,
+            'totalen': {
+                'tenders': len(tenders),
+                'verwerkt': len(verwerkt),
+                'overgeslagen': len(tenders) - len(verwerkt),
+                'planning_taken': len(planning_rows),
+                'checklist_items': len(checklist_rows),
+                'workload_warnings': totaal_warnings,
+                'status_behouden': status_behouden,
             }
         }
 
@@ -188,6 +354,12 @@ class BackplanningService:
         )
         logger.debug(f"get_workload user_ids: {clean_ids}")
 
+        # ── Workload-matrix (bureau bekend, periode binnen venster) ─
+        if tenderbureau_id:
+            matrix = await self._get_matrix(tenderbureau_id)
+            if matrix is not None and matrix.dekt(start_date, end_date):
+                return matrix.per_week(clean_ids, start_date, end_date)
+
         # ── RPC aanroep ──────────────────────────────────────────
         try:
             params = {
@@ -198,7 +370,7 @@ class BackplanningService:
             }
             logger.debug(f"RPC get_workload_for_users params: {params}")
 
-            result = self.db.rpc('get_workload_for_users', params).execute()
+            result = await self.db.rpc('get_workload_for_users', params).execute()
 
             rows = result.data or []
             logger.info(f"get_workload → {len(rows)} rijen terug van RPC")
@@ -243,35 +415,77 @@ class BackplanningService:
         """
         Check of teamleden workload-conflicten hebben.
 
-        Gebruikt de PostgreSQL RPC-functie `get_workload_per_dag`
-        om jsonb-array containment buiten PostgREST af te handelen.
+        Via de workload-matrix van het bureau; valt terug op de
+        PostgreSQL RPC-functie `get_workload_per_dag` als die niet
+        geladen kan worden of de planning buiten het matrix-venster valt.
         """
-        warnings = []
+        matrix = await self._get_matrix(tenderbureau_id)
+        if matrix is not None and self._matrix_dekt(matrix, planning):
+            return matrix.conflicten(planning, exclude_tender_id=exclude_tender_id)
+        return await self._rpc_conflicten(planning, exclude_tender_id)
 
-        # Verzamel unieke persoon → datums mapping
-        persoon_datums: Dict[str, set] = {}
-        for taak in planning:
-            if taak.get('toegewezen_aan'):
-                pid = taak['toegewezen_aan']['id']
-                persoon_datums.setdefault(pid, set()).add(taak['datum'])
-
-        if not persoon_datums:
+    async def _rpc_conflicten(
+        self,
+        planning: list,
+        exclude_tender_id: Optional[str]
+    ) -> list:
+        """Workload-warnings via RPC `get_workload_per_dag` (zonder matrix)."""
+        paren = {
+            (taak['toegewezen_aan'][0], taak['datum'])
+            for taak in planning
+            if isinstance(taak.get('toegewezen_aan'), list) and taak['toegewezen_aan']
+        }
+        if not paren:
             return []
 
-        alle_user_ids = list(persoon_datums.keys())
-        alle_datums = list(
-            {d for datums in persoon_datums.values() for d in datums}
+        dag_counts = await self._get_dag_counts(
+            list({uid for uid, _ in paren}),
+            list({datum for _, datum in paren}),
+            exclude_tender_id
         )
+        return self._workload_warnings(planning, dag_counts)
+
+    @staticmethod
+    def _matrix_dekt(matrix: WorkloadMatrix, planning: list) -> bool:
+        """True als alle taakdatums van de planning in het matrix-venster vallen."""
+        datums = [
+            date.fromisoformat(str(taak['datum'])[:10])
+            for taak in planning if taak.get('datum')
+        ]
+        return not datums or matrix.dekt(min(datums), max(datums))
+
+    async def _get_matrix(self, tenderbureau_id: Optional[str]) -> Optional[WorkloadMatrix]:
+        """Workload-matrix van het bureau, of None (→ RPC-fallback)."""
+        if not tenderbureau_id:
+            return None
+        try:
+            return await get_workload_matrix(self.db, tenderbureau_id)
+        except Exception as e:
+            logger.warning(f"Workload-matrix laden mislukt, RPC-fallback: {e}")
+            return None
+
+    async def _get_dag_counts(
+        self,
+        user_ids: List[str],
+        datums: List[str],
+        exclude_tender_id: Optional[str] = None
+    ) -> Dict[Tuple[str, str], int]:
+        """
+        Bestaande taken per (user_id, datum) via RPC `get_workload_per_dag`.
+
+        Fouten zijn niet blokkerend: workload is informatief.
+        """
+        if not user_ids or not datums:
+            return {}
 
         logger.debug(
-            f"_check_workload: {len(alle_user_ids)} users, "
-            f"{len(alle_datums)} datums"
+            f"_get_dag_counts: {len(user_ids)} users, {len(datums)} datums"
         )
 
         try:
-            result = self.db.rpc('get_workload_per_dag', {
-                'p_user_ids':       alle_user_ids,
-                'p_datums':         alle_datums,
+            result = await self.db.rpc('get_workload_per_dag', {
+                'p_user_ids':       user_ids,
+                'p_datums':         datums,
                 'p_exclude_tender': exclude_tender_id
             }).execute()
 
@@ -281,27 +495,33 @@ class BackplanningService:
             logger.error(
                 f"RPC get_workload_per_dag mislukt: {e}", exc_info=True
             )
-            return []   # Geen conflict-warnings bij fout, niet blokkerend
+            return {}   # Geen conflict-warnings bij fout, niet blokkerend
 
-        # Maak lookup: { user_id: { datum: count } }
-        dag_counts: Dict[str, Dict[str, int]] = {}
+        dag_counts: Dict[Tuple[str, str], int] = {}
         for row in rows:
             uid = row.get('user_id', '')
-            dag = str(row.get('dag', ''))
-            cnt = row.get('taak_count', 0)
-            dag_counts.setdefault(uid, {})[dag] = cnt
+            dag = str(row.get('dag', ''))[:10]
+            if uid and dag:
+                dag_counts[(uid, dag)] = row.get('taak_count', 0) or 0
+        return dag_counts
 
-        # Bouw warnings op voor drempel ≥ 3
+    def _workload_warnings(
+        self,
+        planning: list,
+        dag_counts: Dict[Tuple[str, str], int]
+    ) -> list:
+        """Warnings uit RPC-tellingen (fallback als de matrix ontbreekt)."""
+        warnings = []
         for taak in planning:
             toegewezen = taak.get('toegewezen_aan')
-            if not toegewezen or not isinstance(toegewezen, list) or len(toegewezen) == 0:
+            if not toegewezen or not isinstance(toegewezen, list):
                 continue
-            
+
             pid = toegewezen[0]  # Eerste user_id uit array
             datum = taak['datum']
-            bestaand = dag_counts.get(pid, {}).get(datum, 0)
+            bestaand = dag_counts.get((pid, datum), 0)
 
-            if bestaand >= 3:
+            if bestaand >= settings.workload_warning_drempel:
                 warnings.append({
                     'persoon_id': pid,
                     'datum': datum,
@@ -309,39 +529,44 @@ class BackplanningService:
                     'bericht': (
                         f"User heeft al {bestaand} taken op {datum}"
                     ),
-                    'severity': 'error' if bestaand >= 5 else 'warning'
+                    'severity': 'error' if bestaand >= settings.workload_error_drempel else 'warning'
                 })
 
         return warnings
 
-    async def _get_template_taken(self, template_id: str) -> list:
-        """Haal taken op uit een planning template."""
-        result = self.db.table('planning_template_taken') \
-            .select('*') \
-            .eq('template_id', template_id) \
-            .order('volgorde') \
-            .execute()
-        return result.data or []
-
-    async def _get_feestdagen(self, tenderbureau_id: str, jaar: int) -> set:
-        """Haal feestdagen op voor het bureau in een bepaald jaar."""
-        result = self.db.table('bureau_feestdagen') \
-            .select('datum') \
-            .eq('tenderbureau_id', tenderbureau_id) \
-            .gte('datum', f'{jaar}-01-01') \
-            .lte('datum', f'{jaar}-12-31') \
-            .execute()
-        return {
-            date.fromisoformat(row['datum'])
-            for row in (result.data or [])
-        }
+    @staticmethod
+    def _attach_conflicts(planning: list, warnings: list) -> None:
+        """Koppel workload-warnings als 'conflict' aan de betreffende taken."""
+        if not warnings:
+            return
+        per_dag = {(w['persoon_id'], w['datum']): w for w in warnings}
+        for taak in planning:
+            toegewezen = taak.get('toegewezen_aan')
+            if not toegewezen or not isinstance(toegewezen, list):
+                continue
+            warning = per_dag.get((toegewezen[0], taak['datum']))
+            if warning:
+                taak['conflict'] = {
+                    'type': 'workload',
+                    'bericht': warning['bericht'],
+                    'severity': warning['severity']
+                }
+
+    async def _get_template_taken(
+        self,
+        template_id: str,
+        tenderbureau_id: Optional[str] = None
+    ) -> list:
+        """Haal taken op uit een planning template (template cache)."""
+        tmpl = await get_template_met_taken(self.db, template_id, tenderbureau_id)
+        return tmpl['taken'] if tmpl else []
 
     async def _get_team_details(self, user_ids: list) -> dict:
         """Haal team member details op voor een lijst user IDs."""
         if not user_ids:
             return {}
 
-        result = self.db.table('v_bureau_team') \
+        result = await self.db.table('v_bureau_team') \
             .select('user_id, naam, initialen, avatar_kleur') \
             .in_('user_id', user_ids) \
             .execute()
@@ -361,9 +586,10 @@ class BackplanningService:
         self,
         template_id: str,
         deadline: date,
-        feestdagen: set,
+        kalender: WerkdagKalender,
         team_assignments: dict = None,
-        team_details: dict = None
+        team_details: dict = None,
+        tenderbureau_id: Optional[str] = None
     ) -> list:
         """
         Genereer checklist items op basis van checklist_templates tabel.
@@ -371,51 +597,58 @@ class BackplanningService:
         FIX v2.2: Gebruikt checklist_templates (per bureau) i.p.v. 
         planning_template_checklist (per planning template).
         """
+        items = await self._get_checklist_templates(template_id, tenderbureau_id)
+        if not items:
+            logger.warning("Geen checklist items gevonden")
+            return []
+
+        checklist = self._bereken_checklist(items, deadline, kalender, team_assignments)
+        logger.info(f"✅ {len(checklist)} checklist items gegenereerd")
+        return checklist
+
+    async def _get_checklist_templates(
+        self,
+        template_id: str,
+        tenderbureau_id: Optional[str] = None
+    ) -> list:
+        """Actieve checklist_templates van het bureau van een planning template."""
         try:
-            # Haal bureau_id op uit het planning template
-            template_result = self.db.table('planning_templates') \
-                .select('tenderbureau_id') \
-                .eq('id', template_id) \
-                .single() \
-                .execute()
-            
-            if not template_result.data:
+            # Bureau van het planning template (uit de template cache)
+            tmpl = await get_template_met_taken(self.db, template_id, tenderbureau_id)
+            if not tmpl:
                 logger.warning(f"Template {template_id} niet gevonden voor checklist")
                 return []
             
-            bureau_id = template_result.data.get('tenderbureau_id')
+            bureau_id = tmpl.get('tenderbureau_id')
             if not bureau_id:
                 logger.warning("Geen bureau_id in template voor checklist")
                 return []
             
-            # Haal checklist items op voor dit bureau
-            result = self.db.table('checklist_templates') \
-                .select('*') \
-                .eq('tenderbureau_id', bureau_id) \
-                .eq('is_active', True) \
-                .order('volgorde') \
-                .execute()
-            
-            items = result.data or []
+            items = await get_checklist_template_items(self.db, bureau_id)
             logger.info(f"📋 Checklist: {len(items)} items gevonden voor bureau {bureau_id}")
+            return items
             
         except Exception as e:
             logger.error(f"Fout bij ophalen checklist templates: {e}", exc_info=True)
             return []
 
-        if not items:
-            logger.warning("Geen checklist items gevonden")
-            return []
-
+    def _bereken_checklist(
+        self,
+        items: list,
+        deadline: date,
+        kalender: WerkdagKalender,
+        team_assignments: dict = None
+    ) -> list:
+        """Checklist items met datum en toewijzing, zonder database-calls."""
         checklist = []
         for item in items:
             # Spreidt items gelijkmatig over laatste 2 weken
             dagen_voor_deadline = max(1, 14 - item.get('volgorde', 0))
-            item_datum = self._bereken_werkdag(deadline, dagen_voor_deadline, feestdagen)
+            item_datum = self._bereken_werkdag(deadline, dagen_voor_deadline, kalender)
             
             # Intelligente toewijzing op basis van sectie
             user_id = None
-            sectie = item.get('sectie', '').lower()
+            sectie = (item.get('sectie') or '').lower()
             
             if team_assignments:
                 if 'financ' in sectie or 'budget' in sectie:
@@ -439,10 +672,274 @@ class BackplanningService:
                 't_minus': dagen_voor_deadline,
                 'volgorde': item.get('volgorde', 0)
             })
-        
-        logger.info(f"✅ {len(checklist)} checklist items gegenereerd")
         return checklist
 
+    def _bereken_planning(
+        self,
+        template_taken: list,
+        deadline: date,
+        kalender: WerkdagKalender,
+        team_assignments: Dict[str, str]
+    ) -> list:
+        """Planning-taken met datums terug vanaf de deadline, zonder database-calls."""
+        planning = []
+        for taak in template_taken:
+            taak_datum = self._bereken_werkdag(
+                deadline, taak['t_minus_werkdagen'], kalender
+            )
+            eind_datum = taak_datum
+            duur = taak.get('duur_werkdagen', 1) or 1
+            if duur > 1:
+                eind_datum = self._bereken_vooruit(
+                    taak_datum, duur - 1, kalender
+                )
+
+            user_id = team_assignments.get(taak['rol'])
+
+            planning.append({
+                'naam': taak['naam'],
+                'beschrijving': taak.get('beschrijving'),
+                'datum': taak_datum.isoformat(),
+                'eind_datum': eind_datum.isoformat(),
+                'duur_werkdagen': duur,
+                'rol': taak['rol'],
+                'categorie': taak.get('categorie', 'algemeen'),
+                'toegewezen_aan': [user_id] if user_id else [],  # Array van user IDs
+                'is_mijlpaal': taak.get('is_mijlpaal', False),
+                't_minus': taak['t_minus_werkdagen'],
+                'volgorde': taak.get('volgorde', 0)
+            })
+        return planning
+
+    @staticmethod
+    def _bereken_metadata(planning: list, deadline: date) -> dict:
+        """Samenvattende metadata (eerste/laatste taak, doorlooptijd)."""
+        alle_datums = [
+            date.fromisoformat(t['datum'])
+            for t in planning
+            if t.get('datum')
+        ]
+        eerste = min(alle_datums) if alle_datums else None
+        laatste = max(alle_datums) if alle_datums else None
+        return {
+            'eerste_taak': eerste.isoformat() if eerste else None,
+            'laatste_taak': laatste.isoformat() if laatste else None,
+            'deadline': deadline.isoformat(),
+            'doorlooptijd_werkdagen': len(alle_datums),
+            'doorlooptijd_kalenderdagen': (
+                (laatste - eerste).days if eerste and laatste else 0
+            ),
+        }
+
+    # ──────────────────────────────────────────────────────────────
+    # BULK HELPERS
+    # ──────────────────────────────────────────────────────────────
+
+    async def _get_bulk_tenders(
+        self,
+        tenderbureau_id: str,
+        tender_ids: Optional[List[str]] = None
+    ) -> list:
+        """Actieve tenders van het bureau (optioneel beperkt tot tender_ids)."""
+        def query():
+            return self.db.table('tenders') \
+                .select('id, naam, deadline_indiening') \
+                .eq('tenderbureau_id', tenderbureau_id) \
+                .neq('fase', 'archief')
+
+        if not tender_ids:
+            result = await query().order('deadline_indiening').execute()
+            return result.data or []
+
+        results = await asyncio.gather(*[
+            query().in_('id', chunk).execute() for chunk in _chunks(tender_ids)
+        ])
+        tenders = [row for result in results for row in (result.data or [])]
+        # Zelfde volgorde als .order('deadline_indiening'): NULL achteraan
+        tenders.sort(key=lambda t: (t.get('deadline_indiening') is None, t.get('deadline_indiening') or ''))
+        return tenders
+
+    async def _get_bulk_team_assignments(
+        self,
+        tender_ids: List[str]
+    ) -> Dict[str, Dict[str, str]]:
+        """{ tender_id: { rol: user_id } } voor alle tenders in één query."""
+        if not tender_ids:
+            return {}
+        results = await asyncio.gather(*[
+            self.db.table('tender_team_assignments')
+                .select('tender_id, rol_in_tender, user_id')
+                .in_('tender_id', chunk)
+                .execute()
+            for chunk in _chunks(tender_ids)
+        ])
+
+        teams: Dict[str, Dict[str, str]] = {}
+        for row in (row for result in results for row in (result.data or [])):
+            rol = row.get('rol_in_tender')
+            if rol and row.get('user_id'):
+                # Eerste persoon per rol wint (zelfde als de wizard)
+                teams.setdefault(row['tender_id'], {}).setdefault(rol, row['user_id'])
+        return teams
+
+    @staticmethod
+    def _parse_deadline(value) -> Optional[date]:
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(str(value)[:10])
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _planning_rows(planning: list, tender_id: str, tenderbureau_id: str) -> list:
+        """planning_taken rijen (zelfde mapping als POST /planning/save)."""
+        return [{
+            'tender_id': tender_id,
+            'taak_naam': taak.get('naam'),
+            'beschrijving': taak.get('beschrijving'),
+            'datum': taak.get('datum'),
+            'categorie': taak.get('categorie') or taak.get('rol') or 'algemeen',
+            'toegewezen_aan': taak.get('toegewezen_aan') or [],
+            'is_milestone': taak.get('is_mijlpaal', False),
+            'volgorde': taak.get('volgorde', 0),
+            'status': 'todo',
+            'tenderbureau_id': tenderbureau_id
+        } for taak in planning]
+
+    @staticmethod
+    def _checklist_rows(checklist: list, tender_id: str, tenderbureau_id: str) -> list:
+        """checklist_items rijen (zelfde mapping als POST /planning/save)."""
+        return [{
+            'tender_id': tender_id,
+            'taak_naam': item.get('naam'),
+            'beschrijving': item.get('beschrijving'),
+            'sectie': item.get('categorie') or 'algemeen',
+            'deadline': item.get('datum'),
+            'verantwoordelijke_data': item.get('toegewezen_aan') or [],
+            'is_verplicht': item.get('is_verplicht', True),
+            'volgorde': item.get('volgorde', 0),
+            'status': 'pending',
+            'tenderbureau_id': tenderbureau_id
+        } for item in checklist]
+
+    async def _lees_per_tender(self, tabel: str, kolommen: str, tender_ids: List[str]) -> list:
+        """Alle rijen van `tabel` voor deze tenders: in_() per chunk, gepagineerd."""
+        async def lees_chunk(chunk: List[str]) -> list:
+            rows: list = []
+            pagina = 0
+            while True:
+                result = await self.db.table(tabel) \
+                    .select(kolommen) \
+                    .in_('tender_id', chunk) \
+                    .order('id') \
+                    .range(pagina * BULK_LEES_PAGINA, (pagina + 1) * BULK_LEES_PAGINA - 1) \
+                    .execute()
+                batch = result.data or []
+                rows.extend(batch)
+                if len(batch) < BULK_LEES_PAGINA:
+                    return rows
+                pagina += 1
+
+        results = await asyncio.gather(*[lees_chunk(chunk) for chunk in _chunks(tender_ids)])
+        return [row for rows in results for row in rows]
+
+    @staticmethod
+    def _neem_status_over(rows: list, oude_rows: list) -> int:
+        """
+        Zet de status van bestaande taken op de nieuwe rij met dezelfde
+        (tender_id, taak_naam). Geeft het aantal overgenomen statussen terug.
+        """
+        status = {}
+        for row in oude_rows:
+            status.setdefault((row.get('tender_id'), row.get('taak_naam')), row.get('status'))
+        behouden = 0
+        for row in rows:
+            oud = status.get((row['tender_id'], row['taak_naam']))
+            if oud and oud != row['status']:
+                row['status'] = oud
+                behouden += 1
+        return behouden
+
+    async def _vervang_bulk(
+        self,
+        tender_ids: List[str],
+        planning_rows: list,
+        checklist_rows: list,
+        include_checklist: bool
+    ) -> int:
+        """
+        Vervang planning (en checklist) van de tenders, met behoud van de
+        status per taak. Geeft het aantal behouden statussen terug.
+
+        Via RPC vervang_backplanning_bulk (migratie 026): één transactie.
+        Bestaat de functie nog niet, dan _vervang_bulk_batch.
+        """
+        tabellen = ['planning_taken'] + (['checklist_items'] if include_checklist else [])
+        oude = await asyncio.gather(*[
+            self._lees_per_tender(tabel, 'id, tender_id, taak_naam, status', tender_ids)
+            for tabel in tabellen
+        ])
+        oude_planning = oude[0]
+        oude_checklist = oude[1] if include_checklist else []
+        behouden = (
+            self._neem_status_over(planning_rows, oude_planning)
+            + self._neem_status_over(checklist_rows, oude_checklist)
+        )
+
+        try:
+            await self.db.rpc('vervang_backplanning_bulk', {
+                'p_tender_ids': tender_ids,
+                'p_planning': planning_rows,
+                'p_checklist': checklist_rows,
+                'p_met_checklist': include_checklist,
+            }).execute()
+            return behouden
+        except Exception as e:
+            if not _rpc_ontbreekt(e):
+                raise
+            logger.warning(f"RPC vervang_backplanning_bulk niet beschikbaar, fallback: {e}")
+
+        await self._vervang_bulk_batch(
+            {'planning_taken': planning_rows, 'checklist_items': checklist_rows},
+            {'planning_taken': oude_planning, 'checklist_items': oude_checklist},
+        )
+        return behouden
+
+    async def _vervang_bulk_batch(self, nieuwe: Dict[str, list], oude: Dict[str, list]) -> None:
+        """
+        Fallback zonder RPC: geen echte transactie, dus eerst de NIEUWE
+        rijen wegschrijven en pas daarna de oude (op id) verwijderen. Faalt
+        een insert, dan worden de al ingevoegde rijen opgeruimd en blijft
+        de oude planning staan.
+        """
+        ingevoegd: Dict[str, List[str]] = {tabel: [] for tabel in nieuwe}
+        try:
+            for tabel, rows in nieuwe.items():
+                for i in range(0, len(rows), BULK_INSERT_CHUNK):
+                    result = await self.db.table(tabel) \
+                        .insert(rows[i:i + BULK_INSERT_CHUNK]) \
+                        .execute()
+                    ingevoegd[tabel].extend(r['id'] for r in (result.data or []))
+        except Exception:
+            try:
+                await self._verwijder_ids(ingevoegd)
+            except Exception as e:
+                logger.error(f"Opruimen na mislukte bulk-insert mislukt: {e}", exc_info=True)
+            raise
+
+        await self._verwijder_ids({
+            tabel: [row['id'] for row in rows] for tabel, rows in oude.items()
+        })
+
+    async def _verwijder_ids(self, ids_per_tabel: Dict[str, List[str]]) -> None:
+        for tabel, ids in ids_per_tabel.items():
+            for chunk in _chunks(ids):
+                await self.db.table(tabel) \
+                    .delete() \
+                    .in_('id', chunk) \
+                    .execute()
+
     # ──────────────────────────────────────────────────────────────
     # DATUM BEREKENING HELPERS
     # ──────────────────────────────────────────────────────────────
@@ -451,33 +948,21 @@ class BackplanningService:
         self,
         deadline: date,
         t_minus_werkdagen: int,
-        feestdagen: set
+        kalender: WerkdagKalender
     ) -> date:
         """
         Bereken een datum t_minus_werkdagen voor de deadline,
         waarbij weekenden en feestdagen worden overgeslagen.
         """
-        result = deadline
-        stappen = 0
-        while stappen < t_minus_werkdagen:
-            result -= timedelta(days=1)
-            if result.weekday() < 5 and result not in feestdagen:
-                stappen += 1
-        return result
+        return kalender.terug(deadline, t_minus_werkdagen)
 
     def _bereken_vooruit(
         self,
         start: date,
         werkdagen: int,
-        feestdagen: set
+        kalender: WerkdagKalender
     ) -> date:
         """
         Bereken een datum `werkdagen` werkdagen VOORUIT vanaf start.
         """
-        result = start
-        stappen = 0
-        while stappen < werkdagen:
-            result += timedelta(days=1)
-            if result.weekday() < 5 and result not in feestdagen:
-                stappen += 1
-        return result
\ No newline at end of file
+        return kalender.vooruit(start, werkdagen)
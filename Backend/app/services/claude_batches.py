@@ -0,0 +1,337 @@
+# Backend/app/services/claude_batches.py
+# Message Batches voor bulk AI-werk — TenderZen v1.1
+#
+# Bulkjobs (verrijking bulk job, scan-bureau) deden duizenden losse
+# Claude-calls na elkaar. Via de Message Batches API:
+#   - 50% van de token-prijs
+#   - eigen limieten: de governor (en dus interactief werk) merkt er niets van
+#   - resultaat binnen 24 uur, meestal binnen minuten
+#
+# verwerk_batch() splitst de verzoeken in batches van BATCH_MAX_VERZOEKEN,
+# dient ze in, pollt tot ze klaar zijn en geeft de resultaten per batch
+# aan de verwerker van die soort (registreer_verwerker). custom_id is de
+# sleutel terug naar het record (bijv. bedrijf-id) — max 64 tekens
+# [a-zA-Z0-9_-].
+#
+# WIJZIGINGEN v1.1:
+# - Elke ingediende batch staat in claude_batches (migratie 027) met de
+#   context die de verwerker nodig heeft. Zolang een worker de batch
+#   afhandelt (pollen, resultaten ophalen, verwerker) werkt een
+#   hartslag-taak bijgewerkt_op bij; verzamelaar() (gestart bij
+#   app-startup) neemt batches zonder recente hartslag over, bijv. na een
+#   herstart of deploy.
+# - Resultaten: Message (succeeded), None (errored). Geannuleerde en
+#   verlopen verzoeken ontbreken: die zijn niet uitgevoerd en de
+#   verwerker laat hun record ongemoeid.
+# - start_achtergrondtaak() houdt een referentie naar de asyncio-taak
+#   vast; een losse create_task kan halverwege worden opgeruimd.
+#
+# OFFLINE TESTEN: zet CLAUDE_BATCH_BASE_URL op de lokale stand-in server
+# (scripts/claude_batch_stub.py); alleen batch-calls gaan dan daarheen.
+
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Coroutine, Dict, List, Optional, Set
+
+import anthropic
+from app.config import settings
+from app.core.database import get_async_supabase_admin
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_VERZOEKEN = 10_000         # API-limiet is 100.000 / 256 MB per batch
+BATCH_POLL_MIN_SECONDEN = 5.0
+BATCH_POLL_MAX_SECONDEN = 60.0
+BATCH_MAX_WACHTTIJD = 24 * 3600      # batches verlopen na 24 uur
+BATCH_HARTSLAG_INTERVAL = 60         # bijgewerkt_op zolang de batch wordt afgehandeld
+BATCH_HARTSLAG_VERLOPEN = 600        # zo lang geen hartslag → worker weg, batch overnemen
+BATCH_VERZAMEL_INTERVAL = 300        # verzamelaar: om de 5 minuten kijken
+
+_CUSTOM_ID_RE = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+# {custom_id: Message} — None = errored; geannuleerd/verlopen ontbreekt
+Uitkomst = Dict[str, Optional[anthropic.types.Message]]
+Verwerker = Callable[[Uitkomst, Dict[str, dict]], Awaitable[None]]
+
+_batch_client = None
+_verwerkers: Dict[str, Verwerker] = {}
+_taken: Set[asyncio.Task] = set()
+
+
+def get_batch_client() -> anthropic.AsyncAnthropic:
+    global _batch_client
+    if _batch_client is None:
+        kwargs = {"api_key": settings.anthropic_api_key or "stub"}
+        if settings.claude_batch_base_url:
+            kwargs["base_url"] = settings.claude_batch_base_url
+        _batch_client = anthropic.AsyncAnthropic(**kwargs)
+    return _batch_client
+
+
+def registreer_verwerker(soort: str, verwerker: Verwerker) -> None:
+    """
+    Koppel een soort batch aan de coroutine die de resultaten opslaat:
+    verwerker(uitkomst, context) met context = {custom_id: dict} zoals
+    meegegeven aan verwerk_batch. Registreren bij het importeren van de
+    module, zodat de verzamelaar ook na een herstart de verwerker kent.
+    """
+    _verwerkers[soort] = verwerker
+
+
+def start_achtergrondtaak(coro: Coroutine) -> asyncio.Task:
+    """asyncio.create_task met een referentie tot de taak klaar is."""
+    taak = asyncio.create_task(coro)
+    _taken.add(taak)
+    taak.add_done_callback(_taken.discard)
+    return taak
+
+
+def _nu() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ── Register (claude_batches) ─────────────────────────────────────────────────
+# Niet-fataal: zonder register (bijv. migratie 027 nog niet gedraaid) werkt
+# een batch gewoon, alleen overleeft hij geen herstart.
+
+async def _registreer(batch_id: str, soort: str, context: Dict[str, dict]) -> None:
+    try:
+        await get_async_supabase_admin().table("claude_batches").insert({
+            "id":      batch_id,
+            "soort":   soort,
+            "context": context,
+            "aantal":  len(context),
+        }).execute()
+    except Exception as e:
+        logger.warning(f"[batch:{soort}] {batch_id} niet geregistreerd: {e}")
+
+
+async def _hartslag(batch_id: str) -> None:
+    try:
+        await get_async_supabase_admin().table("claude_batches") \
+            .update({"bijgewerkt_op": _nu()}) \
+            .eq("id", batch_id).eq("status", "lopend").execute()
+    except Exception as e:
+        logger.debug(f"[batch] hartslag {batch_id} mislukt: {e}")
+
+
+async def _hartslag_lus(batch_id: str) -> None:
+    """Hartslag tot de taak wordt geannuleerd (loopt naast _handel_af)."""
+    while True:
+        await _hartslag(batch_id)
+        await asyncio.sleep(BATCH_HARTSLAG_INTERVAL)
+
+
+async def _markeer(batch_id: str, status: str, fout: Optional[str] = None) -> None:
+    try:
+        await get_async_supabase_admin().table("claude_batches").update({
+            "status":        status,
+            "fout":          fout,
+            "bijgewerkt_op": _nu(),
+            "verwerkt_op":   _nu(),
+        }).eq("id", batch_id).execute()
+    except Exception as e:
+        logger.warning(f"[batch] status {batch_id} → {status} niet opgeslagen: {e}")
+
+
+# ── Batches API ───────────────────────────────────────────────────────────────
+
+async def _dien_in(client, verzoeken: Dict[str, dict], label: str) -> str:
+    batch = await client.messages.batches.create(requests=[
+        {"custom_id": custom_id, "params": params}
+        for custom_id, params in verzoeken.items()
+    ])
+    logger.info(f"[batch:{label}] {batch.id} ingediend ({len(verzoeken)} verzoeken)")
+    return batch.id
+
+
+async def _wacht(
+    client,
+    batch_id: str,
+    label: str,
+    gestopt: Optional[Callable[[], bool]],
+    max_wachttijd: float,
+) -> None:
+    start = time.monotonic()
+    interval = BATCH_POLL_MIN_SECONDEN
+    geannuleerd = False
+    while True:
+        batch = await client.messages.batches.retrieve(batch_id)
+        if batch.processing_status == "ended":
+            tellingen = batch.request_counts
+            logger.info(
+                f"[batch:{label}] {batch_id} klaar: {tellingen.succeeded} ok, "
+                f"{tellingen.errored} fout, {tellingen.canceled} geannuleerd, {tellingen.expired} verlopen"
+            )
+            return
+        te_lang = time.monotonic() - start > max_wachttijd
+        if not geannuleerd and (te_lang or (gestopt and gestopt())):
+            # Annuleren: al verwerkte verzoeken komen nog als resultaat terug
+            logger.info(f"[batch:{label}] {batch_id} annuleren")
+            await client.messages.batches.cancel(batch_id)
+            geannuleerd = True
+        await asyncio.sleep(interval)
+        interval = min(interval * 1.5, BATCH_POLL_MAX_SECONDEN)
+
+
+async def _resultaten(client, batch_id: str, label: str) -> Uitkomst:
+    uitkomst: Uitkomst = {}
+    async for regel in await client.messages.batches.results(batch_id):
+        soort = regel.result.type
+        if soort == "succeeded":
+            uitkomst[regel.custom_id] = regel.result.message
+        elif soort == "errored":
+            fout = getattr(getattr(regel.result, "error", None), "error", None)
+            logger.warning(f"[batch:{label}] {regel.custom_id}: errored {fout or ''}".rstrip())
+            uitkomst[regel.custom_id] = None
+        else:
+            # canceled / expired: niet uitgevoerd, geen uitkomst
+            logger.info(f"[batch:{label}] {regel.custom_id}: {soort}")
+    return uitkomst
+
+
+async def _handel_af(
+    client,
+    batch_id: str,
+    soort: str,
+    context: Dict[str, dict],
+    gestopt: Optional[Callable[[], bool]] = None,
+    max_wachttijd: float = BATCH_MAX_WACHTTIJD,
+) -> None:
+    """
+    Wachten, resultaten ophalen, verwerker aanroepen en de batch afmelden.
+
+    De hartslag loopt tot en met de verwerker: resultaten ophalen en
+    opslaan kan langer duren dan BATCH_HARTSLAG_VERLOPEN, en zonder
+    hartslag zou een andere worker de batch dan opnieuw claimen.
+    """
+    hartslag = asyncio.create_task(_hartslag_lus(batch_id))
+    try:
+        try:
+            await _wacht(client, batch_id, soort, gestopt, max_wachttijd)
+            uitkomst = await _resultaten(client, batch_id, soort)
+        except anthropic.NotFoundError as e:
+            # Onbekend of resultaten niet meer beschikbaar (29 dagen)
+            logger.error(f"[batch:{soort}] {batch_id} niet gevonden: {e}")
+            await _markeer(batch_id, "mislukt", str(e))
+            return
+        except Exception as e:
+            # Blijft 'lopend': de verzamelaar probeert het later opnieuw
+            logger.error(f"[batch:{soort}] {batch_id} ophalen mislukt: {e}")
+            return
+
+        try:
+            await _verwerkers[soort](uitkomst, context)
+        except Exception as e:
+            logger.error(f"[batch:{soort}] {batch_id} verwerken mislukt: {e}")
+            await _markeer(batch_id, "mislukt", str(e))
+            return
+    finally:
+        hartslag.cancel()
+    await _markeer(batch_id, "verwerkt")
+
+
+async def verwerk_batch(
+    verzoeken: Dict[str, dict],
+    soort: str,
+    context: Optional[Dict[str, dict]] = None,
+    gestopt: Optional[Callable[[], bool]] = None,
+    max_wachttijd: float = BATCH_MAX_WACHTTIJD,
+) -> None:
+    """
+    Voer Claude-verzoeken uit via de Message Batches API en laat de
+    verwerker van `soort` de resultaten opslaan (per batch van
+    BATCH_MAX_VERZOEKEN).
+
+    Args:
+        verzoeken: {custom_id: messages.create-kwargs (model, max_tokens,
+                   messages, system, ...)}
+        soort: geregistreerde verwerker; ook het label in de logregels
+        context: {custom_id: JSON-serialiseerbare dict} voor de verwerker;
+                 wordt bij de batch opgeslagen zodat de resultaten ook na
+                 een herstart verwerkt kunnen worden
+        gestopt: callback; True → lopende batches annuleren
+        max_wachttijd: daarna annuleren (seconden)
+
+    Raises:
+        ValueError: ongeldige custom_id of onbekende soort
+        anthropic.APIError: indienen mislukt
+    """
+    if soort not in _verwerkers:
+        raise ValueError(f"Geen verwerker geregistreerd voor batch-soort {soort!r}")
+    for custom_id in verzoeken:
+        if not _CUSTOM_ID_RE.match(custom_id):
+            raise ValueError(f"Ongeldige custom_id voor batch: {custom_id!r}")
+    if not verzoeken:
+        return
+
+    context = context or {}
+    client = get_batch_client()
+    ids = list(verzoeken)
+    delen: List[List[str]] = [ids[i:i + BATCH_MAX_VERZOEKEN] for i in range(0, len(ids), BATCH_MAX_VERZOEKEN)]
+
+    lopend = []
+    for deel in delen:
+        batch_id = await _dien_in(client, {cid: verzoeken[cid] for cid in deel}, soort)
+        deel_context = {cid: context.get(cid, {}) for cid in deel}
+        await _registreer(batch_id, soort, deel_context)
+        lopend.append((batch_id, deel_context))
+
+    await asyncio.gather(*(
+        _handel_af(client, batch_id, soort, deel_context, gestopt, max_wachttijd)
+        for batch_id, deel_context in lopend
+    ))
+
+
+# ── Verzamelaar ───────────────────────────────────────────────────────────────
+
+async def verzamel_open_batches() -> int:
+    """
+    Neem batches over die 'lopend' zijn maar al BATCH_HARTSLAG_VERLOPEN
+    seconden geen hartslag hebben (worker herstart of weg) en handel ze op de
+    achtergrond af. De claim is één UPDATE met dezelfde voorwaarden: van
+    meerdere workers krijgt er precies één de rij terug.
+
+    Returns:
+        aantal overgenomen batches
+    """
+    db = get_async_supabase_admin()
+    grens = (datetime.now(timezone.utc) - timedelta(seconds=BATCH_HARTSLAG_VERLOPEN)).isoformat()
+    res = await db.table("claude_batches") \
+        .select("id,soort") \
+        .eq("status", "lopend") \
+        .lt("bijgewerkt_op", grens) \
+        .execute()
+
+    overgenomen = 0
+    for rij in res.data or []:
+        if rij["soort"] not in _verwerkers:
+            logger.warning(f"[batch] {rij['id']}: geen verwerker voor soort {rij['soort']!r}")
+            continue
+        claim = await db.table("claude_batches") \
+            .update({"bijgewerkt_op": _nu()}) \
+            .eq("id", rij["id"]) \
+            .eq("status", "lopend") \
+            .lt("bijgewerkt_op", grens) \
+            .execute()
+        if not claim.data:
+            continue   # andere worker was eerder
+        logger.info(f"[batch:{rij['soort']}] {rij['id']} overgenomen")
+        start_achtergrondtaak(_handel_af(
+            get_batch_client(), rij["id"], rij["soort"], claim.data[0].get("context") or {}
+        ))
+        overgenomen += 1
+    return overgenomen
+
+
+async def verzamelaar() -> None:
+    """Achtergrondlus (app-startup): verweesde batches periodiek overnemen."""
+    while True:
+        try:
+            await verzamel_open_batches()
+        except Exception as e:
+            logger.warning(f"[batch] verzamelen mislukt: {e}")
+        await asyncio.sleep(BATCH_VERZAMEL_INTERVAL)
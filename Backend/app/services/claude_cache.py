@@ -0,0 +1,236 @@
+# Backend/app/services/claude_cache.py
+# Response cache voor deterministische Claude-calls — TenderZen v1.0
+#
+# Veel calls worden met exact dezelfde input herhaald:
+#   - match_handmatig / hematchen_tender draaien analyseer_aanbesteding
+#     opnieuw op dezelfde opgeslagen tekst
+#   - reanalyze() extraheert dezelfde documenten opnieuw
+#   - gebruikers klikken twee keer op "genereer"
+#
+# SLEUTEL: sha256 over (soort, model, system, messages, max_tokens,
+# temperature) — inhoud-geadresseerd, dus geen invalidatie nodig: andere
+# input = andere sleutel.
+#
+# OPSLAG: lokale SQLite (WAL) zodat alle uvicorn workers op dezelfde host
+# de cache delen. Begrensd op claude_cache_max_mb (LRU op laatst_gebruikt)
+# en per call_type een TTL (CACHE_TTL).
+#
+# OPT-IN: alleen call_types in CACHE_TTL worden gecachet; cache=True/False
+# op de call overschrijft dat. Gelijktijdige identieke async calls
+# (dubbelklik) delen één API-call via eenmalig().
+#
+# Een cache-fout (schijf vol, lock timeout) breekt nooit een call: dan
+# gewoon naar de API.
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# TTL in seconden per call_type. Niet genoemd = niet cachen.
+CACHE_TTL: Dict[str, int] = {
+    "tendermatch_analyse": 7 * 24 * 3600,   # analyse van opgeslagen aanbestedingstekst
+    "tendermatch_score":   24 * 3600,       # prompt bevat profielen/referenties
+    "smart_import":        7 * 24 * 3600,   # extractie uit dezelfde documenten
+    "planning_extractie":  24 * 3600,
+    "checklist_extractie": 24 * 3600,
+    "ai_generatie":        10 * 60,         # alleen dubbelklik / direct opnieuw
+}
+CACHE_TTL_STANDAARD = 3600                  # cache=True zonder beleid
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    sleutel          TEXT PRIMARY KEY,
+    call_type        TEXT,
+    waarde           TEXT NOT NULL,
+    grootte          INTEGER NOT NULL,
+    verloopt_op      REAL NOT NULL,
+    laatst_gebruikt  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_gebruikt ON responses(laatst_gebruikt);
+"""
+
+
+def cache_ttl(call_type: str, cache: Optional[bool] = None) -> int:
+    """TTL voor deze call (0 = niet cachen)."""
+    if cache is False or not settings.claude_cache_actief:
+        return 0
+    ttl = CACHE_TTL.get(call_type, 0)
+    if cache is True and not ttl:
+        return CACHE_TTL_STANDAARD
+    return ttl
+
+
+def cache_sleutel(soort: str, kwargs: dict) -> str:
+    """sha256 over de velden die de response bepalen."""
+    payload = {
+        "soort":       soort,
+        "model":       kwargs.get("model"),
+        "system":      kwargs.get("system"),
+        "messages":    kwargs.get("messages"),
+        "max_tokens":  kwargs.get("max_tokens"),
+        "temperature": kwargs.get("temperature"),
+    }
+    ruw = json.dumps(payload, sort_keys=True, separators=(",", ":"),
+                     ensure_ascii=False, default=str)
+    return hashlib.sha256(ruw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-cache met TTL en een limiet op het totaal aantal bytes.
+
+    Args:
+        pad: bestand ('' = tempdir/tenderzen_claude_cache.sqlite)
+        max_bytes: totale grootte waarboven de minst recent gebruikte
+            entries verwijderd worden
+    """
+
+    def __init__(self, pad: str, max_bytes: int):
+        self.pad = pad or os.path.join(tempfile.gettempdir(), "tenderzen_claude_cache.sqlite")
+        self.max_bytes = max_bytes
+        self._lokaal = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_klaar = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._lokaal, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.pad, timeout=2.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_klaar:
+                    conn.executescript(_SCHEMA)
+                    self._schema_klaar = True
+            self._lokaal.conn = conn
+        return conn
+
+    def get(self, sleutel: str) -> Optional[str]:
+        try:
+            conn = self._conn()
+            rij = conn.execute(
+                "SELECT waarde, verloopt_op FROM responses WHERE sleutel = ?", (sleutel,)
+            ).fetchone()
+            if rij is None:
+                return None
+            nu = time.time()
+            if rij[1] <= nu:
+                conn.execute("DELETE FROM responses WHERE sleutel = ?", (sleutel,))
+                return None
+            conn.execute("UPDATE responses SET laatst_gebruikt = ? WHERE sleutel = ?", (nu, sleutel))
+            return rij[0]
+        except sqlite3.Error as e:
+            logger.warning(f"Claude cache lezen mislukt: {e}")
+            return None
+
+    def set(self, sleutel: str, call_type: str, waarde: str, ttl: int) -> None:
+        grootte = len(waarde.encode("utf-8"))
+        if grootte > self.max_bytes:
+            return
+        nu = time.time()
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (sleutel, call_type, waarde, grootte, nu + ttl, nu),
+            )
+            self._ruim_op(conn, nu)
+        except sqlite3.Error as e:
+            logger.warning(f"Claude cache schrijven mislukt: {e}")
+
+    def _ruim_op(self, conn: sqlite3.Connection, nu: float) -> None:
+        totaal = conn.execute("SELECT COALESCE(SUM(grootte), 0) FROM responses").fetchone()[0]
+        if totaal <= self.max_bytes:
+            return
+        conn.execute("DELETE FROM responses WHERE verloopt_op <= ?", (nu,))
+        # Daarna LRU tot 90% van de limiet (niet bij elke set opnieuw)
+        doel = int(self.max_bytes * 0.9)
+        totaal = conn.execute("SELECT COALESCE(SUM(grootte), 0) FROM responses").fetchone()[0]
+        if totaal <= doel:
+            return
+        weg, vrij = [], 0
+        for sleutel, grootte in conn.execute(
+            "SELECT sleutel, grootte FROM responses ORDER BY laatst_gebruikt"
+        ):
+            weg.append((sleutel,))
+            vrij += grootte
+            if totaal - vrij <= doel:
+                break
+        conn.executemany("DELETE FROM responses WHERE sleutel = ?", weg)
+
+    def wis(self, call_type: Optional[str] = None) -> None:
+        try:
+            if call_type:
+                self._conn().execute("DELETE FROM responses WHERE call_type = ?", (call_type,))
+            else:
+                self._conn().execute("DELETE FROM responses")
+        except sqlite3.Error as e:
+            logger.warning(f"Claude cache wissen mislukt: {e}")
+
+    def status(self) -> dict:
+        try:
+            aantal, totaal = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(grootte), 0) FROM responses"
+            ).fetchone()
+        except sqlite3.Error:
+            aantal, totaal = 0, 0
+        return {"pad": self.pad, "entries": aantal, "bytes": totaal, "max_bytes": self.max_bytes}
+
+    # Async: SQLite-I/O buiten de event loop
+    async def aget(self, sleutel: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, sleutel)
+
+    async def aset(self, sleutel: str, call_type: str, waarde: str, ttl: int) -> None:
+        await asyncio.to_thread(self.set, sleutel, call_type, waarde, ttl)
+
+
+response_cache = ResponseCache(settings.claude_cache_pad, settings.claude_cache_max_mb * 1024 * 1024)
+
+_onderweg: Dict[str, asyncio.Future] = {}
+
+
+async def eenmalig(
+    sleutel: str,
+    maak: Callable[[], Awaitable[T]],
+    gedeeld: Optional[Callable[[T], T]] = None,
+) -> T:
+    """
+    Identieke gelijktijdige calls delen één uitvoering. Mislukt (of wordt
+    geannuleerd) de eerste, dan voeren de wachtenden hem zelf uit.
+
+    Args:
+        gedeeld: bewerking op het resultaat voor de wachtenden (bijv. usage
+            op 0, zodat het verbruik maar één keer geteld wordt)
+    """
+    lopend = _onderweg.get(sleutel)
+    if lopend is not None:
+        resultaat = await asyncio.shield(lopend)
+        if resultaat is None:
+            return await maak()
+        return gedeeld(resultaat) if gedeeld else resultaat
+
+    fut = asyncio.get_running_loop().create_future()
+    _onderweg[sleutel] = fut
+    try:
+        resultaat = await maak()
+    except BaseException:
+        fut.set_result(None)
+        raise
+    else:
+        fut.set_result(resultaat)
+        return resultaat
+    finally:
+        _onderweg.pop(sleutel, None)
@@ -0,0 +1,260 @@
+# Backend/app/services/claude_preflight.py
+# Pre-flight voor Claude-calls: input tellen, output voorspellen — TenderZen v1.0
+#
+# Call sites kozen max_tokens op gevoel (tekens tellen, vaste 2000/8192)
+# en smart import kapte de input stil af op 150.000 tekens. Een te krappe
+# max_tokens merk je pas ná de betaalde call (stop_reason max_tokens),
+# waarna de gebruiker het opnieuw probeert: betalen voor niets.
+#
+# plan_call() doet vóór het versturen:
+#   1. input tellen — messages.count_tokens (gratis, ook voor PDF-blokken);
+#      bij een fout of claude_preflight_tellen=False de schatting van de
+#      governor (schat_tokens)
+#   2. output voorspellen — p95 van output_tokens uit ai_usage_log voor
+#      deze call_type, bij voorkeur van calls met vergelijkbare input
+#      (factor 2); te weinig historie → standaard van de aanroeper
+#   3. kiezen — max_tokens = voorspelling × UITVOER_MARGE binnen het
+#      plafond van het model; eerste model (gevraagd, dan alternatieven)
+#      waar input + max_tokens in de context past; past niets, dan het
+#      aantal delen waarin de input gesplitst moet worden (splits_tekst)
+#
+# Historie per call_type wordt HISTORIE_TTL seconden per worker gecachet.
+# Fouten hier breken nooit een call: dan gelden de standaarden.
+
+import hashlib
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.core.database import get_async_supabase_admin
+from app.services.anthropic_service import get_async_client, schat_tokens
+
+logger = logging.getLogger(__name__)
+
+MODEL_LIMIETEN: Dict[str, Dict[str, int]] = {
+    'claude-haiku-4-5-20251001':  {'context': 200_000, 'max_output': 64_000},
+    'claude-sonnet-4-6':          {'context': 200_000, 'max_output': 64_000},
+    'claude-sonnet-4-20250514':   {'context': 200_000, 'max_output': 64_000},
+    'claude-opus-4-6':            {'context': 200_000, 'max_output': 32_000},
+}
+MODEL_LIMIET_STANDAARD = {'context': 200_000, 'max_output': 8_192}
+
+# De SDK weigert niet-streamende calls die (volgens max_tokens) langer dan
+# 10 minuten kunnen duren; daarboven alleen met astream_claude()
+NIET_STREAMEND_MAX_OUTPUT = 16_000
+
+CONTEXT_MARGE = 0.95       # telling en werkelijke input kunnen iets verschillen
+UITVOER_MARGE = 1.25
+UITVOER_MIN = 1024
+
+# Verwachte output zonder historie (aanroeper kan dit overschrijven)
+STANDAARD_OUTPUT: Dict[str, int] = {
+    'smart_import': 6_000,
+    'ai_generatie': 8_192,
+}
+STANDAARD_OUTPUT_ONBEKEND = 4_096
+
+HISTORIE_DAGEN = 30
+HISTORIE_MAX_RIJEN = 1000
+HISTORIE_MIN_RIJEN = 20     # minder calls → standaard
+HISTORIE_BUREN_MIN = 10     # minder vergelijkbare calls → hele call_type
+HISTORIE_PERCENTIEL = 0.95
+HISTORIE_TTL = 3600
+
+TELLING_CACHE_MAX = 256
+
+_historie: Dict[str, Tuple[float, List[Tuple[int, int]]]] = {}
+_tellingen: Dict[str, int] = {}
+
+
+@dataclass
+class CallPlan:
+    model: str
+    max_tokens: int
+    input_tokens: int
+    verwachte_output: int
+    bron: str                    # 'historie' | 'standaard'
+    delen: int = 1               # > 1: input past niet, in zoveel delen splitsen
+    max_input_per_deel: int = 0
+
+    @property
+    def past(self) -> bool:
+        return self.delen == 1
+
+
+def model_limiet(model: str) -> Dict[str, int]:
+    return MODEL_LIMIETEN.get(model, MODEL_LIMIET_STANDAARD)
+
+
+def max_output(model: str, streaming: bool = False) -> int:
+    plafond = model_limiet(model)['max_output']
+    return plafond if streaming else min(plafond, NIET_STREAMEND_MAX_OUTPUT)
+
+
+def _percentiel(waarden: Sequence[int], p: float) -> int:
+    gesorteerd = sorted(waarden)
+    return gesorteerd[min(len(gesorteerd) - 1, int(math.ceil(p * len(gesorteerd))) - 1)]
+
+
+def _rond_af(tokens: float) -> int:
+    return int(math.ceil(tokens / 256.0) * 256)
+
+
+# ── 1. Input tellen ─────────────────────────────────────────
+
+async def tel_input_tokens(kwargs: dict) -> int:
+    """
+    Input-tokens van een messages.create-aanroep (model, messages, system).
+    Via de count_tokens API, gememoiseerd op de inhoud; anders geschat.
+    """
+    schatting = schat_tokens({**kwargs, 'max_tokens': 0})
+    if not settings.claude_preflight_tellen or not settings.anthropic_api_key:
+        return schatting
+
+    velden = {k: kwargs[k] for k in ('model', 'messages', 'system') if kwargs.get(k) is not None}
+    sleutel = hashlib.sha256(
+        json.dumps(velden, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    ).hexdigest()
+    if sleutel in _tellingen:
+        return _tellingen[sleutel]
+
+    try:
+        telling = await get_async_client().messages.count_tokens(**velden)
+    except Exception as e:
+        logger.warning(f"[preflight] count_tokens mislukt, schatting gebruikt: {e}")
+        return schatting
+
+    if len(_tellingen) >= TELLING_CACHE_MAX:
+        _tellingen.pop(next(iter(_tellingen)))
+    _tellingen[sleutel] = telling.input_tokens
+    return telling.input_tokens
+
+
+# ── 2. Output voorspellen ───────────────────────────────────
+
+async def _laad_historie(call_type: str) -> List[Tuple[int, int]]:
+    """(input, output) van recente calls; input incl. prompt-cache tokens."""
+    sinds = (datetime.now(timezone.utc) - timedelta(days=HISTORIE_DAGEN)).isoformat()
+    result = await get_async_supabase_admin().table('ai_usage_log') \
+        .select('*') \
+        .eq('call_type', call_type) \
+        .gt('output_tokens', 0) \
+        .gte('aangemaakt_op', sinds) \
+        .order('aangemaakt_op', desc=True) \
+        .limit(HISTORIE_MAX_RIJEN) \
+        .execute()
+    return [
+        (
+            (r.get('input_tokens') or 0) + (r.get('cache_write_tokens') or 0) + (r.get('cache_read_tokens') or 0),
+            r['output_tokens'],
+        )
+        for r in result.data or []
+    ]
+
+
+async def historie(call_type: str) -> List[Tuple[int, int]]:
+    gecachet = _historie.get(call_type)
+    if gecachet and time.monotonic() - gecachet[0] < HISTORIE_TTL:
+        return gecachet[1]
+    try:
+        rijen = await _laad_historie(call_type)
+    except Exception as e:
+        logger.warning(f"[preflight] ai_usage_log lezen mislukt voor {call_type}: {e}")
+        rijen = gecachet[1] if gecachet else []
+    _historie[call_type] = (time.monotonic(), rijen)
+    return rijen
+
+
+def voorspel_output(rijen: List[Tuple[int, int]], input_tokens: int) -> Optional[int]:
+    """p95 van de output bij vergelijkbare input (None = te weinig historie)."""
+    if len(rijen) < HISTORIE_MIN_RIJEN:
+        return None
+    buren = [uit for inp, uit in rijen if input_tokens / 2 <= inp <= input_tokens * 2]
+    reeks = buren if len(buren) >= HISTORIE_BUREN_MIN else [uit for _, uit in rijen]
+    return _percentiel(reeks, HISTORIE_PERCENTIEL)
+
+
+# ── 3. Kiezen ───────────────────────────────────────────────
+
+async def plan_call(
+    kwargs: dict,
+    call_type: str,
+    alternatieven: Sequence[str] = (),
+    standaard_output: Optional[int] = None,
+    max_input: Optional[int] = None,
+    streaming: bool = False,
+    minimaal: int = UITVOER_MIN,
+) -> CallPlan:
+    """
+    Kies model, max_tokens en het aantal delen vóór het versturen.
+
+    Args:
+        kwargs: messages.create-kwargs (model = voorkeursmodel)
+        call_type: sleutel in ai_usage_log voor de output-historie
+        alternatieven: modellen om uit te wijken als het voorkeursmodel
+            de input of output niet aankan (in volgorde van voorkeur)
+        standaard_output: verwachte output zonder historie
+        max_input: eigen plafond op input-tokens per call (kosten)
+        streaming: call gaat via astream_claude (hoger output-plafond)
+        minimaal: ondergrens voor max_tokens
+    """
+    input_tokens = await tel_input_tokens(kwargs)
+    voorspeld = voorspel_output(await historie(call_type), input_tokens)
+    bron = 'historie' if voorspeld is not None else 'standaard'
+    if voorspeld is None:
+        voorspeld = standaard_output or STANDAARD_OUTPUT.get(call_type, STANDAARD_OUTPUT_ONBEKEND)
+
+    def plan_voor(model: str) -> CallPlan:
+        plafond = max_output(model, streaming)
+        max_tokens = min(plafond, max(minimaal, _rond_af(voorspeld * UITVOER_MARGE)))
+        budget = int(model_limiet(model)['context'] * CONTEXT_MARGE) - max_tokens
+        if max_input:
+            budget = min(budget, max_input)
+        delen = 1 if input_tokens <= budget else math.ceil(input_tokens / max(budget, 1))
+        return CallPlan(model, max_tokens, input_tokens, voorspeld, bron, delen, budget)
+
+    kandidaten = [kwargs['model'], *(m for m in alternatieven if m != kwargs['model'])]
+    plannen = [plan_voor(m) for m in kandidaten]
+    plan = next(
+        (p for p in plannen if p.past and voorspeld <= max_output(p.model, streaming)),
+        plannen[0],
+    )
+    logger.info(
+        f"[preflight] {call_type}: model={plan.model} input={input_tokens} "
+        f"verwacht={voorspeld} ({bron}) max_tokens={plan.max_tokens} delen={plan.delen}"
+    )
+    return plan
+
+
+def splits_tekst(tekst: str, delen: int) -> List[str]:
+    """
+    Splits tekst in `delen` ongeveer even grote stukken, bij voorkeur op
+    een alinea- of regelgrens in het laatste vijfde van elk stuk.
+    """
+    if delen <= 1 or not tekst:
+        return [tekst]
+    doel = math.ceil(len(tekst) / delen)
+    stukken, begin = [], 0
+    for _ in range(delen - 1):
+        eind = min(len(tekst), begin + doel)
+        ondergrens = begin + int(doel * 0.8)
+        grens = tekst.rfind('\n\n', ondergrens, eind)
+        if grens < 0:
+            grens = tekst.rfind('\n', ondergrens, eind)
+        if grens > begin:
+            eind = grens
+        stukken.append(tekst[begin:eind])
+        begin = eind
+    stukken.append(tekst[begin:])
+    return [s for s in stukken if s.strip()]
+
+
+def vergeet_historie() -> None:
+    """Gecachte historie en tellingen wissen (tests / na een grote wijziging)."""
+    _historie.clear()
+    _tellingen.clear()
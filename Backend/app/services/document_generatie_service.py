@@ -21,7 +21,7 @@ import logging
 from typing import Dict, List, Optional
 from datetime import datetime
 
-from .anthropic_service import call_claude
+from .anthropic_service import acall_claude
 
 logger = logging.getLogger(__name__)
 
@@ -430,7 +430,7 @@ class DocumentGeneratieService:
         logger.debug(f"AI prompt voor {doc_type}: {len(prompt)} chars")
 
         # Anthropic API call
-        message = call_claude(
+        message = await acall_claude(
             messages=[{"role": "user", "content": prompt}],
             model=ai_model_id,
             max_tokens=config['max_tokens'],
@@ -0,0 +1,177 @@
+# Backend/app/services/export_cache.py
+# Export cache voor implementatieplanningen — TenderZen v1.0
+#
+# export_excel / export_pdf bouwden bij elke klik het werkboek of de
+# reportlab-PDF opnieuw op, in de request-thread. Vlak voor een deadline
+# wordt dezelfde planning vaak meerdere keren geëxporteerd.
+#
+# LAGEN (sleutel = sha256 van de inhoud + layout-versie, zie
+# implementatie_export.export_hash):
+#   1. Geheugen (per proces, LRU begrensd op bytes)
+#   2. Storage: {EXPORT_BUCKET}/exports/implementatieplanning/{tender}/{hash}.{soort}
+#   3. Renderen in een process pool (CPU-werk buiten de event loop en
+#      buiten de GIL van de API-worker), daarna in 1 en 2 opslaan.
+#
+# Een gewijzigde planning geeft vanzelf een andere hash; bij het opslaan
+# van een nieuwe export worden oudere exports van dezelfde soort voor die
+# tender uit storage verwijderd.
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from app.services.implementatie_export import MIMETYPES, export_hash, render
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BUCKET = "ai-documents"
+EXPORT_MAP = "exports/implementatieplanning"
+EXPORT_WORKERS = 2
+EXPORT_GEHEUGEN_MAX_BYTES = 64 * 1024 * 1024
+
+
+class _BytesLRU:
+    """Thread-safe LRU met een limiet op het totaal aantal bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._grootte = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: Tuple, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            oud = self._entries.pop(key, None)
+            if oud is not None:
+                self._grootte -= len(oud)
+            self._entries[key] = data
+            self._grootte += len(data)
+            while self._grootte > self.max_bytes:
+                _, weg = self._entries.popitem(last=False)
+                self._grootte -= len(weg)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._grootte = 0
+
+
+_geheugen = _BytesLRU(EXPORT_GEHEUGEN_MAX_BYTES)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: geen fork van een proces met draaiende event loop/threads
+            _pool = ProcessPoolExecutor(
+                max_workers=EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool() -> None:
+    """Gooi een defecte pool weg; _get_pool bouwt een nieuwe op."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def _render(soort: str, planning: dict) -> bytes:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_pool(), render, soort, planning)
+    except BrokenProcessPool as e:
+        # Worker gecrasht (bijv. OOM) — pool opnieuw opbouwen bij de
+        # volgende export, deze keer in een thread renderen
+        logger.warning(f"Export process pool defect, render in thread: {e}")
+        _reset_pool()
+        return await asyncio.to_thread(render, soort, planning)
+
+
+def _pad(tender_id: str, h: str, soort: str) -> str:
+    return f"{EXPORT_MAP}/{tender_id}/{h}.{soort}"
+
+
+def _download(db, pad: str) -> Optional[bytes]:
+    try:
+        return db.storage.from_(EXPORT_BUCKET).download(pad) or None
+    except Exception:
+        return None   # niet gevonden (of storage onbereikbaar) → renderen
+
+
+def _upload(db, tender_id: str, h: str, soort: str, data: bytes) -> None:
+    bucket = db.storage.from_(EXPORT_BUCKET)
+    pad = _pad(tender_id, h, soort)
+    try:
+        bucket.upload(pad, data, {"content-type": MIMETYPES[soort], "upsert": "true"})
+    except Exception as e:
+        logger.warning(f"Export cache upload mislukt ({pad}): {e}")
+        return
+
+    # Oudere exports van dezelfde soort opruimen
+    try:
+        map_pad = f"{EXPORT_MAP}/{tender_id}"
+        bestanden = bucket.list(map_pad) or []
+        oud = [
+            f"{map_pad}/{b['name']}" for b in bestanden
+            if b.get("name", "").endswith(f".{soort}") and b["name"] != f"{h}.{soort}"
+        ]
+        if oud:
+            bucket.remove(oud)
+    except Exception as e:
+        logger.debug(f"Opruimen oude exports mislukt ({tender_id}): {e}")
+
+
+async def get_export(db, tender_id: str, soort: str, planning: dict) -> Tuple[bytes, str]:
+    """
+    Export-bytes voor een planning, uit cache of vers gerenderd.
+
+    Args:
+        db: sync Client (user-scoped) voor storage
+        tender_id: tender van de planning
+        soort: 'xlsx' of 'pdf'
+        planning: resultaat van _load_planning
+
+    Returns:
+        (bytes, bron) met bron 'geheugen', 'storage' of 'gerenderd'
+
+    Raises:
+        ImportError: openpyxl/reportlab niet beschikbaar
+    """
+    h = export_hash(planning, soort)
+    key = (tender_id, h)
+
+    data = _geheugen.get(key)
+    if data is not None:
+        return data, "geheugen"
+
+    data = await asyncio.to_thread(_download, db, _pad(tender_id, h, soort))
+    if data:
+        _geheugen.set(key, data)
+        return data, "storage"
+
+    data = await _render(soort, planning)
+    _geheugen.set(key, data)
+    await asyncio.to_thread(_upload, db, tender_id, h, soort, data)
+    return data, "gerenderd"
@@ -11,6 +11,9 @@
 # 4. Team assignments opslaan
 # 5. AI documenten koppelen
 # 6. Smart import sessie afsluiten
+#
+# db is een AsyncSupabaseClient — alle queries worden ge-await.
+# Planning/checklist writes invalideren de agenda week-cache.
 # ================================================================
 
 import logging
@@ -18,6 +21,8 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 from uuid import uuid4
 
+from app.services.agenda_cache import invalidate_agenda_bureau
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,7 +33,7 @@ class FinalizeService:
     """
 
     def __init__(self, supabase_client):
-        self.db = supabase_client
+        self.db = supabase_client  # AsyncSupabaseClient
 
     async def finalize(
         self,
@@ -122,6 +127,7 @@ class FinalizeService:
                 tender_id=tender_id,
                 planning_metadata=planning_metadata
             )
+            invalidate_agenda_bureau(tenderbureau_id)
 
             # ── 7. Smart import sessie afsluiten ──
             if import_id:
@@ -162,7 +168,7 @@ class FinalizeService:
 
         if tender_id:
             # Update bestaande tender
-            result = self.db.table('tenders') \
+            result = await self.db.table('tenders') \
                 .update(tender_data) \
                 .eq('id', tender_id) \
                 .execute()
@@ -176,7 +182,7 @@ class FinalizeService:
         tender_data['aangemaakt_door'] = user_id
         tender_data['fase'] = 'Lopend'
 
-        result = self.db.table('tenders') \
+        result = await self.db.table('tenders') \
             .insert(tender_data) \
             .execute()
 
@@ -261,10 +267,11 @@ class FinalizeService:
             return 0
 
         # Verwijder eventueel bestaande taken voor deze tender
-        self.db.table('planning_taken') \
+        await self.db.table('planning_taken') \
             .delete() \
             .eq('tender_id', tender_id) \
             .execute()
+        invalidate_agenda_bureau(tenderbureau_id)
 
         rows = []
         for i, taak in enumerate(planning_taken):
@@ -283,9 +290,10 @@ class FinalizeService:
             rows.append(row)
 
         if rows:
-            result = self.db.table('planning_taken') \
+            result = await self.db.table('planning_taken') \
                 .insert(rows) \
                 .execute()
+            invalidate_agenda_bureau(tenderbureau_id)
             return len(result.data or [])
 
         return 0
@@ -305,10 +313,11 @@ class FinalizeService:
             return 0
 
         # Verwijder bestaande checklist voor deze tender
-        self.db.table('checklist_items') \
+        await self.db.table('checklist_items') \
             .delete() \
             .eq('tender_id', tender_id) \
             .execute()
+        invalidate_agenda_bureau(tenderbureau_id)
 
         rows = []
         for i, item in enumerate(checklist_items):
@@ -326,9 +335,10 @@ class FinalizeService:
             rows.append(row)
 
         if rows:
-            result = self.db.table('checklist_items') \
+            result = await self.db.table('checklist_items') \
                 .insert(rows) \
                 .execute()
+            invalidate_agenda_bureau(tenderbureau_id)
             return len(result.data or [])
 
         return 0
@@ -350,7 +360,7 @@ class FinalizeService:
             return 0
 
         # Verwijder bestaande toewijzingen
-        self.db.table('tender_team') \
+        await self.db.table('tender_team') \
             .delete() \
             .eq('tender_id', tender_id) \
             .execute()
@@ -365,7 +375,7 @@ class FinalizeService:
                 })
 
         if rows:
-            result = self.db.table('tender_team') \
+            result = await self.db.table('tender_team') \
                 .insert(rows) \
                 .execute()
             return len(result.data or [])
@@ -392,7 +402,7 @@ class FinalizeService:
         count = 0
         for doc_id in document_ids:
             try:
-                self.db.table('ai_generated_documents') \
+                await self.db.table('ai_generated_documents') \
                     .update({
                         'tender_id': tender_id,
                         'status': 'geaccepteerd'
@@ -437,7 +447,7 @@ class FinalizeService:
             }
 
         try:
-            self.db.table('tenders') \
+            await self.db.table('tenders') \
                 .update(update_data) \
                 .eq('id', tender_id) \
                 .execute()
@@ -455,7 +465,7 @@ class FinalizeService:
     ) -> None:
         """Markeer de smart import sessie als voltooid."""
         try:
-            self.db.table('smart_imports') \
+            await self.db.table('smart_imports') \
                 .update({
                     'status': 'completed',
                     'tender_id': tender_id,
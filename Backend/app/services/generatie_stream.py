@@ -0,0 +1,167 @@
+# Backend/app/services/generatie_stream.py
+# Buffer voor streamende AI-generaties (SSE + hervatten) — TenderZen v1.0
+#
+# generate-document wachtte op het volledige antwoord (tot 8192 tokens,
+# vaak een minuut of langer) voordat de gebruiker iets zag. De stream-
+# variant laat de tekst doorlopen terwijl Claude hem schrijft.
+#
+# De generatie draait als eigen asyncio-taak en schrijft in een
+# GeneratieStream; elke SSE-response leest daaruit. Valt de verbinding
+# weg, dan loopt de generatie door en wordt het document aan het eind
+# gewoon opgeslagen.
+#
+# HERVATTEN: elk tekst-event heeft als SSE id de tekenpositie ná dat stuk.
+# Een nieuwe verbinding met Last-Event-ID (EventSource stuurt die zelf mee)
+# of ?vanaf= krijgt de tekst vanaf die positie in één event en volgt
+# daarna live. Na afloop blijft de buffer STREAM_BEWAAR_SECONDEN staan;
+# daarna (of op een andere worker) leest het endpoint ai_documents.
+#
+# ⚠️ Per uvicorn worker: een hervatting op een andere worker ziet alleen
+# wat periodiek in ai_documents.document_content is weggeschreven.
+
+import asyncio
+import bisect
+import json
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STREAM_BEWAAR_SECONDEN = 15 * 60     # afgeronde buffers, voor late hervattingen
+STREAM_HEARTBEAT_SECONDEN = 15.0     # commentaarregel zodat proxies niet sluiten
+STREAM_RETRY_MS = 3000               # EventSource herverbind-interval
+
+
+def sse_event(data: dict, event_id: Optional[int] = None) -> str:
+    """Formatteer een SSE event (optioneel met id voor Last-Event-ID)."""
+    kop = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{kop}data: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+SSE_PING = ": ping\n\n"
+
+
+class GeneratieStream:
+    """
+    Tekst van één lopende generatie, af te spelen vanaf elke tekenpositie.
+
+    Args:
+        document_id: id van het ai_documents record (ook de stream-sleutel)
+    """
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        self.status = 'generating'
+        self.resultaat: Optional[dict] = None
+        self.fout: Optional[str] = None
+        self.klaar_op: Optional[float] = None
+        self.taak: Optional[asyncio.Task] = None
+        self._delen: List[str] = []
+        self._einden: List[int] = []     # tekenpositie na elk deel
+        self._wakker = asyncio.Event()
+
+    @property
+    def lengte(self) -> int:
+        return self._einden[-1] if self._einden else 0
+
+    @property
+    def tekst(self) -> str:
+        return ''.join(self._delen)
+
+    def voeg_toe(self, tekst: str) -> None:
+        if not tekst:
+            return
+        self._delen.append(tekst)
+        self._einden.append(self.lengte + len(tekst))
+        self._wek()
+
+    def sluit(self, resultaat: dict) -> None:
+        self.status = 'completed'
+        self.resultaat = resultaat
+        self.klaar_op = time.monotonic()
+        self._wek()
+
+    def faal(self, fout: str) -> None:
+        self.status = 'failed'
+        self.fout = fout
+        self.klaar_op = time.monotonic()
+        self._wek()
+
+    def _wek(self) -> None:
+        self._wakker.set()
+        self._wakker = asyncio.Event()
+
+    def _vanaf(self, positie: int) -> str:
+        """Tekst vanaf `positie` (alleen de delen erna joinen)."""
+        i = bisect.bisect_right(self._einden, positie)
+        if i >= len(self._delen):
+            return ''
+        begin = self._einden[i] - len(self._delen[i])
+        return self._delen[i][positie - begin:] + ''.join(self._delen[i + 1:])
+
+    async def events(self, vanaf: int = 0) -> AsyncIterator[str]:
+        """
+        SSE-events vanaf tekenpositie `vanaf`: tekst (id = positie erna),
+        tot en met klaar of fout. Wat tussen twee wake-ups binnenkwam gaat
+        samen in één event.
+        """
+        positie = max(0, min(vanaf, self.lengte))
+        while True:
+            wakker = self._wakker
+            if self.lengte > positie:
+                eind = self.lengte
+                yield sse_event({'type': 'tekst', 'tekst': self._vanaf(positie)}, eind)
+                positie = eind
+            if self.status == 'completed':
+                yield sse_event({'type': 'klaar', 'document': self.resultaat})
+                return
+            if self.status == 'failed':
+                yield sse_event({'type': 'fout', 'detail': self.fout})
+                return
+            try:
+                await asyncio.wait_for(wakker.wait(), STREAM_HEARTBEAT_SECONDEN)
+            except asyncio.TimeoutError:
+                yield SSE_PING
+
+
+_streams: Dict[str, GeneratieStream] = {}
+
+
+def _ruim_op() -> None:
+    grens = time.monotonic() - STREAM_BEWAAR_SECONDEN
+    for document_id in [d for d, s in _streams.items() if s.klaar_op and s.klaar_op < grens]:
+        del _streams[document_id]
+
+
+def start_generatie(
+    document_id: str,
+    genereer: Callable[[GeneratieStream], Awaitable[dict]],
+) -> GeneratieStream:
+    """
+    Start `genereer(stream)` als achtergrondtaak, los van de request.
+    Het resultaat (dict) gaat mee in het klaar-event; een exceptie wordt
+    een fout-event.
+    """
+    _ruim_op()
+    stream = GeneratieStream(document_id)
+
+    async def draai():
+        try:
+            stream.sluit(await genereer(stream))
+        except asyncio.CancelledError:
+            stream.faal('Generatie afgebroken (server herstart)')
+            raise
+        except Exception as e:
+            logger.exception(f"Streaming generatie {document_id} mislukt")
+            stream.faal(f"Generatie mislukt: {e}")
+
+    stream.taak = asyncio.create_task(draai())
+    _streams[document_id] = stream
+    return stream
+
+
+def zoek_generatie(document_id: str) -> Optional[GeneratieStream]:
+    """Lopende of recent afgeronde generatie in deze worker."""
+    _ruim_op()
+    return _streams.get(document_id)
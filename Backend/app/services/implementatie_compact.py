@@ -0,0 +1,263 @@
+# Backend/app/services/implementatie_compact.py
+# Compacte planning-codering voor de implementatieplanning-chat — TenderZen v1.0
+#
+# chat_planning stuurde de volledige planning als ingesprongen JSON mee,
+# inclusief UUID's, timestamps en toelichtingen — bij grotere planningen
+# duizenden input-tokens per chatbericht. Claude antwoordde bovendien met
+# volledige UUID's in het diff.
+#
+# CODERING (regel-gebaseerd, geen inspringing):
+#   P|projectnaam|opdrachtgever|planstart|planeinde
+#   K|id|nummer|naam|startdatum|einddatum[|optionele kolommen]
+#   S1|Initiatiefase|#c7d2fe
+#   T1|O.1|Kick-off|2026-01-05|2026-01-09
+#   A|T1>T3+2                   (afhankelijkheid: T3 na T1, 2 dagen lag)
+#
+#   Korte, stabiele id's (S1.., T1.. op volgorde) i.p.v. UUID's; de
+#   vertaling terug gebeurt hier. Optionele kolommen (verantwoordelijke,
+#   status, toelichting) alleen als het bericht er aanleiding toe geeft.
+#   dagen wordt server-side uit de datums berekend en niet meegestuurd.
+#
+# DIFF (antwoord van Claude):
+#   {"s": "samenvatting", "w": [["tw", "T3", {...}], ["tv", "T3", 7], ...]}
+#   vertaal() zet dit om naar het bestaande wijzigingen-formaat van
+#   chat_planning (type/taak_id/sectie_id/data), met alleen toegestane velden.
+
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+KOLOMMEN_BASIS = ("nummer", "naam", "startdatum", "einddatum")
+
+# Optionele kolom → trefwoorden in het bericht (lowercase, prefix-match)
+KOLOMMEN_OPTIONEEL = {
+    "verantwoordelijke": ("verantwoordelijk", "wie ", "rol", "partij", "eigenaar",
+                          "opdrachtgever", "opdrachtnemer", "toewijz", "toegewezen"),
+    "status":            ("status", "voortgang", "afgerond", "open", "klaar",
+                          "uitvoering", "achterstand", "gereed"),
+    "toelichting":       ("toelichting", "omschrijving", "beschrijving", "uitleg",
+                          "inhoud", "waarom", "details", "detail"),
+}
+
+TAAK_VELDEN   = {"nummer", "naam", "verantwoordelijke", "toelichting", "status",
+                 "startdatum", "einddatum", "dagen", "volgorde"}
+SECTIE_VELDEN = {"naam", "kleur", "volgorde"}
+
+# Korte diff-codes → bestaande wijzigingstypes
+DIFF_TYPES = {
+    "st": "sectie_toevoegen",
+    "sw": "sectie_wijzigen",
+    "sv": "sectie_verwijderen",
+    "tt": "taak_toevoegen",
+    "tw": "taak_wijzigen",
+    "tx": "taak_verwijderen",
+    "tv": "taak_verschuiven",
+}
+
+PLANNING_FORMAAT = """De planning is in compact formaat (één regel per element, velden gescheiden door |):
+  P|projectnaam|opdrachtgever|planstart|planeinde
+  K|id|...          kolomvolgorde van de T-regels
+  S<n>|naam|kleur   sectie; de T-regels eronder horen bij deze sectie
+  T<n>|...          taak, velden volgens K
+  A|T1>T3+2         afhankelijkheden: T3 start na T1 (+2 dagen lag)"""
+
+DIFF_INSTRUCTIE = """Het diff-formaat (UITSLUITEND dit JSON, geen uitleg, geen markdown):
+{"s": "Korte samenvatting (max 1 zin)", "w": [ ...wijzigingen... ]}
+
+Wijzigingen (gebruik de korte id's uit de planning, S<n> en T<n>):
+  ["tw", "T3", {"startdatum": "YYYY-MM-DD", "einddatum": "YYYY-MM-DD"}]  taak wijzigen (alleen gewijzigde velden)
+  ["tv", "T3", 7]            taak 7 dagen verschuiven (negatief = eerder); opvolgers schuiven automatisch mee
+  ["tx", "T3"]               taak verwijderen
+  ["tt", "S2", {"nummer": "X.1", "naam": "...", "startdatum": "...", "einddatum": "...", "verantwoordelijke": "..."}]  taak toevoegen aan sectie
+  ["sw", "S2", {"naam": "...", "kleur": "#..."}]  sectie wijzigen
+  ["sv", "S2"]               sectie verwijderen (met taken)
+  ["st", {"naam": "...", "kleur": "#...", "taken": [{"nummer": "...", "naam": "...", "startdatum": "...", "einddatum": "..."}]}]  sectie toevoegen
+
+Gebruik bij voorkeur "tv" voor verschuivingen. Stuur nooit ongewijzigde velden mee.
+Gebruik YYYY-MM-DD formaat voor alle datums."""
+
+
+def _cel(waarde) -> str:
+    if waarde is None:
+        return ""
+    return re.sub(r"[|\r\n]+", " ", str(waarde)).strip()
+
+
+def kies_kolommen(bericht: str, modus: str = "aanpas") -> Tuple[str, ...]:
+    """
+    Basis-kolommen + optionele kolommen waar het bericht naar verwijst.
+    In vraag-modus altijd verantwoordelijke (de analyse noemt die standaard).
+    """
+    tekst = f" {(bericht or '').lower()} "
+    extra = tuple(
+        kolom for kolom, trefwoorden in KOLOMMEN_OPTIONEEL.items()
+        if kolom in tekst or any(w in tekst for w in trefwoorden)
+        or (modus == "vraag" and kolom == "verantwoordelijke")
+    )
+    return KOLOMMEN_BASIS + extra
+
+
+class CompactePlanning:
+    """
+    Compacte tekstweergave van een planning + vertaling van korte id's.
+
+    Args:
+        planning: {metadata, secties: [{id, naam, kleur, taken: [...]}],
+                   afhankelijkheden?: [...]}
+        kolommen: taakkolommen (zie kies_kolommen)
+    """
+
+    def __init__(self, planning: dict, kolommen: Tuple[str, ...] = KOLOMMEN_BASIS):
+        self.kolommen = kolommen
+        self.secties: Dict[str, dict] = {}
+        self.taken: Dict[str, dict] = {}
+        self._kort_taak: Dict[str, str] = {}
+
+        meta = planning.get("metadata") or {}
+        regels = [
+            "P|" + "|".join(_cel(meta.get(k)) for k in
+                            ("projectnaam", "opdrachtgever", "planstart", "planeinde")),
+            "K|id|" + "|".join(kolommen),
+        ]
+
+        t_nr = 0
+        for s_nr, sectie in enumerate(planning.get("secties") or [], 1):
+            kort = f"S{s_nr}"
+            self.secties[kort] = sectie
+            regels.append(f"{kort}|{_cel(sectie.get('naam'))}|{_cel(sectie.get('kleur'))}")
+            for taak in sectie.get("taken") or []:
+                t_nr += 1
+                kort = f"T{t_nr}"
+                self.taken[kort] = taak
+                if taak.get("id"):
+                    self._kort_taak[taak["id"]] = kort
+                regels.append(kort + "|" + "|".join(_cel(taak.get(k)) for k in kolommen))
+
+        afh = []
+        for a in planning.get("afhankelijkheden") or []:
+            van = self._kort_taak.get(a.get("van_taak_id"))
+            naar = self._kort_taak.get(a.get("naar_taak_id"))
+            if van and naar:
+                lag = int(a.get("lag_dagen") or 0)
+                afh.append(f"{van}>{naar}" + (f"{lag:+d}" if lag else ""))
+        if afh:
+            regels.append("A|" + " ".join(afh))
+
+        self.tekst = "\n".join(regels)
+
+    # ── Id-vertaling ───────────────────────────────────────
+
+    def taak_id(self, kort) -> Optional[str]:
+        taak = self.taken.get(str(kort))
+        return taak.get("id") if taak else (kort if _is_uuid(kort) else None)
+
+    def sectie_id(self, kort) -> Optional[str]:
+        sectie = self.secties.get(str(kort))
+        return sectie.get("id") if sectie else (kort if _is_uuid(kort) else None)
+
+    # ── Diff → wijzigingen ─────────────────────────────────
+
+    def vertaal(self, diff: dict) -> Tuple[str, List[dict]]:
+        """
+        Zet het compacte diff om naar (samenvatting, wijzigingen) in het
+        bestaande formaat. Het oude formaat ({samenvatting, wijzigingen})
+        wordt ook geaccepteerd. Onbekende id's worden overgeslagen.
+        """
+        samenvatting = diff.get("s") or diff.get("samenvatting") or "Planning bijgewerkt"
+        ruw = diff.get("w") if "w" in diff else diff.get("wijzigingen", [])
+
+        wijzigingen = []
+        for item in ruw or []:
+            w = self._vertaal_item(item)
+            if w:
+                wijzigingen.append(w)
+        return samenvatting, wijzigingen
+
+    def _vertaal_item(self, item) -> Optional[dict]:
+        if isinstance(item, dict):
+            # Oud formaat: alleen id's en velden nalopen
+            wtype = item.get("type")
+            args = [item.get("taak_id") or item.get("sectie_id"), item.get("data")]
+            if wtype == "sectie_toevoegen":
+                args = [item.get("data")]
+        elif isinstance(item, list) and item:
+            wtype = DIFF_TYPES.get(item[0], item[0])
+            args = list(item[1:])
+        else:
+            return None
+
+        def arg(i):
+            return args[i] if len(args) > i else None
+
+        if wtype == "taak_wijzigen":
+            taak_id = self.taak_id(arg(0))
+            data = _velden(arg(1), TAAK_VELDEN)
+            return {"type": wtype, "taak_id": taak_id, "data": data} if taak_id and data else None
+
+        if wtype == "taak_verschuiven":
+            return self._verschuiving(arg(0), arg(1))
+
+        if wtype == "taak_verwijderen":
+            taak_id = self.taak_id(arg(0))
+            return {"type": wtype, "taak_id": taak_id} if taak_id else None
+
+        if wtype == "taak_toevoegen":
+            sectie_id = self.sectie_id(arg(0))
+            data = _velden(arg(1), TAAK_VELDEN)
+            if not sectie_id or not data.get("naam"):
+                return None
+            data.setdefault("volgorde", 99)
+            return {"type": wtype, "sectie_id": sectie_id, "data": data}
+
+        if wtype == "sectie_wijzigen":
+            sectie_id = self.sectie_id(arg(0))
+            data = _velden(arg(1), SECTIE_VELDEN)
+            return {"type": wtype, "sectie_id": sectie_id, "data": data} if sectie_id and data else None
+
+        if wtype == "sectie_verwijderen":
+            sectie_id = self.sectie_id(arg(0))
+            return {"type": wtype, "sectie_id": sectie_id} if sectie_id else None
+
+        if wtype == "sectie_toevoegen":
+            bron = arg(0) if isinstance(arg(0), dict) else {}
+            data = _velden(bron, SECTIE_VELDEN)
+            if not data.get("naam"):
+                return None
+            data.setdefault("volgorde", len(self.secties) + 1)
+            data["taken"] = [
+                {**_velden(t, TAAK_VELDEN), "volgorde": t.get("volgorde", i)}
+                for i, t in enumerate(bron.get("taken") or [], 1) if isinstance(t, dict)
+            ]
+            return {"type": wtype, "data": data}
+
+        return {"type": wtype}   # onbekend: chat_planning logt en slaat over
+
+    def _verschuiving(self, kort, dagen) -> Optional[dict]:
+        """["tv", "T3", n] → taak_wijzigen met beide datums n dagen verschoven."""
+        taak = self.taken.get(str(kort))
+        try:
+            delta = timedelta(days=int(dagen))
+        except (TypeError, ValueError):
+            return None
+        if not taak or not taak.get("id"):
+            return None
+        data = {}
+        for veld in ("startdatum", "einddatum"):
+            try:
+                data[veld] = (date.fromisoformat(str(taak.get(veld))[:10]) + delta).isoformat()
+            except ValueError:
+                pass
+        return {"type": "taak_wijzigen", "taak_id": taak["id"], "data": data} if data else None
+
+
+_UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+
+
+def _is_uuid(waarde) -> bool:
+    return isinstance(waarde, str) and bool(_UUID_RE.match(waarde))
+
+
+def _velden(data, toegestaan: set) -> dict:
+    if not isinstance(data, dict):
+        return {}
+    return {k: v for k, v in data.items() if k in toegestaan}
@@ -0,0 +1,314 @@
+# Backend/app/services/implementatie_export.py
+# Excel/PDF rendering van implementatieplanningen — TenderZen v1.0
+#
+# Pure functies: planning-dict (zoals _load_planning) in, bytes uit.
+# Geen app-imports, zodat export_cache ze in een aparte worker-process
+# kan draaien zonder de hele backend te laden.
+#
+# LAYOUT_VERSIE ophogen bij elke wijziging in de opmaak hieronder — de
+# versie zit in de cache-sleutel, oude exports worden dan niet meer
+# geserveerd.
+
+import hashlib
+import io
+import json
+from datetime import datetime, timedelta
+
+LAYOUT_VERSIE = {"xlsx": 1, "pdf": 1}
+
+MIMETYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf":  "application/pdf",
+}
+
+# Alleen velden die in de export terechtkomen bepalen de hash
+_METADATA_VELDEN = ("projectnaam", "opdrachtgever", "planstart", "planeinde")
+_SECTIE_VELDEN   = ("naam", "kleur")
+_TAAK_VELDEN     = ("nummer", "naam", "verantwoordelijke", "status",
+                    "startdatum", "einddatum", "dagen")
+
+
+def export_hash(planning: dict, soort: str) -> str:
+    """sha256 over de geëxporteerde inhoud + layout-versie (cache-sleutel)."""
+    metadata = planning.get("metadata") or {}
+    inhoud = {
+        "layout":   [soort, LAYOUT_VERSIE[soort]],
+        "metadata": [metadata.get(k) for k in _METADATA_VELDEN],
+        "secties":  [
+            [[s.get(k) for k in _SECTIE_VELDEN],
+             [[t.get(k) for k in _TAAK_VELDEN] for t in s.get("taken", [])]]
+            for s in planning.get("secties") or []
+        ],
+    }
+    data = json.dumps(inhoud, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def render(soort: str, planning: dict) -> bytes:
+    """Render een export. Raises ImportError als openpyxl/reportlab ontbreekt."""
+    if soort == "xlsx":
+        return render_excel(planning)
+    if soort == "pdf":
+        return render_pdf(planning)
+    raise ValueError(f"Onbekend exporttype: {soort}")
+
+
+def render_excel(planning: dict) -> bytes:
+    import openpyxl
+    from openpyxl.styles import PatternFill, Font, Alignment
+    from openpyxl.utils import get_column_letter
+
+    metadata  = planning["metadata"] or {}
+    secties   = planning["secties"]
+    planstart_str = metadata.get("planstart")
+    planeinde_str = metadata.get("planeinde")
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Implementatieplanning"
+
+    # Kolom breedte
+    col_w = {"A": 6, "B": 42, "C": 22, "D": 15, "E": 12, "F": 12, "G": 7}
+    for col, w in col_w.items():
+        ws.column_dimensions[col].width = w
+
+    # Weekkolommen berekenen
+    week_labels = []
+    if planstart_str and planeinde_str:
+        try:
+            ps = datetime.strptime(planstart_str, "%Y-%m-%d")
+            pe = datetime.strptime(planeinde_str, "%Y-%m-%d")
+            cur = ps
+            while cur <= pe:
+                week_labels.append(f"W{cur.strftime('%V')}\n{cur.strftime('%d/%m')}")
+                cur += timedelta(weeks=1)
+        except Exception:
+            pass
+
+    for i in range(len(week_labels)):
+        ws.column_dimensions[get_column_letter(8 + i)].width = 4
+
+    # Header rij
+    DARK   = "1E293B"
+    hfill  = PatternFill("solid", fgColor=DARK)
+    hfont  = Font(bold=True, color="FFFFFF", size=9)
+    halign = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+    headers = ["Nr", "Taak / Fase", "Verantwoordelijk", "Status", "Start", "Einde", "Dgn"] + week_labels
+    for ci, h in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=ci, value=h)
+        cell.fill, cell.font, cell.alignment = hfill, hfont, halign
+    ws.row_dimensions[1].height = 28
+
+    STATUS_LABELS = {"open": "Open", "in_uitvoering": "In uitvoering", "afgerond": "Afgerond"}
+    row = 2
+
+    def _hex_fill(h):
+        h = (h or "c7d2fe").lstrip("#")
+        return PatternFill("solid", fgColor=h.upper())
+
+    for sectie in secties:
+        # Sectie header
+        sfill  = _hex_fill(sectie.get("kleur"))
+        sfont  = Font(bold=True, size=10)
+        cell   = ws.cell(row=row, column=1, value=sectie["naam"])
+        end_c  = get_column_letter(len(headers))
+        ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=len(headers))
+        cell.fill = sfill
+        cell.font = sfont
+        cell.alignment = Alignment(horizontal="left", indent=1, vertical="center")
+        ws.row_dimensions[row].height = 18
+        row += 1
+
+        for taak in sectie.get("taken", []):
+            ws.cell(row=row, column=1, value=taak.get("nummer",           ""))
+            ws.cell(row=row, column=2, value=taak.get("naam",             ""))
+            ws.cell(row=row, column=3, value=taak.get("verantwoordelijke", ""))
+            ws.cell(row=row, column=4, value=STATUS_LABELS.get(taak.get("status", "open"), "Open"))
+            ws.cell(row=row, column=5, value=taak.get("startdatum",       ""))
+            ws.cell(row=row, column=6, value=taak.get("einddatum",        ""))
+            ws.cell(row=row, column=7, value=taak.get("dagen") or "")
+
+            # Gantt balk kolommen
+            if week_labels and planstart_str and taak.get("startdatum") and taak.get("einddatum"):
+                try:
+                    ps = datetime.strptime(planstart_str, "%Y-%m-%d")
+                    ts = datetime.strptime(taak["startdatum"], "%Y-%m-%d")
+                    te = datetime.strptime(taak["einddatum"],  "%Y-%m-%d")
+                    for wi in range(len(week_labels)):
+                        w_start = ps + timedelta(weeks=wi)
+                        w_end   = ps + timedelta(weeks=wi + 1)
+                        if ts < w_end and te >= w_start:
+                            ws.cell(row=row, column=8 + wi).fill = sfill
+                except Exception:
+                    pass
+
+            ws.row_dimensions[row].height = 15
+            row += 1
+
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def render_pdf(planning: dict) -> bytes:
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas as rl_canvas
+
+    metadata      = planning["metadata"] or {}
+    secties       = planning["secties"]
+    projectnaam   = metadata.get("projectnaam",   "Implementatieplanning")
+    opdrachtgever = metadata.get("opdrachtgever", "")
+    planstart_str = metadata.get("planstart")
+    planeinde_str = metadata.get("planeinde")
+
+    buf   = io.BytesIO()
+    pw, ph = landscape(A4)
+    c      = rl_canvas.Canvas(buf, pagesize=(pw, ph))
+
+    MG     = 15 * mm
+    ROW_H  = 6.5 * mm
+
+    # Bereken totaal projectdagen voor Gantt-fractie
+    totaal_dagen = 1
+    ps_dt = pe_dt = None
+    if planstart_str and planeinde_str:
+        try:
+            ps_dt = datetime.strptime(planstart_str, "%Y-%m-%d")
+            pe_dt = datetime.strptime(planeinde_str, "%Y-%m-%d")
+            totaal_dagen = max(1, (pe_dt - ps_dt).days)
+        except Exception:
+            pass
+
+    def _hex_rgb(h):
+        h = (h or "c7d2fe").lstrip("#")
+        if len(h) == 6:
+            return tuple(int(h[i:i+2], 16) / 255 for i in (0, 2, 4))
+        return (0.78, 0.82, 0.996)
+
+    # Kolombreedtes: [nr, naam, verantw, status, start, einde, dgn, gantt]
+    tabel_w  = pw - 2 * MG
+    gantt_w  = tabel_w * 0.42
+    info_w   = tabel_w - gantt_w
+    col_ws   = [
+        info_w * 0.07,  # Nr
+        info_w * 0.32,  # Naam
+        info_w * 0.24,  # Verantw.
+        info_w * 0.12,  # Status
+        info_w * 0.11,  # Start
+        info_w * 0.11,  # Einde
+        info_w * 0.03,  # Dgn
+        gantt_w,        # Gantt
+    ]
+
+    def _new_page():
+        nonlocal y
+        c.showPage()
+        y = ph - MG
+        # Herdruk kolomkoppen
+        _draw_header_row()
+
+    def _draw_cell(x, cy, text, w, bold=False, fill_rgb=None, text_color=(0, 0, 0)):
+        if fill_rgb:
+            c.setFillColorRGB(*fill_rgb)
+            c.rect(x, cy - ROW_H, w, ROW_H, fill=1, stroke=0)
+        c.setStrokeColorRGB(0.85, 0.85, 0.85)
+        c.rect(x, cy - ROW_H, w, ROW_H, fill=0, stroke=1)
+        c.setFillColorRGB(*text_color)
+        c.setFont("Helvetica-Bold" if bold else "Helvetica", 7.5)
+        c.drawString(x + 1.5 * mm, cy - ROW_H + 1.8 * mm, str(text or "")[:45])
+
+    def _draw_header_row():
+        nonlocal y
+        lbls = ["Nr", "Taak / Fase", "Verantw.", "Status", "Start", "Einde", "Dgn", "Gantt"]
+        x = MG
+        for lbl, w in zip(lbls, col_ws):
+            _draw_cell(x, y, lbl, w, bold=True,
+                       fill_rgb=(0.12, 0.16, 0.24), text_color=(1, 1, 1))
+            x += w
+        y -= ROW_H
+
+    # ── Paginakop ──────────────────────────────────────────────────────────
+    y = ph - MG
+    c.setFont("Helvetica-Bold", 13)
+    c.setFillColorRGB(0.07, 0.09, 0.29)
+    c.drawString(MG, y, projectnaam)
+
+    c.setFont("Helvetica", 9)
+    c.setFillColorRGB(0.4, 0.4, 0.4)
+    if opdrachtgever:
+        c.drawString(MG, y - 5 * mm, f"Opdrachtgever: {opdrachtgever}")
+    if planstart_str and planeinde_str:
+        c.drawRightString(pw - MG, y, f"Looptijd: {planstart_str}  –  {planeinde_str}")
+
+    y -= 16 * mm
+    _draw_header_row()
+
+    STATUS_LABELS = {"open": "Open", "in_uitvoering": "Uitvoering", "afgerond": "Afgerond"}
+
+    for sectie in secties:
+        if y < MG + ROW_H * 3:
+            _new_page()
+
+        rgb = _hex_rgb(sectie.get("kleur"))
+        x = MG
+        for i, w in enumerate(col_ws):
+            text = sectie["naam"] if i == 0 else ""
+            # Sectieheader spans alle kolommen (visueel via kleur)
+            _draw_cell(x, y, text if i == 0 else "", w,
+                       bold=True, fill_rgb=rgb, text_color=(0.1, 0.1, 0.1))
+            x += w
+        # Tekst over breedte van eerste 7 kolommen
+        c.setFillColorRGB(0.1, 0.1, 0.1)
+        c.setFont("Helvetica-Bold", 8)
+        c.drawString(MG + 1.5 * mm, y - ROW_H + 1.8 * mm, sectie["naam"])
+        y -= ROW_H
+
+        for taak in sectie.get("taken", []):
+            if y < MG + ROW_H:
+                _new_page()
+
+            cols_data = [
+                taak.get("nummer",            ""),
+                taak.get("naam",              ""),
+                taak.get("verantwoordelijke", ""),
+                STATUS_LABELS.get(taak.get("status", "open"), "Open"),
+                taak.get("startdatum",        ""),
+                taak.get("einddatum",         ""),
+                str(taak.get("dagen") or ""),
+                "",  # gantt placeholder
+            ]
+            x = MG
+            for i, (text, w) in enumerate(zip(cols_data, col_ws)):
+                if i < 7:
+                    _draw_cell(x, y, text, w)
+                else:
+                    # Gantt cel achtergrond
+                    c.setFillColorRGB(0.96, 0.97, 0.99)
+                    c.rect(x, y - ROW_H, w, ROW_H, fill=1, stroke=0)
+                    c.setStrokeColorRGB(0.85, 0.85, 0.85)
+                    c.rect(x, y - ROW_H, w, ROW_H, fill=0, stroke=1)
+
+                    # Gantt balk
+                    if ps_dt and taak.get("startdatum") and taak.get("einddatum"):
+                        try:
+                            ts = datetime.strptime(taak["startdatum"], "%Y-%m-%d")
+                            te = datetime.strptime(taak["einddatum"],  "%Y-%m-%d")
+                            l_frac = max(0.0, (ts - ps_dt).days / totaal_dagen)
+                            w_frac = max(0.005, (te - ts).days  / totaal_dagen)
+                            bar_x  = x + l_frac * w
+                            bar_w  = min(w_frac * w, w - l_frac * w)
+                            pad    = 1.2 * mm
+                            c.setFillColorRGB(*rgb)
+                            c.rect(bar_x + pad, y - ROW_H + pad,
+                                   max(1, bar_w - 2 * pad), ROW_H - 2 * pad,
+                                   fill=1, stroke=0)
+                        except Exception:
+                            pass
+                x += w
+
+            y -= ROW_H
+
+    c.save()
+    return buf.getvalue()
@@ -0,0 +1,294 @@
+# Backend/app/services/implementatie_scheduler.py
+# Planningsmotor voor implementatieplanningen — TenderZen v1.0
+#
+# Elke "aanpas"-instructie in chat_planning liet Claude de hele planning
+# herschrijven, ook voor iets simpels als "schuif taak U.2 een week op".
+# Met afhankelijkheden (implementatie_afhankelijkheden, migratie 023)
+# rekent deze module dat lokaal uit.
+#
+# MODEL:
+#   - Datums als ordinals (date.toordinal) — alleen integer-rekenwerk
+#   - Duur = dagen (kalenderdagen, inclusief start en einde, zoals
+#     _bereken_dagen in de router)
+#   - Finish-to-start: start(opvolger) >= einde(voorganger) + 1 + lag
+#
+# HERPLANNEN:
+#   compact=False (standaard): alleen vooruit duwen — een opvolger die al
+#     later staat dan nodig blijft staan (handmatige speling blijft).
+#   compact=True: opvolgers zo vroeg mogelijk (klassiek CPM), ook naar voren.
+#   verschuif() loopt alleen de opvolgers van de verschoven taak langs, in
+#   topologische volgorde; de rest van de planning wordt niet aangeraakt.
+#
+# KRITIEK PAD:
+#   analyse() doet een backward pass vanaf het projecteinde. speling = 0
+#   → kritiek. Taken zonder datums doen niet mee.
+
+import heapq
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class CyclischeAfhankelijkheid(ValueError):
+    """De afhankelijkheden bevatten een cyclus."""
+
+
+def _ordinal(waarde) -> Optional[int]:
+    if not waarde:
+        return None
+    try:
+        return date.fromisoformat(str(waarde)[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+def _iso(ordinal: Optional[int]) -> Optional[str]:
+    return date.fromordinal(ordinal).isoformat() if ordinal is not None else None
+
+
+class ImplementatieScheduler:
+    """
+    Afhankelijkheidsgraaf van één implementatieplanning.
+
+    Args:
+        taken: implementatie_taken-rijen (id, startdatum, einddatum, dagen)
+        afhankelijkheden: implementatie_afhankelijkheden-rijen
+            (van_taak_id, naar_taak_id, lag_dagen)
+
+    Raises:
+        CyclischeAfhankelijkheid: als de graaf een cyclus bevat
+    """
+
+    def __init__(self, taken: List[dict], afhankelijkheden: Iterable[dict] = ()):
+        self.ids: List[str] = [t["id"] for t in taken]
+        self.index: Dict[str, int] = {tid: i for i, tid in enumerate(self.ids)}
+        n = len(self.ids)
+
+        self.start: List[Optional[int]] = [None] * n
+        self.duur: List[int] = [1] * n
+        for i, t in enumerate(taken):
+            start = _ordinal(t.get("startdatum"))
+            einde = _ordinal(t.get("einddatum"))
+            self.start[i] = start
+            if start is not None and einde is not None and einde >= start:
+                self.duur[i] = einde - start + 1
+            elif t.get("dagen"):
+                self.duur[i] = max(1, int(t["dagen"]))
+
+        self.voorgangers: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+        self.opvolgers: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+        for a in afhankelijkheden:
+            van = self.index.get(a.get("van_taak_id"))
+            naar = self.index.get(a.get("naar_taak_id"))
+            if van is None or naar is None:
+                continue   # afhankelijkheid naar verwijderde taak
+            lag = int(a.get("lag_dagen") or 0)
+            self.voorgangers[naar].append((van, lag))
+            self.opvolgers[van].append((naar, lag))
+
+        self.volgorde = self._topologisch()
+        self.positie = [0] * n
+        for pos, i in enumerate(self.volgorde):
+            self.positie[i] = pos
+
+    # ── Graaf ──────────────────────────────────────────────
+
+    def _topologisch(self) -> List[int]:
+        n = len(self.ids)
+        graad = [len(v) for v in self.voorgangers]
+        # Heap op index: stabiele volgorde (= volgorde van de taken)
+        klaar = [i for i in range(n) if graad[i] == 0]
+        heapq.heapify(klaar)
+        volgorde = []
+        while klaar:
+            i = heapq.heappop(klaar)
+            volgorde.append(i)
+            for k, _ in self.opvolgers[i]:
+                graad[k] -= 1
+                if graad[k] == 0:
+                    heapq.heappush(klaar, k)
+        if len(volgorde) != n:
+            raise CyclischeAfhankelijkheid("Afhankelijkheden bevatten een cyclus")
+        return volgorde
+
+    def maakt_cyclus(self, van_taak_id: str, naar_taak_id: str) -> bool:
+        """True als van → naar een cyclus zou opleveren (naar bereikt van al)."""
+        van = self.index.get(van_taak_id)
+        naar = self.index.get(naar_taak_id)
+        if van is None or naar is None:
+            return False
+        if van == naar:
+            return True
+        stapel, gezien = [naar], {naar}
+        while stapel:
+            i = stapel.pop()
+            for k, _ in self.opvolgers[i]:
+                if k == van:
+                    return True
+                if k not in gezien:
+                    gezien.add(k)
+                    stapel.append(k)
+        return False
+
+    # ── Rekenen ────────────────────────────────────────────
+
+    def einde(self, i: int) -> Optional[int]:
+        s = self.start[i]
+        return s + self.duur[i] - 1 if s is not None else None
+
+    def _vereiste_start(self, i: int) -> Optional[int]:
+        vereist = None
+        for j, lag in self.voorgangers[i]:
+            e = self.einde(j)
+            if e is None:
+                continue
+            kandidaat = e + 1 + lag
+            if vereist is None or kandidaat > vereist:
+                vereist = kandidaat
+        return vereist
+
+    def _nieuwe_start(self, i: int, compact: bool) -> Optional[int]:
+        vereist = self._vereiste_start(i)
+        huidig = self.start[i]
+        if vereist is None:
+            return huidig
+        if compact or huidig is None:
+            return vereist
+        return max(huidig, vereist)
+
+    def plan(self, compact: bool = False) -> Dict[str, dict]:
+        """Volledige forward pass. Geeft de gewijzigde taken terug."""
+        gewijzigd = set()
+        for i in self.volgorde:
+            nieuw = self._nieuwe_start(i, compact)
+            if nieuw != self.start[i]:
+                self.start[i] = nieuw
+                gewijzigd.add(i)
+        return self._resultaat(gewijzigd)
+
+    def verschuif(
+        self,
+        taak_id: str,
+        startdatum: str,
+        dagen: Optional[int] = None,
+        compact: bool = False
+    ) -> Dict[str, dict]:
+        """
+        Verplaats één taak en herplan alleen de opvolgers.
+
+        Een start vóór wat de voorgangers toelaten wordt opgeschoven naar
+        de vroegst toegestane datum.
+        """
+        i = self.index.get(taak_id)
+        if i is None:
+            raise KeyError(taak_id)
+        nieuw = _ordinal(startdatum)
+        if nieuw is None:
+            raise ValueError(f"Ongeldige startdatum: {startdatum!r}")
+
+        if dagen is not None:
+            self.duur[i] = max(1, int(dagen))
+        vereist = self._vereiste_start(i)
+        if vereist is not None and nieuw < vereist:
+            nieuw = vereist
+        self.start[i] = nieuw
+
+        gewijzigd = {i}
+        gewijzigd |= self._propageer([i], compact)
+        return self._resultaat(gewijzigd)
+
+    def herplan_vanaf(self, taak_ids: Iterable[str], compact: bool = False) -> Dict[str, dict]:
+        """Herplan de opvolgers van taken waarvan de datums al gewijzigd zijn."""
+        bronnen = [self.index[t] for t in taak_ids if t in self.index]
+        return self._resultaat(self._propageer(bronnen, compact))
+
+    def _propageer(self, bronnen: List[int], compact: bool) -> set:
+        # Heap op topologische positie: elke opvolger pas na al zijn
+        # (gewijzigde) voorgangers, en alleen het bereikbare deel.
+        heap: List[Tuple[int, int]] = []
+        gepland = set()
+        for b in bronnen:
+            for k, _ in self.opvolgers[b]:
+                if k not in gepland:
+                    gepland.add(k)
+                    heapq.heappush(heap, (self.positie[k], k))
+
+        gewijzigd = set()
+        while heap:
+            _, k = heapq.heappop(heap)
+            nieuw = self._nieuwe_start(k, compact)
+            if nieuw == self.start[k]:
+                continue
+            self.start[k] = nieuw
+            gewijzigd.add(k)
+            for m, _ in self.opvolgers[k]:
+                if m not in gepland:
+                    gepland.add(m)
+                    heapq.heappush(heap, (self.positie[m], m))
+        return gewijzigd
+
+    def _resultaat(self, indices: Iterable[int]) -> Dict[str, dict]:
+        return {
+            self.ids[i]: {
+                "startdatum": _iso(self.start[i]),
+                "einddatum":  _iso(self.einde(i)),
+                "dagen":      self.duur[i],
+            }
+            for i in indices
+        }
+
+    # ── Kritiek pad ────────────────────────────────────────
+
+    def analyse(self) -> dict:
+        """
+        Kritiek-pad analyse op de huidige datums.
+
+        Returns:
+            {'projectstart', 'projecteinde', 'kritiek_pad': [taak_id, ...],
+             'taken': {taak_id: {vroegste_start, vroegste_einde, laatste_start,
+                                 laatste_einde, speling, kritiek}}}
+        """
+        eindes = [self.einde(i) for i in range(len(self.ids))]
+        geplande = [i for i in range(len(self.ids)) if self.start[i] is not None]
+        if not geplande:
+            return {"projectstart": None, "projecteinde": None, "kritiek_pad": [], "taken": {}}
+
+        project_start = min(self.start[i] for i in geplande)
+        project_einde = max(eindes[i] for i in geplande)
+
+        laatste_einde: List[Optional[int]] = [None] * len(self.ids)
+        for i in reversed(self.volgorde):
+            if self.start[i] is None:
+                continue
+            lf = project_einde
+            for k, lag in self.opvolgers[i]:
+                if laatste_einde[k] is None:
+                    continue
+                ls_k = laatste_einde[k] - self.duur[k] + 1
+                lf = min(lf, ls_k - 1 - lag)
+            laatste_einde[i] = lf
+
+        taken = {}
+        kritiek_pad = []
+        for i in self.volgorde:
+            if self.start[i] is None:
+                continue
+            ls = laatste_einde[i] - self.duur[i] + 1
+            speling = ls - self.start[i]
+            kritiek = speling <= 0
+            if kritiek:
+                kritiek_pad.append(self.ids[i])
+            taken[self.ids[i]] = {
+                "vroegste_start": _iso(self.start[i]),
+                "vroegste_einde": _iso(eindes[i]),
+                "laatste_start":  _iso(ls),
+                "laatste_einde":  _iso(laatste_einde[i]),
+                "speling":        speling,
+                "kritiek":        kritiek,
+            }
+
+        return {
+            "projectstart": _iso(project_start),
+            "projecteinde": _iso(project_einde),
+            "kritiek_pad":  kritiek_pad,
+            "taken":        taken,
+        }
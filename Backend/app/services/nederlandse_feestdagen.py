@@ -0,0 +1,91 @@
+# ================================================================
+# TenderZen — Nederlandse feestdagen
+# Backend/app/services/nederlandse_feestdagen.py
+# Versie: 1.0
+# ================================================================
+#
+# Berekent de landelijke feestdagen lokaal voor elk jaar, zodat de
+# werkdag-kalender niet afhankelijk is van wat er in
+# bureau_feestdagen is ingevoerd. Bureau-specifieke extra dagen
+# (brugdagen, bedrijfsuitjes, ...) blijven uit de database komen en
+# worden er in WerkdagKalender bij opgeteld.
+#
+# REGELS:
+# - Pasen: anonieme Gregoriaanse berekening (Meeus/Jones/Butcher)
+#   → Goede Vrijdag (-2), 2e Paasdag (+1), Hemelvaart (+39),
+#     1e/2e Pinksterdag (+49/+50)
+# - Koningsdag 27 april (vanaf 2014), daarvoor Koninginnedag 30 april;
+#   valt hij op zondag, dan de zaterdag ervoor
+# - Bevrijdingsdag 5 mei: standaard alleen in lustrumjaren (jaar % 5 == 0),
+#   zoals in de meeste cao's
+# - Goede Vrijdag is geen algemene vrije dag: alleen met
+#   met_goede_vrijdag=True
+# ================================================================
+
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Tuple
+
+
+def pasen(jaar: int) -> date:
+    """Eerste Paasdag (Gregoriaanse kalender)."""
+    a = jaar % 19
+    b, c = divmod(jaar, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    maand, dag = divmod(h + l - 7 * m + 114, 31)
+    return date(jaar, maand, dag + 1)
+
+
+def koningsdag(jaar: int) -> date:
+    """Koningsdag (vanaf 2014) of Koninginnedag; zondag → zaterdag ervoor."""
+    dag = date(jaar, 4, 27) if jaar >= 2014 else date(jaar, 4, 30)
+    if dag.weekday() == 6:
+        dag -= timedelta(days=1)
+    return dag
+
+
+@lru_cache(maxsize=256)
+def _feestdagen(
+    jaar: int,
+    bevrijdingsdag_elk_jaar: bool,
+    met_goede_vrijdag: bool
+) -> Tuple[Tuple[date, str], ...]:
+    paasdag = pasen(jaar)
+
+    dagen = [
+        (date(jaar, 1, 1), 'Nieuwjaarsdag'),
+        (paasdag, 'Eerste Paasdag'),
+        (paasdag + timedelta(days=1), 'Tweede Paasdag'),
+        (koningsdag(jaar), 'Koningsdag' if jaar >= 2014 else 'Koninginnedag'),
+        (paasdag + timedelta(days=39), 'Hemelvaartsdag'),
+        (paasdag + timedelta(days=49), 'Eerste Pinksterdag'),
+        (paasdag + timedelta(days=50), 'Tweede Pinksterdag'),
+        (date(jaar, 12, 25), 'Eerste Kerstdag'),
+        (date(jaar, 12, 26), 'Tweede Kerstdag'),
+    ]
+    if met_goede_vrijdag:
+        dagen.append((paasdag - timedelta(days=2), 'Goede Vrijdag'))
+    if bevrijdingsdag_elk_jaar or jaar % 5 == 0:
+        dagen.append((date(jaar, 5, 5), 'Bevrijdingsdag'))
+
+    return tuple(sorted(dagen))
+
+
+def nederlandse_feestdagen(
+    jaar: int,
+    bevrijdingsdag_elk_jaar: bool = False,
+    met_goede_vrijdag: bool = False
+) -> Dict[date, str]:
+    """
+    Landelijke feestdagen voor een jaar.
+
+    Returns:
+        { date: naam } — gesorteerd op datum
+    """
+    return dict(_feestdagen(jaar, bevrijdingsdag_elk_jaar, met_goede_vrijdag))
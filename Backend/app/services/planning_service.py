@@ -10,67 +10,67 @@ Bevat:
 - Tellingen voor kaart badges
 - Agenda data (alle taken over alle tenders, incl. super-admin alle bureaus)
 
+v3.4: Async data-access — alle queries via AsyncSupabaseClient (await .execute())
+v3.5: RequestContext — bureau/super-admin lookups één keer per request
+v3.6: Agenda — planning/checklist queries parallel (asyncio.gather),
+      voortgang per tender via één RPC (get_planning_voortgang, migratie 020)
+v3.7: Agenda cache per ISO-week (agenda_cache) — invalidatie vanuit alle
+      planning/checklist schrijfacties in deze service
+v3.8: Planning counts uit tellertabel tender_planning_counts (migratie 021,
+      trigger-onderhouden) i.p.v. alle rijen ophalen en tellen
+v3.9: get_planning_templates / get_checklist_templates via template_cache
+      (versie-invalidatie vanuit de template-CRUD endpoints)
+v3.10: get_agenda_data levert het formaat van GET /planning/agenda (de
+      router delegeert nu hierheen); voortgang-fallback per chunk tender
+      ids en gepagineerd
+
 INSTALLATIE:
 Kopieer naar Backend/app/services/planning_service.py
 """
+import asyncio
 from typing import List, Optional, Dict, Any
-from supabase import Client
+from app.core.database import AsyncSupabaseClient
+from app.core.request_context import RequestContext
+from app.services.agenda_cache import agenda_cache, agenda_cache_key, invalidate_agenda_bureau
+from app.services.template_cache import template_cache
+from app.services.tender_service import _chunks
+
+# Velden van tender_planning_counts (migratie 021)
+COUNT_FIELDS = ('planning_done', 'planning_total', 'checklist_done', 'checklist_total')
+
+# PostgREST geeft max 1000 rijen per request (db-max-rows)
+STATUS_PAGE_SIZE = 1000
 
 
 class PlanningService:
     """Service voor planning taken, checklist items en templates"""
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncSupabaseClient, context: Optional[RequestContext] = None):
         self.db = db
+        self.context = context
     
     # ============================================
     # HELPER: Bureau ID ophalen
     # ============================================
     
+    def _get_context(self, user_id: str) -> RequestContext:
+        """Geïnjecteerde RequestContext, of een lazy context voor deze user"""
+        if self.context is None or self.context.user_id != user_id:
+            self.context = RequestContext(self.db, user_id)
+        return self.context
+    
     async def _get_user_bureau_id(self, user_id: str) -> Optional[str]:
         """Haal tenderbureau_id op voor een user"""
-        try:
-            result = self.db.table('user_bureau_access')\
-                .select('tenderbureau_id')\
-                .eq('user_id', user_id)\
-                .eq('is_active', True)\
-                .order('last_accessed_at', desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if result.data:
-                bureau_id = result.data[0]['tenderbureau_id']
-                return bureau_id
-            
-            # Fallback naar users tabel
-            result = self.db.table('users')\
-                .select('tenderbureau_id')\
-                .eq('id', user_id)\
-                .single()\
-                .execute()
-            
-            bureau_id = result.data.get('tenderbureau_id') if result.data else None
-            return bureau_id
-        except Exception as e:
-            print(f"⚠️ Error getting bureau_id for user {user_id[:8]}...: {e}")
-            return None
+        return await self._get_context(user_id).get_bureau_id()
     
     async def _is_super_admin(self, user_id: str) -> bool:
-        """Check of user een super_admin is"""
-        try:
-            result = self.db.table('users')\
-                .select('role')\
-                .eq('id', user_id)\
-                .single()\
-                .execute()
-            return result.data.get('role') == 'super_admin' if result.data else False
-        except Exception:
-            return False
+        """Check of user een super_admin is (users.role)"""
+        return await self._get_context(user_id).get_role() == 'super_admin'
     
     async def _get_tender_bureau_id(self, tender_id: str) -> Optional[str]:
         """Haal tenderbureau_id op voor een tender"""
         try:
-            result = self.db.table('tenders')\
+            result = await self.db.table('tenders')\
                 .select('tenderbureau_id')\
                 .eq('id', tender_id)\
                 .single()\
@@ -81,6 +81,72 @@ class PlanningService:
             print(f"❌ _get_tender_bureau_id error: {e}")
             return None
     
+    def _invalidate_agenda_for(self, rows: Optional[List[dict]]) -> None:
+        """Invalideer de agenda cache voor de bureaus van gewijzigde rijen."""
+        bureau_ids = {row.get('tenderbureau_id') for row in (rows or [])}
+        if not bureau_ids or None in bureau_ids:
+            # Bureau onbekend → veilig: alles weg
+            invalidate_agenda_bureau(None)
+            return
+        for bureau_id in bureau_ids:
+            invalidate_agenda_bureau(bureau_id)
+    
+    async def _get_planning_voortgang(
+        self,
+        tender_ids: List[str],
+        bureau_id: Optional[str] = None
+    ) -> Dict[str, tuple]:
+        """
+        (planning_total, planning_done) per tender in één round trip.
+        
+        Gebruikt RPC get_planning_voortgang (GROUP BY in Postgres). Is de
+        migratie nog niet gedraaid, dan status-rijen per chunk tender ids
+        (parallel, gepagineerd) en tellen we hier.
+        """
+        if not tender_ids:
+            return {}
+        
+        try:
+            result = await self.db.rpc('get_planning_voortgang', {
+                'tender_ids': tender_ids,
+                'bureau_filter': bureau_id,
+            }).execute()
+            return {
+                row['tender_id']: (row.get('planning_total') or 0, row.get('planning_done') or 0)
+                for row in (result.data or [])
+            }
+        except Exception as e:
+            print(f"⚠️ RPC get_planning_voortgang niet beschikbaar, fallback: {e}")
+        
+        results = await asyncio.gather(*[
+            self._get_status_rows(chunk, bureau_id) for chunk in _chunks(tender_ids)
+        ])
+        
+        voortgang: Dict[str, tuple] = {}
+        for row in (row for rows in results for row in rows):
+            total, done = voortgang.get(row['tender_id'], (0, 0))
+            voortgang[row['tender_id']] = (total + 1, done + (row['status'] == 'done'))
+        return voortgang
+    
+    async def _get_status_rows(self, tender_ids: List[str], bureau_id: Optional[str]) -> List[dict]:
+        """(tender_id, status) van alle planning taken van deze tenders, in pagina's."""
+        rows: List[dict] = []
+        page = 0
+        while True:
+            query = self.db.table('planning_taken')\
+                .select('tender_id, status')\
+                .in_('tender_id', tender_ids)
+            if bureau_id:
+                query = query.eq('tenderbureau_id', bureau_id)
+            result = await query.order('id')\
+                .range(page * STATUS_PAGE_SIZE, (page + 1) * STATUS_PAGE_SIZE - 1)\
+                .execute()
+            batch = result.data or []
+            rows.extend(batch)
+            if len(batch) < STATUS_PAGE_SIZE:
+                return rows
+            page += 1
+    
     # ============================================
     # PLANNING TAKEN — CRUD
     # ============================================
@@ -88,7 +154,7 @@ class PlanningService:
     async def get_planning_taken(self, tender_id: str) -> List[dict]:
         """Haal alle planning taken op voor een tender"""
         try:
-            result = self.db.table('planning_taken')\
+            result = await self.db.table('planning_taken')\
                 .select('*')\
                 .eq('tender_id', tender_id)\
                 .order('volgorde')\
@@ -117,9 +183,10 @@ class PlanningService:
             'volgorde': taak_data.get('volgorde', 0),
         }
         
-        result = self.db.table('planning_taken')\
+        result = await self.db.table('planning_taken')\
             .insert(insert_data)\
             .execute()
+        invalidate_agenda_bureau(bureau_id)
         
         return result.data[0] if result.data else {}
     
@@ -129,19 +196,21 @@ class PlanningService:
                    'is_milestone', 'datum', 'toegewezen_aan', 'volgorde'}
         filtered = {k: v for k, v in update_data.items() if k in allowed}
         
-        result = self.db.table('planning_taken')\
+        result = await self.db.table('planning_taken')\
             .update(filtered)\
             .eq('id', taak_id)\
             .execute()
+        self._invalidate_agenda_for(result.data)
         
         return result.data[0] if result.data else {}
     
     async def delete_planning_taak(self, taak_id: str) -> bool:
         """Verwijder een planning taak"""
-        self.db.table('planning_taken')\
+        result = await self.db.table('planning_taken')\
             .delete()\
             .eq('id', taak_id)\
             .execute()
+        self._invalidate_agenda_for(result.data)
         return True
     
     # ============================================
@@ -151,7 +220,7 @@ class PlanningService:
     async def get_checklist_items(self, tender_id: str) -> List[dict]:
         """Haal alle checklist items op voor een tender"""
         try:
-            result = self.db.table('checklist_items')\
+            result = await self.db.table('checklist_items')\
                 .select('*')\
                 .eq('tender_id', tender_id)\
                 .order('volgorde')\
@@ -178,9 +247,10 @@ class PlanningService:
             'volgorde': item_data.get('volgorde', 0),
         }
         
-        result = self.db.table('checklist_items')\
+        result = await self.db.table('checklist_items')\
             .insert(insert_data)\
             .execute()
+        invalidate_agenda_bureau(bureau_id)
         
         return result.data[0] if result.data else {}
     
@@ -190,19 +260,21 @@ class PlanningService:
                    'status', 'verantwoordelijke', 'deadline', 'volgorde', 'notitie'}
         filtered = {k: v for k, v in update_data.items() if k in allowed}
         
-        result = self.db.table('checklist_items')\
+        result = await self.db.table('checklist_items')\
             .update(filtered)\
             .eq('id', item_id)\
             .execute()
+        self._invalidate_agenda_for(result.data)
         
         return result.data[0] if result.data else {}
     
     async def delete_checklist_item(self, item_id: str) -> bool:
         """Verwijder een checklist item"""
-        self.db.table('checklist_items')\
+        result = await self.db.table('checklist_items')\
             .delete()\
             .eq('id', item_id)\
             .execute()
+        self._invalidate_agenda_for(result.data)
         return True
     
     # ============================================
@@ -213,41 +285,38 @@ class PlanningService:
         """
         Haal tellingen op voor alle tenders in het bureau.
         Returns: { "tender-uuid": { planning_done, planning_total, checklist_done, checklist_total } }
+        
+        Leest de tellertabel tender_planning_counts (migratie 021, bijgehouden
+        door triggers). Zonder die tabel: fallback naar tellen in Python.
         """
         bureau_id = tenderbureau_id or await self._get_user_bureau_id(user_id)
         if not bureau_id:
             return {}
         
         try:
-            planning = self.db.table('planning_taken')\
-                .select('tender_id, status')\
+            result = await self.db.table('tender_planning_counts')\
+                .select(f"tender_id, {', '.join(COUNT_FIELDS)}")\
                 .eq('tenderbureau_id', bureau_id)\
                 .execute()
-            
-            checklist = self.db.table('checklist_items')\
-                .select('tender_id, status')\
-                .eq('tenderbureau_id', bureau_id)\
-                .execute()
-            
-            counts = {}
-            
-            for row in (planning.data or []):
-                tid = row['tender_id']
-                if tid not in counts:
-                    counts[tid] = {'planning_done': 0, 'planning_total': 0, 'checklist_done': 0, 'checklist_total': 0}
-                counts[tid]['planning_total'] += 1
-                if row['status'] == 'done':
-                    counts[tid]['planning_done'] += 1
-            
-            for row in (checklist.data or []):
-                tid = row['tender_id']
-                if tid not in counts:
-                    counts[tid] = {'planning_done': 0, 'planning_total': 0, 'checklist_done': 0, 'checklist_total': 0}
-                counts[tid]['checklist_total'] += 1
-                if row['status'] == 'completed':
-                    counts[tid]['checklist_done'] += 1
-            
-            return counts
+            return {
+                row['tender_id']: {field: row.get(field) or 0 for field in COUNT_FIELDS}
+                for row in (result.data or [])
+            }
+        except Exception as e:
+            print(f"⚠️ tender_planning_counts niet beschikbaar, fallback: {e}")
+        
+        try:
+            planning, checklist = await asyncio.gather(
+                self.db.table('planning_taken')
+                    .select('tender_id, status')
+                    .eq('tenderbureau_id', bureau_id)
+                    .execute(),
+                self.db.table('checklist_items')
+                    .select('tender_id, status')
+                    .eq('tenderbureau_id', bureau_id)
+                    .execute(),
+            )
+            return self._count_rows(planning.data or [], checklist.data or [])
             
         except Exception as e:
             print(f"❌ Error getting planning counts: {e}")
@@ -256,28 +325,55 @@ class PlanningService:
     async def get_tender_counts(self, tender_id: str) -> dict:
         """Tellingen voor één tender"""
         try:
-            planning = self.db.table('planning_taken')\
-                .select('status')\
-                .eq('tender_id', tender_id)\
-                .execute()
-            
-            checklist = self.db.table('checklist_items')\
-                .select('status')\
+            result = await self.db.table('tender_planning_counts')\
+                .select(', '.join(COUNT_FIELDS))\
                 .eq('tender_id', tender_id)\
+                .limit(1)\
                 .execute()
-            
-            p_data = planning.data or []
-            c_data = checklist.data or []
-            
-            return {
-                'planning_done': sum(1 for r in p_data if r['status'] == 'done'),
-                'planning_total': len(p_data),
-                'checklist_done': sum(1 for r in c_data if r['status'] == 'completed'),
-                'checklist_total': len(c_data),
-            }
+            row = result.data[0] if result.data else {}
+            return {field: row.get(field) or 0 for field in COUNT_FIELDS}
+        except Exception as e:
+            print(f"⚠️ tender_planning_counts niet beschikbaar, fallback: {e}")
+        
+        try:
+            planning, checklist = await asyncio.gather(
+                self.db.table('planning_taken')
+                    .select('tender_id, status')
+                    .eq('tender_id', tender_id)
+                    .execute(),
+                self.db.table('checklist_items')
+                    .select('tender_id, status')
+                    .eq('tender_id', tender_id)
+                    .execute(),
+            )
+            counts = self._count_rows(planning.data or [], checklist.data or [])
+            return counts.get(tender_id, {field: 0 for field in COUNT_FIELDS})
         except Exception as e:
             print(f"❌ Error getting tender counts: {e}")
-            return {'planning_done': 0, 'planning_total': 0, 'checklist_done': 0, 'checklist_total': 0}
+            return {field: 0 for field in COUNT_FIELDS}
+    
+    @staticmethod
+    def _count_rows(planning_rows: List[dict], checklist_rows: List[dict]) -> Dict[str, dict]:
+        """Fallback: tel (tender_id, status) rijen per tender."""
+        counts = {}
+        
+        for row in planning_rows:
+            tid = row['tender_id']
+            if tid not in counts:
+                counts[tid] = {field: 0 for field in COUNT_FIELDS}
+            counts[tid]['planning_total'] += 1
+            if row['status'] == 'done':
+                counts[tid]['planning_done'] += 1
+        
+        for row in checklist_rows:
+            tid = row['tender_id']
+            if tid not in counts:
+                counts[tid] = {field: 0 for field in COUNT_FIELDS}
+            counts[tid]['checklist_total'] += 1
+            if row['status'] == 'completed':
+                counts[tid]['checklist_done'] += 1
+        
+        return counts
     
     # ============================================
     # TEMPLATES — CRUD (admin)
@@ -288,22 +384,19 @@ class PlanningService:
         bureau_id = await self._get_user_bureau_id(user_id)
         if not bureau_id:
             return []
+        cached = template_cache.get(bureau_id, None, 'planning', template_naam)
+        if cached is not None:
+            return cached
         try:
-            result = self.db.table('planning_templates')\
+            result = await self.db.table('planning_templates')\
                 .select('*, planning_template_taken(*)')\
                 .eq('tenderbureau_id', bureau_id)\
                 .eq('naam', template_naam)\
                 .eq('is_actief', True)\
                 .order('naam')\
                 .execute()
-            # Transformeer naar response format
-            templates = []
-            for tmpl in (result.data or []):
-                taken = tmpl.pop('planning_template_taken', [])
-                templates.append({
-                    **tmpl,
-                    'taken': sorted(taken, key=lambda t: t.get('volgorde', 0))
-                })
+            templates = self._met_taken(result.data)
+            template_cache.set(templates, bureau_id, None, 'planning', template_naam)
             return templates
         except Exception as e:
             print(f"❌ Error getting planning templates: {e}")
@@ -314,33 +407,43 @@ class PlanningService:
         bureau_id = await self._get_user_bureau_id(user_id)
         if not bureau_id:
             return []
+        cached = template_cache.get(bureau_id, None, 'checklist', template_naam)
+        if cached is not None:
+            return cached
         try:
-            result = self.db.table('planning_templates')\
+            result = await self.db.table('planning_templates')\
                 .select('*, planning_template_taken(*)')\
                 .eq('tenderbureau_id', bureau_id)\
                 .eq('naam', template_naam)\
                 .eq('type', 'checklist')\
                 .eq('is_actief', True)\
                 .execute()
-            templates = []
-            for tmpl in (result.data or []):
-                taken = tmpl.pop('planning_template_taken', [])
-                templates.append({
-                    **tmpl,
-                    'taken': sorted(taken, key=lambda t: t.get('volgorde', 0))
-                })
+            templates = self._met_taken(result.data)
+            template_cache.set(templates, bureau_id, None, 'checklist', template_naam)
             return templates
         except Exception as e:
             print(f"❌ Error getting checklist templates: {e}")
             return []
     
+    @staticmethod
+    def _met_taken(rows: Optional[List[dict]]) -> List[dict]:
+        """Transformeer naar response format: geneste taken → 'taken' op volgorde"""
+        templates = []
+        for tmpl in (rows or []):
+            taken = tmpl.pop('planning_template_taken', [])
+            templates.append({
+                **tmpl,
+                'taken': sorted(taken, key=lambda t: t.get('volgorde', 0))
+            })
+        return templates
+    
     async def get_template_names(self, user_id: str) -> List[str]:
         """Haal beschikbare template namen op voor het bureau"""
         bureau_id = await self._get_user_bureau_id(user_id)
         if not bureau_id:
             return []
         try:
-            result = self.db.table('planning_templates')\
+            result = await self.db.table('planning_templates')\
                 .select('naam')\
                 .eq('tenderbureau_id', bureau_id)\
                 .eq('is_actief', True)\
@@ -389,17 +492,20 @@ class PlanningService:
         
         # Als overwrite: verwijder bestaande items
         if overwrite:
-            self.db.table('planning_taken')\
+            await self.db.table('planning_taken')\
                 .delete()\
                 .eq('tender_id', tender_id)\
                 .execute()
-            self.db.table('checklist_items')\
+            await self.db.table('checklist_items')\
                 .delete()\
                 .eq('tender_id', tender_id)\
                 .execute()
         
         # Direct manual populate (RPC niet nodig)
-        return await self._populate_manual(tender_id, bureau_id, template_naam)
+        try:
+            return await self._populate_manual(tender_id, bureau_id, template_naam)
+        finally:
+            invalidate_agenda_bureau(bureau_id)
     
     async def _populate_manual(self, tender_id: str, bureau_id: str, template_naam: str) -> dict:
         """
@@ -416,7 +522,7 @@ class PlanningService:
         try:
             # ─── PLANNING TAKEN ───────────────────────────
             # Stap 1: Zoek het planning template
-            planning_tmpl = self.db.table('planning_templates')\
+            planning_tmpl = await self.db.table('planning_templates')\
                 .select('id')\
                 .eq('naam', template_naam)\
                 .eq('type', 'planning')\
@@ -428,7 +534,7 @@ class PlanningService:
                 tmpl_id = planning_tmpl.data[0]['id']
                 
                 # Stap 2: Haal template taken op
-                taken = self.db.table('planning_template_taken')\
+                taken = await self.db.table('planning_template_taken')\
                     .select('*')\
                     .eq('template_id', tmpl_id)\
                     .order('volgorde')\
@@ -455,7 +561,7 @@ class PlanningService:
                         'status': 'todo'
                     } for t in taken.data]
                     
-                    self.db.table('planning_taken').insert(inserts).execute()
+                    await self.db.table('planning_taken').insert(inserts).execute()
                     planning_count = len(inserts)
                     print(f"✅ {planning_count} planning taken gekopieerd naar tender {tender_id}")
                 else:
@@ -465,7 +571,7 @@ class PlanningService:
             
             # ─── CHECKLIST ITEMS ──────────────────────────
             # Stap 1: Zoek het checklist template
-            checklist_tmpl = self.db.table('planning_templates')\
+            checklist_tmpl = await self.db.table('planning_templates')\
                 .select('id')\
                 .eq('naam', template_naam)\
                 .eq('type', 'checklist')\
@@ -477,7 +583,7 @@ class PlanningService:
                 tmpl_id = checklist_tmpl.data[0]['id']
                 
                 # Stap 2: Haal template taken op
-                items = self.db.table('planning_template_taken')\
+                items = await self.db.table('planning_template_taken')\
                     .select('*')\
                     .eq('template_id', tmpl_id)\
                     .order('volgorde')\
@@ -506,7 +612,7 @@ class PlanningService:
                         'status': 'pending'
                     } for t in items.data]
                     
-                    self.db.table('checklist_items').insert(cl_inserts).execute()
+                    await self.db.table('checklist_items').insert(cl_inserts).execute()
                     checklist_count = len(cl_inserts)
                     print(f"✅ {checklist_count} checklist items gekopieerd naar tender {tender_id}")
                 else:
@@ -530,215 +636,117 @@ class PlanningService:
     # AGENDA — Alle taken over alle tenders
     # ============================================
     
-    async def get_agenda_data(self, user_id: str, start_date: str, end_date: str, team_member_id: str = None):
+    async def get_agenda_data(
+        self,
+        bureau_id: Optional[str],
+        is_super_admin: bool,
+        start_date: str,
+        end_date: str,
+        team_member_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Haal alle taken op over alle tenders voor de agenda.
-        Combineert planning_taken EN checklist_items.
-        
-        Inclusief:
-        - Taken MET datum in het bereik (verschijnen op weekdag)
-        - Taken ZONDER datum (verschijnen als 'ongepland')
-        - Taken ZONDER toegewezen persoon (altijd zichtbaar)
-        
-        Super-admin in "Alle bureau's" mode: geen bureau filter → alle taken.
-        Normale user: alleen taken van eigen bureau.
+        Agenda voor GET /planning/agenda: planning taken en checklist items
+        in het bereik, over alle niet-archief tenders van het bureau.
+        
+        bureau_id=None + super-admin → alle bureaus; anders lege agenda.
+        ⚠️ bureau_id moet door de aanroeper gevalideerd zijn
+        (ensure_bureau_access): een cache-hit gaat niet langs RLS.
+        Resultaat per ISO-week gecachet (agenda_cache); tenders, taken,
+        checklist en team in één parallelle ronde, daarna de voortgang
+        per tender via get_planning_voortgang.
+        
+        Returns:
+            {"taken": [...], "tenders": {id: {...}}, "v_bureau_team": [...]}
         """
-        bureau_id = await self._get_user_bureau_id(user_id)
-        is_super = await self._is_super_admin(user_id)
-        
-        # Als geen bureau EN geen super-admin → lege data
-        if not bureau_id and not is_super:
-            print(f"⚠️ Agenda: geen bureau gevonden voor user {user_id[:8]}...")
-            return {"taken": [], "tenders": {}, "team_members": []}
-        
-        print(f"📅 Agenda query: bureau={bureau_id or 'ALLE'}, super={is_super}, range={start_date} → {end_date}")
-        
-        # ── 1A. Planning taken MET datum in bereik ──
-        dated_query = self.db.table('planning_taken')\
-            .select('id, tender_id, tenderbureau_id, taak_naam, categorie, status, datum, toegewezen_aan, is_milestone, volgorde')\
-            .gte('datum', f"{start_date}T00:00:00")\
-            .lte('datum', f"{end_date}T23:59:59")
-        
-        if bureau_id:
-            dated_query = dated_query.eq('tenderbureau_id', bureau_id)
-        
-        dated_result = dated_query.order('datum').order('volgorde').execute()
-        dated_planning = dated_result.data or []
+        if not bureau_id and not is_super_admin:
+            return {"taken": [], "tenders": {}, "v_bureau_team": []}
+        
+        # ── 0. Week-cache ──
+        cache_key = agenda_cache_key(bureau_id, start_date, end_date, team_member_id)
+        if cache_key:
+            cached = agenda_cache.get(cache_key)
+            if cached is not None:
+                print(f"📅 Agenda cache hit: bureau={bureau_id or 'ALLE'}, week={cache_key[1]}-W{cache_key[2]:02d}")
+                return cached
+        
+        # ── 1. Tenders, planning, checklist en team parallel ──
+        # Taken filteren op bureau i.p.v. in_() op alle tender ids; taken
+        # van archief-tenders vallen hieronder weg bij het koppelen
+        tender_query = self.db.table('tenders')\
+            .select('id, naam, opdrachtgever, fase, fase_status, deadline_indiening, tenderbureau_id, bedrijven(bedrijfsnaam)')\
+            .neq('fase', 'archief')
+        
+        planning_query = self.db.table('planning_taken')\
+            .select('*')\
+            .gte('datum', start_date)\
+            .lte('datum', end_date)
         
-        # ── 1B. Planning taken ZONDER datum (ongepland) ──
-        undated_query = self.db.table('planning_taken')\
-            .select('id, tender_id, tenderbureau_id, taak_naam, categorie, status, datum, toegewezen_aan, is_milestone, volgorde')\
-            .is_('datum', 'null')
-        
-        if bureau_id:
-            undated_query = undated_query.eq('tenderbureau_id', bureau_id)
-        
-        undated_result = undated_query.order('volgorde').execute()
-        undated_planning = undated_result.data or []
-        
-        # Combineer, voorkom duplicaten
-        seen_ids = set()
-        planning_taken = []
-        for pt in dated_planning + undated_planning:
-            if pt['id'] not in seen_ids:
-                seen_ids.add(pt['id'])
-                planning_taken.append(pt)
-        
-        print(f"   📋 Planning taken: {len(dated_planning)} gepland + {len(undated_planning)} ongepland = {len(planning_taken)} totaal")
+        if team_member_id:
+            planning_query = planning_query.contains('toegewezen_aan', [team_member_id])
         
-        # ── 2A. Checklist items MET deadline in bereik ──
-        cl_dated_query = self.db.table('checklist_items')\
-            .select('id, tender_id, tenderbureau_id, taak_naam, sectie, status, deadline, verantwoordelijke_data, volgorde')\
+        checklist_query = self.db.table('checklist_items')\
+            .select('*')\
             .gte('deadline', start_date)\
             .lte('deadline', end_date)
         
+        queries = [tender_query, planning_query, checklist_query]
         if bureau_id:
-            cl_dated_query = cl_dated_query.eq('tenderbureau_id', bureau_id)
+            queries = [q.eq('tenderbureau_id', bureau_id) for q in queries]
+            queries.append(
+                self.db.table('v_bureau_team')
+                    .select('user_id, naam, email, initialen, avatar_kleur, bureau_rol')
+                    .eq('tenderbureau_id', bureau_id)
+                    .order('naam')
+            )
+        
+        results = await asyncio.gather(*[q.execute() for q in queries])
+        tender_rows, planning_rows, checklist_rows = (r.data or [] for r in results[:3])
+        team_members = (results[3].data or []) if bureau_id else []
         
-        cl_dated_result = cl_dated_query.order('deadline').order('volgorde').execute()
-        dated_checklist = cl_dated_result.data or []
-        
-        # ── 2B. Checklist items ZONDER deadline (ongepland) ──
-        cl_undated_query = self.db.table('checklist_items')\
-            .select('id, tender_id, tenderbureau_id, taak_naam, sectie, status, deadline, verantwoordelijke_data, volgorde')\
-            .is_('deadline', 'null')
-        
-        if bureau_id:
-            cl_undated_query = cl_undated_query.eq('tenderbureau_id', bureau_id)
-        
-        cl_undated_result = cl_undated_query.order('volgorde').execute()
-        undated_checklist = cl_undated_result.data or []
-        
-        # Combineer checklist
-        seen_cl_ids = set()
-        checklist_items = []
-        for ci in dated_checklist + undated_checklist:
-            if ci['id'] not in seen_cl_ids:
-                seen_cl_ids.add(ci['id'])
-                checklist_items.append(ci)
-        
-        print(f"   ✅ Checklist items: {len(dated_checklist)} gepland + {len(undated_checklist)} ongepland = {len(checklist_items)} totaal")
-        
-        # ── 3. Combineer tot uniform formaat ──
-        taken = []
-        tender_ids = set()
-        
-        for pt in planning_taken:
-            toegewezen = pt.get('toegewezen_aan') or []
-            taak = {
-                "id": pt['id'],
-                "tender_id": pt['tender_id'],
-                "taak_naam": pt['taak_naam'],
-                "categorie": pt.get('categorie', ''),
-                "status": pt['status'],
-                "datum": pt['datum'],  # None voor ongepland
-                "toegewezen_aan": toegewezen,
-                "is_milestone": pt.get('is_milestone', False),
-                "is_ongepland": pt['datum'] is None,
-                "is_niet_toegewezen": len(toegewezen) == 0,
-                "bron": "planning"
-            }
-            taken.append(taak)
-            tender_ids.add(pt['tender_id'])
-        
-        for ci in checklist_items:
-            toegewezen = []
-            if ci.get('verantwoordelijke_data'):
-                vd = ci['verantwoordelijke_data']
-                if isinstance(vd, dict) and vd.get('id'):
-                    toegewezen = [vd]
-            
-            taak = {
-                "id": ci['id'],
-                "tender_id": ci['tender_id'],
-                "taak_naam": ci['taak_naam'],
-                "categorie": ci.get('sectie', 'Checklist'),
-                "status": "done" if ci['status'] == 'completed' else "todo",
-                "datum": f"{ci['deadline']}T00:00:00" if ci.get('deadline') else None,
-                "toegewezen_aan": toegewezen,
-                "is_milestone": False,
-                "is_ongepland": ci.get('deadline') is None,
-                "is_niet_toegewezen": len(toegewezen) == 0,
-                "bron": "checklist"
-            }
-            taken.append(taak)
-            tender_ids.add(ci['tender_id'])
-        
-        # ── 4. Filter op teamlid (optioneel) ──
-        # BELANGRIJK: niet-toegewezen taken blijven ALTIJD zichtbaar
-        if team_member_id:
-            filtered_taken = []
-            for taak in taken:
-                # Niet-toegewezen taken altijd tonen (moeten nog worden toegewezen)
-                if taak.get('is_niet_toegewezen'):
-                    filtered_taken.append(taak)
-                    continue
-                # Check of dit teamlid is toegewezen
-                for persoon in (taak.get('toegewezen_aan') or []):
-                    if isinstance(persoon, dict) and persoon.get('id') == team_member_id:
-                        filtered_taken.append(taak)
-                        break
-            taken = filtered_taken
-            tender_ids = set(t['tender_id'] for t in taken)
-        
-        # ── 5. Haal tender info op ──
         tenders = {}
-        if tender_ids:
-            tender_list = list(tender_ids)
-            tender_query = self.db.table('tenders')\
-                .select('id, naam, opdrachtgever, fase, fase_status, deadline_indiening, publicatie_datum, tenderbureau_id')\
-                .in_('id', tender_list)
-            
-            if bureau_id:
-                tender_query = tender_query.eq('tenderbureau_id', bureau_id)
-            
-            tender_result = tender_query.execute()
-            
-            for t in (tender_result.data or []):
-                tenders[t['id']] = {
-                    "id": t['id'],
-                    "naam": t['naam'],
-                    "opdrachtgever": t.get('opdrachtgever', ''),
-                    "fase": t.get('fase', ''),
-                    "fase_status": t.get('fase_status', ''),
-                    "deadline_indiening": t.get('deadline_indiening'),
-                    "publicatie_datum": t.get('publicatie_datum'),
-                    "tenderbureau_id": t.get('tenderbureau_id', ''),
-                }
-            
-            # ── 6. Planning voortgang per tender ──
-            for tender_id in tender_ids:
-                if tender_id in tenders:
-                    p_query = self.db.table('planning_taken')\
-                        .select('status')\
-                        .eq('tender_id', tender_id)
-                    
-                    if bureau_id:
-                        p_query = p_query.eq('tenderbureau_id', bureau_id)
-                    
-                    p_result = p_query.execute()
-                    p_items = p_result.data or []
-                    tenders[tender_id]['planning_total'] = len(p_items)
-                    tenders[tender_id]['planning_done'] = sum(1 for i in p_items if i['status'] == 'done')
-        
-       # ── 7. Team members ──
-        team_query = self.db.table('v_bureau_team')\
-            .select('user_id, naam, email, initialen, avatar_kleur, bureau_rol')\
-            .order('naam')
-
-        if bureau_id:
-            team_query = team_query.eq('tenderbureau_id', bureau_id)
-
-        team_result = team_query.execute()
-        team_members = team_result.data or []
+        for t in tender_rows:
+            bedrijven_data = t.get('bedrijven') or {}
+            tenders[t['id']] = {
+                'id':                 t['id'],
+                'naam':               t.get('naam'),
+                'opdrachtgever':      t.get('opdrachtgever'),
+                'bedrijfsnaam':       bedrijven_data.get('bedrijfsnaam', '') if isinstance(bedrijven_data, dict) else '',
+                'fase':               t.get('fase'),
+                'fase_status':        t.get('fase_status'),
+                'deadline_indiening': t.get('deadline_indiening'),
+                'tenderbureau_id':    t.get('tenderbureau_id'),
+            }
         
-        # Stats
-        ongepland_count = sum(1 for t in taken if t.get('is_ongepland'))
-        niet_toegewezen_count = sum(1 for t in taken if t.get('is_niet_toegewezen'))
-        print(f"   📊 Resultaat: {len(taken)} taken ({ongepland_count} ongepland, {niet_toegewezen_count} niet-toegewezen), {len(tenders)} tenders, {len(team_members)} teamleden")
+        if not tenders:
+            return {"taken": [], "tenders": {}, "v_bureau_team": team_members}
         
-        return {
+        # ── 2. Combineer tot één lijst ──
+        taken = []
+        for t in planning_rows:
+            if t['tender_id'] in tenders:
+                t['item_type'] = 'planning'
+                taken.append(t)
+        for c in checklist_rows:
+            if c['tender_id'] in tenders:
+                c['item_type'] = 'checklist'
+                c['datum'] = c.get('deadline')
+                taken.append(c)
+        
+        # ── 3. Planning voortgang per tender (één gegroepeerde query) ──
+        voortgang = await self._get_planning_voortgang(list(tenders), bureau_id)
+        for tender_id, tender in tenders.items():
+            total, done = voortgang.get(tender_id, (0, 0))
+            tender['planning_total'] = total
+            tender['planning_done'] = done
+        
+        print(f"📅 Agenda: bureau={bureau_id or 'ALLE'}, {start_date} → {end_date}: {len(taken)} taken, {len(tenders)} tenders")
+        
+        agenda = {
             "taken": taken,
             "tenders": tenders,
-            "team_members": team_members
+            "v_bureau_team": team_members,
         }
+        if cache_key:
+            agenda_cache.set(cache_key, agenda)
+        
+        return agenda
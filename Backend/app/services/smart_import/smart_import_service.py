@@ -4,7 +4,21 @@ import unicodedata
 """
 Smart Import Service
 Orchestreert het volledige import proces voor AI-gestuurde tender aanmaak
-TenderZen v3.5
+TenderZen v3.7
+
+NEW v3.7:
+- Pre-flight (claude_preflight) vóór elke extractie: input geteld,
+  max_tokens uit de smart_import-historie in ai_usage_log i.p.v. een
+  schatting op tekens
+- Geen stille afkapping op 150.000 tekens meer: te grote documenten worden
+  in delen geëxtraheerd en samengevoegd (max SMART_IMPORT_MAX_DELEN, daarboven
+  een waarschuwing in het resultaat)
+- Afgekapte response → één keer opnieuw met het modelplafond
+- Usage per Claude-call gelogd (_meta.calls)
+
+NEW v3.6:
+- Async data-access: db/storage via AsyncSupabaseClient (await .execute())
+- _update_status() en _download_file() zijn nu async
 
 NEW v3.5:
 - Model keuze: Haiku (standaard) of Sonnet (pro)
@@ -40,20 +54,22 @@ MODELLEN:
 - haiku / claude-haiku-4-5-20251001 (standaard) - Snel, goedkoop
 - sonnet / claude-sonnet-4-20250514 (pro) - Nauwkeuriger
 """
+import asyncio
 import json
 import logging
 import re
 import time
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
 
 from fastapi import HTTPException
-from supabase import Client
+from app.core.database import AsyncSupabaseClient
 from json_repair import repair_json
 
 from .text_extraction_service import TextExtractionService
-from ..ai_documents.claude_api_service import ClaudeAPIService
-from ..ai_usage_logger import log_ai_usage
+from ..ai_documents.claude_api_service import ClaudeAPIService, MODEL_SONNET, kies_model
+from ..claude_preflight import CallPlan, max_output, plan_call, splits_tekst
+from ..ai_usage_logger import log_ai_usage_async
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -70,6 +86,11 @@ ALLOWED_MIME_TYPES = [
 ]
 STORAGE_BUCKET = 'smart-imports'
 
+# Pre-flight: plafond per extractie-call (≈ de oude afkapgrens van 150.000
+# tekens) en het maximale aantal delen per extractie
+SMART_IMPORT_MAX_INPUT_TOKENS = 40_000
+SMART_IMPORT_MAX_DELEN = 4
+
 
 class SmartImportService:
     """
@@ -107,7 +128,7 @@ class SmartImportService:
             filename = f'file_{int(time.time())}{ext}'
         return filename
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncSupabaseClient):
         self.db = db
         self.storage = db.storage
         self.text_service = TextExtractionService()
@@ -130,7 +151,7 @@ class SmartImportService:
     ) -> Dict[str, Any]:
         """Maak een nieuwe import sessie aan."""
         try:
-            result = self.db.table('smart_imports').insert({
+            result = await self.db.table('smart_imports').insert({
                 'tenderbureau_id': tenderbureau_id,
                 'created_by': user_id,
                 'status': 'uploading',
@@ -147,7 +168,7 @@ class SmartImportService:
     async def get_import(self, import_id: str) -> Optional[Dict[str, Any]]:
         """Haal import record op."""
         try:
-            result = self.db.table('smart_imports').select(
+            result = await self.db.table('smart_imports').select(
                 '*'
             ).eq('id', import_id).single().execute()
             return result.data
@@ -189,7 +210,7 @@ class SmartImportService:
             storage_path = f"{import_id}/{safe_name}"
 
             try:
-                self.storage.from_(STORAGE_BUCKET).upload(
+                await self.storage.from_(STORAGE_BUCKET).upload(
                     path=storage_path,
                     file=content,
                     file_options={"content-type": file.content_type}
@@ -212,7 +233,7 @@ class SmartImportService:
             logger.info(f"✅ Uploaded: {safe_name} ({file_size} bytes)")
         
         # Update import record
-        self.db.table('smart_imports').update({
+        await self.db.table('smart_imports').update({
             'uploaded_files': uploaded,
             'status': 'uploaded',
             'progress': 10
@@ -255,7 +276,7 @@ class SmartImportService:
             storage_path = f"{import_id}/{file.filename}"
             
             try:
-                self.storage.from_(STORAGE_BUCKET).upload(
+                await self.storage.from_(STORAGE_BUCKET).upload(
                     path=storage_path,
                     file=content,
                     file_options={"content-type": file.content_type}
@@ -264,7 +285,7 @@ class SmartImportService:
                 # Bestand bestaat mogelijk al, probeer te overschrijven
                 logger.warning(f"⚠️ Upload failed, trying update: {e}")
                 try:
-                    self.storage.from_(STORAGE_BUCKET).update(
+                    await self.storage.from_(STORAGE_BUCKET).update(
                         path=storage_path,
                         file=content,
                         file_options={"content-type": file.content_type}
@@ -299,7 +320,7 @@ class SmartImportService:
             
             # Update import record
             # Gebruik 'uploaded' status (bestaat in database constraint)
-            self.db.table('smart_imports').update({
+            await self.db.table('smart_imports').update({
                 'uploaded_files': current_files,
                 'status': 'uploaded',  # Was 'document_added' maar bestaat niet in constraint
                 'progress': 10
@@ -336,7 +357,7 @@ class SmartImportService:
         
         try:
             # Update status
-            self._update_status(import_id, 'analyzing', progress=15, current_step='supplement_extraction')
+            await self._update_status(import_id, 'analyzing', progress=15, current_step='supplement_extraction')
             
             # Haal import record op
             import_record = await self.get_import(import_id)
@@ -361,11 +382,11 @@ class SmartImportService:
             logger.info(f"📄 Analyzing {len(supplement_files)} supplement file(s)")
             
             # Extract tekst uit supplement bestanden
-            self._update_status(import_id, 'analyzing', progress=25, current_step='text_extraction')
+            await self._update_status(import_id, 'analyzing', progress=25, current_step='text_extraction')
             
             combined_text = ""
             for file_info in supplement_files:
-                file_content = self._download_file(import_id, file_info['name'])
+                file_content = await self._download_file(import_id, file_info['name'])
                 text = await self.text_service.extract(
                     content=file_content,
                     filename=file_info['name'],
@@ -374,7 +395,7 @@ class SmartImportService:
                 combined_text += f"\n\n{'='*60}\n=== {file_info['name']} (AANVULLEND) ===\n{'='*60}\n\n{text}"
             
             # AI Extractie met focus op ontbrekende velden
-            self._update_status(import_id, 'analyzing', progress=50, current_step='ai_extraction')
+            await self._update_status(import_id, 'analyzing', progress=50, current_step='ai_extraction')
             
             if not self.claude_service:
                 raise ValueError("Claude API niet geconfigureerd")
@@ -391,29 +412,21 @@ class SmartImportService:
             )
 
             # Log AI token verbruik
-            log_ai_usage(
-                db=self.db,
-                bureau_id=import_record.get('tenderbureau_id'),
-                tender_id=import_record.get('tender_id'),
-                call_type='smart_import',
-                model=new_data.get('_meta', {}).get('model', 'claude-haiku-4-5-20251001'),
-                input_tokens=new_data.get('_meta', {}).get('input_tokens', 0),
-                output_tokens=new_data.get('_meta', {}).get('output_tokens', 0),
-            )
+            await self._log_extractie_usage(import_record, new_data, 'claude-haiku-4-5-20251001')
 
             # Merge data
-            self._update_status(import_id, 'analyzing', progress=80, current_step='merging')
+            await self._update_status(import_id, 'analyzing', progress=80, current_step='merging')
             merged_data, newly_filled = self._merge_extracted_data(existing_data, new_data)
             
             logger.info(f"✨ Newly filled fields: {newly_filled}")
             
             # Bereken statistieken
-            self._update_status(import_id, 'analyzing', progress=95, current_step='finalizing')
+            await self._update_status(import_id, 'analyzing', progress=95, current_step='finalizing')
             stats = self._calculate_statistics(merged_data)
             extraction_time = int(time.time() - start_time)
             
             # Update import record
-            self.db.table('smart_imports').update({
+            await self.db.table('smart_imports').update({
                 'status': 'completed',
                 'progress': 100,
                 'current_step': None,
@@ -446,7 +459,7 @@ class SmartImportService:
             
         except Exception as e:
             logger.exception(f"❌ Supplemental analysis failed: {e}")
-            self._update_status(import_id, 'failed', error_message=str(e))
+            await self._update_status(import_id, 'failed', error_message=str(e))
             raise
     
     def _find_empty_fields(self, data: Dict[str, Any]) -> List[str]:
@@ -566,11 +579,6 @@ class SmartImportService:
     ) -> Dict[str, Any]:
         """Gebruik AI voor aanvullende extractie, met focus op lege velden."""
         
-        # Truncate indien nodig
-        max_chars = 150000
-        if len(document_content) > max_chars:
-            document_content = document_content[:max_chars] + "\n\n[Document afgekapt...]"
-        
         # Bouw lijst van ontbrekende velden voor de prompt
         empty_fields_text = ""
         if empty_fields:
@@ -594,11 +602,12 @@ REGELS:
 7. Retourneer ALLEEN valide JSON, geen uitleg ervoor of erna
 8. Dit is een AANVULLEND document - zoek vooral naar planning, deadlines en andere details"""
 
-        user_prompt = f"""Analyseer dit AANVULLENDE aanbestedingsdocument en extraheer alle informatie.
+        def user_prompt(tekst: str) -> str:
+            return f"""Analyseer dit AANVULLENDE aanbestedingsdocument en extraheer alle informatie.
 {empty_fields_text}
 
 DOCUMENT:
-{document_content}
+{tekst}
 
 EXTRAHEER (geef ALLEEN JSON terug):
 {{
@@ -641,66 +650,13 @@ EXTRAHEER (geef ALLEEN JSON terug):
     "warnings": ["lijst van waarschuwingen"]
 }}"""
 
-        # Dynamische max_tokens voor supplement analyse
-        aantal_segmenten = max(1, len(document_content) // 10000)
-        max_tokens = min(8192, 4000 + (aantal_segmenten * 1000))
-        logger.info(f"🔢 supplement max_tokens={max_tokens} (segmenten={aantal_segmenten})")
-
-        result = await self.claude_service.execute_prompt_with_retry(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            response_format="json",
-            max_tokens=max_tokens,
-            temperature=0.2,
-            log_usage=False,  # Logging gebeurt in analyze_supplement() met bureau_id/tender_id context
+        return await self._extraheer(
+            system_prompt,
+            user_prompt,
+            document_content,
+            meta={'is_supplement': True},
         )
 
-        if result.get('truncated'):
-            tekst = result.get('content', '')
-            raise HTTPException(
-                status_code=500,
-                detail=f"AI response afgekapt door max_tokens limiet. Ontvangen: {len(tekst)} tekens. Probeer minder documenten te uploaden."
-            )
-
-        if result.get('truncated'):
-            raise ValueError(result.get('error', 'AI response afgekapt door token limiet'))
-
-        if result['success']:
-            content = result['content']
-
-            # v3.4: Robuuste JSON parsing met json-repair
-            if isinstance(content, str):
-                logger.info("📝 Parsing JSON string response from Claude")
-
-                # Strip markdown codeblocks indien aanwezig
-                json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', content)
-                if json_match:
-                    content = json_match.group(1)
-
-                # Gebruik json-repair library voor robuuste parsing
-                try:
-                    extracted = json.loads(repair_json(content))
-                    logger.info("✅ JSON parsed successfully")
-                except Exception as e:
-                    logger.error(f"❌ JSON parse failed even after repair: {e}")
-                    logger.error(f"📄 Raw content (first 1000 chars): {content[:1000]}")
-                    raise ValueError(f"Kon JSON niet parsen: {e}")
-            else:
-                extracted = content
-
-            # Voeg metadata toe
-            extracted['_meta'] = {
-                'model': result.get('model', 'claude-haiku-4-5-20251001'),
-                'input_tokens': result.get('usage', {}).get('input_tokens', 0),
-                'output_tokens': result.get('usage', {}).get('output_tokens', 0),
-                'tokens_used': result.get('usage', {}).get('input_tokens', 0) + result.get('usage', {}).get('output_tokens', 0),
-                'is_supplement': True
-            }
-            
-            return extracted
-        else:
-            raise ValueError(f"AI extraction failed: {result.get('error')}")
-    
     def _detect_document_type(self, filename: str) -> str:
         """Detecteer document type op basis van bestandsnaam."""
         filename_lower = filename.lower()
@@ -749,7 +705,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
         
         try:
             # Update status
-            self._update_status(import_id, 'analyzing', progress=15, current_step='text_extraction')
+            await self._update_status(import_id, 'analyzing', progress=15, current_step='text_extraction')
             
             # 1. Haal import record op
             import_record = await self.get_import(import_id)
@@ -765,14 +721,14 @@ EXTRAHEER (geef ALLEEN JSON terug):
             combined_text = ""
             
             for i, file_info in enumerate(files):
-                self._update_status(
+                await self._update_status(
                     import_id, 'analyzing', 
                     progress=15 + (i * 15 // len(files)),
                     current_step=f'text_extraction:{file_info["name"]}'
                 )
                 
                 # Download bestand
-                file_content = self._download_file(import_id, file_info['name'])
+                file_content = await self._download_file(import_id, file_info['name'])
                 
                 # Extract tekst
                 text = await self.text_service.extract(
@@ -784,7 +740,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
                 combined_text += f"\n\n{'='*60}\n=== {file_info['name']} ===\n{'='*60}\n\n{text}"
             
             # 3. AI Extractie
-            self._update_status(import_id, 'analyzing', progress=40, current_step='ai_extraction')
+            await self._update_status(import_id, 'analyzing', progress=40, current_step='ai_extraction')
             
             if not self.claude_service:
                 raise ValueError("Claude API niet geconfigureerd - voeg ANTHROPIC_API_KEY toe aan .env")
@@ -795,15 +751,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
             # Log AI token verbruik
             # tender_id is None bij nieuwe imports (tender bestaat nog niet);
             # bij reanalyze() kan hij wel gevuld zijn vanuit het import_record.
-            log_ai_usage(
-                db=self.db,
-                bureau_id=import_record.get('tenderbureau_id'),
-                tender_id=import_record.get('tender_id'),
-                call_type='smart_import',
-                model=extracted_data.get('_meta', {}).get('model', selected_model),
-                input_tokens=extracted_data.get('_meta', {}).get('input_tokens', 0),
-                output_tokens=extracted_data.get('_meta', {}).get('output_tokens', 0),
-            )
+            await self._log_extractie_usage(import_record, extracted_data, selected_model)
 
             # Log extracted data for debugging
             logger.info("📊 Extracted data summary:")
@@ -817,7 +765,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
                         logger.info(f"  📅 {key}: {val.get('value')} (conf: {val.get('confidence', 0):.0%})")
             
             # 4. Bereken statistieken
-            self._update_status(import_id, 'analyzing', progress=90, current_step='finalizing')
+            await self._update_status(import_id, 'analyzing', progress=90, current_step='finalizing')
             stats = self._calculate_statistics(extracted_data)
             warnings = extracted_data.get('warnings', [])
             
@@ -825,7 +773,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
             extraction_time = int(time.time() - start_time)
             
             # 6. Update import record
-            self.db.table('smart_imports').update({
+            await self.db.table('smart_imports').update({
                 'status': 'completed',
                 'progress': 100,
                 'current_step': None,
@@ -855,7 +803,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
             
         except Exception as e:
             logger.exception(f"❌ Analysis failed for {import_id}: {e}")
-            self._update_status(import_id, 'failed', error_message=str(e))
+            await self._update_status(import_id, 'failed', error_message=str(e))
             raise
     
     # ==========================================
@@ -886,7 +834,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
             raise ValueError(f"Import not found: {import_id}")
         
         # Reset status voor nieuwe analyse
-        self._update_status(import_id, 'analyzing', progress=10, current_step='reanalyze_init')
+        await self._update_status(import_id, 'analyzing', progress=10, current_step='reanalyze_init')
         
         # Voer analyse uit met nieuw model
         return await self.analyze(
@@ -910,11 +858,6 @@ EXTRAHEER (geef ALLEEN JSON terug):
             model: AI model ("haiku" of "sonnet")
         """
         
-        # Truncate indien nodig
-        max_chars = 150000  # ~40k tokens
-        if len(document_content) > max_chars:
-            document_content = document_content[:max_chars] + "\n\n[Document afgekapt...]"
-        
         system_prompt = """Je bent een expert in het analyseren van Nederlandse aanbestedingsdocumenten.
 Je taak is om alle relevante informatie te extraheren en terug te geven in een gestructureerd JSON formaat.
 Wees beknopt. Geef alleen de gevraagde JSON terug, geen uitleg.
@@ -929,10 +872,11 @@ REGELS:
 6. Bedragen als integer (geen valutasymbool)
 7. Retourneer ALLEEN valide JSON, geen uitleg ervoor of erna"""
 
-        user_prompt = f"""Analyseer dit aanbestedingsdocument en extraheer alle informatie.
+        def user_prompt(tekst: str) -> str:
+            return f"""Analyseer dit aanbestedingsdocument en extraheer alle informatie.
 
 DOCUMENT:
-{document_content}
+{tekst}
 
 EXTRAHEER (geef ALLEEN JSON terug):
 {{
@@ -975,84 +919,195 @@ EXTRAHEER (geef ALLEEN JSON terug):
     "warnings": ["lijst van waarschuwingen over ontbrekende of onzekere data"]
 }}"""
 
-        # Dynamische max_tokens: basis 4000 + 2000 per ~10k tekens document inhoud
-        aantal_segmenten = max(1, len(document_content) // 10000)
-        if 'sonnet' in model or 'opus' in model:
-            max_tokens = min(16000, 4000 + (aantal_segmenten * 2000))
+        return await self._extraheer(system_prompt, user_prompt, document_content, model=model)
+
+    async def _extraheer(
+        self,
+        system_prompt: str,
+        user_prompt: Callable[[str], str],
+        document_content: str,
+        model: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Pre-flight (claude_preflight) → extractie, zo nodig in delen.
+
+        max_tokens volgt uit de output-historie van smart_import. Past het
+        document niet in één call (context of SMART_IMPORT_MAX_INPUT_TOKENS),
+        dan wordt het op alineagrenzen gesplitst; de delen worden parallel
+        geëxtraheerd en samengevoegd met _merge_extracted_data. Boven
+        SMART_IMPORT_MAX_DELEN wordt de rest overgeslagen, met een
+        waarschuwing in het resultaat.
+        """
+        model_id = kies_model(model or self.claude_service.default_model)
+
+        # Zonder historie: de oude schatting (basis 4000 + per ~10k tekens), per deel
+        segmenten = max(1, min(len(document_content), SMART_IMPORT_MAX_INPUT_TOKENS * 4) // 10000)
+        if 'sonnet' in model_id or 'opus' in model_id:
+            standaard_output = min(16000, 4000 + segmenten * 2000)
         else:
-            max_tokens = min(8192, 4000 + (aantal_segmenten * 1000))
-        logger.info(f"🔢 max_tokens={max_tokens} (model={model}, segmenten={aantal_segmenten})")
+            standaard_output = min(8192, 4000 + segmenten * 1000)
 
-        # Gebruik bestaande ClaudeAPIService met retry
-        # v3.5: Model parameter toegevoegd
-        result = await self.claude_service.execute_prompt_with_retry(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            response_format="json",
-            max_tokens=max_tokens,
-            temperature=0.2,
-            model=model,  # v3.5: Gekozen model
-            log_usage=False,  # Logging gebeurt in analyze() met bureau_id/tender_id context
+        plan = await plan_call(
+            {
+                'model': model_id,
+                'system': system_prompt,
+                'messages': [{'role': 'user', 'content': user_prompt(document_content)}],
+            },
+            call_type='smart_import',
+            standaard_output=standaard_output,
+            max_input=SMART_IMPORT_MAX_INPUT_TOKENS,
         )
 
+        waarschuwingen = []
+        delen = plan.delen
+        if delen > SMART_IMPORT_MAX_DELEN:
+            waarschuwingen.append(
+                f"Documenten te groot voor volledige analyse: ongeveer "
+                f"{100 - 100 * SMART_IMPORT_MAX_DELEN // delen}% van de tekst is niet geanalyseerd"
+            )
+            logger.warning(f"⚠️ {waarschuwingen[-1]} ({plan.input_tokens} input tokens)")
+            document_content = document_content[:len(document_content) * SMART_IMPORT_MAX_DELEN // delen]
+            delen = SMART_IMPORT_MAX_DELEN
+
+        stukken = splits_tekst(document_content, delen)
+        if len(stukken) > 1:
+            logger.info(f"✂️ Extractie in {len(stukken)} delen ({plan.input_tokens} input tokens)")
+            stukken = [
+                f"[Deel {i} van {len(stukken)} van de documenten]\n\n{stuk}"
+                for i, stuk in enumerate(stukken, 1)
+            ]
+
+        resultaten = await asyncio.gather(*(
+            self._extraheer_deel(system_prompt, user_prompt(stuk), plan) for stuk in stukken
+        ))
+
+        extracted = resultaten[0][0]
+        for deel, _ in resultaten[1:]:
+            extracted, _ = self._merge_extracted_data(extracted, deel)
+        if waarschuwingen:
+            extracted['warnings'] = extracted.get('warnings', []) + waarschuwingen
+
+        calls = [call for _, deel_calls in resultaten for call in deel_calls]
+        input_tokens = sum(c['input_tokens'] for c in calls)
+        output_tokens = sum(c['output_tokens'] for c in calls)
+        extracted['_meta'] = {
+            'model': plan.model,
+            'model_type': 'pro' if plan.model == MODEL_SONNET else 'standaard',  # v3.5
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'tokens_used': input_tokens + output_tokens,
+            'delen': len(stukken),
+            'calls': calls,
+            **(meta or {}),
+        }
+        return extracted
+
+    async def _extraheer_deel(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        plan: CallPlan,
+    ) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Eén extractie-call. Afgekapt ondanks de pre-flight → één keer
+        opnieuw met het plafond van het model, daarna een fout.
+        Returns: (extracted, [usage per call])
+        """
+        calls = []
+        max_tokens = plan.max_tokens
+        plafond = max_output(plan.model)
+        while True:
+            result = await self.claude_service.execute_prompt_with_retry(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                response_format="json",
+                max_tokens=max_tokens,
+                temperature=0.2,
+                model=plan.model,
+                call_type='smart_import',
+                log_usage=False,  # Logging in analyze() / analyze_supplement() met bureau_id/tender_id context
+            )
+            usage = result.get('usage') or {}
+            calls.append({
+                'model': result.get('model', plan.model),
+                'input_tokens': usage.get('input_tokens', 0),
+                'output_tokens': usage.get('output_tokens', 0),
+            })
+            if not result.get('truncated') or max_tokens >= plafond:
+                break
+            logger.warning(f"⚠️ Afgekapt bij max_tokens={max_tokens}, opnieuw met {plafond}")
+            max_tokens = plafond
+
         if result.get('truncated'):
             tekst = result.get('content', '')
             raise HTTPException(
                 status_code=500,
                 detail=f"AI response afgekapt door max_tokens limiet. Ontvangen: {len(tekst)} tekens. Probeer minder documenten te uploaden."
             )
-
-        if result['success']:
-            content = result['content']
-            
-            # v3.4: Robuuste JSON parsing met json-repair
-            if isinstance(content, str):
-                logger.info("📝 Parsing JSON string response from Claude")
-                
-                # Strip markdown codeblocks indien aanwezig
-                json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', content)
-                if json_match:
-                    content = json_match.group(1)
-                
-                # Gebruik json-repair library voor robuuste parsing
-                try:
-                    extracted = json.loads(repair_json(content))
-                    logger.info("✅ JSON parsed successfully")
-                except Exception as e:
-                    logger.error(f"❌ JSON parse failed even after repair: {e}")
-                    logger.error(f"📄 Raw content (first 1000 chars): {content[:1000]}")
-                    raise ValueError(f"Kon JSON niet parsen: {e}")
-            else:
-                extracted = content
-            
-            # Voeg metadata toe
-            extracted['_meta'] = {
-                'model': result.get('model', model),
-                'model_type': result.get('model_type', 'standaard'),  # v3.5
-                'input_tokens': result.get('usage', {}).get('input_tokens', 0),
-                'output_tokens': result.get('usage', {}).get('output_tokens', 0),
-                'tokens_used': result.get('usage', {}).get('input_tokens', 0) + result.get('usage', {}).get('output_tokens', 0)
-            }
-            
-            return extracted
-        else:
+        if not result['success']:
             raise ValueError(f"AI extraction failed: {result.get('error')}")
-    
+        return self._parse_extractie(result['content']), calls
+
+    def _parse_extractie(self, content: Any) -> Dict[str, Any]:
+        """Claude-response → dict (v3.4: robuust met json-repair)."""
+        if not isinstance(content, str):
+            return content
+
+        logger.info("📝 Parsing JSON string response from Claude")
+
+        # Strip markdown codeblocks indien aanwezig
+        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', content)
+        if json_match:
+            content = json_match.group(1)
+
+        # Gebruik json-repair library voor robuuste parsing
+        try:
+            extracted = json.loads(repair_json(content))
+            logger.info("✅ JSON parsed successfully")
+        except Exception as e:
+            logger.error(f"❌ JSON parse failed even after repair: {e}")
+            logger.error(f"📄 Raw content (first 1000 chars): {content[:1000]}")
+            raise ValueError(f"Kon JSON niet parsen: {e}")
+        return extracted
+
+    async def _log_extractie_usage(
+        self,
+        import_record: Dict[str, Any],
+        extracted: Dict[str, Any],
+        standaard_model: str,
+    ) -> None:
+        """
+        Log elke Claude-call van een extractie als eigen rij: ai_usage_log is
+        ook de output-historie waar de pre-flight max_tokens op baseert.
+        """
+        meta = extracted.get('_meta', {})
+        for call in meta.get('calls') or [meta]:
+            await log_ai_usage_async(
+                db=self.db,
+                bureau_id=import_record.get('tenderbureau_id'),
+                tender_id=import_record.get('tender_id'),
+                call_type='smart_import',
+                model=call.get('model', standaard_model),
+                input_tokens=call.get('input_tokens', 0),
+                output_tokens=call.get('output_tokens', 0),
+            )
+
     # ==========================================
     # Helper Methods
     # ==========================================
     
-    def _download_file(self, import_id: str, filename: str) -> bytes:
+    async def _download_file(self, import_id: str, filename: str) -> bytes:
         """Download bestand uit Supabase Storage."""
         storage_path = f"{import_id}/{filename}"
         try:
-            response = self.storage.from_(STORAGE_BUCKET).download(storage_path)
+            response = await self.storage.from_(STORAGE_BUCKET).download(storage_path)
             return response
         except Exception as e:
             logger.exception(f"❌ Failed to download {filename}: {e}")
             raise ValueError(f"Download mislukt voor {filename}")
     
-    def _update_status(
+    async def _update_status(
         self, 
         import_id: str, 
         status: str, 
@@ -1069,7 +1124,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
         if error_message is not None:
             update_data['error_message'] = error_message
         
-        self.db.table('smart_imports').update(update_data).eq('id', import_id).execute()
+        await self.db.table('smart_imports').update(update_data).eq('id', import_id).execute()
     
     def _calculate_statistics(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Bereken statistieken over de geëxtraheerde data."""
@@ -1110,7 +1165,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
     async def _get_default_fase_status(self, fase: str) -> Optional[str]:
         """Haal de eerste (default) fase_status op voor een gegeven fase."""
         try:
-            result = self.db.table('fase_statussen').select(
+            result = await self.db.table('fase_statussen').select(
                 'status'
             ).eq('fase', fase).order('volgorde').limit(1).execute()
             
@@ -1191,7 +1246,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
             
             # Insert tender
             logger.info(f"📝 Creating tender: {tender_data.get('naam')}")
-            result = self.db.table('tenders').insert(tender_data).execute()
+            result = await self.db.table('tenders').insert(tender_data).execute()
             tender = result.data[0]
             
             # Koppel documenten indien gewenst
@@ -1204,7 +1259,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
                         raw_path = file_info['storage_path']
                         clean_path = raw_path[len('smart-imports/'):] if raw_path.startswith('smart-imports/') else raw_path
 
-                        self.db.table('tender_documents').insert({
+                        await self.db.table('tender_documents').insert({
                             'tender_id': tender['id'],
                             'tenderbureau_id': import_record.get('tenderbureau_id'),
                             'file_name': file_info['name'],
@@ -1220,7 +1275,7 @@ EXTRAHEER (geef ALLEEN JSON terug):
                         logger.warning(f"⚠️ Could not link document {file_info['name']}: {e}")
             
             # Update import record
-            self.db.table('smart_imports').update({
+            await self.db.table('smart_imports').update({
                 'status': 'tender_created',
                 'tender_id': tender['id']
             }).eq('id', import_id).execute()
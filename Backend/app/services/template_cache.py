@@ -0,0 +1,173 @@
+# Backend/app/services/template_cache.py
+# Template cache met versies — TenderZen v1.0
+#
+# Elke wizard-stap en elke back-planning haalde planning_templates,
+# planning_template_taken en checklist_templates opnieuw op, terwijl
+# templates zelden wijzigen. Deze cache houdt ze per proces in het
+# geheugen.
+#
+# SLEUTEL:
+#   (bureau_id | '*', template_id | '*', extra..., versie)
+#   versie = (globaal, versie van het bureau, versie van het template)
+#   De bureau_id in de sleutel komt van de aanroeper (BackplanningService:
+#   tenderbureau_id uit de request). Een cache-hit gaat niet langs RLS:
+#   de aanroeper moet het bureau eerst valideren (ensure_bureau_access
+#   in de backplanning-endpoints). PlanningService gebruikt het eigen
+#   bureau uit de RequestContext.
+#
+# INVALIDATIE (versies ophogen):
+#   invalidate_templates(bureau_id, template_id) vanuit de template-
+#   CRUD endpoints. Het template-nummer en het bureau-nummer worden
+#   opgehoogd; bureau_id=None (generiek template, of onbekend) hoogt
+#   het globale nummer op. Oude entries worden nooit meer geraakt en
+#   vallen er via LRU/TTL vanzelf uit — geen scan over alle sleutels.
+#
+# ⚠️ Cache is per uvicorn worker. checklist_templates wordt ook buiten
+#    de backend bewerkt; de TTL begrenst hoe lang dat zichtbaar oud is.
+
+import copy
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.database import execute
+
+logger = logging.getLogger(__name__)
+
+ALLE = '*'
+
+TEMPLATE_CACHE_TTL_SECONDS = 600
+TEMPLATE_CACHE_MAX_ENTRIES = 1024
+
+
+class TemplateCache:
+    """Thread-safe LRU-cache met TTL en versie-invalidatie per bureau/template."""
+
+    def __init__(
+        self,
+        max_entries: int = TEMPLATE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = TEMPLATE_CACHE_TTL_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._versies: Dict[Tuple[str, str], int] = {}
+        self._globaal = 0
+        self._lock = threading.Lock()
+
+    def _key(self, bureau_id: Optional[str], template_id: Optional[str], extra: tuple) -> Tuple:
+        bureau = bureau_id or ALLE
+        template = template_id or ALLE
+        versie = (
+            self._globaal,
+            self._versies.get(('bureau', bureau), 0),
+            self._versies.get(('template', template), 0),
+        )
+        return (bureau, template, *extra, versie)
+
+    def get(self, bureau_id: Optional[str], template_id: Optional[str], *extra) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            key = self._key(bureau_id, template_id, extra)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Kopie buiten de lock: caller mag het resultaat muteren
+        return copy.deepcopy(value)
+
+    def set(self, value: Any, bureau_id: Optional[str], template_id: Optional[str], *extra) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            key = self._key(bureau_id, template_id, extra)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, bureau_id: Optional[str] = None, template_id: Optional[str] = None) -> None:
+        """Hoog de versie van het template en van het bureau (None → globaal) op."""
+        with self._lock:
+            if template_id:
+                scope = ('template', template_id)
+                self._versies[scope] = self._versies.get(scope, 0) + 1
+            if bureau_id:
+                scope = ('bureau', bureau_id)
+                self._versies[scope] = self._versies.get(scope, 0) + 1
+            else:
+                self._globaal += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._globaal += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Eén cache per proces
+template_cache = TemplateCache()
+
+
+def invalidate_templates(bureau_id: Optional[str] = None, template_id: Optional[str] = None) -> None:
+    """
+    Invalidatie-hook: aanroepen na elke schrijfactie op planning_templates
+    of planning_template_taken. bureau_id=None → alle bureaus (generieke
+    templates staan in de lijst van elk bureau).
+    """
+    template_cache.invalidate(bureau_id, template_id)
+    logger.debug(f"Template cache geïnvalideerd: bureau={bureau_id or 'ALLE'}, template={template_id or '-'}")
+
+
+async def get_template_met_taken(db, template_id: str, bureau_id: Optional[str]) -> Optional[dict]:
+    """
+    planning_templates-rij met 'taken' (planning_template_taken, op
+    volgorde), gecached per (bureau van de aanvrager, template).
+
+    Args:
+        db: sync Client of AsyncSupabaseClient (user-scoped, RLS)
+        template_id: UUID van het template
+        bureau_id: bureau van de aanvrager (cache-sleutel)
+    """
+    cached = template_cache.get(bureau_id, template_id, 'template')
+    if cached is not None:
+        return cached
+
+    result = await execute(
+        db.table('planning_templates')
+        .select('*, planning_template_taken(*)')
+        .eq('id', template_id)
+    )
+    if not result.data:
+        return None
+
+    tmpl = result.data[0]
+    taken = tmpl.pop('planning_template_taken', None) or []
+    tmpl['taken'] = sorted(taken, key=lambda t: t.get('volgorde') or 0)
+    template_cache.set(tmpl, bureau_id, template_id, 'template')
+    return tmpl
+
+
+async def get_checklist_template_items(db, bureau_id: str) -> list:
+    """Actieve checklist_templates van een bureau (op volgorde), gecached per bureau."""
+    cached = template_cache.get(bureau_id, None, 'checklist_templates')
+    if cached is not None:
+        return cached
+
+    result = await execute(
+        db.table('checklist_templates')
+        .select('*')
+        .eq('tenderbureau_id', bureau_id)
+        .eq('is_active', True)
+        .order('volgorde')
+    )
+    items = result.data or []
+    template_cache.set(items, bureau_id, None, 'checklist_templates')
+    return items
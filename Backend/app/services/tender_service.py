@@ -13,11 +13,24 @@ CHANGELOG:
 - v2.1: Bedrijfsvelden verwijderd uit tenders (nu via bedrijf_id JOIN)
 - v2.2: Fix Decimal serialization for JSON (geraamde_waarde, minimale_omzet, etc.)
 - v2.3: Milestone enrichment — timeline-velden worden gevuld vanuit milestones tabel
+- v2.4: Async data-access — alle queries via AsyncSupabaseClient (await .execute())
+- v2.5: RequestContext — bureau/super-admin lookups één keer per request
+- v2.6: Team assignments batched — één in_() query per chunk tender ids
+        i.p.v. één query per tender (N+1) in de tender-lijsten
+- v2.7: Tender-lijst: keyset paginering (created_at, id), fields= projectie,
+        archief-fases optioneel uit te sluiten (include_archived=False)
+- v2.8: update/delete/milestone-sync invalideren de agenda cache van het
+        bureau (naam, fase en deadline staan in de gecachte agenda)
 """
-from typing import List, Optional
+import json
+import base64
+import asyncio
+from typing import Dict, List, Optional
 from decimal import Decimal
-from supabase import Client
-from app.models.tender import TenderCreate, TenderUpdate
+from app.core.database import AsyncSupabaseClient
+from app.core.request_context import RequestContext
+from app.models.tender import TenderCreate, TenderResponse, TenderUpdate
+from app.services.agenda_cache import invalidate_agenda_bureau
 
 
 # ============================================
@@ -36,6 +49,70 @@ REMOVED_TENDER_FIELDS = {
     'bedrijfs_plaats'
 }
 
+# ============================================
+# BATCH LOADING
+# Max aantal ids per in_() filter — houdt de
+# PostgREST URL (GET query string) ruim onder
+# de limieten van proxies/gateways (~8KB)
+# ============================================
+IN_FILTER_CHUNK_SIZE = 150
+
+
+def _chunks(items: List[str], size: int = IN_FILTER_CHUNK_SIZE):
+    """Split a list into chunks of at most `size` items."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# ============================================
+# TENDER LIJST
+# ============================================
+TENDER_LIST_SELECT = (
+    '*, tenderbureaus(*), '
+    'bedrijven(bedrijfsnaam, kvk_nummer, btw_nummer, contactpersoon, contact_email, plaats)'
+)
+
+# Fases die buiten de tender-lijst blijven bij include_archived=False
+ARCHIVED_FASES = ('archief',)
+
+# Kolommen die altijd in een projectie zitten: nodig voor de
+# response (id/naam/fase), de bureau-scope en de keyset cursor
+LIST_BASE_FIELDS = ('id', 'created_at', 'naam', 'fase', 'tenderbureau_id')
+
+# Afgeleide velden in de lijst → embedded relatie die ervoor nodig is
+LIST_BEDRIJF_FIELDS = {
+    'bedrijfsnaam', 'kvk_nummer', 'btw_nummer',
+    'contactpersoon', 'contact_email', 'bedrijfs_plaats',
+}
+LIST_TENDERBUREAU_FIELDS = {'tenderbureau'}
+LIST_TEAM_FIELDS = {'team_assignments'}
+
+# Kolommen die via fields= opgevraagd mogen worden: de tender-velden uit
+# de response, zonder de afgeleide bedrijf/team-velden
+LIST_COLUMN_FIELDS = (
+    set(TenderResponse.model_fields)
+    - LIST_BEDRIJF_FIELDS - LIST_TEAM_FIELDS - REMOVED_TENDER_FIELDS
+)
+
+
+def encode_cursor(tender: dict) -> str:
+    """Keyset cursor (created_at, id) of the last tender on a page."""
+    raw = json.dumps([tender.get('created_at'), tender.get('id')])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor(). Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, tender_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Ongeldige cursor")
+    if not created_at or not tender_id or '"' in f"{created_at}{tender_id}":
+        raise ValueError("Ongeldige cursor")
+    return str(created_at), str(tender_id)
+
+
 # ============================================
 # MILESTONE TYPE → TENDER VELD MAPPING
 # Gebruikt om geëxtraheerde milestones terug
@@ -71,8 +148,9 @@ MILESTONE_FIELD_MAP = {
 class TenderService:
     """Service for tender operations"""
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncSupabaseClient, context: Optional[RequestContext] = None):
         self.db = db
+        self.context = context
     
     def _serialize_data(self, data: dict) -> dict:
         """Convert date objects and Decimal to JSON-serializable types"""
@@ -107,52 +185,25 @@ class TenderService:
         team_assignments = data.pop('team_assignments', None)
         return team_assignments
     
+    def _get_context(self, user_id: str) -> RequestContext:
+        """
+        RequestContext for this user. Without an injected context (e.g. calls
+        from outside an endpoint) a lazy one is created and kept on the service.
+        """
+        if self.context is None or self.context.user_id != user_id:
+            self.context = RequestContext(self.db, user_id)
+        return self.context
+    
     async def _get_user_tenderbureau_id(self, user_id: str) -> Optional[str]:
         """
         Get the tenderbureau_id for a user.
         First checks user_bureau_access, then falls back to users table.
         """
-        try:
-            # Try user_bureau_access first (for multi-bureau support)
-            result = self.db.table('user_bureau_access')\
-                .select('tenderbureau_id')\
-                .eq('user_id', user_id)\
-                .eq('is_active', True)\
-                .order('last_accessed_at', desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if result.data and len(result.data) > 0:
-                return result.data[0]['tenderbureau_id']
-            
-            # Fallback to users table
-            result = self.db.table('users')\
-                .select('tenderbureau_id')\
-                .eq('id', user_id)\
-                .single()\
-                .execute()
-            
-            if result.data:
-                return result.data.get('tenderbureau_id')
-            
-            return None
-            
-        except Exception as e:
-            print(f"⚠️ Error getting user tenderbureau_id: {e}")
-            return None
+        return await self._get_context(user_id).get_bureau_id()
     
     async def _is_super_admin(self, user_id: str) -> bool:
         """Check if user is super admin"""
-        try:
-            result = self.db.table('users')\
-                .select('is_super_admin')\
-                .eq('id', user_id)\
-                .single()\
-                .execute()
-            
-            return result.data.get('is_super_admin', False) if result.data else False
-        except Exception:
-            return False
+        return await self._get_context(user_id).is_super_admin()
     
     async def _save_team_assignments(self, tender_id: str, team_assignments: List[dict]) -> None:
         """
@@ -164,7 +215,7 @@ class TenderService:
         
         try:
             # First, delete existing assignments for this tender
-            self.db.table('tender_team_assignments')\
+            await self.db.table('tender_team_assignments')\
                 .delete()\
                 .eq('tender_id', tender_id)\
                 .execute()
@@ -186,7 +237,7 @@ class TenderService:
                         })
                 
                 if assignments_to_insert:
-                    self.db.table('tender_team_assignments')\
+                    await self.db.table('tender_team_assignments')\
                         .insert(assignments_to_insert)\
                         .execute()
                     
@@ -197,33 +248,64 @@ class TenderService:
     
     async def _get_team_assignments(self, tender_id: str) -> List[dict]:
         """Get team assignments for a tender"""
+        assignments = await self._get_team_assignments_batch([tender_id])
+        return assignments.get(tender_id, [])
+    
+    async def _get_team_assignments_batch(self, tender_ids: List[str]) -> Dict[str, List[dict]]:
+        """
+        Get team assignments for many tenders at once.
+        
+        Fetches tender_team_assignments and the related users with in_()
+        queries (chunked, run concurrently) and stitches them in memory.
+        Returns {tender_id: [assignment, ...]}; tenders without
+        assignments are absent from the dict.
+        """
+        tender_ids = list(dict.fromkeys(t for t in tender_ids if t))
+        if not tender_ids:
+            return {}
+        
         try:
-            result = self.db.table('tender_team_assignments')\
-                .select('*')\
-                .eq('tender_id', tender_id)\
-                .execute()
-            
-            if not result.data:
-                return []
-            
-            user_ids = [row['user_id'] for row in result.data if row.get('user_id')]
+            results = await asyncio.gather(*[
+                self.db.table('tender_team_assignments')
+                    .select('*')
+                    .in_('tender_id', chunk)
+                    .execute()
+                for chunk in _chunks(tender_ids)
+            ])
+            rows = [row for result in results for row in (result.data or [])]
+            
+            if not rows:
+                return {}
+            
+            user_ids = list(dict.fromkeys(
+                row['user_id'] for row in rows if row.get('user_id')
+            ))
             
             if not user_ids:
-                return []
-            
-            users_result = self.db.table('users')\
-                .select('id, naam, initialen')\
-                .in_('id', user_ids)\
-                .execute()
-            
-            users_map = {u['id']: u for u in (users_result.data or [])}
+                return {}
+            
+            users_results = await asyncio.gather(*[
+                self.db.table('users')
+                    .select('id, naam, initialen')
+                    .in_('id', chunk)
+                    .execute()
+                for chunk in _chunks(user_ids)
+            ])
+            
+            users_map = {
+                u['id']: u
+                for users_result in users_results
+                for u in (users_result.data or [])
+            }
             
-            assignments = []
-            for row in result.data:
+            assignments: Dict[str, List[dict]] = {}
+            for row in rows:
                 user_id = row.get('user_id')
+                if not user_id:
+                    continue
                 user = users_map.get(user_id, {})
                 
-                assignments.append({
+                assignments.setdefault(row.get('tender_id'), []).append({
                     'id': row.get('id'),
                     'user_id': user_id,
                     'naam': user.get('naam', ''),
@@ -236,7 +318,7 @@ class TenderService:
             
         except Exception as e:
             print(f"❌ Error getting team assignments: {e}")
-            return []
+            return {}
 
     # ============================================
     # MILESTONE SYNC
@@ -271,7 +353,7 @@ class TenderService:
         }
 
         try:
-            result = self.db.table('milestones')\
+            result = await self.db.table('milestones')\
                 .select('milestone_type, datum, tijd')\
                 .eq('tender_id', tender_id)\
                 .execute()
@@ -296,10 +378,12 @@ class TenderService:
             if not update_data:
                 return 0
 
-            self.db.table('tenders')\
+            result = await self.db.table('tenders')\
                 .update(update_data)\
                 .eq('id', tender_id)\
                 .execute()
+            if result.data:
+                invalidate_agenda_bureau(result.data[0].get('tenderbureau_id'))
 
             print(f"📅 Synced {len(update_data)} milestone velden naar tender {tender_id}: {list(update_data.keys())}")
             return len(update_data)
@@ -312,7 +396,124 @@ class TenderService:
     # GET ALL TENDERS
     # ============================================
     
-    async def get_all_tenders(self, user_id: str, tenderbureau_id: Optional[str] = None) -> List[dict]:
+    def _build_list_select(self, fields: Optional[List[str]]) -> str:
+        """
+        Select string for the tender list.
+        
+        fields=None → full row incl. bedrijf/tenderbureau relations.
+        Otherwise only the requested columns + LIST_BASE_FIELDS; relations
+        are only embedded when a derived field asks for them. Unknown
+        field names raise ValueError (→ 400 in the endpoint).
+        """
+        if not fields:
+            return TENDER_LIST_SELECT
+        
+        columns = list(LIST_BASE_FIELDS)
+        embeds = []
+        for field in fields:
+            if field in LIST_BEDRIJF_FIELDS:
+                embed = 'bedrijven(bedrijfsnaam, kvk_nummer, btw_nummer, contactpersoon, contact_email, plaats)'
+            elif field in LIST_TENDERBUREAU_FIELDS:
+                embed = 'tenderbureaus(*)'
+            elif field in LIST_TEAM_FIELDS:
+                continue
+            elif field in LIST_COLUMN_FIELDS:
+                if field not in columns:
+                    columns.append(field)
+                continue
+            else:
+                raise ValueError(f"Ongeldig veld: {field}")
+            if embed not in embeds:
+                embeds.append(embed)
+        
+        return ', '.join(columns + embeds)
+    
+    async def _list_tenders(
+        self,
+        bureau_id: Optional[str],
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        include_archived: bool = True
+    ) -> List[dict]:
+        """
+        Shared list query for get_all_tenders / get_all_tenders_all_bureaus.
+        
+        bureau_id=None → all bureaus (caller checks super-admin).
+        Ordered by (created_at, id) DESC; with a cursor only rows after
+        that key are returned (keyset — no OFFSET scan on deep pages).
+        include_archived=False laat ARCHIVED_FASES weg; tenders zonder
+        fase (NULL) blijven erin.
+        """
+        query = self.db.table('tenders').select(self._build_list_select(fields))
+        
+        if bureau_id:
+            query = query.eq('tenderbureau_id', bureau_id)
+        
+        # postgrest-py 0.13 heeft geen .or_() → PostgREST logica direct als
+        # param; archief- en cursor-conditie samen onder één 'and'
+        conditions = []
+        if not include_archived:
+            fases = ','.join(ARCHIVED_FASES)
+            conditions.append(f'or(fase.is.null,fase.not.in.({fases}))')
+        
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            conditions.append(
+                f'or(created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{last_id}"))'
+            )
+        
+        if conditions:
+            query.params = query.params.add('and', f'({",".join(conditions)})')
+        
+        # Eén order param met tie-breaker (postgrest-py zou er twee maken)
+        query.params = query.params.add('order', 'created_at.desc,id.desc')
+        
+        if limit:
+            query = query.limit(limit)
+        
+        result = await query.execute()
+        rows = result.data or []
+        
+        with_team = not fields or bool(LIST_TEAM_FIELDS & set(fields))
+        team_assignments = {}
+        if with_team:
+            team_assignments = await self._get_team_assignments_batch(
+                [tender['id'] for tender in rows]
+            )
+        
+        tenders = []
+        for tender in rows:
+            if with_team:
+                tender['team_assignments'] = team_assignments.get(tender['id'], [])
+            
+            if 'bedrijven' in tender:
+                bedrijf = tender.pop('bedrijven', None) or {}
+                tender['bedrijfsnaam'] = bedrijf.get('bedrijfsnaam')
+                tender['kvk_nummer'] = bedrijf.get('kvk_nummer')
+                tender['btw_nummer'] = bedrijf.get('btw_nummer')
+                tender['contactpersoon'] = bedrijf.get('contactpersoon')
+                tender['contact_email'] = bedrijf.get('contact_email')
+                tender['bedrijfs_plaats'] = bedrijf.get('plaats')
+            
+            if 'tenderbureaus' in tender:
+                tenderbureau = tender.pop('tenderbureaus', None) or {}
+                tender['tenderbureau'] = tenderbureau
+            
+            tenders.append(tender)
+        
+        return tenders
+    
+    async def get_all_tenders(
+        self,
+        user_id: str,
+        tenderbureau_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        include_archived: bool = True
+    ) -> List[dict]:
         """
         Get all tenders for a user's tenderbureau.
         
@@ -322,6 +523,7 @@ class TenderService:
         
         v2.1: Nu met JOIN naar bedrijven tabel voor bedrijfsgegevens
         v2.3: Milestone enrichment — timeline-velden worden gevuld vanuit milestones
+        v2.7: limit/cursor (keyset), fields projectie, include_archived=False laat archief weg
         """
         try:
             if tenderbureau_id:
@@ -333,41 +535,34 @@ class TenderService:
                 print(f"⚠️ No tenderbureau found for user {user_id}")
                 return []
             
-            result = self.db.table('tenders')\
-                .select('*, tenderbureaus(*), bedrijven(bedrijfsnaam, kvk_nummer, btw_nummer, contactpersoon, contact_email, plaats)')\
-                .eq('tenderbureau_id', bureau_id)\
-                .order('created_at', desc=True)\
-                .execute()
+            tenders = await self._list_tenders(
+                bureau_id,
+                limit=limit,
+                cursor=cursor,
+                fields=fields,
+                include_archived=include_archived
+            )
             
-            print(f"✅ Found {len(result.data)} tenders for bureau {bureau_id}")
+            print(f"✅ Found {len(tenders)} tenders for bureau {bureau_id}")
             
-            tenders = []
-            for tender in result.data:
-                tender['team_assignments'] = await self._get_team_assignments(tender['id'])
-                
-                bedrijf = tender.pop('bedrijven', None) or {}
-                tender['bedrijfsnaam'] = bedrijf.get('bedrijfsnaam')
-                tender['kvk_nummer'] = bedrijf.get('kvk_nummer')
-                tender['btw_nummer'] = bedrijf.get('btw_nummer')
-                tender['contactpersoon'] = bedrijf.get('contactpersoon')
-                tender['contact_email'] = bedrijf.get('contact_email')
-                tender['bedrijfs_plaats'] = bedrijf.get('plaats')
-                
-                tenderbureau = tender.pop('tenderbureaus', None) or {}
-                tender['tenderbureau'] = tenderbureau
-                
-                tenders.append(tender)
-
             return tenders
             
         except Exception as e:
             print(f"❌ Error getting tenders: {e}")
             raise
     
-    async def get_all_tenders_all_bureaus(self, user_id: str) -> List[dict]:
+    async def get_all_tenders_all_bureaus(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        include_archived: bool = True
+    ) -> List[dict]:
         """
         Get all tenders across all bureaus (super-admin only).
         v2.3: Milestone enrichment toegevoegd.
+        v2.7: limit/cursor (keyset), fields projectie, include_archived=False laat archief weg
         """
         try:
             is_super = await self._is_super_admin(user_id)
@@ -375,30 +570,16 @@ class TenderService:
                 print(f"⚠️ User {user_id} is not super admin")
                 return []
             
-            result = self.db.table('tenders')\
-                .select('*, tenderbureaus(*), bedrijven(bedrijfsnaam, kvk_nummer, btw_nummer, contactpersoon, contact_email, plaats)')\
-                .order('created_at', desc=True)\
-                .execute()
+            tenders = await self._list_tenders(
+                None,
+                limit=limit,
+                cursor=cursor,
+                fields=fields,
+                include_archived=include_archived
+            )
             
-            print(f"✅ Found {len(result.data)} tenders across all bureaus")
+            print(f"✅ Found {len(tenders)} tenders across all bureaus")
             
-            tenders = []
-            for tender in result.data:
-                tender['team_assignments'] = await self._get_team_assignments(tender['id'])
-                
-                bedrijf = tender.pop('bedrijven', None) or {}
-                tender['bedrijfsnaam'] = bedrijf.get('bedrijfsnaam')
-                tender['kvk_nummer'] = bedrijf.get('kvk_nummer')
-                tender['btw_nummer'] = bedrijf.get('btw_nummer')
-                tender['contactpersoon'] = bedrijf.get('contactpersoon')
-                tender['contact_email'] = bedrijf.get('contact_email')
-                tender['bedrijfs_plaats'] = bedrijf.get('plaats')
-                
-                tenderbureau = tender.pop('tenderbureaus', None) or {}
-                tender['tenderbureau'] = tenderbureau
-                
-                tenders.append(tender)
-
             return tenders
             
         except Exception as e:
@@ -421,7 +602,7 @@ class TenderService:
             if not is_super and user_bureau_id:
                 query = query.eq('tenderbureau_id', user_bureau_id)
             
-            result = query.single().execute()
+            result = await query.single().execute()
             
             if result.data:
                 tender = result.data
@@ -470,7 +651,7 @@ class TenderService:
             
             print(f"📝 Creating tender for bureau {tender_data.get('tenderbureau_id')}: {tender_data.get('naam')}")
             
-            result = self.db.table('tenders')\
+            result = await self.db.table('tenders')\
                 .insert(tender_data)\
                 .execute()
             
@@ -531,12 +712,18 @@ class TenderService:
                 if not is_super and user_bureau_id:
                     query = query.eq('tenderbureau_id', user_bureau_id)
 
-                result = query.execute()
+                result = await query.execute()
 
                 if not result.data:
                     return None
 
                 updated_tender = result.data[0]
+                # Agenda toont naam/fase/deadline; bij een verhuizing naar
+                # een ander bureau is het oude bureau onbekend → alles
+                if 'tenderbureau_id' in tender_data:
+                    invalidate_agenda_bureau(None)
+                else:
+                    invalidate_agenda_bureau(updated_tender.get('tenderbureau_id'))
             else:
                 query = self.db.table('tenders')\
                     .select('*')\
@@ -545,7 +732,7 @@ class TenderService:
                 if not is_super and user_bureau_id:
                     query = query.eq('tenderbureau_id', user_bureau_id)
 
-                result = query.execute()
+                result = await query.execute()
 
                 if not result.data:
                     return None
@@ -567,7 +754,7 @@ class TenderService:
     async def _get_first_fase_status(self, fase: str) -> Optional[str]:
         """Haal de eerste status op voor een fase uit de fase_statussen tabel."""
         try:
-            result = self.db.table('fase_statussen')\
+            result = await self.db.table('fase_statussen')\
                 .select('status_key')\
                 .eq('fase', fase)\
                 .order('volgorde', desc=False)\
@@ -593,10 +780,11 @@ class TenderService:
             if not is_super and user_bureau_id:
                 query = query.eq('tenderbureau_id', user_bureau_id)
             
-            result = query.execute()
+            result = await query.execute()
             
             success = len(result.data) > 0
             if success:
+                invalidate_agenda_bureau(result.data[0].get('tenderbureau_id'))
                 print(f"✅ Tender deleted: {tender_id}")
             else:
                 print(f"⚠️ Tender not found or no permission: {tender_id}")
@@ -615,16 +803,20 @@ class TenderService:
             if not bureau_id:
                 return []
             
-            result = self.db.table('tenders')\
+            result = await self.db.table('tenders')\
                 .select('*, tenderbureaus(bureau_naam), bedrijven(bedrijfsnaam, kvk_nummer, plaats)')\
                 .eq('tenderbureau_id', bureau_id)\
                 .eq('fase', fase)\
                 .order('created_at', desc=True)\
                 .execute()
             
+            team_assignments = await self._get_team_assignments_batch(
+                [tender['id'] for tender in result.data]
+            )
+            
             tenders = []
             for tender in result.data:
-                tender['team_assignments'] = await self._get_team_assignments(tender['id'])
+                tender['team_assignments'] = team_assignments.get(tender['id'], [])
                 
                 bedrijf = tender.pop('bedrijven', None) or {}
                 tender['bedrijfsnaam'] = bedrijf.get('bedrijfsnaam')
@@ -650,7 +842,7 @@ class TenderService:
             if not bureau_id:
                 return {'total': 0, 'by_fase': {}, 'by_status': {}}
             
-            result = self.db.table('tenders')\
+            result = await self.db.table('tenders')\
                 .select('fase, status')\
                 .eq('tenderbureau_id', bureau_id)\
                 .execute()
@@ -0,0 +1,226 @@
+# ================================================================
+# TenderZen — Werkdag-kalender
+# Backend/app/services/werkdag_kalender.py
+# Versie: 1.1
+# ================================================================
+#
+# WIJZIGINGEN v1.1:
+# - Landelijke feestdagen worden lokaal berekend
+#   (nederlandse_feestdagen.py) voor elk jaar in het bereik;
+#   bureau_feestdagen levert alleen nog de bureau-specifieke extra
+#   dagen. Jaren die niemand heeft ingevoerd kloppen daardoor ook.
+#
+# BackplanningService liep voor elke template-taak dag voor dag terug
+# (of vooruit) in een while-loop, en laadde feestdagen alleen voor
+# deadline.year — een planning over de jaarwisseling miste dus de
+# feestdagen van het vorige jaar.
+#
+# WerkdagKalender houdt een gesorteerde lijst van werkdag-ordinals
+# (date.toordinal()) bij over meerdere jaren. T-minus en vooruit
+# worden daarmee O(log n) bisect-lookups:
+#
+#   terug(d, n)   → n werkdagen vóór d   (d zelf telt niet mee)
+#   vooruit(d, n) → n werkdagen na d     (d zelf telt niet mee)
+#   n = 0         → d ongewijzigd (zelfde gedrag als de oude loops)
+#
+# Het bereik groeit vanzelf mee als een lookup buiten de huidige
+# jaren valt. De kalender per bureau wordt per proces gecached
+# (TTL); invalidate_werkdag_kalender() na wijzigingen in
+# bureau_feestdagen.
+# ================================================================
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, Iterable, Optional, Set, Tuple
+import threading
+import time
+import logging
+
+from app.services.nederlandse_feestdagen import nederlandse_feestdagen
+
+logger = logging.getLogger(__name__)
+
+# Jaren rond de aanvraag die standaard worden opgebouwd
+KALENDER_JAREN_TERUG = 1
+KALENDER_JAREN_VOORUIT = 2
+
+KALENDER_CACHE_TTL_SECONDS = 3600
+
+
+class WerkdagKalender:
+    """Gesorteerde werkdagen (ma–vr, exclusief feestdagen) over meerdere jaren."""
+
+    def __init__(
+        self,
+        feestdagen: Iterable[date],
+        jaar_van: int,
+        jaar_tot: int,
+        landelijk: bool = True
+    ):
+        """
+        Args:
+            feestdagen: bureau-specifieke vrije dagen (bureau_feestdagen)
+            jaar_van / jaar_tot: initieel opgebouwde jaren (inclusief)
+            landelijk: landelijke feestdagen meenemen (default)
+        """
+        self.feestdagen = frozenset(feestdagen)
+        self.landelijk = landelijk
+        self.jaar_van = jaar_van
+        self.jaar_tot = jaar_tot
+        self._ordinals = self._bouw(jaar_van, jaar_tot)
+        self._lock = threading.Lock()
+
+    def _landelijke_feestdagen(self, jaar: int) -> Set[date]:
+        if not self.landelijk:
+            return set()
+        return set(nederlandse_feestdagen(jaar))
+
+    def _bouw(self, jaar_van: int, jaar_tot: int) -> list:
+        feestdag_ordinals = {d.toordinal() for d in self.feestdagen}
+        for jaar in range(jaar_van, jaar_tot + 1):
+            feestdag_ordinals.update(d.toordinal() for d in self._landelijke_feestdagen(jaar))
+        start = date(jaar_van, 1, 1).toordinal()
+        eind = date(jaar_tot, 12, 31).toordinal()
+        # 1 jan 0001 (ordinal 1) is een maandag → weekday = (ordinal - 1) % 7
+        return [
+            o for o in range(start, eind + 1)
+            if (o - 1) % 7 < 5 and o not in feestdag_ordinals
+        ]
+
+    def _dek_af(self, jaar_van: int, jaar_tot: int) -> None:
+        """Breid het bereik uit zodat [jaar_van, jaar_tot] erin valt."""
+        if jaar_van >= self.jaar_van and jaar_tot <= self.jaar_tot:
+            return
+        with self._lock:
+            nieuw_van = min(jaar_van, self.jaar_van)
+            nieuw_tot = max(jaar_tot, self.jaar_tot)
+            if (nieuw_van, nieuw_tot) == (self.jaar_van, self.jaar_tot):
+                return
+            # Nieuwe lijst eerst volledig bouwen, dan in één keer toewijzen
+            self._ordinals = self._bouw(nieuw_van, nieuw_tot)
+            self.jaar_van, self.jaar_tot = nieuw_van, nieuw_tot
+
+    def is_werkdag(self, d: date) -> bool:
+        return (
+            d.weekday() < 5
+            and d not in self.feestdagen
+            and d not in self._landelijke_feestdagen(d.year)
+        )
+
+    def terug(self, d: date, werkdagen: int) -> date:
+        """`werkdagen` werkdagen vóór d (weekenden en feestdagen overgeslagen)."""
+        if werkdagen <= 0:
+            return d
+        while True:
+            ordinals = self._ordinals
+            index = bisect_left(ordinals, d.toordinal()) - werkdagen
+            if index >= 0 and self.jaar_van <= d.year <= self.jaar_tot:
+                return date.fromordinal(ordinals[index])
+            # ~261 werkdagen per jaar; ruim uitbreiden
+            self._dek_af(
+                min(d.year, self.jaar_van) - (werkdagen // 250 + 1),
+                max(d.year, self.jaar_tot)
+            )
+
+    def vooruit(self, d: date, werkdagen: int) -> date:
+        """`werkdagen` werkdagen na d (weekenden en feestdagen overgeslagen)."""
+        if werkdagen <= 0:
+            return d
+        while True:
+            ordinals = self._ordinals
+            index = bisect_right(ordinals, d.toordinal()) + werkdagen - 1
+            if index < len(ordinals) and self.jaar_van <= d.year <= self.jaar_tot:
+                return date.fromordinal(ordinals[index])
+            self._dek_af(
+                min(d.year, self.jaar_van),
+                max(d.year, self.jaar_tot) + (werkdagen // 250 + 1)
+            )
+
+    def werkdagen_tussen(self, van: date, tot: date) -> int:
+        """Aantal werkdagen in [van, tot] (beide inclusief)."""
+        if tot < van:
+            return 0
+        self._dek_af(van.year, tot.year)
+        ordinals = self._ordinals
+        return bisect_right(ordinals, tot.toordinal()) - bisect_left(ordinals, van.toordinal())
+
+
+class WerkdagKalenderCache:
+    """Eén WerkdagKalender per bureau, met TTL."""
+
+    def __init__(self, ttl_seconds: float = KALENDER_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, WerkdagKalender]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenderbureau_id: str) -> Optional[WerkdagKalender]:
+        with self._lock:
+            entry = self._entries.get(tenderbureau_id)
+            if entry is None:
+                return None
+            expires_at, kalender = entry
+            if expires_at <= time.monotonic():
+                del self._entries[tenderbureau_id]
+                return None
+            return kalender
+
+    def set(self, tenderbureau_id: str, kalender: WerkdagKalender) -> None:
+        with self._lock:
+            self._entries[tenderbureau_id] = (time.monotonic() + self.ttl_seconds, kalender)
+
+    def invalidate(self, tenderbureau_id: Optional[str] = None) -> None:
+        with self._lock:
+            if tenderbureau_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tenderbureau_id, None)
+
+
+werkdag_kalender_cache = WerkdagKalenderCache()
+
+
+async def get_werkdag_kalender(db, tenderbureau_id: str, rond: Optional[date] = None) -> WerkdagKalender:
+    """
+    Werkdag-kalender voor een bureau, gecached per proces.
+
+    Landelijke feestdagen worden lokaal berekend; bureau_feestdagen
+    (alle jaren, één query) levert de extra dagen van het bureau.
+    Alleen bij een cache-miss gaat er een query naar de database.
+
+    Args:
+        db: AsyncSupabaseClient
+        tenderbureau_id: UUID van het bureau
+        rond: datum waaromheen het initiële bereik wordt opgebouwd
+              (default: vandaag)
+    """
+    kalender = werkdag_kalender_cache.get(tenderbureau_id)
+    if kalender is not None:
+        return kalender
+
+    result = await db.table('bureau_feestdagen') \
+        .select('datum') \
+        .eq('tenderbureau_id', tenderbureau_id) \
+        .execute()
+    feestdagen = {
+        date.fromisoformat(row['datum'][:10])
+        for row in (result.data or [])
+        if row.get('datum')
+    }
+
+    jaar = (rond or date.today()).year
+    kalender = WerkdagKalender(
+        feestdagen,
+        jaar - KALENDER_JAREN_TERUG,
+        jaar + KALENDER_JAREN_VOORUIT
+    )
+    werkdag_kalender_cache.set(tenderbureau_id, kalender)
+    logger.info(
+        f"📆 Werkdag-kalender opgebouwd voor bureau {tenderbureau_id}: "
+        f"{len(feestdagen)} extra feestdagen, {kalender.jaar_van}–{kalender.jaar_tot}"
+    )
+    return kalender
+
+
+def invalidate_werkdag_kalender(tenderbureau_id: Optional[str] = None) -> None:
+    """Aanroepen na wijzigingen in bureau_feestdagen. None → alle bureaus."""
+    werkdag_kalender_cache.invalidate(tenderbureau_id)
@@ -0,0 +1,480 @@
+# ================================================================
+# TenderZen — Workload-matrix
+# Backend/app/services/workload_matrix.py
+# Versie: 1.2
+# ================================================================
+#
+# WIJZIGINGEN v1.2:
+# - venster / dekt(): de matrix weet welke periode ze volledig bevat.
+#   Buiten het venster (ver verleden, > 3 jaar vooruit) valt
+#   BackplanningService terug op de RPC's; _kolom begrenst daar en
+#   zou anders stil te lage tellingen geven.
+#
+# WIJZIGINGEN v1.1:
+# - Matrix-breedte begrensd tot een venster rond vandaag
+#   (WORKLOAD_DAGEN_TERUG / WORKLOAD_DAGEN_VOORUIT); een taak met een
+#   verschreven datum (bijv. 2099) blaast de matrix niet meer op.
+# - WORKLOAD_MAX_DAGEN: maximale periode voor dag_matrix-queries
+#   (endpoints geven 400 daarboven).
+# - per_week zonder Python-loop per kolom (weekgrenzen via ordinals).
+#
+# BackplanningService.get_workload en _check_workload deden per
+# aanroep een RPC (get_workload_for_users / get_workload_per_dag) en
+# leverden alleen een telling per week of per dag op, met een vaste
+# drempel van 3.
+#
+# WorkloadMatrix laadt de planning_taken van een bureau één keer en
+# houdt een NumPy-matrix bezetting[user, dag] bij (aantal taken per
+# persoon per kalenderdag). Daarop zijn in één vectoroperatie te doen:
+#
+#   som(user_ids, van, tot)        → taken per persoon in een periode
+#   per_week(user_ids, van, tot)   → { uid: { "2026-W07": n } }
+#   pieken(drempel, ...)           → dagen waarop iemand ≥ drempel zit
+#   zonder_tenders(ids)            → matrix zonder de taken van tenders
+#   met_planning(planning, tender) → "what-if": voorgestelde planning
+#                                    erbij opgeteld
+#   conflicten(planning, ...)      → workload-warnings (zelfde formaat
+#                                    als BackplanningService)
+#
+# Elke taak wordt ook los bewaard (user-index, dag-ordinal, tender-
+# index), zodat tenders eruit gehaald of vervangen kunnen worden zonder
+# opnieuw te laden. Een matrix is na opbouw read-only; zonder_tenders
+# en met_planning geven een nieuwe matrix terug.
+#
+# Per bureau per proces gecached (TTL); invalidate_workload_matrix()
+# wordt aangeroepen vanuit invalidate_agenda_bureau(), dus elke
+# schrijfactie op planning_taken maakt de matrix ongeldig.
+# ================================================================
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+import logging
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Venster rond vandaag waarbinnen taken in de matrix komen
+WORKLOAD_DAGEN_TERUG = 90
+WORKLOAD_DAGEN_VOORUIT = 3 * 366
+
+# Maximale periode (dagen) per workload-query vanuit de API
+WORKLOAD_MAX_DAGEN = 366
+
+WORKLOAD_CACHE_TTL_SECONDS = 120
+
+# Paginagrootte bij het laden (PostgREST max-rows)
+WORKLOAD_PAGINA = 1000
+
+
+class WorkloadMatrix:
+    """Bezetting (aantal taken) per persoon per kalenderdag voor één bureau."""
+
+    def __init__(
+        self,
+        user_ids: List[str],
+        taak_user: np.ndarray,
+        taak_dag: np.ndarray,
+        taak_tender: np.ndarray,
+        tender_ids: List[Optional[str]]
+    ):
+        """
+        Args:
+            user_ids: rij-volgorde van de matrix
+            taak_user: per taak de index in user_ids
+            taak_dag: per taak de datum als ordinal (date.toordinal())
+            taak_tender: per taak de index in tender_ids
+            tender_ids: tender per index (None = onbekend / voorstel)
+        """
+        self.user_ids = list(user_ids)
+        self._index = {uid: i for i, uid in enumerate(self.user_ids)}
+        self.tender_ids = list(tender_ids)
+        self._tender_index = {tid: i for i, tid in enumerate(self.tender_ids)}
+
+        self._taak_user = np.asarray(taak_user, dtype=np.int32)
+        self._taak_dag = np.asarray(taak_dag, dtype=np.int64)
+        self._taak_tender = np.asarray(taak_tender, dtype=np.int32)
+
+        # Alleen taken binnen het venster rond vandaag (begrenst de breedte)
+        vandaag = date.today().toordinal()
+        self.venster = (vandaag - WORKLOAD_DAGEN_TERUG, vandaag + WORKLOAD_DAGEN_VOORUIT)
+        binnen = (
+            (self._taak_dag >= self.venster[0])
+            & (self._taak_dag <= self.venster[1])
+        )
+        if not binnen.all():
+            self._taak_user = self._taak_user[binnen]
+            self._taak_dag = self._taak_dag[binnen]
+            self._taak_tender = self._taak_tender[binnen]
+
+        if self._taak_dag.size:
+            self.start = int(self._taak_dag.min())
+            self.dagen = int(self._taak_dag.max()) - self.start + 1
+        else:
+            self.start = date.today().toordinal()
+            self.dagen = 1
+
+        self.bezetting = np.zeros((len(self.user_ids), self.dagen), dtype=np.int32)
+        if self._taak_dag.size:
+            np.add.at(self.bezetting, (self._taak_user, self._taak_dag - self.start), 1)
+
+        # Cumulatieve som per rij (met voorloop-nul) voor O(1) periode-sommen
+        self._cum = np.zeros((len(self.user_ids), self.dagen + 1), dtype=np.int64)
+        np.cumsum(self.bezetting, axis=1, out=self._cum[:, 1:])
+
+    # ──────────────────────────────────────────────────────────────
+    # OPBOUW
+    # ──────────────────────────────────────────────────────────────
+
+    @classmethod
+    def uit_taken(cls, taken: Iterable[dict]) -> "WorkloadMatrix":
+        """
+        Bouw een matrix uit planning_taken-rijen
+        ({tender_id, datum, toegewezen_aan: [user_id, ...]}).
+        Een taak met meerdere personen telt voor elk van hen.
+        """
+        user_ids: List[str] = []
+        user_index: Dict[str, int] = {}
+        tender_ids: List[Optional[str]] = []
+        tender_index: Dict[Optional[str], int] = {}
+        users, dagen, tenders = [], [], []
+
+        for taak in taken:
+            ordinal = _ordinal(taak.get('datum'))
+            toegewezen = taak.get('toegewezen_aan')
+            if ordinal is None or not isinstance(toegewezen, list):
+                continue
+            tid = taak.get('tender_id')
+            if tid not in tender_index:
+                tender_index[tid] = len(tender_ids)
+                tender_ids.append(tid)
+            for uid in toegewezen:
+                if not isinstance(uid, str) or not uid:
+                    continue
+                if uid not in user_index:
+                    user_index[uid] = len(user_ids)
+                    user_ids.append(uid)
+                users.append(user_index[uid])
+                dagen.append(ordinal)
+                tenders.append(tender_index[tid])
+
+        return cls(user_ids, np.array(users), np.array(dagen), np.array(tenders), tender_ids)
+
+    def zonder_tenders(self, tender_ids: Iterable[str]) -> "WorkloadMatrix":
+        """Nieuwe matrix zonder de taken van de opgegeven tenders."""
+        indices = [self._tender_index[t] for t in tender_ids if t in self._tender_index]
+        if not indices:
+            return self
+        behouden = ~np.isin(self._taak_tender, indices)
+        return WorkloadMatrix(
+            self.user_ids,
+            self._taak_user[behouden],
+            self._taak_dag[behouden],
+            self._taak_tender[behouden],
+            self.tender_ids
+        )
+
+    def met_planning(
+        self,
+        planning: Iterable[dict],
+        tender_id: Optional[str] = None
+    ) -> "WorkloadMatrix":
+        """
+        What-if: nieuwe matrix met een voorgestelde planning erbij.
+
+        Met tender_id worden de bestaande taken van die tender eerst
+        verwijderd (de voorgestelde planning vervangt ze).
+        """
+        basis = self.zonder_tenders([tender_id]) if tender_id else self
+        extra = WorkloadMatrix.uit_taken(
+            {**taak, 'tender_id': tender_id} for taak in planning
+        )
+        if not extra._taak_dag.size:
+            return basis
+
+        user_ids = list(basis.user_ids)
+        user_index = dict(basis._index)
+        for uid in extra.user_ids:
+            if uid not in user_index:
+                user_index[uid] = len(user_ids)
+                user_ids.append(uid)
+        tender_ids = list(basis.tender_ids)
+        if tender_id in basis._tender_index:
+            tender_idx = basis._tender_index[tender_id]
+        else:
+            tender_idx = len(tender_ids)
+            tender_ids.append(tender_id)
+
+        remap = np.array([user_index[uid] for uid in extra.user_ids], dtype=np.int32)
+        return WorkloadMatrix(
+            user_ids,
+            np.concatenate([basis._taak_user, remap[extra._taak_user]]),
+            np.concatenate([basis._taak_dag, extra._taak_dag]),
+            np.concatenate([
+                basis._taak_tender,
+                np.full(extra._taak_dag.size, tender_idx, dtype=np.int32)
+            ]),
+            tender_ids
+        )
+
+    # ──────────────────────────────────────────────────────────────
+    # QUERIES
+    # ──────────────────────────────────────────────────────────────
+
+    def _rijen(self, user_ids: Optional[Iterable[str]]) -> Tuple[List[str], np.ndarray]:
+        """(user_ids, rij-indices); onbekende users krijgen rij -1 (= leeg)."""
+        if user_ids is None:
+            return self.user_ids, np.arange(len(self.user_ids))
+        ids = list(user_ids)
+        return ids, np.array([self._index.get(uid, -1) for uid in ids], dtype=np.int64)
+
+    def dekt(self, van: date, tot: date) -> bool:
+        """True als [van, tot] volledig binnen het venster van de matrix valt."""
+        return self.venster[0] <= van.toordinal() and tot.toordinal() <= self.venster[1]
+
+    def _kolom(self, d: date) -> int:
+        """Kolom van een datum, begrensd tot [0, dagen]."""
+        return min(max(d.toordinal() - self.start, 0), self.dagen)
+
+    def dag_matrix(
+        self,
+        user_ids: Optional[Iterable[str]],
+        van: date,
+        tot: date
+    ) -> Tuple[List[str], np.ndarray]:
+        """Bezetting per dag voor [van, tot] (inclusief) → (user_ids, matrix)."""
+        ids, rijen = self._rijen(user_ids)
+        lengte = max((tot - van).days + 1, 0)
+        uit = np.zeros((len(ids), lengte), dtype=np.int32)
+        if not lengte or not len(ids):
+            return ids, uit
+
+        # Overlap tussen gevraagde periode en matrix-bereik
+        k_van, k_tot = self._kolom(van), self._kolom(tot + timedelta(days=1))
+        if k_tot > k_van:
+            offset = self.start + k_van - van.toordinal()
+            bekend = rijen >= 0
+            uit[bekend, offset:offset + (k_tot - k_van)] = \
+                self.bezetting[rijen[bekend], k_van:k_tot]
+        return ids, uit
+
+    def som(
+        self,
+        user_ids: Optional[Iterable[str]],
+        van: date,
+        tot: date
+    ) -> Dict[str, int]:
+        """Totaal aantal taken per persoon in [van, tot]."""
+        ids, rijen = self._rijen(user_ids)
+        k_van, k_tot = self._kolom(van), self._kolom(tot + timedelta(days=1))
+        totalen = np.zeros(len(ids), dtype=np.int64)
+        bekend = rijen >= 0
+        totalen[bekend] = self._cum[rijen[bekend], k_tot] - self._cum[rijen[bekend], k_van]
+        return {uid: int(n) for uid, n in zip(ids, totalen)}
+
+    def per_week(
+        self,
+        user_ids: Optional[Iterable[str]],
+        van: date,
+        tot: date
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Taken per ISO-week: { user_id: { "2026-W07": 3, ... } }.
+        Zelfde formaat als de get_workload_for_users RPC (alleen weken > 0).
+        """
+        ids, matrix = self.dag_matrix(user_ids, van, tot)
+        if not matrix.size:
+            return {}
+
+        # Weken zijn aaneengesloten blokken kolommen → reduceat per blok;
+        # een blok begint op kolom 0 en op elke maandag
+        # (ordinal 1 = maandag → weekdag = (ordinal - 1) % 7)
+        ordinals = van.toordinal() + np.arange(matrix.shape[1])
+        starts = np.flatnonzero((ordinals - 1) % 7 == 0)
+        if not starts.size or starts[0] != 0:
+            starts = np.concatenate([[0], starts])
+        labels = [
+            "{0}-W{1:02d}".format(*date.fromordinal(int(ordinals[i])).isocalendar()[:2])
+            for i in starts
+        ]
+        weken = np.add.reduceat(matrix, starts, axis=1)
+
+        workload: Dict[str, Dict[str, int]] = {}
+        for r, c in zip(*np.nonzero(weken)):
+            workload.setdefault(ids[r], {})[labels[c]] = int(weken[r, c])
+        return workload
+
+    def pieken(
+        self,
+        drempel: Optional[int] = None,
+        van: Optional[date] = None,
+        tot: Optional[date] = None,
+        user_ids: Optional[Iterable[str]] = None
+    ) -> List[dict]:
+        """Alle (persoon, dag) met bezetting ≥ drempel, hoogste eerst."""
+        drempel = settings.workload_warning_drempel if drempel is None else drempel
+        van = van or date.fromordinal(self.start)
+        tot = tot or date.fromordinal(self.start + self.dagen - 1)
+        ids, matrix = self.dag_matrix(user_ids, van, tot)
+
+        rijen, kolommen = np.nonzero(matrix >= drempel)
+        waarden = matrix[rijen, kolommen]
+        volgorde = np.argsort(-waarden, kind='stable')
+        basis = van.toordinal()
+        return [
+            {
+                'user_id': ids[rijen[i]],
+                'datum': date.fromordinal(basis + int(kolommen[i])).isoformat(),
+                'taak_count': int(waarden[i]),
+            }
+            for i in volgorde
+        ]
+
+    def bezetting_op(self, paren: Iterable[Tuple[str, str]]) -> np.ndarray:
+        """Bezetting voor een reeks (user_id, 'YYYY-MM-DD') paren, in één gather."""
+        paren = list(paren)
+        uit = np.zeros(len(paren), dtype=np.int32)
+        if not paren:
+            return uit
+        rijen = np.array([self._index.get(uid, -1) for uid, _ in paren], dtype=np.int64)
+        kolommen = np.array(
+            [(_ordinal(datum) or 0) - self.start for _, datum in paren], dtype=np.int64
+        )
+        geldig = (rijen >= 0) & (kolommen >= 0) & (kolommen < self.dagen)
+        uit[geldig] = self.bezetting[rijen[geldig], kolommen[geldig]]
+        return uit
+
+    def conflicten(
+        self,
+        planning: list,
+        exclude_tender_id: Optional[str] = None,
+        drempel: Optional[int] = None,
+        error_drempel: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Workload-warnings voor een (voorgestelde) planning: per taak het
+        aantal bestaande taken van de eerste toegewezen persoon op die dag,
+        exclusief de taken van exclude_tender_id.
+        """
+        drempel = settings.workload_warning_drempel if drempel is None else drempel
+        error_drempel = settings.workload_error_drempel if error_drempel is None else error_drempel
+        basis = self.zonder_tenders([exclude_tender_id]) if exclude_tender_id else self
+
+        taken = [
+            taak for taak in planning
+            if isinstance(taak.get('toegewezen_aan'), list) and taak['toegewezen_aan']
+        ]
+        bestaand = basis.bezetting_op((t['toegewezen_aan'][0], t['datum']) for t in taken)
+
+        return [
+            {
+                'persoon_id': taak['toegewezen_aan'][0],
+                'datum': taak['datum'],
+                'existing_count': int(n),
+                'bericht': f"User heeft al {int(n)} taken op {taak['datum']}",
+                'severity': 'error' if n >= error_drempel else 'warning'
+            }
+            for taak, n in zip(taken, bestaand)
+            if n >= drempel
+        ]
+
+    def __len__(self) -> int:
+        return int(self._taak_dag.size)
+
+
+def _ordinal(value) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+# ──────────────────────────────────────────────────────────────
+# CACHE PER BUREAU
+# ──────────────────────────────────────────────────────────────
+
+class WorkloadMatrixCache:
+    """Eén WorkloadMatrix per bureau, met TTL."""
+
+    def __init__(self, ttl_seconds: float = WORKLOAD_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, WorkloadMatrix]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenderbureau_id: str) -> Optional[WorkloadMatrix]:
+        with self._lock:
+            entry = self._entries.get(tenderbureau_id)
+            if entry is None:
+                return None
+            expires_at, matrix = entry
+            if expires_at <= time.monotonic():
+                del self._entries[tenderbureau_id]
+                return None
+            return matrix
+
+    def set(self, tenderbureau_id: str, matrix: WorkloadMatrix) -> None:
+        with self._lock:
+            self._entries[tenderbureau_id] = (time.monotonic() + self.ttl_seconds, matrix)
+
+    def invalidate(self, tenderbureau_id: Optional[str] = None) -> None:
+        with self._lock:
+            if tenderbureau_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tenderbureau_id, None)
+
+
+workload_matrix_cache = WorkloadMatrixCache()
+
+
+async def get_workload_matrix(db, tenderbureau_id: str) -> WorkloadMatrix:
+    """
+    Workload-matrix van een bureau, gecached per proces.
+
+    Laadt planning_taken vanaf WORKLOAD_DAGEN_TERUG dagen geleden in
+    pagina's; toegewezen_aan wordt lokaal uitgepakt (geen jsonb-filter
+    via PostgREST nodig).
+
+    Args:
+        db: AsyncSupabaseClient
+        tenderbureau_id: UUID van het bureau
+    """
+    matrix = workload_matrix_cache.get(tenderbureau_id)
+    if matrix is not None:
+        return matrix
+
+    vanaf = (date.today() - timedelta(days=WORKLOAD_DAGEN_TERUG)).isoformat()
+    taken: list = []
+    pagina = 0
+    while True:
+        result = await db.table('planning_taken') \
+            .select('id, tender_id, datum, toegewezen_aan') \
+            .eq('tenderbureau_id', tenderbureau_id) \
+            .gte('datum', vanaf) \
+            .order('id') \
+            .range(pagina * WORKLOAD_PAGINA, (pagina + 1) * WORKLOAD_PAGINA - 1) \
+            .execute()
+        rijen = result.data or []
+        taken.extend(rijen)
+        if len(rijen) < WORKLOAD_PAGINA:
+            break
+        pagina += 1
+
+    matrix = WorkloadMatrix.uit_taken(taken)
+    workload_matrix_cache.set(tenderbureau_id, matrix)
+    logger.info(
+        f"📊 Workload-matrix opgebouwd voor bureau {tenderbureau_id}: "
+        f"{len(matrix.user_ids)} personen × {matrix.dagen} dagen, {len(matrix)} toewijzingen"
+    )
+    return matrix
+
+
+def invalidate_workload_matrix(tenderbureau_id: Optional[str] = None) -> None:
+    """Aanroepen na wijzigingen in planning_taken. None → alle bureaus."""
+    workload_matrix_cache.invalidate(tenderbureau_id)
@@ -0,0 +1,38 @@
+-- ================================================================
+-- Migration 020: Planning voortgang RPC (agenda)
+-- TenderZen — Voer uit in Supabase SQL Editor
+-- ================================================================
+--
+-- PlanningService.get_agenda_data deed per tender een aparte
+-- planning_taken query om planning_total / planning_done te tellen.
+-- Deze functie telt alles in één GROUP BY voor een lijst tenders.
+--
+-- bureau_filter = NULL → geen bureau-filter (super-admin "Alle bureau's")
+
+CREATE OR REPLACE FUNCTION get_planning_voortgang(
+    tender_ids    UUID[],
+    bureau_filter UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    tender_id      UUID,
+    planning_total BIGINT,
+    planning_done  BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        pt.tender_id,
+        COUNT(*)::BIGINT                                   AS planning_total,
+        COUNT(*) FILTER (WHERE pt.status = 'done')::BIGINT AS planning_done
+    FROM planning_taken pt
+    WHERE pt.tender_id = ANY(tender_ids)
+      AND (bureau_filter IS NULL OR pt.tenderbureau_id = bureau_filter)
+    GROUP BY pt.tender_id;
+$$;
+
+-- Index voor de groepering (bestaat mogelijk al)
+CREATE INDEX IF NOT EXISTS idx_planning_taken_tender_status
+    ON public.planning_taken (tender_id, status);
+
+GRANT EXECUTE ON FUNCTION get_planning_voortgang TO authenticated;
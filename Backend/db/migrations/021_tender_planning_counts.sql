@@ -0,0 +1,197 @@
+-- ================================================================
+-- Migration 021: Tender planning counts (tellertabel)
+-- TenderZen — Voer uit in Supabase SQL Editor
+-- ================================================================
+--
+-- PlanningService.get_planning_counts haalde ALLE planning_taken en
+-- checklist_items rijen van een bureau op (tender_id, status) en telde
+-- in Python; get_tender_counts deed hetzelfde per tender. Voor de
+-- badges in de tenderlijst is alleen done/total per tender nodig.
+--
+-- tender_planning_counts houdt die tellingen bij, incrementeel via
+-- triggers op INSERT / UPDATE (status, tender_id of tenderbureau_id) /
+-- DELETE. Opnieuw uitvoeren is veilig (policy/triggers worden vervangen,
+-- de backfill bouwt de tabel opnieuw op).
+-- Rijen die op 0/0/0/0 uitkomen worden verwijderd, zodat de tabel
+-- alleen tenders met taken bevat (zelfde output als voorheen).
+--
+-- planning_taken.status   'done'      → planning_done
+-- checklist_items.status  'completed' → checklist_done
+
+-- ── 1. Tabel ──
+CREATE TABLE IF NOT EXISTS public.tender_planning_counts (
+    tender_id       UUID PRIMARY KEY,
+    tenderbureau_id UUID,
+    planning_done   INTEGER NOT NULL DEFAULT 0,
+    planning_total  INTEGER NOT NULL DEFAULT 0,
+    checklist_done  INTEGER NOT NULL DEFAULT 0,
+    checklist_total INTEGER NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_tender_planning_counts_bureau
+    ON public.tender_planning_counts (tenderbureau_id);
+
+ALTER TABLE public.tender_planning_counts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "bureau_toegang" ON public.tender_planning_counts;
+CREATE POLICY "bureau_toegang" ON public.tender_planning_counts
+    FOR SELECT USING (
+        tenderbureau_id IN (
+            SELECT tenderbureau_id FROM public.users WHERE id = auth.uid()
+            UNION
+            SELECT tenderbureau_id FROM public.user_bureau_access
+            WHERE user_id = auth.uid() AND is_active = TRUE
+        )
+    );
+
+-- ── 2. Delta toepassen (upsert + opruimen) ──
+CREATE OR REPLACE FUNCTION apply_tender_planning_count_delta(
+    p_tender_id       UUID,
+    p_bureau_id       UUID,
+    d_planning_done   INTEGER,
+    d_planning_total  INTEGER,
+    d_checklist_done  INTEGER,
+    d_checklist_total INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    IF p_tender_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public.tender_planning_counts AS c (
+        tender_id, tenderbureau_id,
+        planning_done, planning_total, checklist_done, checklist_total
+    )
+    VALUES (
+        p_tender_id, p_bureau_id,
+        d_planning_done, d_planning_total, d_checklist_done, d_checklist_total
+    )
+    ON CONFLICT (tender_id) DO UPDATE SET
+        tenderbureau_id = COALESCE(EXCLUDED.tenderbureau_id, c.tenderbureau_id),
+        planning_done   = c.planning_done   + EXCLUDED.planning_done,
+        planning_total  = c.planning_total  + EXCLUDED.planning_total,
+        checklist_done  = c.checklist_done  + EXCLUDED.checklist_done,
+        checklist_total = c.checklist_total + EXCLUDED.checklist_total,
+        updated_at      = NOW();
+
+    DELETE FROM public.tender_planning_counts
+    WHERE tender_id = p_tender_id
+      AND planning_total <= 0
+      AND checklist_total <= 0;
+END;
+$$;
+
+-- ── 3. Triggers ──
+-- UPDATE = oude rij eraf, nieuwe erbij. Zo komt ook een gewijzigde
+-- tenderbureau_id in de tellerrij terecht (de upsert neemt het bureau
+-- van de nieuwe rij over).
+CREATE OR REPLACE FUNCTION trg_planning_taken_counts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.tender_id IS NOT DISTINCT FROM OLD.tender_id
+       AND NEW.tenderbureau_id IS NOT DISTINCT FROM OLD.tenderbureau_id
+       AND NEW.status IS NOT DISTINCT FROM OLD.status THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_tender_planning_count_delta(
+            OLD.tender_id, OLD.tenderbureau_id,
+            -(CASE WHEN OLD.status = 'done' THEN 1 ELSE 0 END), -1, 0, 0
+        );
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_tender_planning_count_delta(
+            NEW.tender_id, NEW.tenderbureau_id,
+            (CASE WHEN NEW.status = 'done' THEN 1 ELSE 0 END), 1, 0, 0
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_checklist_items_counts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.tender_id IS NOT DISTINCT FROM OLD.tender_id
+       AND NEW.tenderbureau_id IS NOT DISTINCT FROM OLD.tenderbureau_id
+       AND NEW.status IS NOT DISTINCT FROM OLD.status THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_tender_planning_count_delta(
+            OLD.tender_id, OLD.tenderbureau_id,
+            0, 0, -(CASE WHEN OLD.status = 'completed' THEN 1 ELSE 0 END), -1
+        );
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_tender_planning_count_delta(
+            NEW.tender_id, NEW.tenderbureau_id,
+            0, 0, (CASE WHEN NEW.status = 'completed' THEN 1 ELSE 0 END), 1
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS planning_taken_counts ON public.planning_taken;
+CREATE TRIGGER planning_taken_counts
+    AFTER INSERT OR UPDATE OF status, tender_id, tenderbureau_id OR DELETE ON public.planning_taken
+    FOR EACH ROW EXECUTE FUNCTION trg_planning_taken_counts();
+
+DROP TRIGGER IF EXISTS checklist_items_counts ON public.checklist_items;
+CREATE TRIGGER checklist_items_counts
+    AFTER INSERT OR UPDATE OF status, tender_id, tenderbureau_id OR DELETE ON public.checklist_items
+    FOR EACH ROW EXECUTE FUNCTION trg_checklist_items_counts();
+
+-- ── 4. Backfill (één keer, GROUP BY over bestaande data) ──
+TRUNCATE public.tender_planning_counts;
+
+INSERT INTO public.tender_planning_counts (
+    tender_id, tenderbureau_id,
+    planning_done, planning_total, checklist_done, checklist_total
+)
+SELECT
+    tender_id,
+    (ARRAY_AGG(tenderbureau_id) FILTER (WHERE tenderbureau_id IS NOT NULL))[1],
+    SUM(planning_done)::INTEGER,
+    SUM(planning_total)::INTEGER,
+    SUM(checklist_done)::INTEGER,
+    SUM(checklist_total)::INTEGER
+FROM (
+    SELECT tender_id, tenderbureau_id,
+           CASE WHEN status = 'done' THEN 1 ELSE 0 END AS planning_done,
+           1 AS planning_total,
+           0 AS checklist_done,
+           0 AS checklist_total
+    FROM public.planning_taken
+    WHERE tender_id IS NOT NULL
+    UNION ALL
+    SELECT tender_id, tenderbureau_id,
+           0, 0,
+           CASE WHEN status = 'completed' THEN 1 ELSE 0 END,
+           1
+    FROM public.checklist_items
+    WHERE tender_id IS NOT NULL
+) t
+GROUP BY tender_id;
+
+GRANT SELECT ON public.tender_planning_counts TO authenticated;
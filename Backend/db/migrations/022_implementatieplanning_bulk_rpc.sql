@@ -0,0 +1,108 @@
+-- ================================================================
+-- Migration 022: Implementatieplanning vervangen in één transactie
+-- TenderZen — Voer uit in Supabase SQL Editor
+-- ================================================================
+--
+-- genereer_planning verwijderde de bestaande secties en voegde daarna
+-- elke sectie en elke taak met een aparte INSERT toe (~35 round-trips
+-- voor een planning van 30 taken). Faalde een insert halverwege, dan
+-- bleef een half-verwijderde / half-gevulde planning achter.
+--
+-- vervang_implementatieplanning doet verwijderen, metadata-upsert en
+-- alle inserts in één functie-aanroep = één transactie: óf de nieuwe
+-- planning staat er volledig, óf de oude is ongewijzigd.
+--
+-- p_metadata: implementatie_metadata-velden (zonder tender_id/bureau)
+-- p_secties:  [{naam, kleur, volgorde, taken: [{nummer, naam, ...}]}]
+--
+-- SECURITY INVOKER: RLS-policy "bureau_toegang" blijft gelden.
+
+CREATE OR REPLACE FUNCTION vervang_implementatieplanning(
+    p_tender_id UUID,
+    p_bureau_id UUID,
+    p_metadata  JSONB,
+    p_secties   JSONB
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+DECLARE
+    v_sectie     JSONB;
+    v_sectie_id  UUID;
+    v_secties    INTEGER := 0;
+    v_taken      INTEGER := 0;
+    v_aantal     INTEGER;
+BEGIN
+    -- Bestaande planning weg (taken via ON DELETE CASCADE)
+    DELETE FROM public.implementatie_secties WHERE tender_id = p_tender_id;
+
+    INSERT INTO public.implementatie_metadata (
+        tender_id, tenderbureau_id, projectnaam, opdrachtgever, opdrachtnemer,
+        planstart, planeinde, ai_gegenereerd, ai_gegenereerd_op, updated_at
+    )
+    VALUES (
+        p_tender_id,
+        p_bureau_id,
+        p_metadata->>'projectnaam',
+        p_metadata->>'opdrachtgever',
+        p_metadata->>'opdrachtnemer',
+        (p_metadata->>'planstart')::DATE,
+        (p_metadata->>'planeinde')::DATE,
+        COALESCE((p_metadata->>'ai_gegenereerd')::BOOLEAN, FALSE),
+        (p_metadata->>'ai_gegenereerd_op')::TIMESTAMPTZ,
+        NOW()
+    )
+    ON CONFLICT (tender_id) DO UPDATE SET
+        tenderbureau_id   = EXCLUDED.tenderbureau_id,
+        projectnaam       = EXCLUDED.projectnaam,
+        opdrachtgever     = EXCLUDED.opdrachtgever,
+        opdrachtnemer     = EXCLUDED.opdrachtnemer,
+        planstart         = EXCLUDED.planstart,
+        planeinde         = EXCLUDED.planeinde,
+        ai_gegenereerd    = EXCLUDED.ai_gegenereerd,
+        ai_gegenereerd_op = EXCLUDED.ai_gegenereerd_op,
+        updated_at        = EXCLUDED.updated_at;
+
+    FOR v_sectie IN SELECT * FROM jsonb_array_elements(COALESCE(p_secties, '[]'::JSONB))
+    LOOP
+        INSERT INTO public.implementatie_secties (tender_id, tenderbureau_id, naam, kleur, volgorde)
+        VALUES (
+            p_tender_id,
+            p_bureau_id,
+            COALESCE(v_sectie->>'naam', 'Fase'),
+            v_sectie->>'kleur',
+            COALESCE((v_sectie->>'volgorde')::INTEGER, 0)
+        )
+        RETURNING id INTO v_sectie_id;
+        v_secties := v_secties + 1;
+
+        -- Alle taken van deze sectie in één INSERT ... SELECT
+        INSERT INTO public.implementatie_taken (
+            sectie_id, tender_id, tenderbureau_id, nummer, naam, verantwoordelijke,
+            toelichting, status, startdatum, einddatum, dagen, volgorde
+        )
+        SELECT
+            v_sectie_id, p_tender_id, p_bureau_id, t.nummer, COALESCE(t.naam, 'Taak'),
+            t.verantwoordelijke, t.toelichting, COALESCE(t.status, 'open'),
+            t.startdatum, t.einddatum, t.dagen, COALESCE(t.volgorde, 0)
+        FROM jsonb_to_recordset(COALESCE(v_sectie->'taken', '[]'::JSONB)) AS t(
+            nummer            TEXT,
+            naam              TEXT,
+            verantwoordelijke TEXT,
+            toelichting       TEXT,
+            status            TEXT,
+            startdatum        DATE,
+            einddatum         DATE,
+            dagen             INTEGER,
+            volgorde          INTEGER
+        );
+        GET DIAGNOSTICS v_aantal = ROW_COUNT;
+        v_taken := v_taken + v_aantal;
+    END LOOP;
+
+    RETURN jsonb_build_object('secties', v_secties, 'taken', v_taken);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION vervang_implementatieplanning TO authenticated;
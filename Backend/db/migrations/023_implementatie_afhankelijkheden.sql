@@ -0,0 +1,40 @@
+-- ================================================================
+-- Migration 023: Afhankelijkheden tussen implementatietaken
+-- TenderZen — Voer uit in Supabase SQL Editor
+-- ================================================================
+--
+-- implementatie_taken bevat alleen start/einddatum. Voor lokaal
+-- herplannen (kritiek pad, taak verschuiven → opvolgers schuiven mee)
+-- zijn afhankelijkheden nodig.
+--
+-- type 'FS' (finish-to-start): naar_taak start op zijn vroegst
+-- lag_dagen kalenderdagen na de dag volgend op het einde van van_taak.
+-- Negatieve lag = overlap toegestaan.
+--
+-- Vervangen van de planning (genereer) verwijdert de taken en via
+-- ON DELETE CASCADE ook hun afhankelijkheden.
+
+CREATE TABLE IF NOT EXISTS public.implementatie_afhankelijkheden (
+    id              UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    tender_id       UUID NOT NULL REFERENCES public.tenders(id) ON DELETE CASCADE,
+    tenderbureau_id UUID NOT NULL REFERENCES public.tenderbureaus(id) ON DELETE CASCADE,
+    van_taak_id     UUID NOT NULL REFERENCES public.implementatie_taken(id) ON DELETE CASCADE,
+    naar_taak_id    UUID NOT NULL REFERENCES public.implementatie_taken(id) ON DELETE CASCADE,
+    type            TEXT NOT NULL DEFAULT 'FS' CHECK (type IN ('FS')),
+    lag_dagen       INTEGER NOT NULL DEFAULT 0,
+    created_at      TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (van_taak_id, naar_taak_id),
+    CHECK (van_taak_id <> naar_taak_id)
+);
+
+ALTER TABLE public.implementatie_afhankelijkheden ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "bureau_toegang" ON public.implementatie_afhankelijkheden
+    FOR ALL USING (
+        tenderbureau_id IN (
+            SELECT tenderbureau_id FROM public.users WHERE id = auth.uid()
+        )
+    );
+
+CREATE INDEX IF NOT EXISTS idx_impl_afh_tender ON public.implementatie_afhankelijkheden(tender_id);
+CREATE INDEX IF NOT EXISTS idx_impl_afh_naar   ON public.implementatie_afhankelijkheden(naar_taak_id);
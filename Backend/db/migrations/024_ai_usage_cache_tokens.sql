@@ -0,0 +1,17 @@
+-- ================================================================
+-- Migration 024: Prompt cache tokens in ai_usage_log
+-- TenderZen — Voer uit in Supabase SQL Editor
+-- ================================================================
+--
+-- De AI-documentendpoints sturen de brondocumenten van een tender als
+-- gedeelde prefix met een cache_control breakpoint mee. De API rapporteert
+-- dan naast input_tokens ook cache_creation_input_tokens (wegschrijven,
+-- 1,25× input-prijs) en cache_read_input_tokens (lezen, 0,1×).
+-- input_tokens bevat die tokens NIET; zonder deze kolommen zou het
+-- grootste deel van de input uit de log verdwijnen.
+--
+-- kosten_eur bevat voortaan ook de cache-kosten (ai_usage_logger).
+
+ALTER TABLE public.ai_usage_log
+    ADD COLUMN IF NOT EXISTS cache_write_tokens INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS cache_read_tokens  INTEGER NOT NULL DEFAULT 0;
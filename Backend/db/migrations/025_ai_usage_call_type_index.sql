@@ -0,0 +1,12 @@
+-- ================================================================
+-- Migration 025: Index voor de Claude pre-flight op ai_usage_log
+-- TenderZen — Voer uit in Supabase SQL Editor
+-- ================================================================
+--
+-- claude_preflight leest per call_type de recente calls (input- en
+-- output-tokens) om de output-grootte van een nieuwe call te voorspellen
+-- en max_tokens daarop te kiezen. Zonder index is dat een full scan van
+-- de hele log per call_type (eens per uur per worker).
+
+CREATE INDEX IF NOT EXISTS idx_ai_usage_log_call_type_aangemaakt
+    ON public.ai_usage_log (call_type, aangemaakt_op DESC);
@@ -0,0 +1,67 @@
+-- ================================================================
+-- Migration 026: Bulk back-planning vervangen in één transactie
+-- TenderZen — Voer uit in Supabase SQL Editor
+-- ================================================================
+--
+-- BackplanningService.generate_backplanning_bulk verwijderde de
+-- planning_taken / checklist_items van alle tenders in de batch en
+-- voegde daarna de nieuwe rijen in blokken van 500 toe, zonder
+-- transactie. Faalde een insert halverwege, dan hadden tenders geen
+-- (of een halve) planning meer.
+--
+-- vervang_backplanning_bulk doet delete + inserts in één functie-
+-- aanroep = één transactie: óf alle nieuwe rijen staan er, óf de oude
+-- planning is ongewijzigd.
+--
+-- p_planning / p_checklist: rijen zoals _planning_rows / _checklist_rows
+-- ze opbouwen (incl. tender_id, tenderbureau_id en status). Kolomtypes
+-- komen uit de tabellen zelf (jsonb_populate_recordset), id en overige
+-- kolommen krijgen hun default.
+--
+-- SECURITY INVOKER: RLS op planning_taken / checklist_items blijft gelden.
+
+CREATE OR REPLACE FUNCTION vervang_backplanning_bulk(
+    p_tender_ids     UUID[],
+    p_planning       JSONB,
+    p_checklist      JSONB,
+    p_met_checklist  BOOLEAN DEFAULT TRUE
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+DECLARE
+    v_planning  INTEGER := 0;
+    v_checklist INTEGER := 0;
+BEGIN
+    DELETE FROM public.planning_taken WHERE tender_id = ANY(p_tender_ids);
+
+    INSERT INTO public.planning_taken (
+        tender_id, taak_naam, beschrijving, datum, categorie, toegewezen_aan,
+        is_milestone, volgorde, status, tenderbureau_id
+    )
+    SELECT
+        r.tender_id, r.taak_naam, r.beschrijving, r.datum, r.categorie, r.toegewezen_aan,
+        r.is_milestone, r.volgorde, r.status, r.tenderbureau_id
+    FROM jsonb_populate_recordset(NULL::public.planning_taken, COALESCE(p_planning, '[]'::JSONB)) AS r;
+    GET DIAGNOSTICS v_planning = ROW_COUNT;
+
+    IF p_met_checklist THEN
+        DELETE FROM public.checklist_items WHERE tender_id = ANY(p_tender_ids);
+
+        INSERT INTO public.checklist_items (
+            tender_id, taak_naam, beschrijving, sectie, deadline, verantwoordelijke_data,
+            is_verplicht, volgorde, status, tenderbureau_id
+        )
+        SELECT
+            r.tender_id, r.taak_naam, r.beschrijving, r.sectie, r.deadline, r.verantwoordelijke_data,
+            r.is_verplicht, r.volgorde, r.status, r.tenderbureau_id
+        FROM jsonb_populate_recordset(NULL::public.checklist_items, COALESCE(p_checklist, '[]'::JSONB)) AS r;
+        GET DIAGNOSTICS v_checklist = ROW_COUNT;
+    END IF;
+
+    RETURN jsonb_build_object('planning_taken', v_planning, 'checklist_items', v_checklist);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION vervang_backplanning_bulk TO authenticated;
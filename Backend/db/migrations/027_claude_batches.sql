@@ -0,0 +1,36 @@
+-- ================================================================
+-- Migration 027: Lopende Message Batches bijhouden
+-- TenderZen — Voer uit in Supabase SQL Editor
+-- ================================================================
+--
+-- Bulk-verrijking en scan-bureau kunnen Claude-verzoeken als Message
+-- Batch indienen (app/services/claude_batches.py). De batch-id stond
+-- alleen in het geheugen van de worker: na een herstart of deploy was
+-- het resultaat (al betaald) onvindbaar.
+--
+-- Per ingediende batch één rij met de verwerker (soort) en per
+-- custom_id de context die de verwerker nodig heeft om het resultaat
+-- op te slaan. De worker die de batch afhandelt werkt bijgewerkt_op bij
+-- (hartslag); een rij met status 'lopend' zonder recente hartslag wordt
+-- door een andere worker overgenomen en afgehandeld.
+--
+-- Alleen de backend (service role) leest/schrijft: RLS aan, geen policies.
+
+CREATE TABLE IF NOT EXISTS public.claude_batches (
+    id             TEXT PRIMARY KEY,                    -- Anthropic batch-id (msgbatch_...)
+    soort          TEXT NOT NULL,                       -- verwerker: 'verrijking' | 'scan-bureau'
+    context        JSONB NOT NULL DEFAULT '{}'::JSONB,  -- {custom_id: context}
+    aantal         INTEGER NOT NULL DEFAULT 0,
+    status         TEXT NOT NULL DEFAULT 'lopend'
+                   CHECK (status IN ('lopend', 'verwerkt', 'mislukt')),
+    fout           TEXT,
+    aangemaakt_op  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    bijgewerkt_op  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    verwerkt_op    TIMESTAMPTZ
+);
+
+ALTER TABLE public.claude_batches ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS idx_claude_batches_lopend
+    ON public.claude_batches(bijgewerkt_op)
+    WHERE status = 'lopend';
@@ -0,0 +1,156 @@
+"""
+Lokale stand-in voor de Anthropic Message Batches API (offline testen).
+
+Implementeert create / retrieve / cancel / results onder /v1/messages/batches,
+genoeg voor app.services.claude_batches. Een batch staat `--vertraging`
+seconden op in_progress en is daarna klaar. Er wordt niets naar Anthropic
+gestuurd; elk verzoek krijgt als antwoord de tekst uit `--antwoord`
+(bestand) of '{"stub": true}'.
+
+Run:
+    python scripts/claude_batch_stub.py --port 8765 --vertraging 2
+    CLAUDE_BATCH_BASE_URL=http://127.0.0.1:8765 uvicorn app.main:app
+
+Vanuit Python (tests): maak_app(vertraging=0, antwoord=lambda params: "...")
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+
+STANDAARD_ANTWOORD = '{"stub": true}'
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+def maak_app(
+    vertraging: float = 2.0,
+    antwoord: Optional[Callable[[dict], str]] = None,
+    fout_elke: int = 0,
+) -> FastAPI:
+    """
+    Args:
+        vertraging: seconden tot een batch 'ended' is
+        antwoord: params → antwoordtekst (standaard STANDAARD_ANTWOORD)
+        fout_elke: elk n-de verzoek als 'errored' teruggeven (0 = nooit)
+    """
+    app = FastAPI(title="Claude batch stub")
+    batches: dict = {}
+    antwoord = antwoord or (lambda params: STANDAARD_ANTWOORD)
+
+    def _status(batch: dict, request: Request) -> dict:
+        nu = time.time()
+        if batch["geannuleerd_op"] or nu - batch["aangemaakt_op"] >= vertraging:
+            batch["klaar_op"] = batch["klaar_op"] or nu
+        klaar = batch["klaar_op"] is not None
+        tellingen = {"processing": 0, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        if klaar:
+            for r in batch["resultaten"]:
+                tellingen[r["result"]["type"]] += 1
+        else:
+            tellingen["processing"] = len(batch["resultaten"])
+        basis = str(request.base_url).rstrip("/")
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if klaar else "in_progress",
+            "request_counts": tellingen,
+            "created_at": _iso(batch["aangemaakt_op"]),
+            "expires_at": _iso(batch["aangemaakt_op"] + 24 * 3600),
+            "ended_at": _iso(batch["klaar_op"]),
+            "cancel_initiated_at": _iso(batch["geannuleerd_op"]),
+            "archived_at": None,
+            "results_url": f"{basis}/v1/messages/batches/{batch['id']}/results" if klaar else None,
+        }
+
+    def _resultaat(nr: int, verzoek: dict) -> dict:
+        params = verzoek.get("params") or {}
+        if fout_elke and nr % fout_elke == 0:
+            result = {"type": "errored", "error": {"type": "error", "error": {
+                "type": "invalid_request_error", "message": "stub: gesimuleerde fout"}}}
+        else:
+            tekst = antwoord(params)
+            invoer = len(json.dumps(params.get("messages"), ensure_ascii=False, default=str))
+            result = {"type": "succeeded", "message": {
+                "id": f"msg_stub_{uuid.uuid4().hex[:16]}",
+                "type": "message",
+                "role": "assistant",
+                "model": params.get("model", "stub"),
+                "content": [{"type": "text", "text": tekst}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": invoer // 4, "output_tokens": len(tekst) // 4},
+            }}
+        return {"custom_id": verzoek.get("custom_id"), "result": result}
+
+    def _batch(batch_id: str) -> dict:
+        batch = batches.get(batch_id)
+        if not batch:
+            raise HTTPException(status_code=404, detail={"type": "not_found_error"})
+        return batch
+
+    @app.post("/v1/messages/batches")
+    async def create(request: Request):
+        body = await request.json()
+        verzoeken = body.get("requests") or []
+        batch_id = f"msgbatch_stub_{uuid.uuid4().hex[:16]}"
+        batches[batch_id] = {
+            "id": batch_id,
+            "aangemaakt_op": time.time(),
+            "klaar_op": None,
+            "geannuleerd_op": None,
+            "resultaten": [_resultaat(i, v) for i, v in enumerate(verzoeken, 1)],
+        }
+        return _status(batches[batch_id], request)
+
+    @app.get("/v1/messages/batches/{batch_id}")
+    async def retrieve(batch_id: str, request: Request):
+        return _status(_batch(batch_id), request)
+
+    @app.post("/v1/messages/batches/{batch_id}/cancel")
+    async def cancel(batch_id: str, request: Request):
+        batch = _batch(batch_id)
+        if batch["klaar_op"] is None:
+            batch["geannuleerd_op"] = time.time()
+            for r in batch["resultaten"]:
+                r["result"] = {"type": "canceled"}
+        return _status(batch, request)
+
+    @app.get("/v1/messages/batches/{batch_id}/results")
+    async def results(batch_id: str, request: Request):
+        batch = _batch(batch_id)
+        if _status(batch, request)["processing_status"] != "ended":
+            raise HTTPException(status_code=400, detail="Batch is nog niet klaar")
+        regels = "\n".join(json.dumps(r, ensure_ascii=False) for r in batch["resultaten"])
+        return Response(content=regels + "\n", media_type="application/binary")
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Lokale Message Batches stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--vertraging", type=float, default=2.0)
+    parser.add_argument("--antwoord", help="bestand met de antwoordtekst voor elk verzoek")
+    parser.add_argument("--fout-elke", type=int, default=0)
+    args = parser.parse_args()
+
+    tekst = STANDAARD_ANTWOORD
+    if args.antwoord:
+        with open(args.antwoord, encoding="utf-8") as f:
+            tekst = f.read()
+
+    uvicorn.run(
+        maak_app(args.vertraging, lambda params: tekst, args.fout_elke),
+        host="127.0.0.1",
+        port=args.port,
+    )
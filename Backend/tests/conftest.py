@@ -0,0 +1,16 @@
+# ================================================================
+# TenderZen — pytest configuratie
+# Backend/tests/conftest.py
+# ================================================================
+#
+# Services importeren app.config (Settings) op moduleniveau; die
+# eist SUPABASE_URL / SUPABASE_SECRET_KEY / JWT_SECRET. Voor unit
+# tests volstaan dummy-waarden (er gaat geen call naar Supabase).
+# Een echte .env of omgeving gaat voor.
+# ================================================================
+
+import os
+
+os.environ.setdefault('SUPABASE_URL', 'https://test.supabase.co')
+os.environ.setdefault('SUPABASE_SECRET_KEY', 'test-secret-key')
+os.environ.setdefault('JWT_SECRET', 'test-jwt-secret')
@@ -5,20 +5,32 @@
 # ================================================================
 #
 # Unit tests voor de werkdag-berekening en planning-generatie.
+# Datums via WerkdagKalender (werkdag_kalender.py); de feestdagen
+# van de fixtures zijn de bureau-specifieke extra dagen, landelijke
+# feestdagen staan uit zodat elke test zijn eigen vrije dagen kiest.
 # Draai met: pytest tests/test_backplanning_service.py -v
 # ================================================================
 
+import asyncio
+
 import pytest
-from datetime import date
-from unittest.mock import AsyncMock, MagicMock
+from datetime import date, timedelta
+from unittest.mock import MagicMock
 
 from app.services.backplanning_service import BackplanningService
+from app.services.werkdag_kalender import WerkdagKalender
+from app.services.workload_matrix import WORKLOAD_DAGEN_TERUG, WorkloadMatrix
 
 
 # ════════════════════════════════════════════════
 # FIXTURES
 # ════════════════════════════════════════════════
 
+def maak_kalender(feestdagen=()):
+    """Kalender 2025–2027 met alleen de opgegeven vrije dagen."""
+    return WerkdagKalender(feestdagen, 2025, 2027, landelijk=False)
+
+
 @pytest.fixture
 def service():
     """BackplanningService met een mock Supabase client."""
@@ -26,6 +38,12 @@ def service():
     return BackplanningService(mock_db)
 
 
+@pytest.fixture
+def kalender():
+    """Kalender zonder feestdagen (alleen weekenden vrij)."""
+    return maak_kalender()
+
+
 @pytest.fixture
 def feestdagen_2026():
     """Nederlandse feestdagen 2026."""
@@ -111,125 +129,96 @@ def team_assignments():
     }
 
 
-@pytest.fixture
-def team_details():
-    return {
-        'user-1': {
-            'id': 'user-1',
-            'naam': 'Rick van Dam',
-            'initialen': 'RI',
-            'avatar_kleur': '#7c3aed'
-        },
-        'user-2': {
-            'id': 'user-2',
-            'naam': 'Nathalie Kuiper',
-            'initialen': 'NA',
-            'avatar_kleur': '#22c55e'
-        },
-        'user-3': {
-            'id': 'user-3',
-            'naam': 'Sarah Jansen',
-            'initialen': 'SA',
-            'avatar_kleur': '#f59e0b'
-        }
-    }
-
-
 # ════════════════════════════════════════════════
 # WERKDAG BEREKENING
 # ════════════════════════════════════════════════
 
 class TestIsWerkdag:
-    """Test _is_werkdag methode."""
+    """Test WerkdagKalender.is_werkdag."""
 
-    def test_maandag_is_werkdag(self, service):
-        assert service._is_werkdag(date(2026, 2, 9), set()) is True  # ma
+    def test_maandag_is_werkdag(self, kalender):
+        assert kalender.is_werkdag(date(2026, 2, 9)) is True  # ma
 
-    def test_vrijdag_is_werkdag(self, service):
-        assert service._is_werkdag(date(2026, 2, 13), set()) is True  # vr
+    def test_vrijdag_is_werkdag(self, kalender):
+        assert kalender.is_werkdag(date(2026, 2, 13)) is True  # vr
 
-    def test_zaterdag_is_geen_werkdag(self, service):
-        assert service._is_werkdag(date(2026, 2, 14), set()) is False  # za
+    def test_zaterdag_is_geen_werkdag(self, kalender):
+        assert kalender.is_werkdag(date(2026, 2, 14)) is False  # za
 
-    def test_zondag_is_geen_werkdag(self, service):
-        assert service._is_werkdag(date(2026, 2, 15), set()) is False  # zo
+    def test_zondag_is_geen_werkdag(self, kalender):
+        assert kalender.is_werkdag(date(2026, 2, 15)) is False  # zo
 
-    def test_feestdag_is_geen_werkdag(self, service):
-        feestdagen = {date(2026, 4, 27)}  # Koningsdag (ma)
-        assert service._is_werkdag(date(2026, 4, 27), feestdagen) is False
+    def test_feestdag_is_geen_werkdag(self):
+        kalender = maak_kalender({date(2026, 4, 27)})  # Koningsdag (ma)
+        assert kalender.is_werkdag(date(2026, 4, 27)) is False
 
-    def test_normale_dag_met_feestdagen_set(self, service):
-        feestdagen = {date(2026, 4, 27)}
-        assert service._is_werkdag(date(2026, 4, 28), feestdagen) is True  # di
+    def test_normale_dag_met_feestdagen_set(self):
+        kalender = maak_kalender({date(2026, 4, 27)})
+        assert kalender.is_werkdag(date(2026, 4, 28)) is True  # di
 
 
 class TestBerekenWerkdagTerug:
-    """Test _bereken_werkdag_terug methode."""
+    """Test _bereken_werkdag methode."""
 
-    def test_t_minus_0_werkdag(self, service):
+    def test_t_minus_0_werkdag(self, service, kalender):
         # Deadline op een vrijdag → zelfde dag
-        result = service._bereken_werkdag_terug(date(2026, 3, 13), 0, set())
+        result = service._bereken_werkdag(date(2026, 3, 13), 0, kalender)
         assert result == date(2026, 3, 13)  # vr
 
-    def test_t_minus_0_weekend(self, service):
-        # Deadline op een zondag → vorige vrijdag
-        result = service._bereken_werkdag_terug(date(2026, 3, 15), 0, set())
-        assert result == date(2026, 3, 13)  # vr
+    def test_t_minus_0_weekend(self, service, kalender):
+        # T-0 laat de deadline ongewijzigd, ook in het weekend
+        result = service._bereken_werkdag(date(2026, 3, 15), 0, kalender)
+        assert result == date(2026, 3, 15)  # zo
 
-    def test_t_minus_1(self, service):
+    def test_t_minus_1(self, service, kalender):
         # 1 werkdag terug vanaf maandag = vorige vrijdag
-        result = service._bereken_werkdag_terug(date(2026, 3, 9), 1, set())
+        result = service._bereken_werkdag(date(2026, 3, 9), 1, kalender)
         assert result == date(2026, 3, 6)  # vr
 
-    def test_t_minus_5_over_weekend(self, service):
+    def test_t_minus_5_over_weekend(self, service, kalender):
         # 5 werkdagen terug vanaf vrijdag = vorige vrijdag
-        result = service._bereken_werkdag_terug(date(2026, 3, 13), 5, set())
+        result = service._bereken_werkdag(date(2026, 3, 13), 5, kalender)
         assert result == date(2026, 3, 6)  # vr
 
     def test_t_minus_met_feestdag(self, service):
         # Koningsdag 27 apr 2026 is maandag
-        feestdagen = {date(2026, 4, 27)}
+        kalender = maak_kalender({date(2026, 4, 27)})
         # 1 werkdag terug vanaf 28 apr (di) zou 27 overslaan → 24 apr (vr)
-        result = service._bereken_werkdag_terug(
-            date(2026, 4, 28), 1, feestdagen
-        )
+        result = service._bereken_werkdag(date(2026, 4, 28), 1, kalender)
         assert result == date(2026, 4, 24)  # vr
 
-    def test_t_minus_25_typische_tender(self, service):
-        # 25 werkdagen = ~5 weken
-        deadline = date(2026, 3, 15)  # zo → wordt vr 13 mrt bij T-0
-        result = service._bereken_werkdag_terug(deadline, 25, set())
-        # 25 werkdagen terug: 5 weken × 5 werkdagen
-        assert result == date(2026, 2, 6)  # vr
+    def test_t_minus_25_typische_tender(self, service, kalender):
+        # 25 werkdagen vóór zo 15 mrt: vr 13 mrt is de eerste
+        result = service._bereken_werkdag(date(2026, 3, 15), 25, kalender)
+        # 5 weken × 5 werkdagen terug → maandag
+        assert result == date(2026, 2, 9)  # ma
 
 
 class TestBerekenWerkdagVooruit:
-    """Test _bereken_werkdag_vooruit methode."""
+    """Test _bereken_vooruit methode."""
 
-    def test_0_werkdagen_vooruit(self, service):
-        result = service._bereken_werkdag_vooruit(date(2026, 3, 9), 0, set())
+    def test_0_werkdagen_vooruit(self, service, kalender):
+        result = service._bereken_vooruit(date(2026, 3, 9), 0, kalender)
         assert result == date(2026, 3, 9)
 
-    def test_1_werkdag_vooruit(self, service):
-        result = service._bereken_werkdag_vooruit(date(2026, 3, 9), 1, set())
+    def test_1_werkdag_vooruit(self, service, kalender):
+        result = service._bereken_vooruit(date(2026, 3, 9), 1, kalender)
         assert result == date(2026, 3, 10)
 
-    def test_4_werkdagen_over_weekend(self, service):
+    def test_4_werkdagen_over_weekend(self, service, kalender):
         # ma + 4 werkdagen = vr
-        result = service._bereken_werkdag_vooruit(date(2026, 3, 9), 4, set())
+        result = service._bereken_vooruit(date(2026, 3, 9), 4, kalender)
         assert result == date(2026, 3, 13)  # vr
 
-    def test_5_werkdagen_over_weekend(self, service):
+    def test_5_werkdagen_over_weekend(self, service, kalender):
         # ma + 5 werkdagen = volgende ma
-        result = service._bereken_werkdag_vooruit(date(2026, 3, 9), 5, set())
+        result = service._bereken_vooruit(date(2026, 3, 9), 5, kalender)
         assert result == date(2026, 3, 16)  # ma
 
     def test_vooruit_met_feestdag(self, service):
-        feestdagen = {date(2026, 3, 11)}  # wo feestdag
+        kalender = maak_kalender({date(2026, 3, 11)})  # wo feestdag
         # ma + 2 werkdagen: di is ok, wo is feestdag → do
-        result = service._bereken_werkdag_vooruit(
-            date(2026, 3, 9), 2, feestdagen
-        )
+        result = service._bereken_vooruit(date(2026, 3, 9), 2, kalender)
         assert result == date(2026, 3, 12)  # do
 
 
@@ -241,13 +230,11 @@ class TestBerekenPlanning:
     """Test _bereken_planning methode."""
 
     def test_basis_planning(
-        self, service, sample_template_taken,
-        team_assignments, team_details
+        self, service, kalender, sample_template_taken, team_assignments
     ):
         deadline = date(2026, 3, 13)  # vr
         planning = service._bereken_planning(
-            deadline, sample_template_taken,
-            team_assignments, team_details, set()
+            sample_template_taken, deadline, kalender, team_assignments
         )
 
         assert len(planning) == 5
@@ -257,30 +244,27 @@ class TestBerekenPlanning:
         assert volgordes == sorted(volgordes)
 
     def test_persoon_toewijzing(
-        self, service, sample_template_taken,
-        team_assignments, team_details
+        self, service, kalender, sample_template_taken, team_assignments
     ):
         deadline = date(2026, 3, 13)
         planning = service._bereken_planning(
-            deadline, sample_template_taken,
-            team_assignments, team_details, set()
+            sample_template_taken, deadline, kalender, team_assignments
         )
 
-        # Kick-off (tendermanager) → Rick
-        assert planning[0]['toegewezen_aan']['naam'] == 'Rick van Dam'
-        # Tekstschrijven (schrijver) → Nathalie
-        assert planning[1]['toegewezen_aan']['naam'] == 'Nathalie Kuiper'
-        # Review (reviewer) → Sarah
-        assert planning[2]['toegewezen_aan']['naam'] == 'Sarah Jansen'
+        # toegewezen_aan is een array van user IDs
+        # Kick-off (tendermanager) → user-1
+        assert planning[0]['toegewezen_aan'] == ['user-1']
+        # Tekstschrijven (schrijver) → user-2
+        assert planning[1]['toegewezen_aan'] == ['user-2']
+        # Review (reviewer) → user-3
+        assert planning[2]['toegewezen_aan'] == ['user-3']
 
     def test_indienen_op_deadline(
-        self, service, sample_template_taken,
-        team_assignments, team_details
+        self, service, kalender, sample_template_taken, team_assignments
     ):
         deadline = date(2026, 3, 13)  # vr
         planning = service._bereken_planning(
-            deadline, sample_template_taken,
-            team_assignments, team_details, set()
+            sample_template_taken, deadline, kalender, team_assignments
         )
 
         # T-0 taak (Indienen) moet op de deadline vallen
@@ -289,53 +273,48 @@ class TestBerekenPlanning:
         assert indienen['datum'] == '2026-03-13'
 
     def test_duur_meerdere_werkdagen(
-        self, service, sample_template_taken,
-        team_assignments, team_details
+        self, service, kalender, sample_template_taken, team_assignments
     ):
         deadline = date(2026, 3, 13)
         planning = service._bereken_planning(
-            deadline, sample_template_taken,
-            team_assignments, team_details, set()
+            sample_template_taken, deadline, kalender, team_assignments
         )
 
-        # Tekstschrijven: duur = 5 werkdagen
+        # Tekstschrijven: T-15, duur = 5 werkdagen → eind 4 werkdagen later
         tekstschrijven = planning[1]
         assert tekstschrijven['duur_werkdagen'] == 5
-        start = date.fromisoformat(tekstschrijven['datum'])
-        eind = date.fromisoformat(tekstschrijven['eind_datum'])
-        assert eind > start
+        assert tekstschrijven['datum'] == '2026-02-20'       # vr
+        assert tekstschrijven['eind_datum'] == '2026-02-26'  # do
 
     def test_ontbrekende_rol_geen_crash(
-        self, service, sample_template_taken, team_details
+        self, service, kalender, sample_template_taken
     ):
         # Alleen tendermanager toegewezen, reviewer ontbreekt
         partial_assignments = {'tendermanager': 'user-1'}
         deadline = date(2026, 3, 13)
 
         planning = service._bereken_planning(
-            deadline, sample_template_taken,
-            partial_assignments, team_details, set()
+            sample_template_taken, deadline, kalender, partial_assignments
         )
 
-        # Moet niet crashen, reviewer taak heeft None als persoon
+        # Moet niet crashen, reviewer taak heeft niemand toegewezen
         review = planning[2]
-        assert review['toegewezen_aan'] is None
+        assert review['toegewezen_aan'] == []
 
     def test_feestdagen_worden_overgeslagen(
-        self, service, sample_template_taken,
-        team_assignments, team_details, feestdagen_2026
+        self, service, sample_template_taken, team_assignments, feestdagen_2026
     ):
+        kalender = maak_kalender(feestdagen_2026)
         # Deadline 30 april 2026 (do)
         deadline = date(2026, 4, 30)
         planning = service._bereken_planning(
-            deadline, sample_template_taken,
-            team_assignments, team_details, feestdagen_2026
+            sample_template_taken, deadline, kalender, team_assignments
         )
 
         # Alle datums moeten werkdagen zijn
         for taak in planning:
             taak_datum = date.fromisoformat(taak['datum'])
-            assert service._is_werkdag(taak_datum, feestdagen_2026), \
+            assert kalender.is_werkdag(taak_datum), \
                 f"{taak['naam']} valt op niet-werkdag {taak_datum}"
 
 
@@ -354,7 +333,7 @@ class TestBerekenMetadata:
             {'datum': '2026-03-13'}
         ]
 
-        meta = service._bereken_metadata(deadline, planning, set())
+        meta = service._bereken_metadata(planning, deadline)
 
         assert meta['eerste_taak'] == '2026-02-13'
         assert meta['laatste_taak'] == '2026-03-13'
@@ -363,20 +342,16 @@ class TestBerekenMetadata:
         assert meta['doorlooptijd_werkdagen'] > 0
 
     def test_lege_planning(self, service):
-        meta = service._bereken_metadata(date(2026, 3, 13), [], set())
+        meta = service._bereken_metadata([], date(2026, 3, 13))
         assert meta['eerste_taak'] is None
         assert meta['doorlooptijd_werkdagen'] == 0
+        assert meta['doorlooptijd_kalenderdagen'] == 0
 
-    def test_feestdagen_in_metadata(self, service, feestdagen_2026):
-        deadline = date(2026, 5, 30)
-        planning = [{'datum': '2026-04-01'}]
-
-        meta = service._bereken_metadata(deadline, planning, feestdagen_2026)
-
-        # Meerdere feestdagen vallen in april-mei 2026
-        assert len(meta['feestdagen_overgeslagen']) > 0
-        assert '2026-04-06' in meta['feestdagen_overgeslagen']  # 2e Paasdag
-        assert '2026-04-27' in meta['feestdagen_overgeslagen']  # Koningsdag
+    def test_taken_zonder_datum_tellen_niet_mee(self, service):
+        planning = [{'datum': '2026-03-02'}, {'datum': None}, {}]
+        meta = service._bereken_metadata(planning, date(2026, 3, 13))
+        assert meta['eerste_taak'] == '2026-03-02'
+        assert meta['laatste_taak'] == '2026-03-02'
 
 
 # ════════════════════════════════════════════════
@@ -391,32 +366,31 @@ class TestAttachConflicts:
             {
                 'naam': 'Test',
                 'datum': '2026-03-10',
-                'toegewezen_aan': {'id': 'user-1', 'naam': 'Rick'}
+                'toegewezen_aan': ['user-1']
             }
         ]
         warnings = [
             {
                 'persoon_id': 'user-1',
-                'persoon': 'Rick',
                 'datum': '2026-03-10',
-                'week': '2026-W11',
-                'taken_count': 5,
-                'severity': 'danger',
-                'bericht': 'Rick heeft al 5 taken op 2026-03-10'
+                'existing_count': 5,
+                'severity': 'error',
+                'bericht': 'User heeft al 5 taken op 2026-03-10'
             }
         ]
 
         service._attach_conflicts(taken, warnings)
 
         assert 'conflict' in taken[0]
-        assert taken[0]['conflict']['severity'] == 'danger'
+        assert taken[0]['conflict']['type'] == 'workload'
+        assert taken[0]['conflict']['severity'] == 'error'
 
     def test_geen_conflict_bij_andere_datum(self, service):
         taken = [
             {
                 'naam': 'Test',
                 'datum': '2026-03-11',
-                'toegewezen_aan': {'id': 'user-1', 'naam': 'Rick'}
+                'toegewezen_aan': ['user-1']
             }
         ]
         warnings = [
@@ -436,10 +410,95 @@ class TestAttachConflicts:
             {
                 'naam': 'Test',
                 'datum': '2026-03-10',
-                'toegewezen_aan': None
+                'toegewezen_aan': []
             }
         ]
         warnings = [{'persoon_id': 'user-1', 'datum': '2026-03-10'}]
 
         # Mag niet crashen
-        service._attach_conflicts(taken, warnings)
\ No newline at end of file
+        service._attach_conflicts(taken, warnings)
+        assert 'conflict' not in taken[0]
+
+
+# ════════════════════════════════════════════════
+# BULK: STATUS BEHOUDEN
+# ════════════════════════════════════════════════
+
+class TestNeemStatusOver:
+    """Test _neem_status_over (bulk back-planning opslaan)."""
+
+    def test_status_per_taaknaam_behouden(self, service):
+        nieuw = [
+            {'tender_id': 't1', 'taak_naam': 'Kick-off', 'status': 'todo'},
+            {'tender_id': 't1', 'taak_naam': 'Review', 'status': 'todo'},
+        ]
+        oud = [{'id': 'x', 'tender_id': 't1', 'taak_naam': 'Kick-off', 'status': 'done'}]
+
+        behouden = service._neem_status_over(nieuw, oud)
+
+        assert behouden == 1
+        assert nieuw[0]['status'] == 'done'
+        assert nieuw[1]['status'] == 'todo'  # nieuwe taak start op todo
+
+    def test_andere_tender_telt_niet_mee(self, service):
+        nieuw = [{'tender_id': 't2', 'taak_naam': 'Kick-off', 'status': 'todo'}]
+        oud = [{'id': 'x', 'tender_id': 't1', 'taak_naam': 'Kick-off', 'status': 'done'}]
+
+        assert service._neem_status_over(nieuw, oud) == 0
+        assert nieuw[0]['status'] == 'todo'
+
+
+# ════════════════════════════════════════════════
+# WORKLOAD: MATRIX-VENSTER
+# ════════════════════════════════════════════════
+
+class FakeRpc:
+    """db.rpc(naam, params).execute() met vaste rijen; registreert de aanroepen."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.aanroepen = []
+
+    def __call__(self, naam, params):
+        self.aanroepen.append((naam, params))
+        return self
+
+    async def execute(self):
+        return MagicMock(data=self.rows)
+
+
+class TestWorkloadVenster:
+    """get_workload: matrix binnen het venster, RPC daarbuiten."""
+
+    @pytest.fixture
+    def rpc(self, service, monkeypatch):
+        vandaag = date.today()
+        matrix = WorkloadMatrix.uit_taken([
+            {'tender_id': 't1', 'datum': vandaag.isoformat(), 'toegewezen_aan': ['u1']},
+        ])
+
+        async def fake_matrix(tenderbureau_id):
+            return matrix
+
+        monkeypatch.setattr(service, '_get_matrix', fake_matrix)
+        service.db.rpc = FakeRpc([{'user_id': 'u1', 'iso_week': '2020-W02', 'taak_count': 4}])
+        return service.db.rpc
+
+    def test_binnen_venster_uit_matrix(self, service, rpc):
+        vandaag = date.today()
+        workload = asyncio.run(service.get_workload(['u1'], vandaag, vandaag, 'bureau-1'))
+        week = '{0}-W{1:02d}'.format(*vandaag.isocalendar()[:2])
+        assert workload == {'u1': {week: 1}}
+        assert rpc.aanroepen == []
+
+    def test_verleden_via_rpc(self, service, rpc):
+        workload = asyncio.run(service.get_workload(
+            ['u1'], date(2020, 1, 6), date(2020, 1, 12), 'bureau-1'
+        ))
+        assert workload == {'u1': {'2020-W02': 4}}
+        assert rpc.aanroepen[0][0] == 'get_workload_for_users'
+
+    def test_deels_buiten_venster_via_rpc(self, service, rpc):
+        start = date.today() - timedelta(days=WORKLOAD_DAGEN_TERUG + 1)
+        asyncio.run(service.get_workload(['u1'], start, date.today(), 'bureau-1'))
+        assert len(rpc.aanroepen) == 1
@@ -0,0 +1,213 @@
+# ================================================================
+# TenderZen — Bureau-toegang Tests
+# Backend/tests/test_bureau_toegang.py
+# ================================================================
+#
+# Endpoints die uit een per-proces cache per bureau antwoorden
+# (agenda, workload-matrix, templates) moeten een via
+# ?tenderbureau_id= meegegeven bureau valideren: een cache-hit gaat
+# niet langs RLS.
+# Draai met: pytest tests/test_bureau_toegang.py -v
+# ================================================================
+
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1 import planning
+from app.core.bureau_context import ensure_bureau_access
+from app.models.planning_models import BackplanningRequest, BulkBackplanningRequest
+from app.services.agenda_cache import agenda_cache, agenda_cache_key
+
+BUREAU_A = 'aaaaaaaa-0000-0000-0000-00000000000a'
+BUREAU_B = 'bbbbbbbb-0000-0000-0000-00000000000b'
+TEMPLATE = 'cccccccc-0000-0000-0000-00000000000c'
+
+
+class FakeContext:
+    """RequestContext met vaste bureau-toegang (geen database)."""
+
+    def __init__(self, bureau_ids):
+        self.bureau_ids = list(bureau_ids)
+
+    async def get_bureau_ids(self):
+        return self.bureau_ids
+
+    async def has_bureau_access(self, bureau_id):
+        return bureau_id in self.bureau_ids
+
+
+def gebruiker(bureau_id=BUREAU_A, super_admin=False):
+    return {'id': 'user-1', 'tenderbureau_id': bureau_id, 'is_super_admin': super_admin}
+
+
+# ════════════════════════════════════════════════
+# ensure_bureau_access
+# ════════════════════════════════════════════════
+
+class TestEnsureBureauAccess:
+    """Test ensure_bureau_access."""
+
+    def test_eigen_bureau(self):
+        context = FakeContext([BUREAU_A])
+        assert asyncio.run(ensure_bureau_access(gebruiker(), BUREAU_A, context=context)) == BUREAU_A
+
+    def test_profiel_bureau_zonder_koppeling(self):
+        context = FakeContext([])
+        assert asyncio.run(ensure_bureau_access(gebruiker(), BUREAU_A, context=context)) == BUREAU_A
+
+    def test_ander_bureau_403(self):
+        context = FakeContext([BUREAU_A])
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(ensure_bureau_access(gebruiker(), BUREAU_B, context=context))
+        assert exc.value.status_code == 403
+
+    def test_super_admin(self):
+        context = FakeContext([])
+        user = gebruiker(None, super_admin=True)
+        assert asyncio.run(ensure_bureau_access(user, BUREAU_B, context=context)) == BUREAU_B
+
+    def test_geen_bureau(self):
+        assert asyncio.run(ensure_bureau_access(gebruiker(None, True), None)) is None
+
+
+# ════════════════════════════════════════════════
+# GET /planning/agenda
+# ════════════════════════════════════════════════
+
+class TestAgendaBureau:
+    """Agenda van een ander bureau mag niet uit de cache komen."""
+
+    START, END = '2026-03-09', '2026-03-15'
+
+    @pytest.fixture(autouse=True)
+    def gecachte_agenda_b(self):
+        key = agenda_cache_key(BUREAU_B, self.START, self.END, None)
+        agenda_cache.set(key, {'taken': [{'id': 'geheim'}], 'tenders': {}, 'v_bureau_team': []})
+        yield
+        agenda_cache.clear()
+
+    def _agenda(self, tenderbureau_id, user, context):
+        return asyncio.run(planning.get_agenda_data(
+            start_date=self.START,
+            end_date=self.END,
+            team_member_id=None,
+            tenderbureau_id=tenderbureau_id,
+            user=user,
+            db=None,
+            context=context,
+        ))
+
+    def test_ander_bureau_403(self):
+        with pytest.raises(HTTPException) as exc:
+            self._agenda(BUREAU_B, gebruiker(BUREAU_A), FakeContext([BUREAU_A]))
+        assert exc.value.status_code == 403
+
+    def test_gekoppeld_bureau_uit_cache(self):
+        resultaat = self._agenda(BUREAU_B, gebruiker(BUREAU_A), FakeContext([BUREAU_A, BUREAU_B]))
+        assert resultaat['data']['taken'] == [{'id': 'geheim'}]
+
+
+# ════════════════════════════════════════════════
+# GET /team/workload(-pieken)
+# ════════════════════════════════════════════════
+
+class FakeBackplanningService:
+    """Registreert of de workload (matrix) wordt geraakt."""
+
+    db = None
+
+    def __init__(self):
+        self.aangeroepen = False
+
+    async def get_workload(self, **kwargs):
+        self.aangeroepen = True
+        return {}
+
+    async def generate_backplanning(self, **kwargs):
+        self.aangeroepen = True
+        return {}
+
+    async def generate_backplanning_bulk(self, **kwargs):
+        self.aangeroepen = True
+        return {}
+
+
+class TestWorkloadBureau:
+    """Workload-matrix van een ander bureau is niet op te vragen."""
+
+    @pytest.fixture
+    def matrix_aanroepen(self, monkeypatch):
+        aanroepen = []
+
+        async def fake_matrix(db, bureau_id):
+            aanroepen.append(bureau_id)
+            raise AssertionError('matrix mag niet geladen worden')
+
+        monkeypatch.setattr(planning, 'get_workload_matrix', fake_matrix)
+        return aanroepen
+
+    def test_pieken_ander_bureau_403(self, matrix_aanroepen):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(planning.get_workload_pieken(
+                start=date(2026, 3, 9), end=date(2026, 3, 15), drempel=None, user_ids=None,
+                tenderbureau_id=BUREAU_B, current_user=gebruiker(BUREAU_A),
+                service=FakeBackplanningService(), context=FakeContext([BUREAU_A]),
+            ))
+        assert exc.value.status_code == 403
+        assert matrix_aanroepen == []
+
+    def test_workload_ander_bureau_403(self):
+        service = FakeBackplanningService()
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(planning.get_workload(
+                user_ids='user-2', start=date(2026, 3, 9), end=date(2026, 3, 15),
+                tenderbureau_id=BUREAU_B, current_user=gebruiker(BUREAU_A),
+                service=service, context=FakeContext([BUREAU_A]),
+            ))
+        assert exc.value.status_code == 403
+        assert service.aangeroepen is False
+
+
+# ════════════════════════════════════════════════
+# POST /planning/(bulk-)backplanning
+# ════════════════════════════════════════════════
+
+class TestBackplanningBureau:
+    """Templates en workload van een ander bureau komen niet uit de cache."""
+
+    def test_backplanning_ander_bureau_403(self):
+        service = FakeBackplanningService()
+        request = BackplanningRequest(
+            deadline=date(2026, 3, 15), template_id=TEMPLATE,
+            team_assignments={}, tenderbureau_id=BUREAU_B,
+        )
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(planning.generate_backplanning(
+                request=request, current_user=gebruiker(BUREAU_A),
+                service=service, context=FakeContext([BUREAU_A]),
+            ))
+        assert exc.value.status_code == 403
+        assert service.aangeroepen is False
+
+    def test_bulk_ander_bureau_403(self):
+        service = FakeBackplanningService()
+        request = BulkBackplanningRequest(template_id=TEMPLATE, tenderbureau_id=BUREAU_B)
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(planning.generate_backplanning_bulk(
+                request=request, current_user=gebruiker(BUREAU_A),
+                service=service, context=FakeContext([BUREAU_A]),
+            ))
+        assert exc.value.status_code == 403
+        assert service.aangeroepen is False
+
+    def test_bulk_eigen_bureau(self):
+        service = FakeBackplanningService()
+        request = BulkBackplanningRequest(template_id=TEMPLATE, tenderbureau_id=BUREAU_A)
+        asyncio.run(planning.generate_backplanning_bulk(
+            request=request, current_user=gebruiker(BUREAU_A),
+            service=service, context=FakeContext([BUREAU_A]),
+        ))
+        assert service.aangeroepen is True
@@ -0,0 +1,157 @@
+# ================================================================
+# TenderZen — Claude Message Batches Tests
+# Backend/tests/test_claude_batches.py
+# ================================================================
+#
+# verwerk_batch tegen de lokale stand-in server
+# (scripts/claude_batch_stub.py) via een ASGI-transport: geen netwerk,
+# geen Anthropic. Het register (claude_batches-tabel) is vervangen door
+# een lijst; de tests controleren de vertaling succeeded / errored /
+# canceled → uitkomst en de aanroep van de verwerker.
+# Draai met: pytest tests/test_claude_batches.py -v
+# ================================================================
+
+import asyncio
+
+import anthropic
+import httpx
+import pytest
+
+from app.services import claude_batches
+from scripts.claude_batch_stub import STANDAARD_ANTWOORD, maak_app
+
+SOORT = 'test'
+
+
+def verzoek(tekst='Hallo'):
+    return {
+        'model': 'claude-test',
+        'max_tokens': 16,
+        'messages': [{'role': 'user', 'content': tekst}],
+    }
+
+
+# ════════════════════════════════════════════════
+# FIXTURES
+# ════════════════════════════════════════════════
+
+@pytest.fixture
+def register(monkeypatch):
+    """Vervangt de claude_batches-tabel; registreert statuswijzigingen."""
+    log = {'geregistreerd': [], 'hartslagen': 0, 'status': {}}
+
+    async def registreer(batch_id, soort, context):
+        log['geregistreerd'].append((batch_id, soort, context))
+
+    async def hartslag(batch_id):
+        log['hartslagen'] += 1
+
+    async def markeer(batch_id, status, fout=None):
+        log['status'][batch_id] = status
+
+    monkeypatch.setattr(claude_batches, '_registreer', registreer)
+    monkeypatch.setattr(claude_batches, '_hartslag', hartslag)
+    monkeypatch.setattr(claude_batches, '_markeer', markeer)
+    monkeypatch.setattr(claude_batches, 'BATCH_POLL_MIN_SECONDEN', 0.01)
+    monkeypatch.setattr(claude_batches, 'BATCH_POLL_MAX_SECONDEN', 0.01)
+    return log
+
+
+@pytest.fixture
+def verwerker(monkeypatch):
+    """Geregistreerde verwerker die zijn aanroepen bewaart."""
+    aanroepen = []
+
+    async def verwerk(uitkomst, context):
+        aanroepen.append((uitkomst, context))
+
+    monkeypatch.setitem(claude_batches._verwerkers, SOORT, verwerk)
+    return aanroepen
+
+
+def draai(monkeypatch, app, *args, **kwargs):
+    """verwerk_batch met een batch-client die naar de stub-app gaat."""
+    async def run():
+        http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+        client = anthropic.AsyncAnthropic(
+            api_key='stub', base_url='http://stub', http_client=http_client
+        )
+        monkeypatch.setattr(claude_batches, '_batch_client', client)
+        try:
+            await claude_batches.verwerk_batch(*args, **kwargs)
+        finally:
+            await http_client.aclose()
+
+    asyncio.run(run())
+
+
+# ════════════════════════════════════════════════
+# VERWERK_BATCH
+# ════════════════════════════════════════════════
+
+class TestVerwerkBatch:
+    """Test verwerk_batch tegen maak_app."""
+
+    def test_succeeded_en_errored(self, monkeypatch, register, verwerker):
+        verzoeken = {f'bedrijf-{i}': verzoek() for i in range(1, 5)}
+        context = {cid: {'nr': i} for i, cid in enumerate(verzoeken, 1)}
+
+        draai(monkeypatch, maak_app(vertraging=0, fout_elke=2), verzoeken, SOORT, context)
+
+        assert len(verwerker) == 1
+        uitkomst, ontvangen_context = verwerker[0]
+        assert ontvangen_context == context
+        # elk 2e verzoek is errored → None
+        assert uitkomst['bedrijf-2'] is None
+        assert uitkomst['bedrijf-4'] is None
+        for cid in ('bedrijf-1', 'bedrijf-3'):
+            assert isinstance(uitkomst[cid], anthropic.types.Message)
+            assert uitkomst[cid].content[0].text == STANDAARD_ANTWOORD
+
+        batch_id, soort, geregistreerd = register['geregistreerd'][0]
+        assert soort == SOORT
+        assert geregistreerd == context
+        assert register['status'] == {batch_id: 'verwerkt'}
+
+    def test_geannuleerd_ontbreekt(self, monkeypatch, register, verwerker):
+        verzoeken = {'a': verzoek(), 'b': verzoek()}
+
+        draai(
+            monkeypatch, maak_app(vertraging=60), verzoeken, SOORT,
+            gestopt=lambda: True,
+        )
+
+        uitkomst, context = verwerker[0]
+        assert uitkomst == {}
+        assert context == {'a': {}, 'b': {}}
+
+    def test_verwerker_fout_markeert_mislukt(self, monkeypatch, register):
+        async def kapot(uitkomst, context):
+            raise RuntimeError('opslaan mislukt')
+
+        monkeypatch.setitem(claude_batches._verwerkers, SOORT, kapot)
+        draai(monkeypatch, maak_app(vertraging=0), {'a': verzoek()}, SOORT)
+
+        assert list(register['status'].values()) == ['mislukt']
+
+    def test_hartslag_tijdens_verwerker(self, monkeypatch, register):
+        monkeypatch.setattr(claude_batches, 'BATCH_HARTSLAG_INTERVAL', 0.01)
+        tijdens = []
+
+        async def traag(uitkomst, context):
+            voor = register['hartslagen']
+            await asyncio.sleep(0.1)
+            tijdens.append(register['hartslagen'] - voor)
+
+        monkeypatch.setitem(claude_batches._verwerkers, SOORT, traag)
+        draai(monkeypatch, maak_app(vertraging=0), {'a': verzoek()}, SOORT)
+
+        assert tijdens[0] > 0
+
+    def test_onbekende_soort(self, monkeypatch, register):
+        with pytest.raises(ValueError):
+            draai(monkeypatch, maak_app(vertraging=0), {'a': verzoek()}, 'onbekend')
+
+    def test_ongeldige_custom_id(self, monkeypatch, register, verwerker):
+        with pytest.raises(ValueError):
+            draai(monkeypatch, maak_app(vertraging=0), {'a/b': verzoek()}, SOORT)
@@ -0,0 +1,207 @@
+# ================================================================
+# TenderZen — Claude response cache Tests
+# Backend/tests/test_claude_cache.py
+# ================================================================
+#
+# Unit tests voor claude_cache.py: TTL-verloop en LRU-opruimen op
+# bytes (ResponseCache op een SQLite-bestand in tmp_path, met een
+# vaste klok), het cachebeleid per call_type en eenmalig() voor
+# gelijktijdige identieke calls.
+# Draai met: pytest tests/test_claude_cache.py -v
+# ================================================================
+
+import asyncio
+
+import pytest
+
+from app.services import claude_cache
+from app.services.claude_cache import (
+    CACHE_TTL,
+    CACHE_TTL_STANDAARD,
+    ResponseCache,
+    cache_sleutel,
+    cache_ttl,
+    eenmalig,
+)
+
+
+# ════════════════════════════════════════════════
+# FIXTURES
+# ════════════════════════════════════════════════
+
+class Klok:
+    """Vervangt de time-module in claude_cache (alleen time.time)."""
+
+    def __init__(self, nu=1_000_000.0):
+        self.nu = nu
+
+    def time(self):
+        return self.nu
+
+
+@pytest.fixture
+def klok(monkeypatch):
+    klok = Klok()
+    monkeypatch.setattr(claude_cache, 'time', klok)
+    return klok
+
+
+@pytest.fixture
+def cache(tmp_path, klok):
+    """Cache van 100 bytes op een tijdelijk SQLite-bestand."""
+    return ResponseCache(str(tmp_path / 'claude_cache.sqlite'), max_bytes=100)
+
+
+def sleutels(cache):
+    return {rij[0] for rij in cache._conn().execute('SELECT sleutel FROM responses')}
+
+
+# ════════════════════════════════════════════════
+# TTL
+# ════════════════════════════════════════════════
+
+class TestTTL:
+    """Test verloop van entries."""
+
+    def test_binnen_ttl(self, cache, klok):
+        cache.set('a', 'smart_import', 'antwoord', ttl=60)
+        klok.nu += 59
+        assert cache.get('a') == 'antwoord'
+
+    def test_verlopen_wordt_verwijderd(self, cache, klok):
+        cache.set('a', 'smart_import', 'antwoord', ttl=60)
+        klok.nu += 60
+        assert cache.get('a') is None
+        assert cache.status()['entries'] == 0
+
+    def test_onbekende_sleutel(self, cache):
+        assert cache.get('bestaat-niet') is None
+
+
+# ════════════════════════════════════════════════
+# LRU OP BYTES
+# ════════════════════════════════════════════════
+
+class TestRuimOp:
+    """Test _ruim_op (limiet op het totaal aantal bytes)."""
+
+    def test_lru_verwijdert_minst_recent_gebruikt(self, cache, klok):
+        for sleutel in 'abc':
+            cache.set(sleutel, 'x', sleutel * 30, ttl=3600)
+            klok.nu += 1
+        cache.get('a')          # a recenter gebruikt dan b
+        klok.nu += 1
+
+        cache.set('d', 'x', 'd' * 30, ttl=3600)   # 120 > 100 → terug naar ≤ 90
+
+        assert sleutels(cache) == {'a', 'c', 'd'}
+        assert cache.status()['bytes'] == 90
+
+    def test_verlopen_entries_eerst(self, cache, klok):
+        cache.set('oud', 'x', 'o' * 30, ttl=10)
+        cache.set('b', 'x', 'b' * 30, ttl=3600)
+        cache.set('c', 'x', 'c' * 30, ttl=3600)
+        klok.nu += 20
+
+        cache.set('d', 'x', 'd' * 30, ttl=3600)
+
+        assert sleutels(cache) == {'b', 'c', 'd'}
+
+    def test_te_groot_niet_opgeslagen(self, cache):
+        cache.set('groot', 'x', 'g' * 101, ttl=3600)
+        assert cache.get('groot') is None
+
+    def test_bytes_niet_tekens(self, cache):
+        # 'é' is 2 bytes in UTF-8
+        cache.set('a', 'x', 'é' * 40, ttl=3600)
+        assert cache.status()['bytes'] == 80
+
+
+# ════════════════════════════════════════════════
+# BELEID
+# ════════════════════════════════════════════════
+
+class TestCacheBeleid:
+    """Test cache_ttl en cache_sleutel."""
+
+    @pytest.fixture(autouse=True)
+    def cache_aan(self, monkeypatch):
+        monkeypatch.setattr(claude_cache.settings, 'claude_cache_actief', True)
+
+    def test_beleid_per_call_type(self):
+        assert cache_ttl('smart_import') == CACHE_TTL['smart_import']
+        assert cache_ttl('onbekend') == 0
+
+    def test_forceren(self):
+        assert cache_ttl('onbekend', cache=True) == CACHE_TTL_STANDAARD
+        assert cache_ttl('smart_import', cache=True) == CACHE_TTL['smart_import']
+        assert cache_ttl('smart_import', cache=False) == 0
+
+    def test_uitgeschakeld(self, monkeypatch):
+        monkeypatch.setattr(claude_cache.settings, 'claude_cache_actief', False)
+        assert cache_ttl('smart_import') == 0
+        assert cache_ttl('onbekend', cache=True) == 0
+
+    def test_sleutel_op_inhoud(self):
+        kwargs = {'model': 'm', 'max_tokens': 10, 'messages': [{'role': 'user', 'content': 'x'}]}
+        assert cache_sleutel('message', kwargs) == cache_sleutel('message', dict(kwargs))
+        assert cache_sleutel('message', kwargs) != cache_sleutel('message', {**kwargs, 'max_tokens': 11})
+        assert cache_sleutel('message', kwargs) != cache_sleutel('stream', kwargs)
+
+
+# ════════════════════════════════════════════════
+# EENMALIG
+# ════════════════════════════════════════════════
+
+class TestEenmalig:
+    """Test eenmalig (gelijktijdige identieke calls)."""
+
+    def test_gedeelde_uitvoering(self):
+        aanroepen = []
+
+        async def maak():
+            aanroepen.append(1)
+            await asyncio.sleep(0.01)
+            return {'usage': 10}
+
+        async def run():
+            return await asyncio.gather(
+                eenmalig('k', maak, gedeeld=lambda r: {**r, 'usage': 0}),
+                eenmalig('k', maak, gedeeld=lambda r: {**r, 'usage': 0}),
+            )
+
+        eerste, tweede = asyncio.run(run())
+        assert len(aanroepen) == 1
+        assert eerste == {'usage': 10}
+        assert tweede == {'usage': 0}
+        assert claude_cache._onderweg == {}
+
+    def test_wachtende_voert_zelf_uit_na_fout(self):
+        async def fout():
+            await asyncio.sleep(0.01)
+            raise RuntimeError('API-fout')
+
+        async def goed():
+            return 'antwoord'
+
+        async def run():
+            return await asyncio.gather(
+                eenmalig('k', fout), eenmalig('k', goed), return_exceptions=True
+            )
+
+        eerste, tweede = asyncio.run(run())
+        assert isinstance(eerste, RuntimeError)
+        assert tweede == 'antwoord'
+        assert claude_cache._onderweg == {}
+
+    def test_na_afloop_opnieuw_uitgevoerd(self):
+        aanroepen = []
+
+        async def maak():
+            aanroepen.append(1)
+            return len(aanroepen)
+
+        async def run():
+            return [await eenmalig('k', maak), await eenmalig('k', maak)]
+
+        assert asyncio.run(run()) == [1, 2]
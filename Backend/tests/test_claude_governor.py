@@ -0,0 +1,144 @@
+# ================================================================
+# TenderZen — ClaudeGovernor Tests
+# Backend/tests/test_claude_governor.py
+# ================================================================
+#
+# Unit tests voor de procesbrede Claude-limiet (anthropic_service.py):
+# prioriteitsbanen, de reserve voor interactief werk, FIFO binnen een
+# baan, pauzeren na een 429 en het verrekenen van de reservering.
+# De banen worden via _aanmelden / _probeer stap voor stap doorlopen,
+# zodat de tests niet van de klok afhangen.
+# Draai met: pytest tests/test_claude_governor.py -v
+# ================================================================
+
+import asyncio
+
+import pytest
+
+from app.services.anthropic_service import (
+    GOVERNOR_POLL_MAX,
+    PRIORITEIT_ACHTERGROND,
+    PRIORITEIT_INTERACTIEF,
+    ClaudeGovernor,
+    claude_prioriteit,
+)
+
+
+# ════════════════════════════════════════════════
+# FIXTURES
+# ════════════════════════════════════════════════
+
+@pytest.fixture
+def governor():
+    """60 requests/min (1 per seconde bijgevuld), ruim tokenbudget."""
+    return ClaudeGovernor(rpm=60, tpm=600_000, reserve_interactief=0.2)
+
+
+# ════════════════════════════════════════════════
+# PRIORITEITSBANEN
+# ════════════════════════════════════════════════
+
+class TestBanen:
+    """Test voorrang van interactief werk en FIFO binnen een baan."""
+
+    def test_achtergrond_wacht_op_interactief(self, governor):
+        interactief = governor._aanmelden(PRIORITEIT_INTERACTIEF)
+        achtergrond = governor._aanmelden(PRIORITEIT_ACHTERGROND)
+
+        # Capaciteit genoeg, maar er wacht een interactieve aanvraag
+        assert governor._probeer(PRIORITEIT_ACHTERGROND, achtergrond, 100) == GOVERNOR_POLL_MAX
+        assert governor._probeer(PRIORITEIT_INTERACTIEF, interactief, 100) == 0
+        assert governor._probeer(PRIORITEIT_ACHTERGROND, achtergrond, 100) == 0
+        assert governor.toegekend == {PRIORITEIT_INTERACTIEF: 1, PRIORITEIT_ACHTERGROND: 1}
+
+    def test_fifo_binnen_baan(self, governor):
+        eerste = governor._aanmelden(PRIORITEIT_ACHTERGROND)
+        tweede = governor._aanmelden(PRIORITEIT_ACHTERGROND)
+
+        assert governor._probeer(PRIORITEIT_ACHTERGROND, tweede, 100) > 0
+        assert governor._probeer(PRIORITEIT_ACHTERGROND, eerste, 100) == 0
+        assert governor._probeer(PRIORITEIT_ACHTERGROND, tweede, 100) == 0
+
+    def test_afmelden_geeft_plek_vrij(self, governor):
+        eerste = governor._aanmelden(PRIORITEIT_INTERACTIEF)
+        tweede = governor._aanmelden(PRIORITEIT_INTERACTIEF)
+        governor._afmelden(PRIORITEIT_INTERACTIEF, eerste)
+        assert governor._probeer(PRIORITEIT_INTERACTIEF, tweede, 100) == 0
+
+    def test_prioriteit_uit_context(self, governor):
+        async def run():
+            with claude_prioriteit(PRIORITEIT_ACHTERGROND):
+                await governor.acquire(100)
+            await governor.acquire(100)
+
+        asyncio.run(run())
+        assert governor.toegekend == {PRIORITEIT_INTERACTIEF: 1, PRIORITEIT_ACHTERGROND: 1}
+
+
+# ════════════════════════════════════════════════
+# RESERVE
+# ════════════════════════════════════════════════
+
+class TestReserve:
+    """Achtergrondwerk spreekt de reserve voor interactief werk nooit aan."""
+
+    def test_requests_reserve(self, governor):
+        # Reserve = 20% van 60 = 12 requests; er zijn er nog 12.5
+        governor.requests.niveau = 12.5
+        achtergrond = governor._aanmelden(PRIORITEIT_ACHTERGROND)
+        assert governor._probeer(PRIORITEIT_ACHTERGROND, achtergrond, 100) > 0
+        governor._afmelden(PRIORITEIT_ACHTERGROND, achtergrond)
+
+        interactief = governor._aanmelden(PRIORITEIT_INTERACTIEF)
+        assert governor._probeer(PRIORITEIT_INTERACTIEF, interactief, 100) == 0
+
+    def test_tokens_reserve(self):
+        governor = ClaudeGovernor(rpm=600, tpm=1000, reserve_interactief=0.2)
+        achtergrond = governor._aanmelden(PRIORITEIT_ACHTERGROND)
+        # 900 + reserve 200 > 1000
+        assert governor._probeer(PRIORITEIT_ACHTERGROND, achtergrond, 900) > 0
+        assert governor._probeer(PRIORITEIT_ACHTERGROND, achtergrond, 800) == 0
+        assert governor.tokens.niveau >= governor.reserve * governor.tokens.capaciteit
+
+    def test_begrens_tot_bucket_min_reserve(self):
+        governor = ClaudeGovernor(rpm=600, tpm=1000, reserve_interactief=0.2)
+        assert governor._begrens(5000, PRIORITEIT_ACHTERGROND) == 800
+        assert governor._begrens(5000, PRIORITEIT_INTERACTIEF) == 1000
+        assert governor._begrens(0, PRIORITEIT_INTERACTIEF) == 1
+
+
+# ════════════════════════════════════════════════
+# PAUZEREN EN VERREKENEN
+# ════════════════════════════════════════════════
+
+class TestPauzeerVerreken:
+    """Test pauzeer (na een 429) en verreken (werkelijke usage)."""
+
+    def test_pauzeer_blokkeert_ook_interactief(self, governor):
+        governor.pauzeer(30)
+        interactief = governor._aanmelden(PRIORITEIT_INTERACTIEF)
+        # 1 request/s bijgevuld: pas na ~30 s weer één request
+        assert governor._probeer(PRIORITEIT_INTERACTIEF, interactief, 100) > 29
+
+    def test_pauzeer_nul_doet_niets(self, governor):
+        governor.pauzeer(0)
+        assert governor.requests.niveau == governor.requests.capaciteit
+
+    def test_verreken_geeft_verschil_terug(self):
+        governor = ClaudeGovernor(rpm=600, tpm=600, reserve_interactief=0.2)
+        gereserveerd = governor.acquire_sync(500, PRIORITEIT_INTERACTIEF)
+        assert gereserveerd == 500
+        assert governor.tokens.niveau == pytest.approx(100, abs=1)
+
+        governor.verreken(gereserveerd, 120)
+        assert governor.tokens.niveau == pytest.approx(480, abs=1)
+
+    def test_verreken_niet_boven_capaciteit(self, governor):
+        governor.verreken(1000, 0)
+        assert governor.tokens.niveau == governor.tokens.capaciteit
+
+    def test_inactief_zonder_limiet(self):
+        governor = ClaudeGovernor(rpm=0, tpm=0)
+        assert governor.actief is False
+        assert governor.acquire_sync(10_000) == 0
+        assert asyncio.run(governor.acquire(10_000)) == 0
@@ -0,0 +1,176 @@
+# ================================================================
+# TenderZen — CompactePlanning Tests
+# Backend/tests/test_implementatie_compact.py
+# ================================================================
+#
+# Unit tests voor de compacte planning-codering van de
+# implementatieplanning-chat: kolomkeuze, de tekstweergave met korte
+# id's en de vertaling van het diff terug naar wijzigingen.
+# Draai met: pytest tests/test_implementatie_compact.py -v
+# ================================================================
+
+import pytest
+
+from app.services.implementatie_compact import (
+    KOLOMMEN_BASIS,
+    CompactePlanning,
+    kies_kolommen,
+)
+
+SECTIE_1 = '11111111-1111-1111-1111-111111111111'
+SECTIE_2 = '22222222-2222-2222-2222-222222222222'
+TAAK_1 = 'aaaaaaaa-0000-0000-0000-000000000001'
+TAAK_2 = 'aaaaaaaa-0000-0000-0000-000000000002'
+TAAK_3 = 'aaaaaaaa-0000-0000-0000-000000000003'
+
+
+# ════════════════════════════════════════════════
+# FIXTURES
+# ════════════════════════════════════════════════
+
+@pytest.fixture
+def planning():
+    return {
+        'metadata': {
+            'projectnaam': 'Implementatie | fase 1',
+            'opdrachtgever': 'Gemeente X',
+            'planstart': '2026-01-05',
+            'planeinde': '2026-03-27',
+        },
+        'secties': [
+            {
+                'id': SECTIE_1, 'naam': 'Initiatie', 'kleur': '#c7d2fe',
+                'taken': [
+                    {'id': TAAK_1, 'nummer': 'O.1', 'naam': 'Kick-off',
+                     'startdatum': '2026-01-05', 'einddatum': '2026-01-09',
+                     'status': 'open', 'toelichting': 'Met\nalle partijen'},
+                    {'id': TAAK_2, 'nummer': 'O.2', 'naam': 'Inventarisatie',
+                     'startdatum': '2026-01-12', 'einddatum': '2026-01-16'},
+                ],
+            },
+            {
+                'id': SECTIE_2, 'naam': 'Uitvoering', 'kleur': '#bbf7d0',
+                'taken': [
+                    {'id': TAAK_3, 'nummer': 'U.1', 'naam': 'Migratie',
+                     'startdatum': '2026-02-02', 'einddatum': '2026-02-13'},
+                ],
+            },
+        ],
+        'afhankelijkheden': [
+            {'van_taak_id': TAAK_1, 'naar_taak_id': TAAK_2, 'lag_dagen': 0},
+            {'van_taak_id': TAAK_2, 'naar_taak_id': TAAK_3, 'lag_dagen': 2},
+            {'van_taak_id': TAAK_1, 'naar_taak_id': 'verwijderd', 'lag_dagen': 0},
+        ],
+    }
+
+
+# ════════════════════════════════════════════════
+# KOLOMKEUZE
+# ════════════════════════════════════════════════
+
+class TestKiesKolommen:
+    """Test kies_kolommen."""
+
+    def test_alleen_basis(self):
+        assert kies_kolommen('Schuif T3 een week op') == KOLOMMEN_BASIS
+
+    def test_optionele_kolom_op_trefwoord(self):
+        kolommen = kies_kolommen('Zet de status van de kick-off op afgerond')
+        assert 'status' in kolommen
+        assert 'toelichting' not in kolommen
+
+    def test_vraag_modus_altijd_verantwoordelijke(self):
+        assert 'verantwoordelijke' in kies_kolommen('Hoe lang duurt het?', modus='vraag')
+        assert 'verantwoordelijke' not in kies_kolommen('Hoe lang duurt het?')
+
+
+# ════════════════════════════════════════════════
+# CODERING
+# ════════════════════════════════════════════════
+
+class TestCodering:
+    """Test de compacte tekstweergave."""
+
+    def test_regels(self, planning):
+        regels = CompactePlanning(planning).tekst.split('\n')
+
+        # '|' in de projectnaam mag het kolomformaat niet breken
+        assert regels[0].split('|') == ['P', 'Implementatie   fase 1', 'Gemeente X', '2026-01-05', '2026-03-27']
+        assert regels[1] == 'K|id|nummer|naam|startdatum|einddatum'
+        assert regels[2] == 'S1|Initiatie|#c7d2fe'
+        assert regels[3] == 'T1|O.1|Kick-off|2026-01-05|2026-01-09'
+        assert regels[5] == 'S2|Uitvoering|#bbf7d0'
+        assert regels[6] == 'T3|U.1|Migratie|2026-02-02|2026-02-13'
+
+    def test_afhankelijkheden_met_lag(self, planning):
+        tekst = CompactePlanning(planning).tekst
+        # afhankelijkheid naar een onbekende taak valt weg
+        assert tekst.split('\n')[-1] == 'A|T1>T2 T2>T3+2'
+
+    def test_geen_uuids_in_tekst(self, planning):
+        tekst = CompactePlanning(planning).tekst
+        for uuid in (SECTIE_1, SECTIE_2, TAAK_1, TAAK_2, TAAK_3):
+            assert uuid not in tekst
+
+    def test_optionele_kolom_zonder_regeleinden(self, planning):
+        compact = CompactePlanning(planning, KOLOMMEN_BASIS + ('toelichting',))
+        assert 'T1|O.1|Kick-off|2026-01-05|2026-01-09|Met alle partijen' in compact.tekst.split('\n')
+
+
+# ════════════════════════════════════════════════
+# DIFF → WIJZIGINGEN
+# ════════════════════════════════════════════════
+
+class TestVertaal:
+    """Test vertaal (compact diff → bestaand wijzigingen-formaat)."""
+
+    def test_taak_wijzigen_alleen_toegestane_velden(self, planning):
+        compact = CompactePlanning(planning)
+        samenvatting, wijzigingen = compact.vertaal({
+            's': 'Kick-off later',
+            'w': [['tw', 'T1', {'startdatum': '2026-01-06', 'id': 'x', 'sectie_id': 'y'}]],
+        })
+        assert samenvatting == 'Kick-off later'
+        assert wijzigingen == [
+            {'type': 'taak_wijzigen', 'taak_id': TAAK_1, 'data': {'startdatum': '2026-01-06'}}
+        ]
+
+    def test_verschuiven_beide_datums(self, planning):
+        _, wijzigingen = CompactePlanning(planning).vertaal({'w': [['tv', 'T3', -7]]})
+        assert wijzigingen == [{
+            'type': 'taak_wijzigen', 'taak_id': TAAK_3,
+            'data': {'startdatum': '2026-01-26', 'einddatum': '2026-02-06'},
+        }]
+
+    def test_onbekende_ids_overgeslagen(self, planning):
+        _, wijzigingen = CompactePlanning(planning).vertaal({
+            'w': [['tx', 'T9'], ['sv', 'S7'], ['tv', 'T1', 'veel']],
+        })
+        assert wijzigingen == []
+
+    def test_uuid_blijft_geldig(self, planning):
+        _, wijzigingen = CompactePlanning(planning).vertaal({'w': [['tx', TAAK_2]]})
+        assert wijzigingen == [{'type': 'taak_verwijderen', 'taak_id': TAAK_2}]
+
+    def test_taak_toevoegen_aan_sectie(self, planning):
+        _, wijzigingen = CompactePlanning(planning).vertaal({
+            'w': [['tt', 'S2', {'nummer': 'U.2', 'naam': 'Test', 'startdatum': '2026-02-16'}]],
+        })
+        assert wijzigingen[0]['sectie_id'] == SECTIE_2
+        assert wijzigingen[0]['data']['volgorde'] == 99
+
+    def test_sectie_toevoegen(self, planning):
+        _, wijzigingen = CompactePlanning(planning).vertaal({
+            'w': [['st', {'naam': 'Nazorg', 'taken': [{'naam': 'Evaluatie', 'x': 1}]}]],
+        })
+        data = wijzigingen[0]['data']
+        assert data['volgorde'] == 3
+        assert data['taken'] == [{'naam': 'Evaluatie', 'volgorde': 1}]
+
+    def test_oud_formaat(self, planning):
+        samenvatting, wijzigingen = CompactePlanning(planning).vertaal({
+            'samenvatting': 'Oud',
+            'wijzigingen': [{'type': 'sectie_wijzigen', 'sectie_id': 'S1', 'data': {'kleur': '#fff'}}],
+        })
+        assert samenvatting == 'Oud'
+        assert wijzigingen == [{'type': 'sectie_wijzigen', 'sectie_id': SECTIE_1, 'data': {'kleur': '#fff'}}]
@@ -0,0 +1,199 @@
+# ================================================================
+# TenderZen — ImplementatieScheduler Tests
+# Backend/tests/test_implementatie_scheduler.py
+# ================================================================
+#
+# Unit tests voor de planningsmotor van implementatieplanningen:
+# finish-to-start met lag, alleen-vooruit vs compact herplannen,
+# cyclus-detectie en het kritieke pad.
+# Draai met: pytest tests/test_implementatie_scheduler.py -v
+# ================================================================
+
+import pytest
+
+from app.services.implementatie_scheduler import (
+    CyclischeAfhankelijkheid,
+    ImplementatieScheduler,
+)
+
+
+# ════════════════════════════════════════════════
+# FIXTURES
+# ════════════════════════════════════════════════
+
+def taak(taak_id, start, einde):
+    return {'id': taak_id, 'startdatum': start, 'einddatum': einde}
+
+
+def afh(van, naar, lag=0):
+    return {'van_taak_id': van, 'naar_taak_id': naar, 'lag_dagen': lag}
+
+
+@pytest.fixture
+def keten():
+    """A (5 dagen) → B (3 dagen) → C (2 dagen), plus losse taak D."""
+    taken = [
+        taak('A', '2026-01-05', '2026-01-09'),
+        taak('B', '2026-01-05', '2026-01-07'),
+        taak('C', '2026-01-05', '2026-01-06'),
+        taak('D', '2026-01-05', '2026-01-05'),
+    ]
+    return taken, [afh('A', 'B'), afh('B', 'C')]
+
+
+# ════════════════════════════════════════════════
+# FORWARD PASS
+# ════════════════════════════════════════════════
+
+class TestPlan:
+    """Test plan (volledige forward pass)."""
+
+    def test_finish_to_start(self, keten):
+        scheduler = ImplementatieScheduler(*keten)
+        gewijzigd = scheduler.plan()
+
+        assert gewijzigd['B'] == {'startdatum': '2026-01-10', 'einddatum': '2026-01-12', 'dagen': 3}
+        assert gewijzigd['C'] == {'startdatum': '2026-01-13', 'einddatum': '2026-01-14', 'dagen': 2}
+        assert 'A' not in gewijzigd
+        assert 'D' not in gewijzigd
+
+    def test_positieve_lag(self):
+        taken = [taak('A', '2026-01-05', '2026-01-09'), taak('B', '2026-01-05', '2026-01-05')]
+        gewijzigd = ImplementatieScheduler(taken, [afh('A', 'B', 2)]).plan()
+        assert gewijzigd['B']['startdatum'] == '2026-01-12'
+
+    def test_negatieve_lag_overlapt(self):
+        # lag -2: B mag 2 dagen vóór het einde van A beginnen
+        taken = [taak('A', '2026-01-05', '2026-01-09'), taak('B', '2026-01-01', '2026-01-01')]
+        gewijzigd = ImplementatieScheduler(taken, [afh('A', 'B', -2)]).plan()
+        assert gewijzigd['B']['startdatum'] == '2026-01-08'
+
+    def test_alleen_vooruit_behoudt_speling(self):
+        taken = [taak('A', '2026-01-05', '2026-01-09'), taak('B', '2026-01-20', '2026-01-22')]
+        gewijzigd = ImplementatieScheduler(taken, [afh('A', 'B')]).plan(compact=False)
+        assert gewijzigd == {}
+
+    def test_compact_trekt_naar_voren(self):
+        taken = [taak('A', '2026-01-05', '2026-01-09'), taak('B', '2026-01-20', '2026-01-22')]
+        gewijzigd = ImplementatieScheduler(taken, [afh('A', 'B')]).plan(compact=True)
+        assert gewijzigd['B'] == {'startdatum': '2026-01-10', 'einddatum': '2026-01-12', 'dagen': 3}
+
+    def test_taak_zonder_datum_krijgt_vroegste_start(self):
+        taken = [taak('A', '2026-01-05', '2026-01-09'), {'id': 'B', 'dagen': 4}]
+        gewijzigd = ImplementatieScheduler(taken, [afh('A', 'B')]).plan()
+        assert gewijzigd['B'] == {'startdatum': '2026-01-10', 'einddatum': '2026-01-13', 'dagen': 4}
+
+    def test_afhankelijkheid_naar_verwijderde_taak_genegeerd(self):
+        taken = [taak('A', '2026-01-05', '2026-01-09')]
+        assert ImplementatieScheduler(taken, [afh('A', 'weg')]).plan() == {}
+
+
+# ════════════════════════════════════════════════
+# VERSCHUIVEN
+# ════════════════════════════════════════════════
+
+class TestVerschuif:
+    """Test verschuif / herplan_vanaf."""
+
+    def test_opvolgers_schuiven_mee(self, keten):
+        scheduler = ImplementatieScheduler(*keten)
+        scheduler.plan()
+        gewijzigd = scheduler.verschuif('A', '2026-01-12')
+
+        assert gewijzigd['A']['startdatum'] == '2026-01-12'
+        assert gewijzigd['B']['startdatum'] == '2026-01-17'
+        assert gewijzigd['C']['startdatum'] == '2026-01-20'
+        assert 'D' not in gewijzigd
+
+    def test_eerder_alleen_met_compact(self, keten):
+        scheduler = ImplementatieScheduler(*keten)
+        scheduler.plan()
+        assert set(scheduler.verschuif('A', '2026-01-01')) == {'A'}
+
+        scheduler = ImplementatieScheduler(*keten)
+        scheduler.plan()
+        gewijzigd = scheduler.verschuif('A', '2026-01-01', compact=True)
+        assert gewijzigd['B']['startdatum'] == '2026-01-06'
+        assert gewijzigd['C']['startdatum'] == '2026-01-09'
+
+    def test_start_voor_voorganger_wordt_opgeschoven(self, keten):
+        scheduler = ImplementatieScheduler(*keten)
+        scheduler.plan()
+        gewijzigd = scheduler.verschuif('B', '2026-01-06')
+        assert gewijzigd['B']['startdatum'] == '2026-01-10'
+
+    def test_nieuwe_duur(self, keten):
+        scheduler = ImplementatieScheduler(*keten)
+        scheduler.plan()
+        gewijzigd = scheduler.verschuif('A', '2026-01-05', dagen=7)
+        assert gewijzigd['A']['einddatum'] == '2026-01-11'
+        assert gewijzigd['B']['startdatum'] == '2026-01-12'
+
+    def test_onbekende_taak(self, keten):
+        with pytest.raises(KeyError):
+            ImplementatieScheduler(*keten).verschuif('X', '2026-01-05')
+
+    def test_ongeldige_datum(self, keten):
+        with pytest.raises(ValueError):
+            ImplementatieScheduler(*keten).verschuif('A', 'morgen')
+
+    def test_herplan_vanaf(self, keten):
+        taken, afhankelijkheden = keten
+        taken[0] = taak('A', '2026-01-12', '2026-01-16')
+        gewijzigd = ImplementatieScheduler(taken, afhankelijkheden).herplan_vanaf(['A'])
+        assert gewijzigd['B']['startdatum'] == '2026-01-17'
+        assert 'A' not in gewijzigd
+
+
+# ════════════════════════════════════════════════
+# CYCLI
+# ════════════════════════════════════════════════
+
+class TestCycli:
+    """Test cyclus-detectie."""
+
+    def test_cyclus_in_graaf(self):
+        taken = [taak('A', '2026-01-05', '2026-01-09'), taak('B', '2026-01-12', '2026-01-13')]
+        with pytest.raises(CyclischeAfhankelijkheid):
+            ImplementatieScheduler(taken, [afh('A', 'B'), afh('B', 'A')])
+
+    def test_cyclus_is_value_error(self):
+        assert issubclass(CyclischeAfhankelijkheid, ValueError)
+
+    def test_maakt_cyclus(self, keten):
+        scheduler = ImplementatieScheduler(*keten)
+        assert scheduler.maakt_cyclus('C', 'A') is True
+        assert scheduler.maakt_cyclus('A', 'A') is True
+        assert scheduler.maakt_cyclus('A', 'C') is False
+        assert scheduler.maakt_cyclus('D', 'A') is False
+        assert scheduler.maakt_cyclus('A', 'onbekend') is False
+
+
+# ════════════════════════════════════════════════
+# KRITIEK PAD
+# ════════════════════════════════════════════════
+
+class TestAnalyse:
+    """Test analyse (kritiek pad)."""
+
+    def test_kritiek_pad_en_speling(self, keten):
+        scheduler = ImplementatieScheduler(*keten)
+        scheduler.plan()
+        analyse = scheduler.analyse()
+
+        assert analyse['projectstart'] == '2026-01-05'
+        assert analyse['projecteinde'] == '2026-01-14'
+        assert analyse['kritiek_pad'] == ['A', 'B', 'C']
+        assert analyse['taken']['D']['kritiek'] is False
+        assert analyse['taken']['D']['speling'] == 9
+
+    def test_lag_telt_mee_in_laatste_start(self):
+        taken = [taak('A', '2026-01-05', '2026-01-09'), taak('B', '2026-01-12', '2026-01-12')]
+        scheduler = ImplementatieScheduler(taken, [afh('A', 'B', 2)])
+        analyse = scheduler.analyse()
+        assert analyse['kritiek_pad'] == ['A', 'B']
+        assert analyse['taken']['A']['laatste_einde'] == '2026-01-09'
+
+    def test_lege_planning(self):
+        analyse = ImplementatieScheduler([{'id': 'A'}]).analyse()
+        assert analyse == {'projectstart': None, 'projecteinde': None, 'kritiek_pad': [], 'taken': {}}
@@ -0,0 +1,101 @@
+# ================================================================
+# TenderZen — Nederlandse feestdagen Tests
+# Backend/tests/test_nederlandse_feestdagen.py
+# ================================================================
+#
+# Unit tests voor de lokale berekening van landelijke feestdagen
+# (Pasen en afgeleide dagen, Koningsdag, Bevrijdingsdag).
+# Draai met: pytest tests/test_nederlandse_feestdagen.py -v
+# ================================================================
+
+import pytest
+from datetime import date
+
+from app.services.nederlandse_feestdagen import (
+    koningsdag,
+    nederlandse_feestdagen,
+    pasen,
+)
+
+
+# ════════════════════════════════════════════════
+# PASEN
+# ════════════════════════════════════════════════
+
+class TestPasen:
+    """Test pasen (Meeus/Jones/Butcher)."""
+
+    @pytest.mark.parametrize('jaar, verwacht', [
+        (2000, date(2000, 4, 23)),
+        (2019, date(2019, 4, 21)),
+        (2024, date(2024, 3, 31)),   # vroeg: maart
+        (2025, date(2025, 4, 20)),
+        (2026, date(2026, 4, 5)),
+        (2038, date(2038, 4, 25)),   # laatst mogelijke datum
+    ])
+    def test_bekende_paasdata(self, jaar, verwacht):
+        assert pasen(jaar) == verwacht
+
+    def test_pasen_is_altijd_zondag(self):
+        for jaar in range(1990, 2100):
+            assert pasen(jaar).weekday() == 6, jaar
+
+    def test_afgeleide_dagen_2026(self):
+        feestdagen = nederlandse_feestdagen(2026)
+        assert feestdagen[date(2026, 4, 6)] == 'Tweede Paasdag'
+        assert feestdagen[date(2026, 5, 14)] == 'Hemelvaartsdag'
+        assert feestdagen[date(2026, 5, 24)] == 'Eerste Pinksterdag'
+        assert feestdagen[date(2026, 5, 25)] == 'Tweede Pinksterdag'
+
+
+# ════════════════════════════════════════════════
+# KONINGSDAG
+# ════════════════════════════════════════════════
+
+class TestKoningsdag:
+    """Test koningsdag."""
+
+    def test_27_april(self):
+        assert koningsdag(2026) == date(2026, 4, 27)  # ma
+
+    def test_zondag_wordt_zaterdag_ervoor(self):
+        # 27 april 2025 is een zondag
+        assert koningsdag(2025) == date(2025, 4, 26)
+
+    def test_eerste_koningsdag_2014_op_zaterdag(self):
+        assert koningsdag(2014) == date(2014, 4, 26)
+
+    def test_koninginnedag_voor_2014(self):
+        assert koningsdag(2013) == date(2013, 4, 30)
+        assert nederlandse_feestdagen(2013)[date(2013, 4, 30)] == 'Koninginnedag'
+
+
+# ════════════════════════════════════════════════
+# OPTIES
+# ════════════════════════════════════════════════
+
+class TestNederlandseFeestdagen:
+    """Test nederlandse_feestdagen (vaste dagen en opties)."""
+
+    def test_vaste_dagen(self):
+        feestdagen = nederlandse_feestdagen(2026)
+        assert date(2026, 1, 1) in feestdagen
+        assert date(2026, 12, 25) in feestdagen
+        assert date(2026, 12, 26) in feestdagen
+
+    def test_bevrijdingsdag_alleen_in_lustrumjaren(self):
+        assert date(2025, 5, 5) in nederlandse_feestdagen(2025)
+        assert date(2026, 5, 5) not in nederlandse_feestdagen(2026)
+
+    def test_bevrijdingsdag_elk_jaar(self):
+        feestdagen = nederlandse_feestdagen(2026, bevrijdingsdag_elk_jaar=True)
+        assert feestdagen[date(2026, 5, 5)] == 'Bevrijdingsdag'
+
+    def test_goede_vrijdag_alleen_op_verzoek(self):
+        assert date(2026, 4, 3) not in nederlandse_feestdagen(2026)
+        feestdagen = nederlandse_feestdagen(2026, met_goede_vrijdag=True)
+        assert feestdagen[date(2026, 4, 3)] == 'Goede Vrijdag'
+
+    def test_gesorteerd_op_datum(self):
+        datums = list(nederlandse_feestdagen(2026, True, True))
+        assert datums == sorted(datums)
@@ -0,0 +1,151 @@
+# ================================================================
+# TenderZen — WerkdagKalender Tests
+# Backend/tests/test_werkdag_kalender.py
+# ================================================================
+#
+# Unit tests voor de bisect-gebaseerde werkdag-kalender: landelijke
+# en bureau-feestdagen, de jaarwisseling, het automatisch uitbreiden
+# van het bereik en de cache per bureau.
+# Draai met: pytest tests/test_werkdag_kalender.py -v
+# ================================================================
+
+from datetime import date, timedelta
+
+from app.services.werkdag_kalender import WerkdagKalender, WerkdagKalenderCache
+
+
+def loop_terug(kalender, d, n):
+    """Referentie: dag voor dag terug (het oude gedrag)."""
+    while n > 0:
+        d -= timedelta(days=1)
+        if kalender.is_werkdag(d):
+            n -= 1
+    return d
+
+
+def loop_vooruit(kalender, d, n):
+    """Referentie: dag voor dag vooruit (het oude gedrag)."""
+    while n > 0:
+        d += timedelta(days=1)
+        if kalender.is_werkdag(d):
+            n -= 1
+    return d
+
+
+# ════════════════════════════════════════════════
+# FEESTDAGEN
+# ════════════════════════════════════════════════
+
+class TestFeestdagen:
+    """Landelijke en bureau-specifieke vrije dagen."""
+
+    def test_landelijke_feestdagen_standaard_vrij(self):
+        kalender = WerkdagKalender(set(), 2026, 2026)
+        assert kalender.is_werkdag(date(2026, 4, 27)) is False  # Koningsdag (ma)
+        assert kalender.is_werkdag(date(2026, 4, 6)) is False   # 2e Paasdag (ma)
+        assert kalender.is_werkdag(date(2026, 4, 28)) is True   # di
+
+    def test_landelijk_uit(self):
+        kalender = WerkdagKalender(set(), 2026, 2026, landelijk=False)
+        assert kalender.is_werkdag(date(2026, 4, 27)) is True
+
+    def test_bureau_feestdag(self):
+        kalender = WerkdagKalender({date(2026, 3, 11)}, 2026, 2026)
+        assert kalender.is_werkdag(date(2026, 3, 11)) is False
+        assert kalender.vooruit(date(2026, 3, 10), 1) == date(2026, 3, 12)
+
+    def test_feestdagen_buiten_opgebouwd_bereik(self):
+        # is_werkdag kent ook jaren die (nog) niet zijn opgebouwd
+        kalender = WerkdagKalender(set(), 2026, 2026)
+        assert kalender.is_werkdag(date(2030, 4, 22)) is False  # 2e Paasdag 2030
+
+
+# ════════════════════════════════════════════════
+# TERUG / VOORUIT
+# ════════════════════════════════════════════════
+
+class TestTerugVooruit:
+    """Test terug / vooruit (bisect) tegen de dag-voor-dag referentie."""
+
+    def test_nul_werkdagen_laat_datum_ongewijzigd(self):
+        kalender = WerkdagKalender(set(), 2026, 2026)
+        zondag = date(2026, 3, 15)
+        assert kalender.terug(zondag, 0) == zondag
+        assert kalender.vooruit(zondag, 0) == zondag
+
+    def test_over_de_jaarwisseling(self):
+        kalender = WerkdagKalender(set(), 2026, 2027)
+        # ma 4 jan 2027 → vr 1 jan is Nieuwjaarsdag → do 31 dec 2026
+        assert kalender.terug(date(2027, 1, 4), 1) == date(2026, 12, 31)
+        # do 24 dec 2026 → 25/26 kerst, 27 zo → ma 28 dec
+        assert kalender.vooruit(date(2026, 12, 24), 1) == date(2026, 12, 28)
+
+    def test_terug_breidt_bereik_uit(self):
+        kalender = WerkdagKalender(set(), 2026, 2026)
+        referentie = WerkdagKalender(set(), 2026, 2026)
+        resultaat = kalender.terug(date(2026, 1, 15), 400)
+        assert kalender.jaar_van < 2026
+        assert resultaat == loop_terug(referentie, date(2026, 1, 15), 400)
+
+    def test_vooruit_breidt_bereik_uit(self):
+        kalender = WerkdagKalender(set(), 2026, 2026)
+        referentie = WerkdagKalender(set(), 2026, 2026)
+        resultaat = kalender.vooruit(date(2026, 12, 1), 300)
+        assert kalender.jaar_tot > 2026
+        assert resultaat == loop_vooruit(referentie, date(2026, 12, 1), 300)
+
+    def test_datum_buiten_bereik(self):
+        kalender = WerkdagKalender(set(), 2026, 2026)
+        referentie = WerkdagKalender(set(), 2026, 2026)
+        assert kalender.terug(date(2029, 6, 3), 10) == loop_terug(referentie, date(2029, 6, 3), 10)
+
+    def test_gelijk_aan_referentie_over_een_jaar(self):
+        kalender = WerkdagKalender({date(2026, 8, 3)}, 2025, 2027)
+        d = date(2026, 1, 1)
+        for _ in range(0, 365, 7):
+            for n in (1, 3, 10):
+                assert kalender.terug(d, n) == loop_terug(kalender, d, n), (d, n)
+                assert kalender.vooruit(d, n) == loop_vooruit(kalender, d, n), (d, n)
+            d += timedelta(days=7)
+
+
+# ════════════════════════════════════════════════
+# WERKDAGEN TUSSEN
+# ════════════════════════════════════════════════
+
+class TestWerkdagenTussen:
+    """Test werkdagen_tussen (beide grenzen inclusief)."""
+
+    def test_een_week(self):
+        kalender = WerkdagKalender(set(), 2026, 2026, landelijk=False)
+        assert kalender.werkdagen_tussen(date(2026, 3, 9), date(2026, 3, 15)) == 5
+
+    def test_met_feestdag(self):
+        kalender = WerkdagKalender(set(), 2026, 2026)
+        # week van Koningsdag (ma 27 apr)
+        assert kalender.werkdagen_tussen(date(2026, 4, 27), date(2026, 5, 1)) == 4
+
+    def test_omgekeerde_periode_is_nul(self):
+        kalender = WerkdagKalender(set(), 2026, 2026)
+        assert kalender.werkdagen_tussen(date(2026, 3, 13), date(2026, 3, 9)) == 0
+
+
+# ════════════════════════════════════════════════
+# CACHE
+# ════════════════════════════════════════════════
+
+class TestWerkdagKalenderCache:
+    """Test WerkdagKalenderCache."""
+
+    def test_get_set_invalidate(self):
+        cache = WerkdagKalenderCache()
+        kalender = WerkdagKalender(set(), 2026, 2026)
+        cache.set('bureau-1', kalender)
+        assert cache.get('bureau-1') is kalender
+        cache.invalidate('bureau-1')
+        assert cache.get('bureau-1') is None
+
+    def test_verlopen_entry(self):
+        cache = WerkdagKalenderCache(ttl_seconds=0)
+        cache.set('bureau-1', WerkdagKalender(set(), 2026, 2026))
+        assert cache.get('bureau-1') is None
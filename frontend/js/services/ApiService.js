@@ -207,9 +207,10 @@ class ApiService {
      */
     async getTenders(bureauId = null) {
         try {
-            let endpoint = API_CONFIG.endpoints.tenders;
+            // Kanban/lijst tonen ook de archief-kolom → archief expliciet meenemen
+            let endpoint = `${API_CONFIG.endpoints.tenders}?include_archived=true`;
             if (bureauId !== null) {
-                endpoint += `?tenderbureau_id=${encodeURIComponent(bureauId)}`;
+                endpoint += `&tenderbureau_id=${encodeURIComponent(bureauId)}`;
                 console.log('📡 getTenders for bureau:', bureauId);
             } else {
                 console.log('📡 getTenders for ALL bureaus (super_admin)');